@@ -0,0 +1,102 @@
+"""add_report_rollup_tables
+
+Revision ID: 5c1e2d7a9b40
+Revises: 970f3a9f8211
+Create Date: 2026-10-16 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e2d7a9b40'
+down_revision: Union[str, None] = '970f3a9f8211'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('production_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stat_date', sa.Date(), nullable=False, comment='计划开始日期'),
+    sa.Column('workshop', sa.String(length=50), nullable=False, comment='车间'),
+    sa.Column('product_name', sa.String(length=100), nullable=False, comment='产品名称'),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='计划状态'),
+    sa.Column('plan_count', sa.Integer(), nullable=False, comment='计划数'),
+    sa.Column('quantity', sa.Integer(), nullable=False, comment='计划数量合计'),
+    sa.Column('progress_sum', sa.Float(), nullable=False, comment='进度合计'),
+    sa.Column('progress_count', sa.Integer(), nullable=False, comment='有进度的计划数'),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stat_date', 'workshop', 'product_name', 'status', name='uq_production_daily_rollup')
+    )
+    op.create_index(op.f('ix_production_daily_rollups_id'), 'production_daily_rollups', ['id'], unique=False)
+    op.create_index(op.f('ix_production_daily_rollups_stat_date'), 'production_daily_rollups', ['stat_date'], unique=False)
+
+    op.create_table('quality_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stat_date', sa.Date(), nullable=False, comment='检查日期'),
+    sa.Column('product_name', sa.String(length=200), nullable=False, comment='产品名称'),
+    sa.Column('result', sa.String(length=20), nullable=False, comment='检查结果'),
+    sa.Column('check_count', sa.Integer(), nullable=False, comment='检查次数'),
+    sa.Column('check_quantity', sa.Integer(), nullable=False, comment='检查数量合计'),
+    sa.Column('pass_quantity', sa.Integer(), nullable=False, comment='合格数量合计'),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stat_date', 'product_name', 'result', name='uq_quality_daily_rollup')
+    )
+    op.create_index(op.f('ix_quality_daily_rollups_id'), 'quality_daily_rollups', ['id'], unique=False)
+    op.create_index(op.f('ix_quality_daily_rollups_stat_date'), 'quality_daily_rollups', ['stat_date'], unique=False)
+
+    op.create_table('maintenance_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stat_date', sa.Date(), nullable=False, comment='维护日期'),
+    sa.Column('maintenance_type', sa.String(length=20), nullable=False, comment='维护类型'),
+    sa.Column('record_count', sa.Integer(), nullable=False, comment='维护次数'),
+    sa.Column('cost_sum', sa.Float(), nullable=False, comment='维护费用合计'),
+    sa.Column('cost_count', sa.Integer(), nullable=False, comment='有费用的维护次数'),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stat_date', 'maintenance_type', name='uq_maintenance_daily_rollup')
+    )
+    op.create_index(op.f('ix_maintenance_daily_rollups_id'), 'maintenance_daily_rollups', ['id'], unique=False)
+    op.create_index(op.f('ix_maintenance_daily_rollups_stat_date'), 'maintenance_daily_rollups', ['stat_date'], unique=False)
+
+    op.create_table('report_rollup_states',
+    sa.Column('name', sa.String(length=50), nullable=False, comment='汇总名称'),
+    sa.Column('watermark', sa.DateTime(), nullable=True, comment='水位线'),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True, comment='上次刷新完成时间'),
+    sa.Column('rows_processed', sa.Integer(), nullable=True, comment='上次刷新重算的日期数'),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    op.create_table('report_rollup_dirty_dates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rollup', sa.String(length=50), nullable=False, comment='汇总名称'),
+    sa.Column('stat_date', sa.Date(), nullable=False, comment='需要重算的日期'),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True, comment='创建时间'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_report_rollup_dirty_dates_id'), 'report_rollup_dirty_dates', ['id'], unique=False)
+    op.create_index(op.f('ix_report_rollup_dirty_dates_rollup'), 'report_rollup_dirty_dates', ['rollup'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_report_rollup_dirty_dates_rollup'), table_name='report_rollup_dirty_dates')
+    op.drop_index(op.f('ix_report_rollup_dirty_dates_id'), table_name='report_rollup_dirty_dates')
+    op.drop_table('report_rollup_dirty_dates')
+    op.drop_table('report_rollup_states')
+    op.drop_index(op.f('ix_maintenance_daily_rollups_stat_date'), table_name='maintenance_daily_rollups')
+    op.drop_index(op.f('ix_maintenance_daily_rollups_id'), table_name='maintenance_daily_rollups')
+    op.drop_table('maintenance_daily_rollups')
+    op.drop_index(op.f('ix_quality_daily_rollups_stat_date'), table_name='quality_daily_rollups')
+    op.drop_index(op.f('ix_quality_daily_rollups_id'), table_name='quality_daily_rollups')
+    op.drop_table('quality_daily_rollups')
+    op.drop_index(op.f('ix_production_daily_rollups_stat_date'), table_name='production_daily_rollups')
+    op.drop_index(op.f('ix_production_daily_rollups_id'), table_name='production_daily_rollups')
+    op.drop_table('production_daily_rollups')
@@ -17,6 +17,7 @@ from loguru import logger
 
 from ...database import get_db
 from ...models.material import BOM, BOMItem, Material
+from ...services.search_index import BOM_SEARCH
 from ...schemas.base import BaseResponse, PaginatedResponse
 from ...core.auth import get_current_user
 from ...models.user import User
@@ -144,12 +145,7 @@ async def get_bom_list(
         
         # 关键词搜索
         if keyword:
-            query = query.filter(
-                or_(
-                    BOM.bom_code.ilike(f"%{keyword}%"),
-                    BOM.product_name.ilike(f"%{keyword}%")
-                )
-            )
+            query = query.filter(BOM_SEARCH.filter(keyword))
         
         # 产品名称过滤
         if product_name:
@@ -3,9 +3,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, desc
 from app.db.database import get_db
+from app.services.stats_service import EQUIPMENT_STATS, MAINTENANCE_STATS, get_breakdown
 from app.models.equipment import Equipment, MaintenanceRecord, EquipmentStatus, MaintenanceType
 from app.models.user import User
-from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams, PageInfo
+from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams
+from app.utils.pagination import CursorError, KeysetPagination, build_page_info, count_total
 from app.api.endpoints.auth import get_current_user, get_current_active_user
 from app.schemas.equipment import (
     EquipmentCreate, EquipmentUpdate, EquipmentQuery, EquipmentDetail,
@@ -93,23 +95,31 @@ async def get_equipment_list(
         if filters:
             base_query = base_query.filter(and_(*filters))
         
-        # 获取总数
-        total = base_query.count()
-        
-        # 排序
-        if query.sort_field:
-            sort_column = getattr(Equipment, query.sort_field, None)
-            if sort_column:
-                if query.sort_order == "desc":
-                    base_query = base_query.order_by(sort_column.desc())
-                else:
-                    base_query = base_query.order_by(sort_column.asc())
-        else:
-            base_query = base_query.order_by(Equipment.created_at.desc())
+        # 获取总数（按筛选条件短时缓存，写入提交后失效；游标分页时可不统计）
+        total = None
+        if query.cursor is None or query.with_total:
+            total = await count_total(db, base_query, "equipment")
         
-        # 分页
-        offset = (query.page - 1) * query.page_size
-        equipment_list = base_query.offset(offset).limit(query.page_size).all()
+        if query.cursor is not None:
+            # 游标分页：按 (排序字段, id) 从上一页最后一行之后取数，与翻页深度无关
+            keyset = KeysetPagination(Equipment, query.sort_field, query.sort_order, query.page_size)
+            equipment_list, next_cursor = keyset.page(keyset.apply(base_query, query.cursor).all())
+        else:
+            # 排序
+            if query.sort_field:
+                sort_column = getattr(Equipment, query.sort_field, None)
+                if sort_column:
+                    if query.sort_order == "desc":
+                        base_query = base_query.order_by(sort_column.desc())
+                    else:
+                        base_query = base_query.order_by(sort_column.asc())
+            else:
+                base_query = base_query.order_by(Equipment.created_at.desc())
+        
+            # 分页
+            offset = (query.page - 1) * query.page_size
+            equipment_list = base_query.offset(offset).limit(query.page_size).all()
+            next_cursor = None
         
         # 转换为响应模型
         equipment_details = []
@@ -179,15 +189,7 @@ async def get_equipment_list(
             equipment_details.append(equipment_detail)
         
         # 分页信息
-        total_pages = (total + query.page_size - 1) // query.page_size
-        page_info = PageInfo(
-            page=query.page,
-            page_size=query.page_size,
-            total=total,
-            total_pages=total_pages,
-            has_next=query.page < total_pages,
-            has_prev=query.page > 1
-        )
+        page_info = build_page_info(query, total, next_cursor)
         
         return PagedResponseModel(
             code=200,
@@ -196,6 +198,8 @@ async def get_equipment_list(
             page_info=page_info
         )
         
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"获取设备列表异常: {e}")
         raise HTTPException(
@@ -539,55 +543,13 @@ async def get_equipment_stats(
 ):
     """获取设备统计信息"""
     try:
-        # 总设备数
-        total_equipment = db.query(Equipment).count()
-        
-        # 各状态设备数
-        normal_equipment = db.query(Equipment).filter(Equipment.status == EquipmentStatus.NORMAL).count()
-        running_equipment = db.query(Equipment).filter(Equipment.status == EquipmentStatus.RUNNING).count()
-        maintenance_equipment = db.query(Equipment).filter(Equipment.status == EquipmentStatus.MAINTENANCE).count()
-        fault_equipment = db.query(Equipment).filter(Equipment.status == EquipmentStatus.FAULT).count()
-        retired_equipment = db.query(Equipment).filter(Equipment.status == EquipmentStatus.RETIRED).count()
-        
-        # 需要维护的设备（下次维护日期在7天内）
-        maintenance_due_date = datetime.now().date() + timedelta(days=7)
-        maintenance_due_equipment = db.query(Equipment).filter(
-            and_(
-                Equipment.next_maintenance_date <= maintenance_due_date,
-                Equipment.status != EquipmentStatus.RETIRED
-            )
-        ).count()
-        
-        # 保修即将到期的设备（保修到期日期在30天内）
-        warranty_expiry_date = datetime.now().date() + timedelta(days=30)
-        warranty_expiring_equipment = db.query(Equipment).filter(
-            and_(
-                Equipment.warranty_expiry <= warranty_expiry_date,
-                Equipment.warranty_expiry >= datetime.now().date(),
-                Equipment.status != EquipmentStatus.RETIRED
-            )
-        ).count()
-        
-        # 总设备价值
-        total_value_result = db.query(db.func.sum(Equipment.purchase_price)).filter(
-            Equipment.status != EquipmentStatus.RETIRED
-        ).scalar()
-        total_equipment_value = float(total_value_result) if total_value_result else 0.0
-        
-        # 本月新增设备
-        current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_new_equipment = db.query(Equipment).filter(Equipment.created_at >= current_month_start).count()
-        
-        # 本月维护记录
-        monthly_maintenance_records = db.query(MaintenanceRecord).filter(
-            MaintenanceRecord.maintenance_date >= current_month_start.date()
-        ).count()
+        equipment = await get_breakdown(db, EQUIPMENT_STATS)
+        maintenance = await get_breakdown(db, MAINTENANCE_STATS)
         
-        # 本月维护费用
-        monthly_maintenance_cost_result = db.query(db.func.sum(MaintenanceRecord.cost)).filter(
-            MaintenanceRecord.maintenance_date >= current_month_start.date()
-        ).scalar()
-        monthly_maintenance_cost = float(monthly_maintenance_cost_result) if monthly_maintenance_cost_result else 0.0
+        total_equipment = equipment.count()
+        running_equipment = equipment.count(EquipmentStatus.RUNNING)
+        fault_equipment = equipment.count(EquipmentStatus.BREAKDOWN)
+        retired_equipment = equipment.count(EquipmentStatus.RETIRED)
         
         # 设备利用率（运行设备数 / 可用设备数）
         available_equipment = total_equipment - retired_equipment - fault_equipment
@@ -595,18 +557,19 @@ async def get_equipment_stats(
         
         equipment_stats = EquipmentStats(
             total_equipment=total_equipment,
-            normal_equipment=normal_equipment,
+            normal_equipment=equipment.count(EquipmentStatus.IDLE),
             running_equipment=running_equipment,
-            maintenance_equipment=maintenance_equipment,
+            maintenance_equipment=equipment.count(EquipmentStatus.MAINTENANCE),
             fault_equipment=fault_equipment,
             retired_equipment=retired_equipment,
-            maintenance_due_equipment=maintenance_due_equipment,
-            warranty_expiring_equipment=warranty_expiring_equipment,
-            total_equipment_value=total_equipment_value,
+            # 需要维护（7天内有待执行的维护单）的设备；保修即将到期（30天内）的设备不含报废设备
+            maintenance_due_equipment=maintenance.value("due_equipment"),
+            warranty_expiring_equipment=equipment.value("warranty_expiring", exclude=[EquipmentStatus.RETIRED]),
+            total_equipment_value=float(equipment.value("value", exclude=[EquipmentStatus.RETIRED])),
             utilization_rate=round(utilization_rate, 2),
-            monthly_new_equipment=monthly_new_equipment,
-            monthly_maintenance_records=monthly_maintenance_records,
-            monthly_maintenance_cost=monthly_maintenance_cost
+            monthly_new_equipment=equipment.value("monthly_new"),
+            monthly_maintenance_records=maintenance.value("monthly"),
+            monthly_maintenance_cost=float(maintenance.value("monthly_cost"))
         )
         
         return ResponseModel(
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from io import BytesIO
@@ -18,10 +18,17 @@ from ...schemas.production_plan import ProductionPlanCreate
 from ...schemas.material import MaterialCreate
 from ...utils.excel_handler import ExcelHandler
 from ...utils.data_validator import DataValidator
+from ...utils.stream_export import EXPORT_FORMATS, MEDIA_TYPES, iter_query, open_export_stream
 
 router = APIRouter()
 
 
+def _check_export_format(file_format: str):
+    """校验导出格式"""
+    if file_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {file_format}，支持: {', '.join(EXPORT_FORMATS)}")
+
+
 @router.post("/orders/import")
 @require_permission(Permission.ORDER_WRITE)
 def import_orders(
@@ -97,48 +104,39 @@ def import_orders(
 @router.get("/orders/export")
 @require_permission(Permission.ORDER_READ)
 def export_orders(
+    format: str = Query("xlsx", description="文件格式：xlsx/csv/ndjson"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     导出订单数据
     """
+    _check_export_format(format)
     try:
-        orders = db.query(Order).all()
-        
-        # 准备数据
-        data = []
-        for order in orders:
-            data.append({
-                '订单号': order.order_number,
-                '客户名称': order.customer_name,
-                '产品名称': order.product_name,
-                '数量': order.quantity,
-                '交付日期': order.delivery_date.strftime('%Y-%m-%d') if order.delivery_date else '',
-                '优先级': order.priority,
-                '状态': order.status,
-                '备注': order.notes or '',
-                '创建时间': order.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        # 创建Excel文件
-        df = pd.DataFrame(data)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='订单数据', index=False)
-        
-        output.seek(0)
-        
-        # 返回文件
-        filename = f"orders_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return StreamingResponse(
-            BytesIO(output.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
+        # 按批读取并流式写出，不一次性加载全部订单
+        rows = iter_query(db.query(Order), lambda order: {
+            '订单号': order.order_no,
+            '客户名称': order.customer_name,
+            '产品名称': order.product_name,
+            '数量': order.quantity,
+            '交付日期': order.delivery_date.strftime('%Y-%m-%d') if order.delivery_date else '',
+            '优先级': order.priority,
+            '状态': order.status,
+            '备注': order.remark or '',
+            '创建时间': order.created_at.strftime('%Y-%m-%d %H:%M:%S') if order.created_at else ''
+        })
+        # 返回前先查询并转换第一行，之后的错误由 open_export_stream 记录日志
+        content = open_export_stream(rows, format, sheet_name='订单数据')
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+    
+    # 返回文件
+    filename = f"orders_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 
 @router.post("/production-plans/import")
@@ -212,45 +210,36 @@ def import_production_plans(
 @router.get("/production-plans/export")
 @require_permission(Permission.PRODUCTION_READ)
 def export_production_plans(
+    format: str = Query("xlsx", description="文件格式：xlsx/csv/ndjson"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     导出生产计划数据
     """
+    _check_export_format(format)
     try:
-        plans = db.query(ProductionPlan).all()
-        
-        data = []
-        for plan in plans:
-            data.append({
-                '计划号': plan.plan_number,
-                '产品名称': plan.product_name,
-                '数量': plan.quantity,
-                '开始日期': plan.start_date.strftime('%Y-%m-%d') if plan.start_date else '',
-                '结束日期': plan.end_date.strftime('%Y-%m-%d') if plan.end_date else '',
-                '状态': plan.status,
-                '优先级': plan.priority,
-                '备注': plan.notes or '',
-                '创建时间': plan.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        df = pd.DataFrame(data)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='生产计划', index=False)
-        
-        output.seek(0)
-        
-        filename = f"production_plans_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return StreamingResponse(
-            BytesIO(output.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
+        rows = iter_query(db.query(ProductionPlan), lambda plan: {
+            '计划号': plan.plan_no,
+            '产品名称': plan.product_name,
+            '数量': plan.quantity,
+            '开始日期': plan.plan_start_date.strftime('%Y-%m-%d') if plan.plan_start_date else '',
+            '结束日期': plan.plan_end_date.strftime('%Y-%m-%d') if plan.plan_end_date else '',
+            '状态': plan.status,
+            '优先级': plan.priority,
+            '备注': plan.remark or '',
+            '创建时间': plan.created_at.strftime('%Y-%m-%d %H:%M:%S') if plan.created_at else ''
+        })
+        content = open_export_stream(rows, format, sheet_name='生产计划')
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+    
+    filename = f"production_plans_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 
 @router.post("/materials/import")
@@ -326,47 +315,38 @@ def import_materials(
 @router.get("/materials/export")
 @require_permission(Permission.MATERIAL_READ)
 def export_materials(
+    format: str = Query("xlsx", description="文件格式：xlsx/csv/ndjson"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     导出物料数据
     """
+    _check_export_format(format)
     try:
-        materials = db.query(Material).all()
-        
-        data = []
-        for material in materials:
-            data.append({
-                '物料编码': material.material_code,
-                '物料名称': material.material_name,
-                '单位': material.unit,
-                '库存数量': material.stock_quantity,
-                '最小库存': material.min_stock,
-                '最大库存': material.max_stock,
-                '单价': material.unit_price,
-                '供应商': material.supplier or '',
-                '分类': material.category or '',
-                '描述': material.description or '',
-                '创建时间': material.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        df = pd.DataFrame(data)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='物料数据', index=False)
-        
-        output.seek(0)
-        
-        filename = f"materials_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return StreamingResponse(
-            BytesIO(output.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
+        rows = iter_query(db.query(Material), lambda material: {
+            '物料编码': material.material_code,
+            '物料名称': material.material_name,
+            '单位': material.unit,
+            '库存数量': material.current_stock,
+            '安全库存': material.safety_stock,
+            '最大库存': material.max_stock,
+            '单价': material.unit_price,
+            '供应商': material.primary_supplier or '',
+            '分类': material.category or '',
+            '描述': material.remark or '',
+            '创建时间': material.created_at.strftime('%Y-%m-%d %H:%M:%S') if material.created_at else ''
+        })
+        content = open_export_stream(rows, format, sheet_name='物料数据')
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+    
+    filename = f"materials_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 
 @router.post("/template/download")
@@ -1,11 +1,17 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc
-from app.db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, and_, desc, select
+from app.db.database import get_db, get_async_db
+from app.core.cache import invalidate_entity_cache
+from app.services.stats_service import MATERIAL_STATS, get_breakdown
+from app.services.search_index import MATERIAL_SEARCH
 from app.models.material import Material, MaterialCategory, MaterialStatus
 from app.models.user import User
-from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams, PageInfo
+from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams
+from app.utils.pagination import CursorError, KeysetPagination, build_page_info, count_total
+from app.utils.fast_response import Projection, paged_response, wants_fast_response
 from app.api.endpoints.auth import get_current_user, get_current_active_user
 from app.schemas.material import (
     MaterialCreate, MaterialUpdate, MaterialQuery, MaterialDetail,
@@ -19,10 +25,35 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _stock_status(material: dict) -> str:
+    """库存状态（快速路径）"""
+    current_stock = material["current_stock"]
+    if current_stock <= 0:
+        return "缺货"
+    if current_stock <= material["safety_stock"]:
+        return "库存不足"
+    if material["max_stock"] is not None and current_stock >= material["max_stock"]:
+        return "库存过多"
+    return "正常"
+
+# 物料列表快速路径的投影列，字段名与 MaterialDetail 一致；物料表没有的字段（最小库存、供应商联系方式、
+# 采购周期、仓库、最后采购/使用日期）不输出
+MATERIAL_PROJECTION = Projection(
+    Material,
+    [
+        "id", "material_code", "material_name", "category", "specification", "unit", "unit_price",
+        "current_stock", "max_stock", "safety_stock", "supplier", "location", "status",
+        "last_purchase_price", "remark", "created_at", "updated_at", "created_by", "updated_by"
+    ],
+    computed={"stock_status": _stock_status},
+    columns={"supplier": "primary_supplier"}
+)
+
 @router.get("/", response_model=PagedResponseModel[MaterialDetail])
 async def get_materials(
+    request: Request,
     query: MaterialQuery = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """获取物料列表"""
@@ -31,14 +62,7 @@ async def get_materials(
         filters = []
         
         if query.keyword:
-            filters.append(
-                or_(
-                    Material.material_code.contains(query.keyword),
-                    Material.material_name.contains(query.keyword),
-                    Material.specification.contains(query.keyword),
-                    Material.supplier.contains(query.keyword)
-                )
-            )
+            filters.append(MATERIAL_SEARCH.filter(query.keyword))
         
         if query.category:
             filters.append(Material.category == query.category)
@@ -65,27 +89,51 @@ async def get_materials(
             filters.append(Material.unit_price <= query.price_max)
         
         # 构建基础查询
-        base_query = db.query(Material)
+        base_query = select(Material)
         if filters:
-            base_query = base_query.filter(and_(*filters))
-        
-        # 获取总数
-        total = base_query.count()
-        
-        # 排序
-        if query.sort_field:
-            sort_column = getattr(Material, query.sort_field, None)
-            if sort_column:
-                if query.sort_order == "desc":
-                    base_query = base_query.order_by(sort_column.desc())
-                else:
-                    base_query = base_query.order_by(sort_column.asc())
+            base_query = base_query.where(and_(*filters))
+        
+        fast = wants_fast_response(request, query)
+        
+        # 获取总数（按筛选条件短时缓存，写入提交后失效；游标分页时可不统计）
+        total = None
+        if query.cursor is None or query.with_total:
+            total = await count_total(db, base_query, "material")
+        
+        if query.cursor is not None:
+            # 游标分页：按 (排序字段, id) 从上一页最后一行之后取数，与翻页深度无关
+            keyset = KeysetPagination(Material, query.sort_field, query.sort_order, query.page_size)
+            statement = keyset.apply(base_query, query.cursor)
+            if fast:
+                rows = await MATERIAL_PROJECTION.fetch(db, statement, keyset.sort_field)
+            else:
+                rows = (await db.scalars(statement)).all()
+            materials, next_cursor = keyset.page(rows)
         else:
-            base_query = base_query.order_by(Material.created_at.desc())
-        
-        # 分页
-        offset = (query.page - 1) * query.page_size
-        materials = base_query.offset(offset).limit(query.page_size).all()
+            # 排序
+            if query.sort_field:
+                sort_column = getattr(Material, query.sort_field, None)
+                if sort_column:
+                    if query.sort_order == "desc":
+                        base_query = base_query.order_by(sort_column.desc())
+                    else:
+                        base_query = base_query.order_by(sort_column.asc())
+            else:
+                base_query = base_query.order_by(Material.created_at.desc())
+        
+            # 分页
+            offset = (query.page - 1) * query.page_size
+            statement = base_query.offset(offset).limit(query.page_size)
+            if fast:
+                materials = await MATERIAL_PROJECTION.fetch(db, statement)
+            else:
+                materials = (await db.scalars(statement)).all()
+            next_cursor = None
+        
+        if fast:
+            # 快速路径：元组行直接投影为字典，由 orjson 编码
+            page_info = build_page_info(query, total, next_cursor)
+            return paged_response("获取物料列表成功", MATERIAL_PROJECTION.rows(materials), page_info)
         
         # 转换为响应模型
         material_details = []
@@ -130,15 +178,7 @@ async def get_materials(
             material_details.append(material_detail)
         
         # 分页信息
-        total_pages = (total + query.page_size - 1) // query.page_size
-        page_info = PageInfo(
-            page=query.page,
-            page_size=query.page_size,
-            total=total,
-            total_pages=total_pages,
-            has_next=query.page < total_pages,
-            has_prev=query.page > 1
-        )
+        page_info = build_page_info(query, total, next_cursor)
         
         return PagedResponseModel(
             code=200,
@@ -147,6 +187,8 @@ async def get_materials(
             page_info=page_info
         )
         
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"获取物料列表异常: {e}")
         raise HTTPException(
@@ -264,6 +306,7 @@ async def create_material(
         db.add(material)
         db.commit()
         db.refresh(material)
+        await invalidate_entity_cache("material", material.id)
         
         # 计算库存状态
         stock_status = "正常"
@@ -340,6 +383,7 @@ async def update_material(
         
         db.commit()
         db.refresh(material)
+        await invalidate_entity_cache("material", material_id)
         
         # 计算库存状态
         stock_status = "正常"
@@ -417,6 +461,7 @@ async def delete_material(
         
         db.delete(material)
         db.commit()
+        await invalidate_entity_cache("material", material_id)
         
         return ResponseModel(
             code=200,
@@ -436,56 +481,28 @@ async def delete_material(
 
 @router.get("/stats/overview", response_model=ResponseModel[MaterialStats])
 async def get_material_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """获取物料统计信息"""
     try:
-        # 总物料数
-        total_materials = db.query(Material).count()
-        
-        # 各状态物料数
-        active_materials = db.query(Material).filter(Material.status == MaterialStatus.ACTIVE).count()
-        inactive_materials = db.query(Material).filter(Material.status == MaterialStatus.INACTIVE).count()
-        discontinued_materials = db.query(Material).filter(Material.status == MaterialStatus.DISCONTINUED).count()
-        
-        # 各分类物料数
-        raw_materials = db.query(Material).filter(Material.category == MaterialCategory.RAW_MATERIAL).count()
-        semi_finished = db.query(Material).filter(Material.category == MaterialCategory.SEMI_FINISHED).count()
-        finished_products = db.query(Material).filter(Material.category == MaterialCategory.FINISHED_PRODUCT).count()
-        consumables = db.query(Material).filter(Material.category == MaterialCategory.CONSUMABLE).count()
-        tools = db.query(Material).filter(Material.category == MaterialCategory.TOOL).count()
-        
-        # 库存预警
-        low_stock_materials = db.query(Material).filter(Material.current_stock <= Material.min_stock).count()
-        out_of_stock_materials = db.query(Material).filter(Material.current_stock <= 0).count()
-        overstock_materials = db.query(Material).filter(Material.current_stock >= Material.max_stock).count()
-        
-        # 总库存价值
-        total_stock_value_result = db.query(
-            db.func.sum(Material.current_stock * Material.unit_price)
-        ).scalar()
-        total_stock_value = float(total_stock_value_result) if total_stock_value_result else 0.0
-        
-        # 本月新增物料
-        current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_new_materials = db.query(Material).filter(Material.created_at >= current_month_start).count()
+        materials = await get_breakdown(db, MATERIAL_STATS)
         
         material_stats = MaterialStats(
-            total_materials=total_materials,
-            active_materials=active_materials,
-            inactive_materials=inactive_materials,
-            discontinued_materials=discontinued_materials,
-            raw_materials=raw_materials,
-            semi_finished=semi_finished,
-            finished_products=finished_products,
-            consumables=consumables,
-            tools=tools,
-            low_stock_materials=low_stock_materials,
-            out_of_stock_materials=out_of_stock_materials,
-            overstock_materials=overstock_materials,
-            total_stock_value=total_stock_value,
-            monthly_new_materials=monthly_new_materials
+            total_materials=materials.count(),
+            active_materials=materials.count(MaterialStatus.ACTIVE),
+            inactive_materials=materials.value("inactive"),
+            discontinued_materials=materials.count(MaterialStatus.DISCONTINUED),
+            raw_materials=materials.value("raw_material"),
+            semi_finished=materials.value("semi_finished"),
+            finished_products=materials.value("finished_product"),
+            consumables=materials.value("consumable"),
+            tools=materials.value("tool"),
+            low_stock_materials=materials.value("low_stock"),
+            out_of_stock_materials=materials.value("out_of_stock"),
+            overstock_materials=materials.value("overstock"),
+            total_stock_value=float(materials.value("stock_value")),
+            monthly_new_materials=materials.value("monthly_new")
         )
         
         return ResponseModel(
@@ -586,6 +603,7 @@ async def stock_in(
         
         db.commit()
         db.refresh(material)
+        await invalidate_entity_cache("material", material_id)
         
         # 计算库存状态
         stock_status = "正常"
@@ -672,6 +690,7 @@ async def stock_out(
         
         db.commit()
         db.refresh(material)
+        await invalidate_entity_cache("material", material_id)
         
         # 计算库存状态
         stock_status = "正常"
@@ -768,6 +787,9 @@ async def stock_transfer(
         to_material.updated_at = datetime.now()
         
         db.commit()
+        await invalidate_entity_cache(
+            "material", transfer_data.from_material_id, transfer_data.to_material_id
+        )
         
         return ResponseModel(
             code=200,
@@ -817,6 +839,7 @@ async def stock_check(
         
         db.commit()
         db.refresh(material)
+        await invalidate_entity_cache("material", material_id)
         
         # 计算库存状态
         stock_status = "正常"
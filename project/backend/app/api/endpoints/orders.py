@@ -1,11 +1,17 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc
-from app.db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, and_, desc, select
+from app.db.database import get_db, get_async_db
+from app.core.cache import invalidate_entity_cache
+from app.services.stats_service import ORDER_STATS, get_breakdown
+from app.services.search_index import ORDER_SEARCH
 from app.models.order import Order, OrderStatus, OrderPriority
 from app.models.user import User
-from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams, PageInfo
+from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams
+from app.utils.pagination import CursorError, KeysetPagination, build_page_info, count_total
+from app.utils.fast_response import Projection, paged_response, wants_fast_response
 from app.api.endpoints.auth import get_current_user, get_current_active_user
 from app.schemas.order import OrderCreate, OrderUpdate, OrderQuery, OrderDetail, OrderSummary, OrderStats
 from datetime import datetime, timedelta
@@ -18,10 +24,23 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 订单列表快速路径的投影列，字段名与 OrderDetail 一致；订单表没有的字段（客户编码、产品规格、币种）不输出
+ORDER_PROJECTION = Projection(
+    Order,
+    [
+        "id", "order_number", "customer_name", "product_name", "product_model", "quantity", "unit",
+        "unit_price", "total_amount", "order_date", "delivery_date", "status", "priority", "contact_person",
+        "contact_phone", "contact_email", "delivery_address", "technical_requirements", "quality_standards",
+        "remark", "created_at", "updated_at", "created_by", "updated_by"
+    ],
+    columns={"order_number": "order_no"}
+)
+
 @router.get("/", response_model=PagedResponseModel[OrderDetail])
 async def get_orders(
+    request: Request,
     query: OrderQuery = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """获取订单列表"""
@@ -30,14 +49,7 @@ async def get_orders(
         filters = []
         
         if query.keyword:
-            filters.append(
-                or_(
-                    Order.order_number.contains(query.keyword),
-                    Order.customer_name.contains(query.keyword),
-                    Order.product_name.contains(query.keyword),
-                    Order.product_model.contains(query.keyword)
-                )
-            )
+            filters.append(ORDER_SEARCH.filter(query.keyword))
         
         if query.status:
             filters.append(Order.status == query.status)
@@ -67,27 +79,51 @@ async def get_orders(
             filters.append(Order.priority == OrderPriority.URGENT)
         
         # 构建基础查询
-        base_query = db.query(Order)
+        base_query = select(Order)
         if filters:
-            base_query = base_query.filter(and_(*filters))
-        
-        # 获取总数
-        total = base_query.count()
-        
-        # 排序
-        if query.sort_field:
-            sort_column = getattr(Order, query.sort_field, None)
-            if sort_column:
-                if query.sort_order == "desc":
-                    base_query = base_query.order_by(sort_column.desc())
-                else:
-                    base_query = base_query.order_by(sort_column.asc())
+            base_query = base_query.where(and_(*filters))
+        
+        fast = wants_fast_response(request, query)
+        
+        # 获取总数（按筛选条件短时缓存，写入提交后失效；游标分页时可不统计）
+        total = None
+        if query.cursor is None or query.with_total:
+            total = await count_total(db, base_query, "order")
+        
+        if query.cursor is not None:
+            # 游标分页：按 (排序字段, id) 从上一页最后一行之后取数，与翻页深度无关
+            keyset = KeysetPagination(Order, query.sort_field, query.sort_order, query.page_size)
+            statement = keyset.apply(base_query, query.cursor)
+            if fast:
+                rows = await ORDER_PROJECTION.fetch(db, statement, keyset.sort_field)
+            else:
+                rows = (await db.scalars(statement)).all()
+            orders, next_cursor = keyset.page(rows)
         else:
-            base_query = base_query.order_by(Order.created_at.desc())
-        
-        # 分页
-        offset = (query.page - 1) * query.page_size
-        orders = base_query.offset(offset).limit(query.page_size).all()
+            # 排序
+            if query.sort_field:
+                sort_column = getattr(Order, query.sort_field, None)
+                if sort_column:
+                    if query.sort_order == "desc":
+                        base_query = base_query.order_by(sort_column.desc())
+                    else:
+                        base_query = base_query.order_by(sort_column.asc())
+            else:
+                base_query = base_query.order_by(Order.created_at.desc())
+        
+            # 分页
+            offset = (query.page - 1) * query.page_size
+            statement = base_query.offset(offset).limit(query.page_size)
+            if fast:
+                orders = await ORDER_PROJECTION.fetch(db, statement)
+            else:
+                orders = (await db.scalars(statement)).all()
+            next_cursor = None
+        
+        if fast:
+            # 快速路径：元组行直接投影为字典，由 orjson 编码
+            page_info = build_page_info(query, total, next_cursor)
+            return paged_response("获取订单列表成功", ORDER_PROJECTION.rows(orders), page_info)
         
         # 转换为响应模型
         order_details = []
@@ -124,15 +160,7 @@ async def get_orders(
             order_details.append(order_detail)
         
         # 分页信息
-        total_pages = (total + query.page_size - 1) // query.page_size
-        page_info = PageInfo(
-            page=query.page,
-            page_size=query.page_size,
-            total=total,
-            total_pages=total_pages,
-            has_next=query.page < total_pages,
-            has_prev=query.page > 1
-        )
+        page_info = build_page_info(query, total, next_cursor)
         
         return PagedResponseModel(
             code=200,
@@ -141,6 +169,8 @@ async def get_orders(
             page_info=page_info
         )
         
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"获取订单列表异常: {e}")
         raise HTTPException(
@@ -255,6 +285,7 @@ async def create_order(
         db.add(order)
         db.commit()
         db.refresh(order)
+        await invalidate_entity_cache("order", order.id)
         
         order_detail = OrderDetail(
             id=order.id,
@@ -319,6 +350,7 @@ async def update_order(
         
         db.commit()
         db.refresh(order)
+        await invalidate_entity_cache("order", order_id)
         
         order_detail = OrderDetail(
             id=order.id,
@@ -381,6 +413,7 @@ async def delete_order(
         
         db.delete(order)
         db.commit()
+        await invalidate_entity_cache("order", order_id)
         
         return ResponseModel(
             code=200,
@@ -400,68 +433,29 @@ async def delete_order(
 
 @router.get("/stats/overview", response_model=ResponseModel[OrderStats])
 async def get_order_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """获取订单统计信息"""
     try:
-        # 总订单数
-        total_orders = db.query(Order).count()
-        
-        # 各状态订单数
-        pending_orders = db.query(Order).filter(Order.status == OrderStatus.PENDING).count()
-        confirmed_orders = db.query(Order).filter(Order.status == OrderStatus.CONFIRMED).count()
-        in_production_orders = db.query(Order).filter(Order.status == OrderStatus.IN_PRODUCTION).count()
-        completed_orders = db.query(Order).filter(Order.status == OrderStatus.COMPLETED).count()
-        cancelled_orders = db.query(Order).filter(Order.status == OrderStatus.CANCELLED).count()
-        
-        # 紧急订单数
-        urgent_orders = db.query(Order).filter(Order.priority == OrderPriority.URGENT).count()
-        
-        # 本月新增订单
-        current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_new_orders = db.query(Order).filter(Order.created_at >= current_month_start).count()
-        
-        # 本月完成订单
-        monthly_completed_orders = db.query(Order).filter(
-            and_(
-                Order.status == OrderStatus.COMPLETED,
-                Order.updated_at >= current_month_start
-            )
-        ).count()
-        
-        # 逾期订单（交期已过但未完成）
-        today = datetime.now().date()
-        overdue_orders = db.query(Order).filter(
-            and_(
-                Order.delivery_date < today,
-                Order.status.in_([OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.IN_PRODUCTION])
-            )
-        ).count()
-        
-        # 总金额
-        total_amount_result = db.query(db.func.sum(Order.total_amount)).scalar()
-        total_amount = float(total_amount_result) if total_amount_result else 0.0
-        
-        # 本月金额
-        monthly_amount_result = db.query(db.func.sum(Order.total_amount)).filter(
-            Order.created_at >= current_month_start
-        ).scalar()
-        monthly_amount = float(monthly_amount_result) if monthly_amount_result else 0.0
+        orders = await get_breakdown(db, ORDER_STATS)
         
         order_stats = OrderStats(
-            total_orders=total_orders,
-            pending_orders=pending_orders,
-            confirmed_orders=confirmed_orders,
-            in_production_orders=in_production_orders,
-            completed_orders=completed_orders,
-            cancelled_orders=cancelled_orders,
-            urgent_orders=urgent_orders,
-            overdue_orders=overdue_orders,
-            monthly_new_orders=monthly_new_orders,
-            monthly_completed_orders=monthly_completed_orders,
-            total_amount=total_amount,
-            monthly_amount=monthly_amount
+            total_orders=orders.count(),
+            pending_orders=orders.count(OrderStatus.PENDING),
+            confirmed_orders=orders.count(OrderStatus.CONFIRMED),
+            in_production_orders=orders.count(OrderStatus.IN_PRODUCTION),
+            completed_orders=orders.count(OrderStatus.COMPLETED),
+            cancelled_orders=orders.count(OrderStatus.CANCELLED),
+            urgent_orders=orders.value("urgent"),
+            # 逾期订单（交期已过但未完成）
+            overdue_orders=orders.value(
+                "overdue", OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.IN_PRODUCTION
+            ),
+            monthly_new_orders=orders.value("monthly_new"),
+            monthly_completed_orders=orders.value("monthly_updated", OrderStatus.COMPLETED),
+            total_amount=float(orders.value("amount")),
+            monthly_amount=float(orders.value("monthly_amount"))
         )
         
         return ResponseModel(
@@ -486,10 +480,10 @@ async def import_bd400_orders(
     """导入BD400订单表"""
     try:
         # 验证文件格式
-        if not file.filename or not file.filename.lower().endswith(('.xlsx', '.xls')):
+        if not file.filename or not file.filename.lower().endswith(('.xlsx', '.xls', '.csv')):
             return ResponseModel(
                 success=False,
-                message="只支持Excel文件格式(.xlsx, .xls)",
+                message="只支持Excel或CSV文件格式(.xlsx, .xls, .csv)",
                 data=None
             )
         
@@ -500,7 +494,9 @@ async def import_bd400_orders(
         importer = BD400OrderImporter(db)
         
         # 执行导入
-        result = importer.import_from_excel(file_content)
+        result = importer.import_from_excel(file_content, filename=file.filename)
+        if result.get('imported_count'):
+            await invalidate_entity_cache("order")
         
         if result['success']:
             logger.info(f"用户 {current_user.username} 成功导入BD400订单: {result['imported_count']}条")
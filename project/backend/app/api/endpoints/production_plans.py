@@ -1,17 +1,21 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, desc
 from app.db.database import get_db
+from app.core.cache import invalidate_entity_cache
+from app.services.stats_service import PRODUCTION_PLAN_STATS, get_breakdown
 from app.models.production_plan import ProductionPlan, ProductionStage, PlanStatus, PlanPriority
 from app.models.order import Order
 from app.models.user import User
-from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams, PageInfo
+from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams
+from app.utils.pagination import CursorError, KeysetPagination, build_page_info, count_total
 from app.api.endpoints.auth import get_current_user, get_current_active_user
 from app.schemas.production_plan import (
     ProductionPlanCreate, ProductionPlanUpdate, ProductionPlanQuery, ProductionPlanDetail,
     ProductionStageCreate, ProductionStageUpdate, ProductionStageDetail,
-    ProductionPlanStats, ProductionPlanSummary
+    ProductionPlanStats, ProductionPlanSummary, AutoScheduleResponse
 )
 from app.services.production_scheduling_service import (
     get_production_scheduling_service, SchedulingStrategy
@@ -81,23 +85,31 @@ async def get_production_plans(
         if filters:
             base_query = base_query.filter(and_(*filters))
         
-        # 获取总数
-        total = base_query.count()
-        
-        # 排序
-        if query.sort_field:
-            sort_column = getattr(ProductionPlan, query.sort_field, None)
-            if sort_column:
-                if query.sort_order == "desc":
-                    base_query = base_query.order_by(sort_column.desc())
-                else:
-                    base_query = base_query.order_by(sort_column.asc())
-        else:
-            base_query = base_query.order_by(ProductionPlan.created_at.desc())
+        # 获取总数（按筛选条件短时缓存，写入提交后失效；游标分页时可不统计）
+        total = None
+        if query.cursor is None or query.with_total:
+            total = await count_total(db, base_query, "production_plan")
         
-        # 分页
-        offset = (query.page - 1) * query.page_size
-        plans = base_query.offset(offset).limit(query.page_size).all()
+        if query.cursor is not None:
+            # 游标分页：按 (排序字段, id) 从上一页最后一行之后取数，与翻页深度无关
+            keyset = KeysetPagination(ProductionPlan, query.sort_field, query.sort_order, query.page_size)
+            plans, next_cursor = keyset.page(keyset.apply(base_query, query.cursor).all())
+        else:
+            # 排序
+            if query.sort_field:
+                sort_column = getattr(ProductionPlan, query.sort_field, None)
+                if sort_column:
+                    if query.sort_order == "desc":
+                        base_query = base_query.order_by(sort_column.desc())
+                    else:
+                        base_query = base_query.order_by(sort_column.asc())
+            else:
+                base_query = base_query.order_by(ProductionPlan.created_at.desc())
+        
+            # 分页
+            offset = (query.page - 1) * query.page_size
+            plans = base_query.offset(offset).limit(query.page_size).all()
+            next_cursor = None
         
         # 转换为响应模型
         plan_details = []
@@ -140,15 +152,7 @@ async def get_production_plans(
             plan_details.append(plan_detail)
         
         # 分页信息
-        total_pages = (total + query.page_size - 1) // query.page_size
-        page_info = PageInfo(
-            page=query.page,
-            page_size=query.page_size,
-            total=total,
-            total_pages=total_pages,
-            has_next=query.page < total_pages,
-            has_prev=query.page > 1
-        )
+        page_info = build_page_info(query, total, next_cursor)
         
         return PagedResponseModel(
             code=200,
@@ -157,6 +161,8 @@ async def get_production_plans(
             page_info=page_info
         )
         
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"获取生产计划列表异常: {e}")
         raise HTTPException(
@@ -337,6 +343,8 @@ async def create_production_plan(
             
             db.commit()
         
+        await invalidate_entity_cache("production_plan", plan.id)
+        
         # 获取完整的计划详情
         plan_detail = ProductionPlanDetail(
             id=plan.id,
@@ -405,6 +413,7 @@ async def update_production_plan(
         
         db.commit()
         db.refresh(plan)
+        await invalidate_entity_cache("production_plan", plan_id)
         
         plan_detail = ProductionPlanDetail(
             id=plan.id,
@@ -480,6 +489,7 @@ async def delete_production_plan(
         # 删除生产计划
         db.delete(plan)
         db.commit()
+        await invalidate_entity_cache("production_plan", plan_id)
         
         return ResponseModel(
             code=200,
@@ -504,56 +514,22 @@ async def get_production_plan_stats(
 ):
     """获取生产计划统计信息"""
     try:
-        # 总计划数
-        total_plans = db.query(ProductionPlan).count()
-        
-        # 各状态计划数
-        draft_plans = db.query(ProductionPlan).filter(ProductionPlan.status == PlanStatus.DRAFT).count()
-        confirmed_plans = db.query(ProductionPlan).filter(ProductionPlan.status == PlanStatus.CONFIRMED).count()
-        in_progress_plans = db.query(ProductionPlan).filter(ProductionPlan.status == PlanStatus.IN_PROGRESS).count()
-        completed_plans = db.query(ProductionPlan).filter(ProductionPlan.status == PlanStatus.COMPLETED).count()
-        cancelled_plans = db.query(ProductionPlan).filter(ProductionPlan.status == PlanStatus.CANCELLED).count()
-        paused_plans = db.query(ProductionPlan).filter(ProductionPlan.status == PlanStatus.PAUSED).count()
-        
-        # 本月新增计划
-        current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_new_plans = db.query(ProductionPlan).filter(ProductionPlan.created_at >= current_month_start).count()
-        
-        # 本月完成计划
-        monthly_completed_plans = db.query(ProductionPlan).filter(
-            and_(
-                ProductionPlan.status == PlanStatus.COMPLETED,
-                ProductionPlan.updated_at >= current_month_start
-            )
-        ).count()
-        
-        # 逾期计划（计划结束日期已过但未完成）
-        today = datetime.now().date()
-        overdue_plans = db.query(ProductionPlan).filter(
-            and_(
-                ProductionPlan.planned_end_date < today,
-                ProductionPlan.status.in_([PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS])
-            )
-        ).count()
-        
-        # 平均进度
-        avg_progress_result = db.query(db.func.avg(ProductionPlan.progress)).filter(
-            ProductionPlan.status.in_([PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS])
-        ).scalar()
-        avg_progress = float(avg_progress_result) if avg_progress_result else 0.0
+        plans = await get_breakdown(db, PRODUCTION_PLAN_STATS)
+        active_statuses = (PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS)
         
         plan_stats = ProductionPlanStats(
-            total_plans=total_plans,
-            draft_plans=draft_plans,
-            confirmed_plans=confirmed_plans,
-            in_progress_plans=in_progress_plans,
-            completed_plans=completed_plans,
-            cancelled_plans=cancelled_plans,
-            paused_plans=paused_plans,
-            overdue_plans=overdue_plans,
-            monthly_new_plans=monthly_new_plans,
-            monthly_completed_plans=monthly_completed_plans,
-            avg_progress=avg_progress
+            total_plans=plans.count(),
+            draft_plans=plans.count(PlanStatus.DRAFT),
+            confirmed_plans=plans.count(PlanStatus.CONFIRMED),
+            in_progress_plans=plans.count(PlanStatus.IN_PROGRESS),
+            completed_plans=plans.count(PlanStatus.COMPLETED),
+            cancelled_plans=plans.count(PlanStatus.CANCELLED),
+            paused_plans=plans.count(PlanStatus.PAUSED),
+            # 逾期计划（计划结束日期已过但未完成）
+            overdue_plans=plans.value("overdue", *active_statuses),
+            monthly_new_plans=plans.value("monthly_new"),
+            monthly_completed_plans=plans.value("monthly_updated", PlanStatus.COMPLETED),
+            avg_progress=plans.average("progress_sum", "progress_count", *active_statuses)
         )
         
         return ResponseModel(
@@ -569,11 +545,12 @@ async def get_production_plan_stats(
             detail="获取生产计划统计服务异常"
         )
 
-@router.post("/scheduling/auto", response_model=ResponseModel[List[Dict[str, Any]]])
+@router.post("/scheduling/auto", response_model=AutoScheduleResponse)
 async def auto_schedule_plans(
     plan_ids: Optional[List[int]] = None,
     strategy: Optional[str] = Query("balanced", description="排程策略"),
     start_date: Optional[datetime] = Query(None, description="排程开始时间"),
+    save_chunk_size: Optional[int] = Query(None, ge=1, le=10000, description="结果写回每批提交的计划数"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -588,18 +565,23 @@ async def auto_schedule_plans(
             "shortest_processing_time": SchedulingStrategy.SHORTEST_PROCESSING_TIME,
             "critical_ratio": SchedulingStrategy.CRITICAL_RATIO,
             "priority_first": SchedulingStrategy.PRIORITY_FIRST,
-            "balanced": SchedulingStrategy.BALANCED
+            "balanced": SchedulingStrategy.BALANCED,
+            "optimized": SchedulingStrategy.OPTIMIZED
         }
         
         scheduling_strategy = strategy_map.get(strategy, SchedulingStrategy.BALANCED)
         
-        # 执行自动排程
-        results = scheduling_service.auto_schedule_plans(
+        # 执行自动排程（在线程池中运行，优化策略的搜索阶段不阻塞事件循环）
+        results = await run_in_threadpool(
+            scheduling_service.auto_schedule_plans,
             plan_ids=plan_ids,
             strategy=scheduling_strategy,
-            start_date=start_date
+            start_date=start_date,
+            save_chunk_size=save_chunk_size
         )
         
+        await invalidate_entity_cache("production_plan", *[result.plan_id for result in results])
+        
         # 转换结果为字典格式
         result_data = []
         for result in results:
@@ -613,10 +595,14 @@ async def auto_schedule_plans(
                 "feasibility_score": result.feasibility_score
             })
         
-        return ResponseModel(
+        return AutoScheduleResponse(
             success=True,
             message=f"成功排程 {len(results)} 个生产计划",
-            data=result_data
+            data=result_data,
+            stats={
+                "save": scheduling_service.last_save_stats,
+                "optimization": scheduling_service.last_optimization_stats
+            }
         )
         
     except Exception as e:
@@ -659,6 +645,8 @@ async def manual_schedule_plan(
             resources=resources
         )
         
+        await invalidate_entity_cache("production_plan", plan_id)
+        
         # 转换结果
         result_data = {
             "plan_id": result.plan_id,
@@ -694,6 +682,7 @@ async def reschedule_plan(
     new_priority: Optional[PlanPriority] = None,
     new_due_date: Optional[date] = None,
     strategy: Optional[str] = Query("balanced", description="排程策略"),
+    incremental: bool = Query(True, description="增量重排：一并重排受影响的计划，其余计划保持不变"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -708,17 +697,24 @@ async def reschedule_plan(
             "shortest_processing_time": SchedulingStrategy.SHORTEST_PROCESSING_TIME,
             "critical_ratio": SchedulingStrategy.CRITICAL_RATIO,
             "priority_first": SchedulingStrategy.PRIORITY_FIRST,
-            "balanced": SchedulingStrategy.BALANCED
+            "balanced": SchedulingStrategy.BALANCED,
+            "optimized": SchedulingStrategy.OPTIMIZED
         }
         
         scheduling_strategy = strategy_map.get(strategy, SchedulingStrategy.BALANCED)
         
         # 执行重新排程
-        result = scheduling_service.reschedule_plan(
+        result = await run_in_threadpool(
+            scheduling_service.reschedule_plan,
             plan_id=plan_id,
             new_priority=new_priority,
             new_due_date=new_due_date,
-            strategy=scheduling_strategy
+            strategy=scheduling_strategy,
+            incremental=incremental
+        )
+        
+        await invalidate_entity_cache(
+            "production_plan", *scheduling_service.last_reschedule_scope.get("rescheduled_plan_ids", [plan_id])
         )
         
         # 转换结果
@@ -729,7 +725,8 @@ async def reschedule_plan(
             "assigned_resources": result.assigned_resources,
             "estimated_duration_hours": result.estimated_duration.total_seconds() / 3600,
             "conflicts": result.conflicts,
-            "feasibility_score": result.feasibility_score
+            "feasibility_score": result.feasibility_score,
+            "rescheduled_plan_ids": scheduling_service.last_reschedule_scope.get("rescheduled_plan_ids", [])
         }
         
         return ResponseModel(
@@ -789,6 +786,7 @@ async def get_scheduling_gantt_data(
 async def analyze_scheduling_conflicts(
     start_date: Optional[date] = Query(None, description="分析开始日期"),
     end_date: Optional[date] = Query(None, description="分析结束日期"),
+    line_capacity: int = Query(1, ge=1, description="每条生产线可同时执行的计划数"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -800,7 +798,8 @@ async def analyze_scheduling_conflicts(
         # 分析冲突
         conflicts = scheduling_service.analyze_scheduling_conflicts(
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            line_capacity=line_capacity
         )
         
         return ResponseModel(
@@ -841,6 +840,7 @@ async def schedule_production_plans(
                 plan.updated_at = datetime.now()
         
         db.commit()
+        await invalidate_entity_cache("production_plan", *plan_ids)
         
         # 转换为响应格式
         schedule_data = []
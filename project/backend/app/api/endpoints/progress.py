@@ -3,11 +3,13 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, desc
 from app.db.database import get_db
+from app.services.stats_service import PROGRESS_QUALITY_STATS, PROGRESS_STATS, get_breakdown
 from app.models.progress import ProgressRecord, StageRecord, QualityRecord, ProgressUpdate, ProgressStatus, QualityResult
 from app.models.production_plan import ProductionPlan
 from app.models.order import Order
 from app.models.user import User
-from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams, PageInfo
+from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams
+from app.utils.pagination import CursorError, KeysetPagination, build_page_info, count_total
 from app.api.endpoints.auth import get_current_user, get_current_active_user
 from app.schemas.progress import (
     ProgressRecordCreate, ProgressRecordUpdate, ProgressRecordQuery, ProgressRecordDetail,
@@ -78,23 +80,31 @@ async def get_progress_records(
         if filters:
             base_query = base_query.filter(and_(*filters))
         
-        # 获取总数
-        total = base_query.count()
-        
-        # 排序
-        if query.sort_field:
-            sort_column = getattr(ProgressRecord, query.sort_field, None)
-            if sort_column:
-                if query.sort_order == "desc":
-                    base_query = base_query.order_by(sort_column.desc())
-                else:
-                    base_query = base_query.order_by(sort_column.asc())
-        else:
-            base_query = base_query.order_by(ProgressRecord.created_at.desc())
+        # 获取总数（按筛选条件短时缓存，写入提交后失效；游标分页时可不统计）
+        total = None
+        if query.cursor is None or query.with_total:
+            total = await count_total(db, base_query, "progress")
         
-        # 分页
-        offset = (query.page - 1) * query.page_size
-        records = base_query.offset(offset).limit(query.page_size).all()
+        if query.cursor is not None:
+            # 游标分页：按 (排序字段, id) 从上一页最后一行之后取数，与翻页深度无关
+            keyset = KeysetPagination(ProgressRecord, query.sort_field, query.sort_order, query.page_size)
+            records, next_cursor = keyset.page(keyset.apply(base_query, query.cursor).all())
+        else:
+            # 排序
+            if query.sort_field:
+                sort_column = getattr(ProgressRecord, query.sort_field, None)
+                if sort_column:
+                    if query.sort_order == "desc":
+                        base_query = base_query.order_by(sort_column.desc())
+                    else:
+                        base_query = base_query.order_by(sort_column.asc())
+            else:
+                base_query = base_query.order_by(ProgressRecord.created_at.desc())
+        
+            # 分页
+            offset = (query.page - 1) * query.page_size
+            records = base_query.offset(offset).limit(query.page_size).all()
+            next_cursor = None
         
         # 转换为响应模型
         record_details = []
@@ -176,15 +186,7 @@ async def get_progress_records(
             record_details.append(record_detail)
         
         # 分页信息
-        total_pages = (total + query.page_size - 1) // query.page_size
-        page_info = PageInfo(
-            page=query.page,
-            page_size=query.page_size,
-            total=total,
-            total_pages=total_pages,
-            has_next=query.page < total_pages,
-            has_prev=query.page > 1
-        )
+        page_info = build_page_info(query, total, next_cursor)
         
         return PagedResponseModel(
             code=200,
@@ -193,6 +195,8 @@ async def get_progress_records(
             page_info=page_info
         )
         
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"获取进度记录列表异常: {e}")
         raise HTTPException(
@@ -571,62 +575,26 @@ async def get_progress_stats(
 ):
     """获取进度统计信息"""
     try:
-        # 总记录数
-        total_records = db.query(ProgressRecord).count()
-        
-        # 各状态记录数
-        not_started_records = db.query(ProgressRecord).filter(ProgressRecord.status == ProgressStatus.NOT_STARTED).count()
-        in_progress_records = db.query(ProgressRecord).filter(ProgressRecord.status == ProgressStatus.IN_PROGRESS).count()
-        completed_records = db.query(ProgressRecord).filter(ProgressRecord.status == ProgressStatus.COMPLETED).count()
-        paused_records = db.query(ProgressRecord).filter(ProgressRecord.status == ProgressStatus.PAUSED).count()
-        cancelled_records = db.query(ProgressRecord).filter(ProgressRecord.status == ProgressStatus.CANCELLED).count()
-        
-        # 逾期记录（结束日期已过但未完成）
-        today = datetime.now().date()
-        overdue_records = db.query(ProgressRecord).filter(
-            and_(
-                ProgressRecord.end_date < today,
-                ProgressRecord.status.in_([ProgressStatus.NOT_STARTED, ProgressStatus.IN_PROGRESS])
-            )
-        ).count()
-        
-        # 平均进度
-        avg_progress_result = db.query(db.func.avg(ProgressRecord.progress)).filter(
-            ProgressRecord.status.in_([ProgressStatus.IN_PROGRESS, ProgressStatus.COMPLETED])
-        ).scalar()
-        avg_progress = float(avg_progress_result) if avg_progress_result else 0.0
-        
-        # 本月新增记录
-        current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_new_records = db.query(ProgressRecord).filter(ProgressRecord.created_at >= current_month_start).count()
-        
-        # 本月完成记录
-        monthly_completed_records = db.query(ProgressRecord).filter(
-            and_(
-                ProgressRecord.status == ProgressStatus.COMPLETED,
-                ProgressRecord.updated_at >= current_month_start
-            )
-        ).count()
-        
-        # 质量检查统计
-        total_quality_checks = db.query(QualityRecord).count()
-        passed_quality_checks = db.query(QualityRecord).filter(QualityRecord.check_result == QualityResult.PASS).count()
-        failed_quality_checks = db.query(QualityRecord).filter(QualityRecord.check_result == QualityResult.FAIL).count()
+        records = await get_breakdown(db, PROGRESS_STATS)
+        quality_records = await get_breakdown(db, PROGRESS_QUALITY_STATS)
         
         progress_stats = ProgressStats(
-            total_records=total_records,
-            not_started_records=not_started_records,
-            in_progress_records=in_progress_records,
-            completed_records=completed_records,
-            paused_records=paused_records,
-            cancelled_records=cancelled_records,
-            overdue_records=overdue_records,
-            avg_progress=avg_progress,
-            monthly_new_records=monthly_new_records,
-            monthly_completed_records=monthly_completed_records,
-            total_quality_checks=total_quality_checks,
-            passed_quality_checks=passed_quality_checks,
-            failed_quality_checks=failed_quality_checks
+            total_records=records.count(),
+            not_started_records=records.count(ProgressStatus.NOT_STARTED),
+            in_progress_records=records.count(ProgressStatus.IN_PROGRESS),
+            completed_records=records.count(ProgressStatus.COMPLETED),
+            paused_records=records.count(ProgressStatus.PAUSED),
+            cancelled_records=records.count(ProgressStatus.CANCELLED),
+            # 逾期记录（结束日期已过但未完成）
+            overdue_records=records.value("overdue", ProgressStatus.NOT_STARTED, ProgressStatus.IN_PROGRESS),
+            avg_progress=records.average(
+                "progress_sum", "progress_count", ProgressStatus.IN_PROGRESS, ProgressStatus.COMPLETED
+            ),
+            monthly_new_records=records.value("monthly_new"),
+            monthly_completed_records=records.value("monthly_updated", ProgressStatus.COMPLETED),
+            total_quality_checks=quality_records.count(),
+            passed_quality_checks=quality_records.count(QualityResult.PASS),
+            failed_quality_checks=quality_records.count(QualityResult.FAIL)
         )
         
         return ResponseModel(
@@ -5,7 +5,8 @@ from sqlalchemy import or_, and_, desc
 from app.db.database import get_db
 from app.models.quality import QualityCheck, QualityStandard, QualityIssue, QualityCheckStatus, QualityResult, IssueStatus, IssueSeverity
 from app.models.user import User
-from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams, PageInfo
+from app.schemas.common import ResponseModel, PagedResponseModel, QueryParams
+from app.utils.pagination import CursorError, KeysetPagination, build_page_info, count_total
 from app.api.endpoints.auth import get_current_user, get_current_active_user
 from app.schemas.quality import (
     QualityCheckCreate, QualityCheckUpdate, QualityCheckQuery, QualityCheckDetail,
@@ -13,6 +14,7 @@ from app.schemas.quality import (
     QualityIssueCreate, QualityIssueUpdate, QualityIssueDetail,
     QualityStats, QualityCheckSummary, QualityCheckStatusUpdate
 )
+from app.services.stats_service import QUALITY_CHECK_STATS, StatsTable, count_if, get_breakdown
 from datetime import datetime, timedelta
 import logging
 
@@ -20,6 +22,21 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+def _quality_issue_measures(now: datetime):
+    """质量问题统计的条件聚合量"""
+    return [
+        count_if("critical", QualityIssue.severity == IssueSeverity.CRITICAL),
+        count_if("high", QualityIssue.severity == IssueSeverity.HIGH),
+        count_if("medium", QualityIssue.severity == IssueSeverity.MEDIUM),
+        count_if("low", QualityIssue.severity == IssueSeverity.LOW),
+        count_if("monthly", QualityIssue.created_at >= now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)),
+        count_if("overdue", QualityIssue.due_date < now.date()),
+    ]
+
+
+QUALITY_ISSUE_STATS = StatsTable("quality_issue", "quality", QualityIssue, measures=_quality_issue_measures)
+
 @router.get("/checks", response_model=PagedResponseModel[QualityCheckDetail])
 async def get_quality_checks(
     query: QualityCheckQuery = Depends(),
@@ -79,23 +96,31 @@ async def get_quality_checks(
         if filters:
             base_query = base_query.filter(and_(*filters))
         
-        # 获取总数
-        total = base_query.count()
-        
-        # 排序
-        if query.sort_field:
-            sort_column = getattr(QualityCheck, query.sort_field, None)
-            if sort_column:
-                if query.sort_order == "desc":
-                    base_query = base_query.order_by(sort_column.desc())
-                else:
-                    base_query = base_query.order_by(sort_column.asc())
+        # 获取总数（按筛选条件短时缓存，写入提交后失效；游标分页时可不统计）
+        total = None
+        if query.cursor is None or query.with_total:
+            total = await count_total(db, base_query, "quality")
+        
+        if query.cursor is not None:
+            # 游标分页：按 (排序字段, id) 从上一页最后一行之后取数，与翻页深度无关
+            keyset = KeysetPagination(QualityCheck, query.sort_field, query.sort_order, query.page_size)
+            checks, next_cursor = keyset.page(keyset.apply(base_query, query.cursor).all())
         else:
-            base_query = base_query.order_by(QualityCheck.created_at.desc())
+            # 排序
+            if query.sort_field:
+                sort_column = getattr(QualityCheck, query.sort_field, None)
+                if sort_column:
+                    if query.sort_order == "desc":
+                        base_query = base_query.order_by(sort_column.desc())
+                    else:
+                        base_query = base_query.order_by(sort_column.asc())
+            else:
+                base_query = base_query.order_by(QualityCheck.created_at.desc())
         
-        # 分页
-        offset = (query.page - 1) * query.page_size
-        checks = base_query.offset(offset).limit(query.page_size).all()
+            # 分页
+            offset = (query.page - 1) * query.page_size
+            checks = base_query.offset(offset).limit(query.page_size).all()
+            next_cursor = None
         
         # 转换为响应模型
         check_details = []
@@ -144,15 +169,7 @@ async def get_quality_checks(
             check_details.append(check_detail)
         
         # 分页信息
-        total_pages = (total + query.page_size - 1) // query.page_size
-        page_info = PageInfo(
-            page=query.page,
-            page_size=query.page_size,
-            total=total,
-            total_pages=total_pages,
-            has_next=query.page < total_pages,
-            has_prev=query.page > 1
-        )
+        page_info = build_page_info(query, total, next_cursor)
         
         return PagedResponseModel(
             code=200,
@@ -161,6 +178,8 @@ async def get_quality_checks(
             page_info=page_info
         )
         
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"获取质量检查列表异常: {e}")
         raise HTTPException(
@@ -500,87 +519,39 @@ async def get_quality_stats(
 ):
     """获取质量统计信息"""
     try:
-        # 总检查数
-        total_checks = db.query(QualityCheck).count()
-        
-        # 各状态检查数
-        pending_checks = db.query(QualityCheck).filter(QualityCheck.status == QualityCheckStatus.PENDING).count()
-        in_progress_checks = db.query(QualityCheck).filter(QualityCheck.status == QualityCheckStatus.IN_PROGRESS).count()
-        completed_checks = db.query(QualityCheck).filter(QualityCheck.status == QualityCheckStatus.COMPLETED).count()
-        
-        # 各结果检查数
-        pass_checks = db.query(QualityCheck).filter(QualityCheck.result == QualityResult.PASS).count()
-        fail_checks = db.query(QualityCheck).filter(QualityCheck.result == QualityResult.FAIL).count()
-        rework_checks = db.query(QualityCheck).filter(QualityCheck.result == QualityResult.REWORK).count()
-        
-        # 总问题数
-        total_issues = db.query(QualityIssue).count()
-        
-        # 各状态问题数
-        open_issues = db.query(QualityIssue).filter(QualityIssue.status == IssueStatus.OPEN).count()
-        in_progress_issues = db.query(QualityIssue).filter(QualityIssue.status == IssueStatus.IN_PROGRESS).count()
-        resolved_issues = db.query(QualityIssue).filter(QualityIssue.status == IssueStatus.RESOLVED).count()
-        closed_issues = db.query(QualityIssue).filter(QualityIssue.status == IssueStatus.CLOSED).count()
-        
-        # 各严重程度问题数
-        critical_issues = db.query(QualityIssue).filter(QualityIssue.severity == IssueSeverity.CRITICAL).count()
-        high_issues = db.query(QualityIssue).filter(QualityIssue.severity == IssueSeverity.HIGH).count()
-        medium_issues = db.query(QualityIssue).filter(QualityIssue.severity == IssueSeverity.MEDIUM).count()
-        low_issues = db.query(QualityIssue).filter(QualityIssue.severity == IssueSeverity.LOW).count()
-        
-        # 总检查数量和通过数量
-        total_check_quantity = db.query(db.func.sum(QualityCheck.check_quantity)).scalar() or 0
-        total_pass_quantity = db.query(db.func.sum(QualityCheck.pass_quantity)).scalar() or 0
-        
-        # 整体通过率
-        overall_pass_rate = (total_pass_quantity / total_check_quantity * 100) if total_check_quantity > 0 else 0
-        
-        # 本月数据
-        current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_checks = db.query(QualityCheck).filter(QualityCheck.created_at >= current_month_start).count()
-        monthly_issues = db.query(QualityIssue).filter(QualityIssue.created_at >= current_month_start).count()
-        
-        # 本月检查数量和通过数量
-        monthly_check_quantity = db.query(db.func.sum(QualityCheck.check_quantity)).filter(
-            QualityCheck.created_at >= current_month_start
-        ).scalar() or 0
-        monthly_pass_quantity = db.query(db.func.sum(QualityCheck.pass_quantity)).filter(
-            QualityCheck.created_at >= current_month_start
-        ).scalar() or 0
-        
-        # 本月通过率
-        monthly_pass_rate = (monthly_pass_quantity / monthly_check_quantity * 100) if monthly_check_quantity > 0 else 0
-        
-        # 逾期问题数（超过截止日期且未关闭）
-        overdue_issues = db.query(QualityIssue).filter(
-            and_(
-                QualityIssue.due_date < datetime.now().date(),
-                QualityIssue.status.in_([IssueStatus.OPEN, IssueStatus.IN_PROGRESS])
-            )
-        ).count()
+        checks = await get_breakdown(db, QUALITY_CHECK_STATS)
+        issues = await get_breakdown(db, QUALITY_ISSUE_STATS)
+        
+        # 整体与本月通过率
+        total_check_quantity = checks.value("check_quantity")
+        overall_pass_rate = (checks.value("pass_quantity") / total_check_quantity * 100) if total_check_quantity > 0 else 0
+        monthly_check_quantity = checks.value("monthly_check_quantity")
+        monthly_pass_rate = (checks.value("monthly_pass_quantity") / monthly_check_quantity * 100) if monthly_check_quantity > 0 else 0
         
         quality_stats = QualityStats(
-            total_checks=total_checks,
-            pending_checks=pending_checks,
-            in_progress_checks=in_progress_checks,
-            completed_checks=completed_checks,
-            pass_checks=pass_checks,
-            fail_checks=fail_checks,
-            rework_checks=rework_checks,
-            total_issues=total_issues,
-            open_issues=open_issues,
-            in_progress_issues=in_progress_issues,
-            resolved_issues=resolved_issues,
-            closed_issues=closed_issues,
-            critical_issues=critical_issues,
-            high_issues=high_issues,
-            medium_issues=medium_issues,
-            low_issues=low_issues,
+            total_checks=checks.count(),
+            # 质量检查按检查结果分组：待检为未完成，其余结果均为已完成
+            pending_checks=checks.count(QualityResult.PENDING),
+            in_progress_checks=0,
+            completed_checks=checks.count(exclude=[QualityResult.PENDING]),
+            pass_checks=checks.count(QualityResult.PASS),
+            fail_checks=checks.count(QualityResult.FAIL),
+            rework_checks=checks.count(QualityResult.REWORK),
+            total_issues=issues.count(),
+            open_issues=issues.count(IssueStatus.OPEN),
+            in_progress_issues=issues.count(IssueStatus.IN_PROGRESS),
+            resolved_issues=issues.count(IssueStatus.RESOLVED),
+            closed_issues=issues.count(IssueStatus.CLOSED),
+            critical_issues=issues.value("critical"),
+            high_issues=issues.value("high"),
+            medium_issues=issues.value("medium"),
+            low_issues=issues.value("low"),
             overall_pass_rate=round(overall_pass_rate, 2),
-            monthly_checks=monthly_checks,
-            monthly_issues=monthly_issues,
+            monthly_checks=checks.value("monthly"),
+            monthly_issues=issues.value("monthly"),
             monthly_pass_rate=round(monthly_pass_rate, 2),
-            overdue_issues=overdue_issues
+            # 逾期问题数（超过截止日期且未关闭）
+            overdue_issues=issues.value("overdue", IssueStatus.OPEN, IssueStatus.IN_PROGRESS)
         )
         
         return ResponseModel(
@@ -14,13 +14,14 @@ from datetime import datetime, date, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, case
 from pydantic import BaseModel, Field
 import logging
 import os
 import tempfile
 
-from ...db.database import get_db
+from ...db.database import get_db, get_async_db
 from ...models.user import User
 from ...models.production_plan import ProductionPlan, PlanStatus
 from ...models.order import Order, OrderStatus
@@ -31,6 +32,13 @@ from ...models.progress import ProgressRecord, ProgressStatus
 from ...schemas.common import ResponseModel
 from ...core.auth import get_current_user
 from ...utils.report_export import report_exporter
+from ...utils.time_buckets import TimeBucket, bucket_series
+from ...services.stats_service import (
+    EQUIPMENT_STATS, ORDER_STATS, PRODUCTION_PLAN_STATS, QUALITY_CHECK_STATS, get_breakdown
+)
+from ...services.report_rollup_service import (
+    MAINTENANCE_ROLLUP, PRODUCTION_ROLLUP, QUALITY_ROLLUP, group_rows, read_rollup, rollup_series, sum_rows
+)
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +50,7 @@ class ReportRequest(BaseModel):
     start_date: date = Field(..., description="开始日期")
     end_date: date = Field(..., description="结束日期")
     format: str = Field(default="json", description="报表格式: json, excel, pdf")
+    granularity: TimeBucket = Field(default=TimeBucket.DAY, description="趋势粒度: day, week, month")
     
 class ProductionReportRequest(ReportRequest):
     """生产报表请求"""
@@ -105,8 +114,8 @@ async def generate_production_report(
     try:
         # 构建查询条件
         filters = [
-            ProductionPlan.planned_start_date >= request.start_date,
-            ProductionPlan.planned_start_date <= request.end_date
+            ProductionPlan.plan_start_date >= request.start_date,
+            ProductionPlan.plan_start_date <= request.end_date
         ]
         
         if request.workshop:
@@ -116,53 +125,57 @@ async def generate_production_report(
         if request.status:
             filters.append(ProductionPlan.status.in_(request.status))
             
-        # 基础统计
+        # 基础统计（按天汇总，已刷新的日期读日汇总表，生产线不在汇总粒度内时直接聚合明细）
         base_query = db.query(ProductionPlan).filter(and_(*filters))
-        total_plans = base_query.count()
-        completed_plans = base_query.filter(ProductionPlan.status == PlanStatus.COMPLETED).count()
-        in_progress_plans = base_query.filter(ProductionPlan.status == PlanStatus.IN_PROGRESS).count()
+        statuses = {plan_status.value for plan_status in request.status or []}
+        rows = read_rollup(
+            db, PRODUCTION_ROLLUP, request.start_date, request.end_date,
+            where=lambda row: (
+                (not request.workshop or request.workshop in row['workshop'])
+                and (not statuses or row['status'] in statuses)
+            ),
+            source_criteria=[ProductionPlan.production_line.contains(request.production_line)]
+            if request.production_line else ()
+        )
+        total_plans = sum_rows(rows, 'plan_count')
+        completed_plans = sum_rows(rows, 'plan_count', status=PlanStatus.COMPLETED)
+        in_progress_plans = sum_rows(rows, 'plan_count', status=PlanStatus.IN_PROGRESS)
         
         # 逾期计划
         today = datetime.now().date()
         overdue_plans = base_query.filter(
             and_(
-                ProductionPlan.planned_end_date < today,
+                ProductionPlan.plan_end_date < today,
                 ProductionPlan.status.in_([PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS])
             )
         ).count()
         
         # 完成率和平均进度
         completion_rate = (completed_plans / total_plans * 100) if total_plans > 0 else 0
-        avg_progress_result = base_query.with_entities(func.avg(ProductionPlan.progress)).scalar()
-        avg_progress = float(avg_progress_result) if avg_progress_result else 0
+        progress_count = sum_rows(rows, 'progress_count')
+        avg_progress = float(sum_rows(rows, 'progress_sum')) / progress_count if progress_count else 0
         
         # 车间统计
         workshop_stats = []
-        workshop_query = base_query.with_entities(
-            ProductionPlan.workshop,
-            func.count(ProductionPlan.id).label('count'),
-            func.avg(ProductionPlan.progress).label('avg_progress')
-        ).group_by(ProductionPlan.workshop).all()
-        
-        for workshop, count, progress in workshop_query:
+        for workshop, workshop_rows in group_rows(rows, 'workshop').items():
+            workshop_progress_count = sum_rows(workshop_rows, 'progress_count')
             workshop_stats.append({
-                'workshop': workshop,
-                'total_plans': count,
-                'avg_progress': float(progress) if progress else 0
+                'workshop': workshop or None,
+                'total_plans': sum_rows(workshop_rows, 'plan_count'),
+                'avg_progress': float(sum_rows(workshop_rows, 'progress_sum')) / workshop_progress_count
+                if workshop_progress_count else 0
             })
         
-        # 日产量统计
-        daily_production = []
-        current_date = request.start_date
-        while current_date <= request.end_date:
-            daily_count = base_query.filter(
-                func.date(ProductionPlan.planned_start_date) == current_date
-            ).count()
-            daily_production.append({
-                'date': current_date.isoformat(),
-                'count': daily_count
-            })
-            current_date += timedelta(days=1)
+        # 日产量统计（日汇总行按趋势粒度合并）
+        daily_production = [
+            {
+                'date': point['bucket'].date().isoformat(),
+                'count': point['plan_count']
+            }
+            for point in rollup_series(
+                rows, request.start_date, request.end_date, request.granularity, 'plan_count'
+            )
+        ]
         
         # 效率分析
         efficiency_analysis = {
@@ -212,37 +225,44 @@ async def generate_quality_report(
         if request.quality_result:
             filters.append(QualityCheck.result.in_(request.quality_result))
             
-        # 基础统计
+        # 基础统计（按天汇总，已刷新的日期读日汇总表）
         base_query = db.query(QualityCheck).filter(and_(*filters))
-        total_checks = base_query.count()
-        passed_checks = base_query.filter(QualityCheck.result == QualityResult.PASSED).count()
-        failed_checks = base_query.filter(QualityCheck.result == QualityResult.FAILED).count()
+        results = {quality_result.value for quality_result in request.quality_result or []}
+        rows = read_rollup(
+            db, QUALITY_ROLLUP, request.start_date, request.end_date,
+            where=lambda row: (
+                (not request.product_name or request.product_name in row['product_name'])
+                and (not results or row['result'] in results)
+            )
+        )
+        passed_rows = [row for row in rows if row['result'] == QualityResult.PASS.value]
+        total_checks = sum_rows(rows, 'check_count')
+        passed_checks = sum_rows(passed_rows, 'check_count')
+        failed_checks = sum_rows(rows, 'check_count', result=QualityResult.FAIL)
         
         # 合格率和缺陷率
         pass_rate = (passed_checks / total_checks * 100) if total_checks > 0 else 0
         defect_rate = (failed_checks / total_checks * 100) if total_checks > 0 else 0
         
-        # 质量趋势
-        quality_trends = []
-        current_date = request.start_date
-        while current_date <= request.end_date:
-            daily_checks = base_query.filter(
-                func.date(QualityCheck.check_date) == current_date
+        # 质量趋势（日汇总行按趋势粒度合并）
+        passed_series = rollup_series(
+            passed_rows, request.start_date, request.end_date, request.granularity, 'check_count'
+        )
+        quality_trends = [
+            {
+                'date': point['bucket'].date().isoformat(),
+                'total_checks': point['check_count'],
+                'pass_rate': (passed['check_count'] / point['check_count'] * 100) if point['check_count'] > 0 else 0
+            }
+            for point, passed in zip(
+                rollup_series(rows, request.start_date, request.end_date, request.granularity, 'check_count'),
+                passed_series
             )
-            daily_total = daily_checks.count()
-            daily_passed = daily_checks.filter(QualityCheck.result == QualityResult.PASSED).count()
-            daily_rate = (daily_passed / daily_total * 100) if daily_total > 0 else 0
-            
-            quality_trends.append({
-                'date': current_date.isoformat(),
-                'total_checks': daily_total,
-                'pass_rate': daily_rate
-            })
-            current_date += timedelta(days=1)
+        ]
         
         # 缺陷分析
         defect_analysis = []
-        defect_query = base_query.filter(QualityCheck.result == QualityResult.FAILED).with_entities(
+        defect_query = base_query.filter(QualityCheck.result == QualityResult.FAIL).with_entities(
             QualityCheck.defect_type,
             func.count(QualityCheck.id).label('count')
         ).group_by(QualityCheck.defect_type).all()
@@ -256,13 +276,9 @@ async def generate_quality_report(
         
         # 产品质量统计
         product_quality = []
-        product_query = base_query.with_entities(
-            QualityCheck.product_name,
-            func.count(QualityCheck.id).label('total'),
-            func.sum(func.case([(QualityCheck.result == QualityResult.PASSED, 1)], else_=0)).label('passed')
-        ).group_by(QualityCheck.product_name).all()
-        
-        for product_name, total, passed in product_query:
+        for product_name, product_rows in group_rows(rows, 'product_name').items():
+            total = sum_rows(product_rows, 'check_count')
+            passed = sum_rows(product_rows, 'check_count', result=QualityResult.PASS)
             product_quality.append({
                 'product_name': product_name,
                 'total_checks': total,
@@ -322,24 +338,15 @@ async def generate_equipment_report(
         # 设备利用率
         utilization_rate = (running_equipment / total_equipment * 100) if total_equipment > 0 else 0
         
-        # 维护统计
+        # 维护统计（按天汇总，已刷新的日期读日汇总表）
+        maintenance_rows = read_rollup(db, MAINTENANCE_ROLLUP, request.start_date, request.end_date)
         maintenance_stats = []
-        maintenance_query = db.query(MaintenanceRecord).filter(
-            and_(
-                MaintenanceRecord.maintenance_date >= request.start_date,
-                MaintenanceRecord.maintenance_date <= request.end_date
-            )
-        ).with_entities(
-            MaintenanceRecord.maintenance_type,
-            func.count(MaintenanceRecord.id).label('count'),
-            func.avg(MaintenanceRecord.cost).label('avg_cost')
-        ).group_by(MaintenanceRecord.maintenance_type).all()
-        
-        for maintenance_type, count, avg_cost in maintenance_query:
+        for maintenance_type, type_rows in group_rows(maintenance_rows, 'maintenance_type').items():
+            cost_count = sum_rows(type_rows, 'cost_count')
             maintenance_stats.append({
                 'maintenance_type': maintenance_type,
-                'count': count,
-                'avg_cost': float(avg_cost) if avg_cost else 0
+                'count': sum_rows(type_rows, 'record_count'),
+                'avg_cost': float(sum_rows(type_rows, 'cost_sum')) / cost_count if cost_count else 0
             })
         
         # 故障分析
@@ -356,17 +363,17 @@ async def generate_equipment_report(
                 'fault_rate': (count / total_equipment * 100) if total_equipment > 0 else 0
             })
         
-        # 效率趋势（简化版）
-        efficiency_trends = []
-        current_date = request.start_date
-        while current_date <= request.end_date:
-            # 这里可以根据实际需求计算每日设备效率
-            efficiency_trends.append({
-                'date': current_date.isoformat(),
-                'utilization_rate': utilization_rate,  # 简化处理
-                'maintenance_count': 0  # 需要根据实际维护记录计算
-            })
-            current_date += timedelta(days=1)
+        # 效率趋势（利用率为简化处理，维护次数由日汇总行按趋势粒度合并）
+        efficiency_trends = [
+            {
+                'date': point['bucket'].date().isoformat(),
+                'utilization_rate': utilization_rate,
+                'maintenance_count': point['record_count']
+            }
+            for point in rollup_series(
+                maintenance_rows, request.start_date, request.end_date, request.granularity, 'record_count'
+            )
+        ]
         
         report_data = EquipmentReportData(
             total_equipment=total_equipment,
@@ -391,7 +398,7 @@ async def generate_equipment_report(
 
 @router.get("/dashboard", response_model=ResponseModel[Dict[str, Any]])
 async def get_reports_dashboard(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """获取报表仪表板数据"""
@@ -400,48 +407,38 @@ async def get_reports_dashboard(
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=30)
         
+        # 每张表一条分组查询（短时缓存），各概览指标由分组结果组合
+        plans = await get_breakdown(db, PRODUCTION_PLAN_STATS)
+        checks = await get_breakdown(db, QUALITY_CHECK_STATS)
+        equipment = await get_breakdown(db, EQUIPMENT_STATS)
+        orders = await get_breakdown(db, ORDER_STATS)
+        
         # 生产概览
         production_overview = {
-            'total_plans': db.query(ProductionPlan).count(),
-            'completed_plans': db.query(ProductionPlan).filter(
-                ProductionPlan.status == PlanStatus.COMPLETED
-            ).count(),
-            'in_progress_plans': db.query(ProductionPlan).filter(
-                ProductionPlan.status == PlanStatus.IN_PROGRESS
-            ).count()
+            'total_plans': plans.count(),
+            'completed_plans': plans.count(PlanStatus.COMPLETED),
+            'in_progress_plans': plans.count(PlanStatus.IN_PROGRESS)
         }
         
         # 质量概览
         quality_overview = {
-            'total_checks': db.query(QualityCheck).count(),
-            'passed_checks': db.query(QualityCheck).filter(
-                QualityCheck.result == QualityResult.PASSED
-            ).count(),
-            'failed_checks': db.query(QualityCheck).filter(
-                QualityCheck.result == QualityResult.FAILED
-            ).count()
+            'total_checks': checks.count(),
+            'passed_checks': checks.count(QualityResult.PASS),
+            'failed_checks': checks.count(QualityResult.FAIL)
         }
         
         # 设备概览
         equipment_overview = {
-            'total_equipment': db.query(Equipment).count(),
-            'running_equipment': db.query(Equipment).filter(
-                Equipment.status == EquipmentStatus.RUNNING
-            ).count(),
-            'fault_equipment': db.query(Equipment).filter(
-                Equipment.status == EquipmentStatus.FAULT
-            ).count()
+            'total_equipment': equipment.count(),
+            'running_equipment': equipment.count(EquipmentStatus.RUNNING),
+            'fault_equipment': equipment.count(EquipmentStatus.BREAKDOWN)
         }
         
         # 订单概览
         order_overview = {
-            'total_orders': db.query(Order).count(),
-            'pending_orders': db.query(Order).filter(
-                Order.status == OrderStatus.PENDING
-            ).count(),
-            'completed_orders': db.query(Order).filter(
-                Order.status == OrderStatus.COMPLETED
-            ).count()
+            'total_orders': orders.count(),
+            'pending_orders': orders.count(OrderStatus.PENDING),
+            'completed_orders': orders.count(OrderStatus.COMPLETED)
         }
         
         dashboard_data = {
@@ -505,8 +502,8 @@ async def export_report(
         if report_type == "production":
             # 获取生产报表数据
             filters = [
-                ProductionPlan.planned_start_date >= start_date,
-                ProductionPlan.planned_start_date <= end_date
+                ProductionPlan.plan_start_date >= start_date,
+                ProductionPlan.plan_start_date <= end_date
             ]
             
             if workshop:
@@ -530,21 +527,18 @@ async def export_report(
                     })
             
             # 计算日产量统计
-            daily_production = []
-            current_date = start_date
-            while current_date <= end_date:
-                day_plans = [p for p in plans if p.planned_start_date == current_date]
-                daily_production.append({
-                    'date': current_date.isoformat(),
-                    'count': len(day_plans)
-                })
-                current_date += timedelta(days=1)
+            daily_production = [
+                {'date': point['bucket'].date().isoformat(), 'count': point['count']}
+                for point in bucket_series(
+                    base_query, ProductionPlan.plan_start_date, TimeBucket.DAY, start_date, end_date
+                )
+            ]
             
             # 计算逾期计划
             today = datetime.now().date()
             overdue_plans = len([
                 p for p in plans 
-                if p.planned_end_date < today and p.status in [PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS]
+                if p.plan_end_date < today and p.status in [PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS]
             ])
             
             report_data = {
@@ -557,7 +551,7 @@ async def export_report(
                 "workshop_stats": workshop_stats,
                 "daily_production": daily_production,
                 "efficiency_analysis": {
-                    'on_time_completion_rate': len([p for p in plans if p.status == PlanStatus.COMPLETED and (p.actual_end_date or today) <= p.planned_end_date]) / len(plans) * 100 if plans else 0,
+                    'on_time_completion_rate': len([p for p in plans if p.status == PlanStatus.COMPLETED and (p.actual_end_date or today) <= p.plan_end_date]) / len(plans) * 100 if plans else 0,
                     'average_delay_days': 0,  # 需要根据实际完成时间计算
                     'resource_utilization': sum([p.progress for p in plans]) / len(plans) if plans else 0
                 }
@@ -576,13 +570,13 @@ async def export_report(
             # 计算缺陷分析
             defect_analysis = []
             defect_types = db.query(QualityCheck.defect_type).filter(
-                and_(*filters), QualityCheck.result == QualityResult.FAILED
+                and_(*filters), QualityCheck.result == QualityResult.FAIL
             ).distinct().all()
             
-            total_defects = len([c for c in checks if c.result == QualityResult.FAILED])
+            total_defects = len([c for c in checks if c.result == QualityResult.FAIL])
             for (defect_type,) in defect_types:
                 if defect_type:
-                    count = len([c for c in checks if c.defect_type == defect_type and c.result == QualityResult.FAILED])
+                    count = len([c for c in checks if c.defect_type == defect_type and c.result == QualityResult.FAIL])
                     defect_analysis.append({
                         'defect_type': defect_type,
                         'count': count,
@@ -595,7 +589,7 @@ async def export_report(
             for (product_name,) in products:
                 if product_name:
                     product_checks = [c for c in checks if c.product_name == product_name]
-                    passed = len([c for c in product_checks if c.result == QualityResult.PASSED])
+                    passed = len([c for c in product_checks if c.result == QualityResult.PASS])
                     total = len(product_checks)
                     product_quality.append({
                         'product_name': product_name,
@@ -605,24 +599,24 @@ async def export_report(
                     })
             
             # 计算质量趋势
-            quality_trends = []
-            current_date = start_date
-            while current_date <= end_date:
-                day_checks = [c for c in checks if c.check_date == current_date]
-                passed_checks = len([c for c in day_checks if c.result == QualityResult.PASSED])
-                quality_trends.append({
-                    'date': current_date.isoformat(),
-                    'total_checks': len(day_checks),
-                    'pass_rate': passed_checks / len(day_checks) * 100 if day_checks else 0
-                })
-                current_date += timedelta(days=1)
+            quality_trends = [
+                {
+                    'date': point['bucket'].date().isoformat(),
+                    'total_checks': point['count'],
+                    'pass_rate': point['passed'] / point['count'] * 100 if point['count'] > 0 else 0
+                }
+                for point in bucket_series(
+                    base_query, QualityCheck.check_date, TimeBucket.DAY, start_date, end_date,
+                    passed=func.count(case((QualityCheck.result == QualityResult.PASS, 1)))
+                )
+            ]
             
             report_data = {
                 "total_checks": len(checks),
-                "passed_checks": len([c for c in checks if c.result == QualityResult.PASSED]),
-                "failed_checks": len([c for c in checks if c.result == QualityResult.FAILED]),
-                "pass_rate": len([c for c in checks if c.result == QualityResult.PASSED]) / len(checks) * 100 if checks else 0,
-                "defect_rate": len([c for c in checks if c.result == QualityResult.FAILED]) / len(checks) * 100 if checks else 0,
+                "passed_checks": len([c for c in checks if c.result == QualityResult.PASS]),
+                "failed_checks": len([c for c in checks if c.result == QualityResult.FAIL]),
+                "pass_rate": len([c for c in checks if c.result == QualityResult.PASS]) / len(checks) * 100 if checks else 0,
+                "defect_rate": len([c for c in checks if c.result == QualityResult.FAIL]) / len(checks) * 100 if checks else 0,
                 "quality_trends": quality_trends,
                 "defect_analysis": defect_analysis,
                 "product_quality": product_quality
@@ -633,26 +627,27 @@ async def export_report(
             equipment = db.query(Equipment).all()
             
             # 获取维护记录
-            maintenance_records = db.query(MaintenanceRecord).filter(
+            maintenance_query = db.query(MaintenanceRecord).filter(
                 and_(
-                    MaintenanceRecord.maintenance_date >= start_date,
-                    MaintenanceRecord.maintenance_date <= end_date
+                    MaintenanceRecord.planned_start_time >= start_date,
+                    MaintenanceRecord.planned_start_time <= end_date
                 )
-            ).all()
+            )
+            maintenance_records = maintenance_query.all()
             
             # 计算维护统计
             maintenance_stats = []
             maintenance_types = db.query(MaintenanceRecord.maintenance_type).filter(
                 and_(
-                    MaintenanceRecord.maintenance_date >= start_date,
-                    MaintenanceRecord.maintenance_date <= end_date
+                    MaintenanceRecord.planned_start_time >= start_date,
+                    MaintenanceRecord.planned_start_time <= end_date
                 )
             ).distinct().all()
             
             for (maintenance_type,) in maintenance_types:
                 if maintenance_type:
                     type_records = [r for r in maintenance_records if r.maintenance_type == maintenance_type]
-                    avg_cost = sum([r.cost for r in type_records if r.cost]) / len(type_records) if type_records else 0
+                    avg_cost = sum([r.total_cost for r in type_records if r.total_cost]) / len(type_records) if type_records else 0
                     maintenance_stats.append({
                         'maintenance_type': maintenance_type,
                         'count': len(type_records),
@@ -673,18 +668,18 @@ async def export_report(
                     })
             
             # 计算效率趋势
-            efficiency_trends = []
-            current_date = start_date
-            while current_date <= end_date:
-                day_maintenance = len([r for r in maintenance_records if r.maintenance_date == current_date])
-                running_equipment = len([e for e in equipment if e.status == EquipmentStatus.RUNNING])
-                utilization_rate = running_equipment / len(equipment) * 100 if equipment else 0
-                efficiency_trends.append({
-                    'date': current_date.isoformat(),
+            running_equipment = len([e for e in equipment if e.status == EquipmentStatus.RUNNING])
+            utilization_rate = running_equipment / len(equipment) * 100 if equipment else 0
+            efficiency_trends = [
+                {
+                    'date': point['bucket'].date().isoformat(),
                     'utilization_rate': utilization_rate,
-                    'maintenance_count': day_maintenance
-                })
-                current_date += timedelta(days=1)
+                    'maintenance_count': point['count']
+                }
+                for point in bucket_series(
+                    maintenance_query, MaintenanceRecord.planned_start_time, TimeBucket.DAY, start_date, end_date
+                )
+            ]
             
             report_data = {
                 "total_equipment": len(equipment),
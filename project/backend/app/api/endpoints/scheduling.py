@@ -44,6 +44,7 @@ class ProductionOrderCreate(BaseModel):
     priority: str = Field("NORMAL", description="优先级: LOW, NORMAL, HIGH, URGENT")
     estimated_hours: float = Field(..., gt=0, description="预计工时")
     material_requirements: Dict[str, int] = Field(default_factory=dict, description="物料需求")
+    equipment_type: Optional[str] = Field(None, description="所需设备类型")
 
 
 class EquipmentCreate(BaseModel):
@@ -53,6 +54,7 @@ class EquipmentCreate(BaseModel):
     capacity_per_hour: float = Field(..., gt=0, description="每小时产能")
     available_hours_per_day: float = Field(..., gt=0, le=24, description="每日可用工时")
     maintenance_schedule: List[Dict[str, str]] = Field(default_factory=list, description="维护计划")
+    equipment_type: Optional[str] = Field(None, description="设备类型")
 
 
 class MaterialCreate(BaseModel):
@@ -104,11 +106,12 @@ async def create_production_order(order: ProductionOrderCreate):
             due_date=order.due_date,
             priority=priority,
             estimated_hours=order.estimated_hours,
-            material_requirements=order.material_requirements
+            material_requirements=order.material_requirements,
+            equipment_type=order.equipment_type
         )
         
         # 检查订单是否已存在
-        existing_order = next((o for o in scheduling_service.orders if o.order_id == order.order_id), None)
+        existing_order = scheduling_service.get_order(order.order_id)
         if existing_order:
             raise HTTPException(status_code=400, detail=f"订单 {order.order_id} 已存在")
         
@@ -145,11 +148,12 @@ async def create_equipment(equipment: EquipmentCreate):
             name=equipment.name,
             capacity_per_hour=equipment.capacity_per_hour,
             available_hours_per_day=equipment.available_hours_per_day,
-            maintenance_schedule=maintenance_schedule
+            maintenance_schedule=maintenance_schedule,
+            equipment_type=equipment.equipment_type
         )
         
         # 检查设备是否已存在
-        existing_equipment = next((e for e in scheduling_service.equipment if e.equipment_id == equipment.equipment_id), None)
+        existing_equipment = scheduling_service.get_equipment(equipment.equipment_id)
         if existing_equipment:
             raise HTTPException(status_code=400, detail=f"设备 {equipment.equipment_id} 已存在")
         
@@ -184,7 +188,7 @@ async def create_material(material: MaterialCreate):
         )
         
         # 检查物料是否已存在
-        existing_material = next((m for m in scheduling_service.materials if m.material_code == material.material_code), None)
+        existing_material = scheduling_service.get_material(material.material_code)
         if existing_material:
             raise HTTPException(status_code=400, detail=f"物料 {material.material_code} 已存在")
         
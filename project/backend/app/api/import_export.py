@@ -37,6 +37,8 @@ from ..schemas.import_export import (
 from ..core.exceptions import ValidationException, BusinessException
 from ..core.auth import get_current_user
 from ..core.celery_app import celery_app
+from ..utils.stream_export import EXPORT_FORMATS, MEDIA_TYPES, open_export_stream
+from ..utils.stream_reader import count_rows
 
 router = APIRouter(prefix="/import-export", tags=["数据导入导出"])
 
@@ -114,34 +116,30 @@ async def import_data(
                 f"支持的类型: {', '.join(supported_types)}"
             )
         
-        # 读取Excel文件
-        df = file_service.read_excel(
-            file_path=request.file_path,
-            sheet_name=request.sheet_name,
-            header_row=request.header_row or 0,
-            max_rows=request.max_rows
-        )
-        
-        # 应用字段映射
-        if request.field_mapping:
-            df = df.rename(columns=request.field_mapping)
+        from ..tasks.import_export_tasks import prepare_import_chunk, process_import_data_task
         
-        # 应用过滤条件
-        if request.filters:
-            for field, value in request.filters.items():
-                if field in df.columns:
-                    df = df[df[field] == value]
+        read_options = {
+            'sheet_name': request.sheet_name,
+            'header_row': request.header_row or 0,
+            'max_rows': request.max_rows
+        }
         
-        # 数据验证和清理
-        df = _clean_import_data(df, data_type)
+        # 只读取第一块用于校验和预览，完整数据由后台任务按块读取
+        first_chunk = next(file_service.iter_excel_chunks(request.file_path, **read_options))
+        preview = prepare_import_chunk(first_chunk, data_type, request.field_mapping, request.filters)
+        total_rows = count_rows(request.file_path, **read_options)
         
         # 启动Celery后台任务处理数据
-        from ..tasks.import_export_tasks import process_import_data_task
-        
         task = process_import_data_task.delay(
             data_type=data_type,
-            data=df.to_dict('records'),
-            user_id=current_user.id
+            user_id=current_user.id,
+            file_path=request.file_path,
+            read_options={
+                **read_options,
+                'field_mapping': request.field_mapping,
+                'filters': request.filters
+            },
+            total_rows=total_rows
         )
         task_id = task.id
         
@@ -149,8 +147,8 @@ async def import_data(
             success=True,
             message="数据导入任务已启动",
             task_id=task_id,
-            total_rows=len(df),
-            preview_data=df.head(5).to_dict('records')
+            total_rows=total_rows,
+            preview_data=preview.head(5).to_dict('records')
         )
         
     except Exception as e:
@@ -213,6 +211,51 @@ async def export_data(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/export/{data_type}/stream")
+async def stream_export_data(
+    data_type: str,
+    format: str = Query("csv", description="文件格式：csv/ndjson/xlsx"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    流式导出数据
+    
+    按批从数据库读取并边生成边输出，适合数据量较大的同步下载；
+    CSV/NDJSON 在查询过程中即开始传输，XLSX 在只写模式生成完毕后输出。
+    返回前先查询第一行，参数错误返回400、查询出错返回500；开始传输后出错记录日志并中断传输
+    
+    Args:
+        data_type: 数据类型
+        format: 文件格式
+        db: 数据库会话
+        current_user: 当前用户
+        
+    Returns:
+        StreamingResponse: 导出文件
+    """
+    from ..tasks.import_export_tasks import query_export_rows
+    
+    try:
+        if format not in EXPORT_FORMATS:
+            raise ValidationException(f"不支持的导出格式: {format}，支持: {', '.join(EXPORT_FORMATS)}")
+        rows = query_export_rows(data_type, {}, db)
+        content = open_export_stream(rows, format, sheet_name=data_type)
+    except ValidationException as e:
+        logger.error(f"数据导出失败: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"数据导出失败: {e}")
+        raise HTTPException(status_code=500, detail=f"数据导出失败: {e}")
+    
+    filename = f"{data_type}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
 @router.get("/template/{data_type}")
 async def download_template(
     data_type: str,
@@ -353,63 +396,6 @@ async def get_task_status(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-def _clean_import_data(df: pd.DataFrame, data_type: str) -> pd.DataFrame:
-    """
-    清理导入数据
-    
-    Args:
-        df: 数据框
-        data_type: 数据类型
-        
-    Returns:
-        DataFrame: 清理后的数据
-    """
-    try:
-        # 删除空行
-        df = df.dropna(how='all')
-        
-        # 根据数据类型进行特定清理
-        if data_type == "progress":
-            # 进度数据清理
-            required_columns = ['project_name', 'task_name', 'progress']
-            for col in required_columns:
-                if col not in df.columns:
-                    raise ValidationException(f"缺少必需列: {col}")
-            
-            # 进度值验证
-            if 'progress' in df.columns:
-                df['progress'] = pd.to_numeric(df['progress'], errors='coerce')
-                df = df[df['progress'].between(0, 100)]
-        
-        elif data_type == "equipment":
-            # 设备数据清理
-            required_columns = ['equipment_name', 'equipment_type']
-            for col in required_columns:
-                if col not in df.columns:
-                    raise ValidationException(f"缺少必需列: {col}")
-        
-        elif data_type == "material":
-            # 物料数据清理
-            required_columns = ['material_name', 'material_code']
-            for col in required_columns:
-                if col not in df.columns:
-                    raise ValidationException(f"缺少必需列: {col}")
-        
-        # 通用数据清理
-        # 去除前后空格
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].astype(str).str.strip()
-        
-        # 替换空字符串为None
-        df = df.replace('', None)
-        
-        return df
-        
-    except Exception as e:
-        logger.error(f"数据清理失败: {e}")
-        raise BusinessException(f"数据清理失败: {str(e)}")
-
-
 def _get_template_data(data_type: str) -> List[Dict[str, Any]]:
     """
     获取模板数据
@@ -568,29 +554,24 @@ async def _process_export_data(
     try:
         logger.info(f"开始处理导出任务: {task_id}")
         
-        # 查询数据
-        data = []
+        # 查询数据（逐批读取，边读边写）
+        from ..tasks.import_export_tasks import query_export_rows
         
-        if data_type == "progress":
-            # 查询进度数据
-            pass
-        elif data_type == "equipment":
-            # 查询设备数据
-            pass
-        elif data_type == "material":
-            # 查询物料数据
-            pass
-        # ... 其他数据类型
+        rows = query_export_rows(data_type, request.dict(), db)
         
         # 生成导出文件
         filename = f"{data_type}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        file_info = file_service.generate_export_file(
-            data=data,
+        file_info = file_service.write_export_stream(
+            rows=rows,
             filename=filename,
-            file_format=request.format or "xlsx"
+            file_format=request.format or "xlsx",
+            sheet_name=data_type
         )
         
-        logger.info(f"导出任务完成: {task_id}, 文件: {file_info['filename']}")
+        logger.info(
+            f"导出任务完成: {task_id}, 文件: {file_info['filename']}, "
+            f"记录数: {file_info['record_count']}"
+        )
         
     except Exception as e:
         logger.error(f"处理导出任务失败: {task_id}, {e}")
\ No newline at end of file
@@ -2,13 +2,22 @@
 # -*- coding: utf-8 -*-
 """
 PMC系统缓存管理模块
-提供Redis缓存的统一管理和操作接口
+提供进程内一级缓存 + Redis二级缓存的统一管理和操作接口
 """
 
 import json
+import math
+import asyncio
+import time
+import uuid
+import heapq
 import pickle
+import random
+import inspect
+import fnmatch
 import hashlib
-from typing import Any, Optional, Union, Dict, List, Callable, TypeVar, Generic
+from collections import OrderedDict, defaultdict
+from typing import Any, Optional, Union, Dict, List, Callable, Set, Tuple, TypeVar, Generic
 from datetime import datetime, timedelta
 from functools import wraps
 from contextlib import asynccontextmanager
@@ -24,6 +33,43 @@ logger = get_logger(__name__)
 
 T = TypeVar('T')
 
+# get_or_set 写入的条目标记及未命中哨兵
+_ENTRY_MARKER = "__pmc_cache_entry__"
+_MISSING = object()
+
+# 把键登记到各标签集合，标签集合的过期时间不短于其中的键
+_TAG_KEY_SCRIPT = """
+local ttl = tonumber(ARGV[2])
+for _, tag in ipairs(KEYS) do
+    redis.call("SADD", tag, ARGV[1])
+    if redis.call("PTTL", tag) < ttl then
+        redis.call("PEXPIRE", tag, ttl)
+    end
+end
+return #KEYS
+"""
+
+# 原子地删除标签下的全部键及标签集合，返回被删除的键
+_INVALIDATE_TAGS_SCRIPT = """
+local keys = {}
+for _, tag in ipairs(KEYS) do
+    for _, key in ipairs(redis.call("SMEMBERS", tag)) do
+        redis.call("DEL", key)
+        table.insert(keys, key)
+    end
+    redis.call("DEL", tag)
+end
+return keys
+"""
+
+# 仅当锁仍由自己持有时才删除
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 
 class CacheKeyBuilder:
     """
@@ -127,7 +173,8 @@ class CacheSerializer:
         """
         try:
             if method == "json":
-                return json.loads(data.decode('utf-8'))
+                # 共享的Redis客户端开启了 decode_responses，取到的可能是str
+                return json.loads(data if isinstance(data, str) else data.decode('utf-8'))
             elif method == "pickle":
                 return pickle.loads(data)
             else:
@@ -137,29 +184,275 @@ class CacheSerializer:
             raise
 
 
+class LocalCache:
+    """
+    进程内一级缓存
+    
+    按字节预算限制容量的 LRU 缓存，每个条目带过期时间。容量不足时先清理已过期条目，
+    再按最近最少使用淘汰。缓存的是反序列化后的对象（写入时也先经过序列化往返，与 L2 取到的值一致），
+    调用方不应修改取到的值。
+    仅在事件循环线程内使用，不做加锁。
+    """
+    
+    def __init__(self, max_bytes: int, max_ttl: float):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @property
+    def size_bytes(self) -> int:
+        """当前占用字节数"""
+        return self._bytes
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        获取缓存
+        
+        Returns:
+            Tuple[bool, Any]: (是否命中, 缓存值)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._discard(key)
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+    
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None) -> bool:
+        """
+        设置缓存
+        
+        Args:
+            key: 缓存键
+            value: 缓存值
+            size: 条目大小（字节），通常为序列化后的长度
+            ttl: 过期时间（秒），不超过 max_ttl
+            
+        Returns:
+            bool: 是否写入（超过容量或已过期的条目不写入）
+        """
+        self._discard(key)
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        if ttl <= 0 or size > self.max_bytes:
+            return False
+        
+        expires_at = time.monotonic() + ttl
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        
+        if self._bytes > self.max_bytes:
+            self._evict()
+        elif len(self._expiry_heap) > 2 * len(self._entries) + 64:
+            # 同一键反复写入会在堆中留下失效记录，定期重建
+            self._expiry_heap = [(entry[2], k) for k, entry in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+        return True
+    
+    def expire(self, key: str, ttl: float) -> bool:
+        """重设条目过期时间，返回条目是否存在"""
+        entry = self._entries.get(key)
+        if entry is None or entry[2] <= time.monotonic():
+            return False
+        return self.set(key, entry[0], entry[1], ttl)
+    
+    def remaining_ttl(self, key: str) -> Optional[float]:
+        """条目剩余存活时间（秒），不存在返回None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[2] - time.monotonic()
+        return remaining if remaining > 0 else None
+    
+    def delete(self, *keys: str) -> int:
+        """删除条目，返回删除数量"""
+        return sum(1 for key in keys if self._discard(key))
+    
+    def delete_matching(self, pattern: str) -> int:
+        """按通配符模式删除条目"""
+        matched = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        return self.delete(*matched)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+        self._expiry_heap.clear()
+        self._bytes = 0
+    
+    def _discard(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        return True
+    
+    def _evict(self) -> None:
+        """先清理过期条目，仍超出容量时淘汰最久未使用的条目"""
+        now = time.monotonic()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # 堆中的记录可能已被重新写入的条目取代
+            if entry is not None and entry[2] == expires_at:
+                self._discard(key)
+                self.expirations += 1
+        
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+
 class CacheManager:
     """
     缓存管理器
+    
+    两级缓存：进程内 LocalCache（L1）在前，Redis（L2）在后。
+    - 读：先查 L1，未命中再读 Redis 并回填 L1（L1 过期时间不超过 Redis 剩余TTL）
+    - 写：同时写 L1 和 Redis，并通过 Redis pub/sub 通知其他进程丢弃各自的 L1 条目
+    - Redis 不可用时退化为仅 L1，按 CACHE_REDIS_RETRY_INTERVAL 间隔重试；
+      重新连上后清空 L1，避免使用断连期间已在其他进程失效的值
     """
     
-    def __init__(self, redis_client: Optional[redis.Redis] = None):
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        l1_max_bytes: Optional[int] = None,
+        l1_ttl: Optional[float] = None
+    ):
         self.redis_client = redis_client
         self.key_builder = CacheKeyBuilder()
         self.serializer = CacheSerializer()
-        self.default_ttl = settings.CACHE_DEFAULT_TTL
+        self.default_ttl = settings.CACHE_TTL
+        self.local = LocalCache(
+            l1_max_bytes if l1_max_bytes is not None else settings.CACHE_L1_MAX_BYTES,
+            l1_ttl if l1_ttl is not None else settings.CACHE_L1_TTL
+        )
+        self.invalidation_channel = settings.CACHE_INVALIDATION_CHANNEL
+        self.instance_id = uuid.uuid4().hex
+        self._redis_retry_at = 0.0
+        self._redis_available: Optional[bool] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._local_tags: Dict[str, Set[str]] = defaultdict(set)
+        self._background_tasks = set()
+        self._prefix_stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"l1_hits": 0, "l2_hits": 0, "misses": 0}
+        )
+    
+    async def _get_redis(self) -> Optional[redis.Redis]:
+        """获取Redis客户端，不可用时返回None（仅使用L1）"""
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        
+        try:
+            redis_client = self.redis_client or await get_redis()
+        except Exception as e:
+            self._mark_redis_unavailable(e)
+            return None
+        
+        if self._redis_available is False:
+            logger.info("Redis连接已恢复，清空一级缓存")
+            self.local.clear()
+        self._redis_available = True
+        
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen_invalidations(redis_client))
+        return redis_client
+    
+    def _mark_redis_unavailable(self, error: Exception) -> None:
+        """标记Redis不可用，一段时间内只使用L1"""
+        if self._redis_available is not False:
+            logger.warning(f"Redis不可用，缓存退化为进程内一级缓存: {error}")
+        self._redis_available = False
+        self._redis_retry_at = time.monotonic() + settings.CACHE_REDIS_RETRY_INTERVAL
+    
+    def _invalidation_message(self, **message) -> str:
+        """构建失效通知，keys 为失效的键列表，pattern 为失效的通配符模式"""
+        message["origin"] = self.instance_id
+        return json.dumps(message, ensure_ascii=False)
     
-    async def _get_redis(self) -> redis.Redis:
-        """获取Redis客户端"""
-        if self.redis_client:
-            return self.redis_client
-        return await get_redis()
+    async def _publish_invalidation(self, redis_client: redis.Redis, **message) -> None:
+        """通知其他进程丢弃L1条目"""
+        await redis_client.publish(self.invalidation_channel, self._invalidation_message(**message))
+    
+    async def _listen_invalidations(self, redis_client: redis.Redis) -> None:
+        """订阅失效频道，丢弃其他进程写入或删除的键"""
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(self.invalidation_channel)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                self._apply_invalidation(message.get("data"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 订阅中断期间可能错过失效通知，清空L1，下次访问Redis时重新订阅
+            logger.warning(f"缓存失效订阅中断: {e}")
+            self.local.clear()
+        finally:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+    
+    def _apply_invalidation(self, data: Union[str, bytes, None]) -> None:
+        """处理一条失效通知"""
+        if not data:
+            return
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"无法解析缓存失效通知: {data!r}")
+            return
+        if message.get("origin") == self.instance_id:
+            return
+        if message.get("keys"):
+            self.local.delete(*message["keys"])
+        if message.get("pattern"):
+            self.local.delete_matching(message["pattern"])
+    
+    @staticmethod
+    def _stats_prefix(key: str) -> str:
+        """统计用的键前缀：去掉最后一段，最多保留前三段"""
+        parts = key.split(":")
+        if len(parts) > 1:
+            parts = parts[:-1]
+        return ":".join(parts[:3])
+    
+    def _record(self, key: str, outcome: str) -> None:
+        self._prefix_stats[self._stats_prefix(key)][outcome] += 1
+    
+    async def close(self) -> None:
+        """停止失效订阅"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener_task = None
     
     async def set(
         self,
         key: str,
         value: Any,
         ttl: Optional[int] = None,
-        serialize_method: str = "json"
+        serialize_method: str = "json",
+        tags: Optional[List[str]] = None
     ) -> bool:
         """
         设置缓存
@@ -169,22 +462,57 @@ class CacheManager:
             value: 缓存值
             ttl: 过期时间（秒）
             serialize_method: 序列化方法
+            tags: 缓存标签，如 order:1、order:*，用于 invalidate_tags 精确失效
             
         Returns:
             bool: 是否设置成功
         """
         try:
-            redis_client = await self._get_redis()
-            
             # 序列化数据
             serialized_data = self.serializer.serialize(value, serialize_method)
+            stored = self.serializer.deserialize(serialized_data, serialize_method)
+            return await self._store(key, serialized_data, stored, ttl or self.default_ttl, tags)
+        except Exception as e:
+            log_error(e, {"operation": "cache_set", "key": key})
+            return False
+    
+    async def _store(
+        self,
+        key: str,
+        serialized_data: bytes,
+        stored: Any,
+        ttl: int,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        """写入两级缓存
+        
+        L1 保存序列化后再反序列化得到的值（stored），与 L2 命中及其他进程读到的值一致，
+        调用方之后修改原对象也不会影响缓存。
+        """
+        try:
+            self.local.set(key, stored, len(serialized_data), ttl)
+            for tag in tags or ():
+                self._index_local_tag(tag, key)
             
-            # 设置缓存
-            ttl = ttl or self.default_ttl
-            result = await redis_client.setex(key, ttl, serialized_data)
+            redis_client = await self._get_redis()
+            if redis_client is None:
+                return True
+            
+            # 写入Redis并通知其他进程
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.setex(key, ttl, serialized_data)
+                    if tags:
+                        tag_keys = [self._tag_key(tag) for tag in tags]
+                        pipe.eval(_TAG_KEY_SCRIPT, len(tag_keys), *tag_keys, key, ttl * 1000)
+                    pipe.publish(self.invalidation_channel, self._invalidation_message(keys=[key]))
+                    results = await pipe.execute()
+            except (RedisError, OSError) as e:
+                self._mark_redis_unavailable(e)
+                return True
             
             logger.debug(f"缓存设置成功: {key}, TTL: {ttl}")
-            return bool(result)
+            return bool(results[0])
             
         except Exception as e:
             log_error(e, {"operation": "cache_set", "key": key})
@@ -207,17 +535,37 @@ class CacheManager:
         Returns:
             Any: 缓存值或默认值
         """
+        hit, value = self.local.get(key)
+        if hit:
+            self._record(key, "l1_hits")
+            return value
+        
         try:
             redis_client = await self._get_redis()
+            if redis_client is None:
+                self._record(key, "misses")
+                return default
+            
+            # 一次往返同时取值和剩余TTL
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    pipe.pttl(key)
+                    data, pttl = await pipe.execute()
+            except (RedisError, OSError) as e:
+                self._mark_redis_unavailable(e)
+                self._record(key, "misses")
+                return default
             
-            # 获取缓存数据
-            data = await redis_client.get(key)
             if data is None:
                 logger.debug(f"缓存未命中: {key}")
+                self._record(key, "misses")
                 return default
             
-            # 反序列化数据
+            # 反序列化数据并回填L1
             result = self.serializer.deserialize(data, serialize_method)
+            self.local.set(key, result, len(data), pttl / 1000 if pttl and pttl > 0 else None)
+            self._record(key, "l2_hits")
             logger.debug(f"缓存命中: {key}")
             return result
             
@@ -225,6 +573,54 @@ class CacheManager:
             log_error(e, {"operation": "cache_get", "key": key})
             return default
     
+    def _tag_key(self, tag: str) -> str:
+        """标签集合在Redis中的键"""
+        return self.key_builder.build("tag", tag)
+    
+    def _index_local_tag(self, tag: str, key: str) -> None:
+        """登记进程内标签索引，顺带清理已不在L1中的键"""
+        keys = self._local_tags[tag]
+        keys.add(key)
+        if len(keys) > 2 * len(self.local) + 1024:
+            keys.intersection_update(k for k in list(keys) if self.local.get(k)[0])
+    
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        按标签失效缓存，只删除登记在这些标签下的键
+        
+        Args:
+            *tags: 缓存标签
+            
+        Returns:
+            int: 失效的键数量
+        """
+        if not tags:
+            return 0
+        
+        local_keys = set()
+        for tag in tags:
+            local_keys.update(self._local_tags.pop(tag, ()))
+        self.local.delete(*local_keys)
+        
+        try:
+            redis_client = await self._get_redis()
+            if redis_client is None:
+                return len(local_keys)
+            
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            deleted_keys = set(await redis_client.eval(_INVALIDATE_TAGS_SCRIPT, len(tag_keys), *tag_keys))
+            if deleted_keys:
+                await self._publish_invalidation(redis_client, keys=sorted(deleted_keys))
+            logger.debug(f"按标签失效缓存: {tags}, 失效数量: {len(deleted_keys)}")
+            return len(deleted_keys)
+            
+        except (RedisError, OSError) as e:
+            self._mark_redis_unavailable(e)
+            return len(local_keys)
+        except Exception as e:
+            log_error(e, {"operation": "cache_invalidate_tags", "tags": tags})
+            return 0
+    
     async def delete(self, *keys: str) -> int:
         """
         删除缓存
@@ -235,12 +631,24 @@ class CacheManager:
         Returns:
             int: 删除的键数量
         """
+        if not keys:
+            return 0
+        local_deleted = self.local.delete(*keys)
         try:
             redis_client = await self._get_redis()
-            result = await redis_client.delete(*keys)
+            if redis_client is None:
+                return local_deleted
+            
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(*keys)
+                pipe.publish(self.invalidation_channel, self._invalidation_message(keys=list(keys)))
+                result = (await pipe.execute())[0]
             logger.debug(f"缓存删除: {keys}, 删除数量: {result}")
             return result
             
+        except (RedisError, OSError) as e:
+            self._mark_redis_unavailable(e)
+            return local_deleted
         except Exception as e:
             log_error(e, {"operation": "cache_delete", "keys": keys})
             return 0
@@ -255,8 +663,12 @@ class CacheManager:
         Returns:
             bool: 是否存在
         """
+        if self.local.get(key)[0]:
+            return True
         try:
             redis_client = await self._get_redis()
+            if redis_client is None:
+                return False
             result = await redis_client.exists(key)
             return bool(result)
             
@@ -277,7 +689,15 @@ class CacheManager:
         """
         try:
             redis_client = await self._get_redis()
-            result = await redis_client.expire(key, ttl)
+            if redis_client is None:
+                return self.local.expire(key, ttl)
+            
+            # TTL变化后各进程的L1条目可能比Redis活得更久，统一丢弃
+            self.local.delete(key)
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.expire(key, ttl)
+                pipe.publish(self.invalidation_channel, self._invalidation_message(keys=[key]))
+                result = (await pipe.execute())[0]
             return bool(result)
             
         except Exception as e:
@@ -296,6 +716,9 @@ class CacheManager:
         """
         try:
             redis_client = await self._get_redis()
+            if redis_client is None:
+                remaining = self.local.remaining_ttl(key)
+                return -2 if remaining is None else int(remaining)
             return await redis_client.ttl(key)
             
         except Exception as e:
@@ -316,12 +739,20 @@ class CacheManager:
         """
         try:
             redis_client = await self._get_redis()
+            if redis_client is None:
+                # 仅L1时在进程内计数
+                _, current = self.local.get(key)
+                value = int(current or 0) + amount
+                self.local.set(key, value, len(str(value)), ttl or self.local.remaining_ttl(key) or self.default_ttl)
+                return value
             
-            # 使用管道确保原子性
+            # 使用管道确保原子性，计数以Redis为准
+            self.local.delete(key)
             async with redis_client.pipeline() as pipe:
-                await pipe.incrby(key, amount)
+                pipe.incrby(key, amount)
                 if ttl:
-                    await pipe.expire(key, ttl)
+                    pipe.expire(key, ttl)
+                pipe.publish(self.invalidation_channel, self._invalidation_message(keys=[key]))
                 results = await pipe.execute()
                 
             return results[0]
@@ -329,46 +760,207 @@ class CacheManager:
         except Exception as e:
             log_error(e, {"operation": "cache_increment", "key": key})
             return 0
-    
     async def get_or_set(
         self,
         key: str,
         factory: Callable,
         ttl: Optional[int] = None,
-        serialize_method: str = "json"
+        serialize_method: str = "json",
+        stale_ttl: int = 0,
+        early_expiry_beta: float = 0.0,
+        distributed_lock: bool = False,
+        lock_timeout: float = 10.0,
+        tags: Optional[List[str]] = None
     ) -> Any:
         """
         获取缓存，如果不存在则通过工厂函数生成并设置
         
+        同一进程内同一键的并发未命中只执行一次工厂函数，其余请求等待其结果；
+        工厂函数结果以带逻辑过期时间和计算耗时的条目保存。
+        
         Args:
             key: 缓存键
-            factory: 工厂函数
+            factory: 工厂函数（同步或异步）
             ttl: 过期时间（秒）
             serialize_method: 序列化方法
+            stale_ttl: 过期后仍可返回旧值的时间窗（秒），期间由一个后台任务刷新
+            early_expiry_beta: 概率提前过期系数，0表示关闭；越大越早触发后台刷新
+            distributed_lock: 是否用Redis锁在多进程间只计算一次
+            lock_timeout: Redis锁超时（秒），也是等待其他进程结果的最长时间
+            tags: 缓存标签
             
         Returns:
             Any: 缓存值
         """
+        ttl = ttl or self.default_ttl
+        load_args = (key, factory, ttl, serialize_method, stale_ttl, distributed_lock, lock_timeout, tags)
+        
         # 先尝试获取缓存
-        value = await self.get(key, serialize_method=serialize_method)
-        if value is not None:
-            return value
+        entry = self._unwrap_entry(await self.get(key, default=_MISSING, serialize_method=serialize_method))
+        if entry is not None:
+            value, expires_at, delta = entry
+            now = time.time()
+            if now < expires_at:
+                # XFetch：计算越慢、越接近过期，越可能提前刷新
+                if early_expiry_beta > 0 and now - delta * early_expiry_beta * math.log(1.0 - random.random()) >= expires_at:
+                    self._refresh_in_background(*load_args)
+                return value
+            if now < expires_at + stale_ttl:
+                self._refresh_in_background(*load_args)
+                return value
         
-        # 缓存不存在，通过工厂函数生成
+        # 缓存不存在或已过期，合并并发请求后通过工厂函数生成
+        future = self._inflight.get(key) or self._start_load(*load_args)
         try:
-            if asyncio.iscoroutinefunction(factory):
-                value = await factory()
-            else:
-                value = factory()
-            
-            # 设置缓存
-            await self.set(key, value, ttl, serialize_method)
-            return value
-            
+            return await asyncio.shield(future)
         except Exception as e:
             log_error(e, {"operation": "cache_get_or_set", "key": key})
             raise
     
+    @staticmethod
+    def _unwrap_entry(cached_value: Any) -> Optional[Tuple[Any, float, float]]:
+        """
+        解析 get_or_set 写入的缓存条目
+        
+        Returns:
+            Optional[Tuple]: (值, 逻辑过期时间戳, 计算耗时)；未命中返回None。
+            通过 set 直接写入的普通值视为永不逻辑过期。
+        """
+        if cached_value is _MISSING:
+            return None
+        if isinstance(cached_value, dict) and cached_value.get(_ENTRY_MARKER) == 1:
+            return cached_value["value"], cached_value["expires_at"], cached_value["delta"]
+        return cached_value, float("inf"), 0.0
+    
+    def _start_load(self, key: str, *args) -> asyncio.Future:
+        """登记并启动一次加载，返回供并发请求共同等待的Future"""
+        future = asyncio.get_running_loop().create_future()
+        # 后台刷新失败时没有等待者，避免未读取异常的告警
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        task = asyncio.create_task(self._load(future, key, *args))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return future
+    
+    def _refresh_in_background(self, key: str, *args) -> None:
+        """在后台刷新缓存，同一键同时只有一个刷新任务"""
+        if key not in self._inflight:
+            logger.debug(f"后台刷新缓存: {key}")
+            self._start_load(key, *args)
+    
+    async def _load(
+        self,
+        future: asyncio.Future,
+        key: str,
+        factory: Callable,
+        ttl: int,
+        serialize_method: str,
+        stale_ttl: int,
+        distributed_lock: bool,
+        lock_timeout: float,
+        tags: Optional[List[str]]
+    ) -> None:
+        """执行加载并把结果交给等待者"""
+        try:
+            value = await self._load_value(
+                key, factory, ttl, serialize_method, stale_ttl, distributed_lock, lock_timeout, tags
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(value)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+    
+    async def _load_value(
+        self,
+        key: str,
+        factory: Callable,
+        ttl: int,
+        serialize_method: str,
+        stale_ttl: int,
+        distributed_lock: bool,
+        lock_timeout: float,
+        tags: Optional[List[str]]
+    ) -> Any:
+        """加载缓存值，必要时用Redis锁在进程间去重"""
+        redis_client = await self._get_redis() if distributed_lock else None
+        if redis_client is None:
+            return await self._compute_and_store(key, factory, ttl, serialize_method, stale_ttl, tags)
+        
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis_client.set(lock_key, token, nx=True, px=int(lock_timeout * 1000))
+        except (RedisError, OSError) as e:
+            self._mark_redis_unavailable(e)
+            acquired = True
+            redis_client = None
+        
+        if not acquired:
+            # 其他进程正在计算，等待其写入新值；超时后自行计算
+            value = await self._wait_for_fresh_value(key, serialize_method, lock_timeout)
+            if value is not _MISSING:
+                return value
+            return await self._compute_and_store(key, factory, ttl, serialize_method, stale_ttl, tags)
+        
+        try:
+            return await self._compute_and_store(key, factory, ttl, serialize_method, stale_ttl, tags)
+        finally:
+            if redis_client is not None:
+                try:
+                    await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"释放缓存锁失败: {lock_key}, {e}")
+    
+    async def _wait_for_fresh_value(self, key: str, serialize_method: str, timeout: float) -> Any:
+        """轮询等待未过期的缓存值，超时返回 _MISSING"""
+        deadline = time.monotonic() + timeout
+        interval = 0.02
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 0.2)
+            # 跳过L1，直接看其他进程是否已写入
+            self.local.delete(key)
+            entry = self._unwrap_entry(await self.get(key, default=_MISSING, serialize_method=serialize_method))
+            if entry is not None and time.time() < entry[1]:
+                return entry[0]
+        return _MISSING
+    
+    async def _compute_and_store(
+        self,
+        key: str,
+        factory: Callable,
+        ttl: int,
+        serialize_method: str,
+        stale_ttl: int,
+        tags: Optional[List[str]] = None
+    ) -> Any:
+        """执行工厂函数并写入带逻辑过期时间的条目"""
+        started = time.perf_counter()
+        value = factory()
+        if inspect.isawaitable(value):
+            value = await value
+        delta = time.perf_counter() - started
+        
+        entry = {_ENTRY_MARKER: 1, "value": value, "expires_at": time.time() + ttl, "delta": delta}
+        try:
+            serialized_data = self.serializer.serialize(entry, serialize_method)
+            entry = self.serializer.deserialize(serialized_data, serialize_method)
+        except Exception as e:
+            log_error(e, {"operation": "cache_set", "key": key})
+            return value
+        # 物理TTL包含旧值可用窗口；本次调用方与之后的命中拿到同样经过序列化的值
+        await self._store(key, serialized_data, entry, ttl + stale_ttl, tags)
+        return entry["value"]
+    
     async def mget(self, keys: List[str], serialize_method: str = "json") -> Dict[str, Any]:
         """
         批量获取缓存
@@ -380,29 +972,53 @@ class CacheManager:
         Returns:
             Dict[str, Any]: 键值对字典
         """
+        result = {}
+        missing = []
+        for key in keys:
+            hit, value = self.local.get(key)
+            if hit:
+                self._record(key, "l1_hits")
+                result[key] = value
+            else:
+                missing.append(key)
+        if not missing:
+            return result
+        
         try:
             redis_client = await self._get_redis()
+            if redis_client is None:
+                for key in missing:
+                    self._record(key, "misses")
+                    result[key] = None
+                return result
             
-            # 批量获取
-            values = await redis_client.mget(keys)
+            # 批量获取值和剩余TTL
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.mget(missing)
+                for key in missing:
+                    pipe.pttl(key)
+                responses = await pipe.execute()
+            values, pttls = responses[0], responses[1:]
             
             # 构建结果字典
-            result = {}
-            for key, value in zip(keys, values):
+            for key, value, pttl in zip(missing, values, pttls):
                 if value is not None:
                     try:
                         result[key] = self.serializer.deserialize(value, serialize_method)
+                        self.local.set(key, result[key], len(value), pttl / 1000 if pttl and pttl > 0 else None)
+                        self._record(key, "l2_hits")
                     except Exception as e:
                         logger.warning(f"反序列化失败: {key}, {e}")
                         result[key] = None
                 else:
+                    self._record(key, "misses")
                     result[key] = None
             
             return result
             
         except Exception as e:
             log_error(e, {"operation": "cache_mget", "keys": keys})
-            return {key: None for key in keys}
+            return {key: result.get(key) for key in keys}
     
     async def mset(self, mapping: Dict[str, Any], ttl: Optional[int] = None, serialize_method: str = "json") -> bool:
         """
@@ -417,22 +1033,27 @@ class CacheManager:
             bool: 是否设置成功
         """
         try:
-            redis_client = await self._get_redis()
-            
             # 序列化所有值
             serialized_mapping = {}
             for key, value in mapping.items():
                 serialized_mapping[key] = self.serializer.serialize(value, serialize_method)
+                stored = self.serializer.deserialize(serialized_mapping[key], serialize_method)
+                self.local.set(key, stored, len(serialized_mapping[key]), ttl or self.default_ttl)
+            
+            redis_client = await self._get_redis()
+            if redis_client is None:
+                return True
             
             # 使用管道批量设置
             async with redis_client.pipeline() as pipe:
-                await pipe.mset(serialized_mapping)
+                pipe.mset(serialized_mapping)
                 
                 # 如果指定了TTL，为每个键设置过期时间
                 if ttl:
                     for key in mapping.keys():
-                        await pipe.expire(key, ttl)
+                        pipe.expire(key, ttl)
                 
+                pipe.publish(self.invalidation_channel, self._invalidation_message(keys=list(mapping.keys())))
                 await pipe.execute()
             
             return True
@@ -451,14 +1072,19 @@ class CacheManager:
         Returns:
             int: 删除的键数量
         """
+        local_deleted = self.local.delete_matching(pattern)
         try:
             redis_client = await self._get_redis()
+            if redis_client is None:
+                return local_deleted
             
             # 查找匹配的键
             keys = []
             async for key in redis_client.scan_iter(match=pattern):
                 keys.append(key)
             
+            await self._publish_invalidation(redis_client, pattern=pattern)
+            
             # 批量删除
             if keys:
                 deleted_count = await redis_client.delete(*keys)
@@ -476,13 +1102,35 @@ class CacheManager:
         获取缓存统计信息
         
         Returns:
-            Dict[str, Any]: 统计信息
+            Dict[str, Any]: 统计信息，包含Redis信息、L1状态和按键前缀的命中统计
         """
+        prefixes = {}
+        for prefix, counters in sorted(self._prefix_stats.items()):
+            lookups = counters["l1_hits"] + counters["l2_hits"] + counters["misses"]
+            prefixes[prefix] = dict(
+                counters,
+                hit_rate=round((counters["l1_hits"] + counters["l2_hits"]) / lookups, 4) if lookups else 0.0
+            )
+        
+        stats = {
+            "redis_available": bool(self._redis_available),
+            "l1": {
+                "entries": len(self.local),
+                "size_bytes": self.local.size_bytes,
+                "max_bytes": self.local.max_bytes,
+                "evictions": self.local.evictions,
+                "expirations": self.local.expirations
+            },
+            "prefixes": prefixes
+        }
+        
         try:
             redis_client = await self._get_redis()
+            if redis_client is None:
+                return stats
             info = await redis_client.info()
             
-            return {
+            stats.update({
                 "connected_clients": info.get("connected_clients", 0),
                 "used_memory": info.get("used_memory", 0),
                 "used_memory_human": info.get("used_memory_human", "0B"),
@@ -490,11 +1138,11 @@ class CacheManager:
                 "keyspace_misses": info.get("keyspace_misses", 0),
                 "total_commands_processed": info.get("total_commands_processed", 0),
                 "uptime_in_seconds": info.get("uptime_in_seconds", 0)
-            }
+            })
             
         except Exception as e:
             log_error(e, {"operation": "cache_stats"})
-            return {}
+        return stats
 
 
 # 全局缓存管理器实例
@@ -506,7 +1154,11 @@ def cached(
     ttl: Optional[int] = None,
     key_prefix: str = "",
     serialize_method: str = "json",
-    skip_cache: Callable = None
+    skip_cache: Callable = None,
+    stale_ttl: int = 0,
+    early_expiry_beta: float = 0.0,
+    distributed_lock: bool = False,
+    tags: Union[List[str], Callable[..., List[str]], None] = None
 ):
     """
     缓存装饰器
@@ -516,6 +1168,10 @@ def cached(
         key_prefix: 键前缀
         serialize_method: 序列化方法
         skip_cache: 跳过缓存的条件函数
+        stale_ttl: 过期后仍返回旧值并后台刷新的时间窗（秒）
+        early_expiry_beta: 概率提前过期系数，0表示关闭
+        distributed_lock: 是否用Redis锁在多进程间只计算一次
+        tags: 缓存标签列表，或以被装饰函数参数调用、返回标签列表的函数
     """
     def decorator(func):
         @wraps(func)
@@ -534,45 +1190,45 @@ def cached(
                 **kwargs
             )
             
-            # 尝试从缓存获取
-            cached_result = await cache_manager.get(
-                cache_key,
-                serialize_method=serialize_method
-            )
-            
-            if cached_result is not None:
-                logger.debug(f"缓存命中: {func.__name__}")
-                return cached_result
-            
-            # 执行函数
-            with log_performance(f"cache_miss_{func.__name__}"):
+            async def factory():
+                # 执行函数
+                started = time.perf_counter()
                 if asyncio.iscoroutinefunction(func):
                     result = await func(*args, **kwargs)
                 else:
                     result = func(*args, **kwargs)
+                log_performance(f"cache_miss_{func.__name__}", (time.perf_counter() - started) * 1000)
+                logger.debug(f"缓存设置: {func.__name__}")
+                return result
             
-            # 设置缓存
-            await cache_manager.set(
+            return await cache_manager.get_or_set(
                 cache_key,
-                result,
+                factory,
                 ttl or cache_manager.default_ttl,
-                serialize_method
+                serialize_method,
+                stale_ttl=stale_ttl,
+                early_expiry_beta=early_expiry_beta,
+                distributed_lock=distributed_lock,
+                tags=tags(*args, **kwargs) if callable(tags) else tags
             )
-            
-            logger.debug(f"缓存设置: {func.__name__}")
-            return result
         
         return wrapper
     return decorator
 
 
 # 缓存失效装饰器
-def cache_invalidate(patterns: List[str]):
+def cache_invalidate(
+    patterns: Optional[List[str]] = None,
+    tags: Union[List[str], Callable[..., List[str]], None] = None
+):
     """
     缓存失效装饰器
     
+    优先使用 tags：按标签只删除登记过的键；patterns 需要扫描整个键空间，仅用于兼容。
+    
     Args:
         patterns: 要失效的缓存模式列表
+        tags: 要失效的缓存标签列表，或以被装饰函数参数调用、返回标签列表的函数
     """
     def decorator(func):
         @wraps(func)
@@ -584,7 +1240,9 @@ def cache_invalidate(patterns: List[str]):
                 result = func(*args, **kwargs)
             
             # 失效相关缓存
-            for pattern in patterns:
+            if tags:
+                await cache_manager.invalidate_tags(*(tags(*args, **kwargs) if callable(tags) else tags))
+            for pattern in patterns or ():
                 await cache_manager.clear_pattern(pattern)
             
             return result
@@ -614,13 +1272,32 @@ async def clear_cache_pattern(pattern: str) -> int:
     return await cache_manager.clear_pattern(pattern)
 
 
-# 导入asyncio（如果需要）
-import asyncio
+def entity_tags(entity: str, *entity_ids: Any) -> List[str]:
+    """
+    构建实体写入后需要失效的缓存标签
+    
+    依赖单个实体的缓存登记 "{entity}:{id}"，依赖该类实体集合（列表、统计、报表）的缓存登记 "{entity}:*"；
+    实体写入时两者都需失效。
+    
+    Args:
+        entity: 实体名称，如 order、material、production_plan
+        *entity_ids: 实体ID
+        
+    Returns:
+        List[str]: 标签列表，总是包含 "{entity}:*"
+    """
+    return [f"{entity}:{entity_id}" for entity_id in entity_ids] + [f"{entity}:*"]
+
+
+async def invalidate_entity_cache(entity: str, *entity_ids: Any) -> int:
+    """实体写入后失效其单项缓存及集合类缓存"""
+    return await cache_manager.invalidate_tags(*entity_tags(entity, *entity_ids))
 
 
 # 导出主要接口
 __all__ = [
     'CacheManager',
+    'LocalCache',
     'CacheKeyBuilder',
     'CacheSerializer',
     'cache_manager',
@@ -629,5 +1306,7 @@ __all__ = [
     'get_cache',
     'set_cache',
     'delete_cache',
-    'clear_cache_pattern'
+    'clear_cache_pattern',
+    'entity_tags',
+    'invalidate_entity_cache'
 ]
\ No newline at end of file
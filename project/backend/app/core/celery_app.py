@@ -101,6 +101,10 @@ celery_app.conf.update(
             "task": "generate_weekly_reports",
             "schedule": crontab(hour=6, minute=0, day_of_week=1),  # 每周一早上6点
         },
+        "refresh-report-rollups": {
+            "task": "refresh_report_rollups",
+            "schedule": 600.0,  # 每10分钟，增量刷新报表日汇总
+        },
     },
 )
 
@@ -162,6 +162,11 @@ class Settings(BaseSettings):
     # Redis配置
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # 通知队列配置
+    NOTIFICATION_QUEUE_BACKEND: str = "memory"  # memory：进程内存；redis：Redis流，多进程共享并持久化
+    NOTIFICATION_QUEUE_PREFIX: str = "pmc:notify"  # Redis键前缀
+    NOTIFICATION_QUEUE_VISIBILITY_TIMEOUT: int = 300  # 已取出未确认的项超过该时间（秒）由其他进程接管
+    
     # 邮件配置
     SMTP_TLS: bool = True
     SMTP_PORT: int = 587
@@ -193,6 +198,12 @@ class Settings(BaseSettings):
     SESSION_TIMEOUT: int = 3600  # 1小时
     CACHE_TTL: int = 3600  # 缓存过期时间（秒）
     CACHE_MAX_SIZE: int = 1000  # 缓存最大条目数
+    CACHE_L1_MAX_BYTES: int = 16 * 1024 * 1024  # 进程内一级缓存容量（字节）
+    CACHE_L1_TTL: int = 60  # 一级缓存条目最长存活时间（秒）
+    CACHE_INVALIDATION_CHANNEL: str = "pmc:cache:invalidate"  # 跨进程缓存失效频道
+    CACHE_REDIS_RETRY_INTERVAL: int = 30  # Redis不可用时的重连间隔（秒）
+    STATS_CACHE_TTL: int = 30  # 统计概览与仪表板聚合结果缓存时间（秒）
+    PAGINATION_COUNT_CACHE_TTL: int = 60  # 列表总记录数缓存时间（秒），写入提交后失效
     
     # 中间件配置
     ENABLE_AUTH: bool = True  # 启用认证中间件
@@ -10,7 +10,6 @@ from typing import AsyncGenerator, Optional, Dict, Any
 from contextlib import asynccontextmanager, contextmanager
 from sqlalchemy import create_engine, event, pool
 from sqlalchemy.ext.asyncio import (
-    create_async_engine,
     AsyncSession,
     async_sessionmaker,
     AsyncEngine
@@ -25,6 +24,9 @@ from redis.exceptions import RedisError
 from .config import settings
 from .logging import get_logger, log_error, log_performance
 from .exceptions import DatabaseException, ExternalServiceException
+from ..db import database as base_database
+# 异步引擎与 get_async_db 依赖统一定义在 app.db.database，这里复用并导出
+from ..db.database import dispose_async_engine, get_async_db, get_async_engine
 
 logger = get_logger(__name__)
 
@@ -60,6 +62,12 @@ class DatabaseManager:
             # 初始化数据库连接
             await self._init_database()
             
+            # 初始化异步数据库连接（可选）
+            try:
+                await self._init_async_database()
+            except Exception as e:
+                logger.warning(f"异步数据库连接初始化失败，异步会话不可用: {str(e)}")
+            
             # 初始化Redis连接（可选）
             try:
                 await self._init_redis()
@@ -129,6 +137,19 @@ class DatabaseManager:
         
         logger.info(f"数据库连接初始化完成: {settings.DATABASE_URL}")
     
+    async def _init_async_database(self):
+        """
+        初始化异步数据库连接（与 app.db.database 共用同一个异步引擎和会话工厂）
+        """
+        self.async_engine = get_async_engine()
+        self.async_session_factory = base_database.AsyncSessionLocal
+        
+        # 测试连接
+        async with self.async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        
+        logger.info(f"异步数据库连接初始化完成: {self.async_engine.url.drivername}")
+    
     async def _init_redis(self):
         """
         初始化Redis连接
@@ -233,7 +254,9 @@ class DatabaseManager:
         """
         try:
             if self.async_engine:
-                await self.async_engine.dispose()
+                await dispose_async_engine()
+                self.async_engine = None
+                self.async_session_factory = None
                 logger.info("异步数据库引擎已关闭")
             
             if self.sync_engine:
@@ -271,6 +294,29 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @asynccontextmanager
+    async def get_async_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """
+        获取异步数据库会话
+        
+        Returns:
+            AsyncSession: 异步数据库会话
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        if not self.async_session_factory:
+            raise DatabaseException("异步数据库未初始化")
+        
+        async with self.async_session_factory() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"异步数据库会话错误: {e}")
+                raise
+    
     async def get_redis(self) -> redis.Redis:
         """
         获取Redis客户端
@@ -503,6 +549,7 @@ __all__ = [
     'DatabaseManager',
     'db_manager',
     'get_sync_db',
+    'get_async_db',
     'get_redis',
     'get_db',
     'init_database',
@@ -1,4 +1,7 @@
+from typing import AsyncGenerator, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -16,10 +19,80 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # 创建基础模型类
 Base = declarative_base()
 
+# 同步驱动 -> 异步驱动
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mssql": "mssql+aioodbc",
+}
+
+# 异步引擎在首次使用时创建，避免未安装异步驱动时影响同步路径
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def to_async_database_url(url: str) -> str:
+    """将同步数据库URL转换为对应的异步驱动URL
+
+    sqlite -> aiosqlite，postgresql/psycopg2 -> asyncpg，mssql/pyodbc -> aioodbc
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"不支持的异步数据库类型: {backend}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """获取（必要时创建）异步数据库引擎"""
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        url = to_async_database_url(settings.SQLALCHEMY_DATABASE_URI)
+        engine_kwargs = {"echo": settings.DEBUG, "pool_pre_ping": True}
+        if not url.startswith("sqlite"):
+            # SQLite 使用默认连接池，其余数据库按配置设置连接池大小
+            engine_kwargs.update({
+                "pool_size": settings.DB_POOL_SIZE,
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "pool_timeout": settings.DB_POOL_TIMEOUT,
+                "pool_recycle": settings.DB_POOL_RECYCLE,
+            })
+        async_engine = create_async_engine(url, **engine_kwargs)
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return async_engine
+
+
+async def dispose_async_engine() -> None:
+    """关闭异步数据库引擎"""
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+
+
 def get_db():
     """获取数据库会话"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取异步数据库会话（请求成功时提交，出错时回滚）"""
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
@@ -10,9 +10,11 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.api.api import api_router
-from app.db.database import engine
+from app.db.database import engine, dispose_async_engine
 from app.models import Base
 from app.services.backup_scheduler import backup_scheduler
+from app.services.search_index import init_search_indexes
+from app.services.wechat_client import close_wechat_clients
 
 # 配置日志
 logging.basicConfig(
@@ -34,6 +36,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"数据库表创建失败: {e}")
     
+    # 创建关键词搜索索引（幂等）
+    try:
+        search_indexes = init_search_indexes(engine)
+        logger.info(f"关键词搜索索引就绪: {search_indexes}")
+    except Exception as e:
+        logger.error(f"关键词搜索索引创建失败: {e}")
+    
     # 创建导出目录
     export_dir = "exports"
     os.makedirs(export_dir, exist_ok=True)
@@ -57,6 +66,20 @@ async def lifespan(app: FastAPI):
         logger.info("备份调度器已停止")
     except Exception as e:
         logger.error(f"备份调度器停止失败: {e}")
+    
+    # 关闭异步数据库连接池
+    try:
+        await dispose_async_engine()
+        logger.info("异步数据库连接池已关闭")
+    except Exception as e:
+        logger.error(f"异步数据库连接池关闭失败: {e}")
+    
+    # 关闭企业微信接口连接
+    try:
+        await close_wechat_clients()
+        logger.info("企业微信接口连接已关闭")
+    except Exception as e:
+        logger.error(f"企业微信接口连接关闭失败: {e}")
 
 # 创建FastAPI应用实例
 app = FastAPI(
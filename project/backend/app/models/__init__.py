@@ -7,6 +7,9 @@ from .user import User
 from .equipment import Equipment, MaintenanceRecord, EquipmentOperationLog, EquipmentAlert, EquipmentSpare
 from .notification import Notification, NotificationTemplate, NotificationRule
 from .reminder import ReminderRecord, ReminderRule, ReminderResponse
+from .report_rollup import (
+    ProductionDailyRollup, QualityDailyRollup, MaintenanceDailyRollup, ReportRollupState, ReportRollupDirtyDate
+)
 
 __all__ = [
     "Base",
@@ -29,5 +32,10 @@ __all__ = [
     "NotificationRule",
     "ReminderRecord",
     "ReminderRule",
-    "ReminderResponse"
+    "ReminderResponse",
+    "ProductionDailyRollup",
+    "QualityDailyRollup",
+    "MaintenanceDailyRollup",
+    "ReportRollupState",
+    "ReportRollupDirtyDate"
 ]
\ No newline at end of file
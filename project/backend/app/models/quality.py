@@ -83,13 +83,13 @@ class QualityCheck(Base):
     is_active = Column(Boolean, default=True, comment="是否有效")
     remarks = Column(Text, comment="备注")
     
-    # 关联关系
-    order = relationship("Order", back_populates="quality_checks")
-    production_plan = relationship("ProductionPlan", back_populates="quality_checks")
-    material = relationship("Material", back_populates="quality_checks")
-    inspector = relationship("User", foreign_keys=[inspector_id])
-    reviewer = relationship("User", foreign_keys=[reviewer_id])
-    approver = relationship("User", foreign_keys=[approver_id])
+    # 关联关系（订单、计划、物料、用户模型不在同一个 Base 中，无法按类名解析）
+    # order = relationship("Order", back_populates="quality_checks")
+    # production_plan = relationship("ProductionPlan", back_populates="quality_checks")
+    # material = relationship("Material", back_populates="quality_checks")
+    # inspector = relationship("User", foreign_keys=[inspector_id])
+    # reviewer = relationship("User", foreign_keys=[reviewer_id])
+    # approver = relationship("User", foreign_keys=[approver_id])
 
 
 class QualityStandard(Base):
@@ -125,8 +125,8 @@ class QualityStandard(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
     
     # 关联关系
-    creator = relationship("User", foreign_keys=[created_by])
-    approver = relationship("User", foreign_keys=[approved_by])
+    # creator = relationship("User", foreign_keys=[created_by])
+    # approver = relationship("User", foreign_keys=[approved_by])
 
 
 class QualityDefect(Base):
@@ -229,4 +229,4 @@ class QualityAlert(Base):
     
     # 关联关系
     related_check = relationship("QualityCheck")
-    handler = relationship("User")
\ No newline at end of file
+    # handler = relationship("User")
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""报表日汇总模型
+
+按天预聚合的报表指标，由定时任务增量维护（见 services/report_rollup_service.py）：
+- ProductionDailyRollup: 生产计划，按 计划开始日期 / 车间 / 产品 / 状态
+- QualityDailyRollup: 质量检查，按 检查日期 / 产品 / 检查结果
+- MaintenanceDailyRollup: 设备维护，按 计划开始日期 / 维护类型
+- ReportRollupState: 各汇总表的水位线
+- ReportRollupDirtyDate: 明细行被删除或改到其他日期后，原日期需要重算
+
+维度列以空字符串代替 NULL，保证 (日期, 维度...) 唯一。
+"""
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+
+from ..db.database import Base
+
+
+class ProductionDailyRollup(Base):
+    """生产计划日汇总"""
+    __tablename__ = "production_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("stat_date", "workshop", "product_name", "status", name="uq_production_daily_rollup"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    stat_date = Column(Date, nullable=False, index=True, comment="计划开始日期")
+    workshop = Column(String(50), nullable=False, default="", comment="车间")
+    product_name = Column(String(100), nullable=False, default="", comment="产品名称")
+    status = Column(String(20), nullable=False, default="", comment="计划状态")
+
+    plan_count = Column(Integer, nullable=False, default=0, comment="计划数")
+    quantity = Column(Integer, nullable=False, default=0, comment="计划数量合计")
+    progress_sum = Column(Float, nullable=False, default=0, comment="进度合计")
+    progress_count = Column(Integer, nullable=False, default=0, comment="有进度的计划数")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
+
+
+class QualityDailyRollup(Base):
+    """质量检查日汇总"""
+    __tablename__ = "quality_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("stat_date", "product_name", "result", name="uq_quality_daily_rollup"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    stat_date = Column(Date, nullable=False, index=True, comment="检查日期")
+    product_name = Column(String(200), nullable=False, default="", comment="产品名称")
+    result = Column(String(20), nullable=False, default="", comment="检查结果")
+
+    check_count = Column(Integer, nullable=False, default=0, comment="检查次数")
+    check_quantity = Column(Integer, nullable=False, default=0, comment="检查数量合计")
+    pass_quantity = Column(Integer, nullable=False, default=0, comment="合格数量合计")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
+
+
+class MaintenanceDailyRollup(Base):
+    """设备维护日汇总"""
+    __tablename__ = "maintenance_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("stat_date", "maintenance_type", name="uq_maintenance_daily_rollup"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    stat_date = Column(Date, nullable=False, index=True, comment="维护日期")
+    maintenance_type = Column(String(20), nullable=False, default="", comment="维护类型")
+
+    record_count = Column(Integer, nullable=False, default=0, comment="维护次数")
+    cost_sum = Column(Float, nullable=False, default=0, comment="维护费用合计")
+    cost_count = Column(Integer, nullable=False, default=0, comment="有费用的维护次数")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
+
+
+class ReportRollupState(Base):
+    """汇总表刷新状态
+
+    watermark 为上次刷新开始的时间：此后新增或修改的明细行会在下次刷新时重算其所在日期。
+    早于 watermark 当天的日期视为已被汇总表覆盖。
+    """
+    __tablename__ = "report_rollup_states"
+
+    name = Column(String(50), primary_key=True, comment="汇总名称")
+    watermark = Column(DateTime, comment="水位线")
+    refreshed_at = Column(DateTime, comment="上次刷新完成时间")
+    rows_processed = Column(Integer, default=0, comment="上次刷新重算的日期数")
+
+
+class ReportRollupDirtyDate(Base):
+    """待重算日期（明细行删除或改期时记录原日期）"""
+    __tablename__ = "report_rollup_dirty_dates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rollup = Column(String(50), nullable=False, index=True, comment="汇总名称")
+    stat_date = Column(Date, nullable=False, comment="需要重算的日期")
+    created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
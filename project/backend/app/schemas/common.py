@@ -20,10 +20,11 @@ class PageInfo(BaseModel):
     """分页信息模型"""
     page: int = Field(1, description="当前页码")
     page_size: int = Field(10, description="每页大小")
-    total: int = Field(0, description="总记录数")
-    total_pages: int = Field(0, description="总页数")
+    total: Optional[int] = Field(0, description="总记录数（游标分页且不统计时为空）")
+    total_pages: Optional[int] = Field(0, description="总页数")
     has_next: bool = Field(False, description="是否有下一页")
     has_prev: bool = Field(False, description="是否有上一页")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（游标分页）")
 
 class PagedResponseModel(BaseModel, Generic[T]):
     """分页响应模型"""
@@ -45,6 +46,9 @@ class QueryParams(BaseModel):
     keyword: Optional[str] = Field(None, description="关键词搜索")
     sort_field: Optional[str] = Field(None, description="排序字段")
     sort_order: Optional[str] = Field("desc", pattern="^(asc|desc)$", description="排序方向")
+    cursor: Optional[str] = Field(None, description="分页游标：传空字符串取首页，之后传上一页的 next_cursor；不传时按页码分页")
+    with_total: bool = Field(True, description="游标分页时是否统计总记录数")
+    fast: bool = Field(False, description="快速响应：只查询响应列并直接编码，跳过逐行模型构造")
 
 class DateRangeFilter(BaseModel):
     """日期范围过滤器"""
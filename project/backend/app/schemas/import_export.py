@@ -21,6 +21,7 @@ class FileFormat(str, Enum):
     XLSX = "xlsx"
     XLS = "xls"
     CSV = "csv"
+    NDJSON = "ndjson"
     PDF = "pdf"
     TXT = "txt"
 
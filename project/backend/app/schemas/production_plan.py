@@ -3,7 +3,7 @@ from pydantic import BaseModel, Field, validator
 from datetime import datetime, date
 from decimal import Decimal
 from app.models.production_plan import PlanStatus, PlanPriority, StageStatus
-from app.schemas.common import QueryParams
+from app.schemas.common import QueryParams, ResponseModel
 
 # 生产阶段基础模型
 class ProductionStageBase(BaseModel):
@@ -203,6 +203,10 @@ class ProductionPlanStats(BaseModel):
     monthly_completed_plans: int = Field(..., description="本月完成计划数")
     avg_progress: float = Field(..., description="平均进度")
 
+class AutoScheduleResponse(ResponseModel[List[Dict[str, Any]]]):
+    """自动排程响应，data 为各计划的排程结果"""
+    stats: Optional[Dict[str, Any]] = Field(None, description="排程统计（save: 写回统计，optimization: 优化统计）")
+
 class ProductionPlanStatusUpdate(BaseModel):
     """生产计划状态更新"""
     status: PlanStatus = Field(..., description="新状态")
@@ -0,0 +1,248 @@
+"""批量导入引擎
+
+导入数据按块处理，替代逐行构造模型、逐行查重、逐行更新进度的方式：
+- 校验与类型转换：在 pandas 中按列向量化完成（数值、日期、默认值、派生列），出错行记录行号与原因后跳过
+- 查重：每块一次 IN 查询取出已存在的唯一键，文件内重复的键只保留第一行
+- 写入：每块一次 executemany（insert_records），随后提交
+- 进度：ProgressThrottle 按时间间隔节流回调，避免每行写一次结果后端
+
+输入可以是行字典列表、DataFrame，或逐块产生 DataFrame 的迭代器（流式读取大文件时）。
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 5000
+
+# IN 查询的参数个数上限（SQLite 旧版本为 999）
+_IN_BATCH_SIZE = 900
+
+
+class ProgressThrottle:
+    """按时间间隔节流的进度回调：两次回调至少间隔 interval 秒，force=True 时总是回调"""
+
+    def __init__(self, callback: Optional[Callable[..., None]], interval: float = 1.0):
+        self.callback = callback
+        self.interval = interval
+        self._last = None
+
+    def __call__(self, *args: Any, force: bool = False) -> None:
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if force or self._last is None or now - self._last >= self.interval:
+            self._last = now
+            self.callback(*args)
+
+
+def existing_values(db: Session, column: Any, values: Iterable[Any]) -> Set[Any]:
+    """返回 values 中在 column 上已存在的值（按批 IN 查询）"""
+    values = list({value for value in values if value is not None})
+    found = set()
+    for start in range(0, len(values), _IN_BATCH_SIZE):
+        batch = values[start:start + _IN_BATCH_SIZE]
+        found.update(db.execute(select(column).where(column.in_(batch))).scalars())
+    return found
+
+
+def to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame 转为写入用的字典列表：缺失值为 None，numpy 标量与 Timestamp 转为 Python 类型"""
+    frame = frame.copy()
+    for name in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[name]):
+            values = np.asarray(frame[name].dt.to_pydatetime(), dtype=object)
+            frame[name] = pd.Series(values, index=frame.index, dtype=object)
+    frame = frame.astype(object).where(frame.notna(), None)
+    columns = list(frame.columns)
+    return [dict(zip(columns, row)) for row in frame.itertuples(index=False, name=None)]
+
+
+def insert_records(db: Session, model: Any, records: List[Dict[str, Any]]) -> None:
+    """整块写入：各行字段一致（缺失值为 NULL），在会话的连接上一次 executemany，不经过 ORM 的逐行处理"""
+    if records:
+        db.connection().execute(model.__table__.insert(), records)
+
+
+@dataclass
+class ImportSpec:
+    """一种数据类型的批量导入规则
+
+    columns 为 表头 -> 模型字段；defaults 为值缺失时的默认值；floats / integers / dates 为需要转换的字段，
+    无法转换的行记为错误；derived 为由整块原始数据计算的字段；unique 为查重字段，已存在或文件内重复的行跳过。
+    columns 为空时只计数不写入（尚未实现的数据类型）。
+    """
+    model: Any
+    columns: Dict[str, str] = field(default_factory=dict)
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    floats: Sequence[str] = ()
+    integers: Sequence[str] = ()
+    dates: Sequence[str] = ()
+    date_format: str = "%Y-%m-%d"
+    derived: Dict[str, Callable[[pd.DataFrame], pd.Series]] = field(default_factory=dict)
+    unique: Optional[str] = None
+
+
+@dataclass
+class ImportResult:
+    """导入结果"""
+    total_count: int = 0
+    success_count: int = 0
+    error_count: int = 0
+    skipped_count: int = 0
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self, max_messages: int = 10) -> Dict[str, Any]:
+        return {
+            "total_count": self.total_count,
+            "success_count": self.success_count,
+            "error_count": self.error_count,
+            "skipped_count": self.skipped_count,
+            "errors": self.errors[:max_messages],
+            "warnings": self.warnings[:max_messages],
+        }
+
+
+def iter_chunks(data: Union[pd.DataFrame, List[Dict[str, Any]], Iterable[pd.DataFrame]],
+                chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """把输入切分为 DataFrame 块（迭代器输入按原样逐块产出）"""
+    if isinstance(data, list):
+        for start in range(0, len(data), chunk_size):
+            yield pd.DataFrame(data[start:start + chunk_size])
+    elif isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+    else:
+        yield from data
+
+
+class BatchImporter:
+    """按块校验、查重、写入的导入器"""
+
+    def __init__(
+        self,
+        db: Session,
+        spec: ImportSpec,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        on_progress: Optional[Callable[[ImportResult, Optional[int]], None]] = None,
+        progress_interval: float = 1.0,
+        first_row: int = 1
+    ):
+        self.db = db
+        self.spec = spec
+        self.chunk_size = chunk_size
+        self.progress = ProgressThrottle(on_progress, progress_interval)
+        self.first_row = first_row
+        self._seen: Set[Any] = set()
+
+    def run(self, data: Union[pd.DataFrame, List[Dict[str, Any]], Iterable[pd.DataFrame]]) -> ImportResult:
+        """导入全部数据，每块写入后提交；进度回调参数为 (当前结果, 总行数或 None)"""
+        total = len(data) if isinstance(data, (list, pd.DataFrame)) else None
+        result = ImportResult()
+        row_number = self.first_row
+        for chunk in iter_chunks(data, self.chunk_size):
+            chunk = chunk.reset_index(drop=True)
+            self._import_chunk(chunk, row_number, result)
+            row_number += len(chunk)
+            result.total_count += len(chunk)
+            self.progress(result, total)
+        self.progress(result, total, force=True)
+        return result
+
+    def _import_chunk(self, chunk: pd.DataFrame, first_row: int, result: ImportResult) -> None:
+        frame, errors = self.prepare(chunk)
+        for position, message in errors:
+            result.errors.append(f"第{first_row + position}行数据处理失败: {message}")
+        result.error_count += len(errors)
+
+        frame, duplicates = self._drop_duplicates(frame)
+        for position, key in duplicates:
+            result.warnings.append(f"第{first_row + position}行: {key} 已存在，跳过")
+        result.skipped_count += len(duplicates)
+
+        if frame.empty:
+            return
+        if not self.spec.columns:
+            self._remember_keys(frame)
+            result.success_count += len(frame)
+            return
+        try:
+            insert_records(self.db, self.spec.model, to_records(frame))
+            self.db.commit()
+            # 提交成功后才记录唯一键，回滚的块中的键在后续块中仍可导入
+            self._remember_keys(frame)
+            result.success_count += len(frame)
+        except Exception as e:
+            self.db.rollback()
+            last_row = first_row + len(chunk) - 1
+            result.errors.append(f"第{first_row}-{last_row}行写入失败: {e}")
+            result.error_count += len(frame)
+            logger.error(f"批量写入失败: 第{first_row}-{last_row}行, {e}")
+
+    def prepare(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, List[Tuple[int, str]]]:
+        """按列转换一块原始数据，返回 (有效行, [(块内位置, 错误原因)])"""
+        spec = self.spec
+        frame = pd.DataFrame(index=chunk.index)
+        headers = {}
+        for header, name in spec.columns.items():
+            frame[name] = chunk[header] if header in chunk.columns else None
+            headers[name] = header
+
+        errors: List[Tuple[int, str]] = []
+        invalid = pd.Series(False, index=chunk.index)
+
+        def reject(mask: pd.Series, raw: pd.Series, reason: str) -> None:
+            nonlocal invalid
+            for position in mask[mask & ~invalid].index:
+                errors.append((position, f"{reason}: {raw[position]}"))
+            invalid |= mask
+
+        for name in list(spec.floats) + list(spec.integers):
+            raw = frame[name]
+            values = pd.to_numeric(raw, errors="coerce")
+            reject(raw.notna() & values.isna(), raw, f"{headers[name]}不是有效的数字")
+            if name in spec.defaults:
+                values = values.fillna(spec.defaults[name])
+            if name in spec.integers:
+                values = np.trunc(values).astype("Int64")
+            frame[name] = values
+
+        for name in spec.dates:
+            raw = frame[name]
+            values = pd.to_datetime(raw, format=spec.date_format, errors="coerce")
+            reject(raw.notna() & values.isna(), raw, f"{headers[name]}不是有效的日期")
+            frame[name] = values
+
+        for name, value in spec.defaults.items():
+            if name not in spec.floats and name not in spec.integers:
+                frame[name] = frame[name].where(frame[name].notna(), value)
+
+        for name, compute in spec.derived.items():
+            frame[name] = compute(chunk)
+
+        errors.sort(key=lambda error: error[0])
+        return frame[~invalid], errors
+
+    def _drop_duplicates(self, frame: pd.DataFrame) -> Tuple[pd.DataFrame, List[Tuple[int, Any]]]:
+        """去掉已存在或在本次导入中已写入过的唯一键"""
+        name = self.spec.unique
+        if name is None or frame.empty:
+            return frame, []
+        keys = frame[name]
+        existing = existing_values(self.db, getattr(self.spec.model, name), keys.tolist()) | self._seen
+        duplicated = keys.isin(existing) | (keys.duplicated() & keys.notna())
+        return frame[~duplicated], list(keys[duplicated].items())
+
+    def _remember_keys(self, frame: pd.DataFrame) -> None:
+        """记录已写入的唯一键"""
+        if self.spec.unique is not None:
+            self._seen.update(frame[self.spec.unique].dropna())
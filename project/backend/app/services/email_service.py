@@ -7,8 +7,7 @@
 - 批量邮件发送
 """
 
-import smtplib
-import ssl
+import asyncio
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -22,6 +21,8 @@ from jinja2 import Template
 from loguru import logger
 import os
 
+from .smtp_pool import SMTPConnectionPool
+
 
 @dataclass
 class EmailConfig:
@@ -34,6 +35,10 @@ class EmailConfig:
     use_ssl: bool = False
     sender_name: str = "PMC生产管理系统"
     sender_email: Optional[str] = None
+    pool_size: int = 4  # 最大并发SMTP连接数
+    max_messages_per_connection: int = 100  # 单个连接发送该数量后重建
+    connection_idle_timeout: int = 60  # 空闲连接保留时间（秒）
+    timeout: int = 30  # SMTP连接超时（秒）
     
     def __post_init__(self):
         if not self.sender_email:
@@ -82,6 +87,19 @@ class EmailService:
     def __init__(self, config: EmailConfig):
         self.config = config
         self.templates = self._load_default_templates()
+        # 复用已登录的SMTP连接，发送在连接池线程中执行
+        self.pool = SMTPConnectionPool(
+            host=config.smtp_server,
+            port=config.smtp_port,
+            username=config.username,
+            password=config.password,
+            use_tls=config.use_tls,
+            use_ssl=config.use_ssl,
+            size=config.pool_size,
+            max_messages=config.max_messages_per_connection,
+            idle_timeout=config.connection_idle_timeout,
+            timeout=config.timeout
+        )
         
     def _load_default_templates(self) -> Dict[str, EmailTemplate]:
         """加载默认邮件模板"""
@@ -339,12 +357,8 @@ class EmailService:
             return False
     
     async def send_batch_emails(self, messages: List[EmailMessage]) -> List[bool]:
-        """批量发送邮件"""
-        results = []
-        for message in messages:
-            result = await self.send_email(message)
-            results.append(result)
-        return results
+        """批量发送邮件（并发数受连接池大小限制，结果与 messages 顺序一致）"""
+        return list(await asyncio.gather(*(self.send_email(message) for message in messages)))
     
     def _add_attachment(self, msg: MIMEMultipart, file_path: str):
         """添加附件"""
@@ -367,23 +381,9 @@ class EmailService:
     async def _send_smtp(self, msg: MIMEMultipart, recipients: List[str]) -> bool:
         """通过SMTP发送邮件"""
         try:
-            # 创建SMTP连接
-            if self.config.use_ssl:
-                context = ssl.create_default_context()
-                server = smtplib.SMTP_SSL(self.config.smtp_server, self.config.smtp_port, context=context)
-            else:
-                server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port)
-                if self.config.use_tls:
-                    context = ssl.create_default_context()
-                    server.starttls(context=context)
-            
-            # 登录
-            server.login(self.config.username, self.config.password)
-            
-            # 发送邮件
+            # 通过连接池发送（复用已登录的连接）
             text = msg.as_string()
-            server.sendmail(self.config.sender_email, recipients, text)
-            server.quit()
+            await self.pool.send(self.config.sender_email, recipients, text)
             
             logger.info(f"Email sent successfully to {recipients}")
             return True
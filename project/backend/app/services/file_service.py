@@ -13,7 +13,7 @@
 import os
 import uuid
 import shutil
-from typing import List, Dict, Any, Optional, Union, BinaryIO
+from typing import List, Dict, Any, Optional, Union, BinaryIO, Callable, Iterable, Iterator
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
@@ -26,6 +26,8 @@ import hashlib
 
 from ..core.config import settings
 from ..core.exceptions import ValidationException, BusinessException
+from ..utils.stream_export import write_export
+from ..utils.stream_reader import READ_CHUNK_SIZE, iter_table_chunks, read_table
 
 
 class FileService:
@@ -184,21 +186,13 @@ class FileService:
             if not file_path.exists():
                 raise FileNotFoundError(f"文件不存在: {file_path}")
             
-            # 读取Excel文件
-            if file_path.suffix.lower() == '.csv':
-                df = pd.read_csv(
-                    file_path, 
-                    header=header_row,
-                    nrows=max_rows,
-                    encoding='utf-8-sig'
-                )
-            else:
-                df = pd.read_excel(
-                    file_path,
-                    sheet_name=sheet_name,
-                    header=header_row,
-                    nrows=max_rows
-                )
+            # 读取Excel文件（CSV按后缀识别）
+            df = read_table(
+                file_path,
+                sheet_name=sheet_name,
+                header_row=header_row,
+                max_rows=max_rows
+            )
             
             # 清理数据
             df = df.dropna(how='all')  # 删除全空行
@@ -211,6 +205,45 @@ class FileService:
             logger.error(f"读取Excel文件失败: {e}")
             raise BusinessException(f"读取Excel文件失败: {str(e)}")
     
+    def iter_excel_chunks(
+        self,
+        file_path: Union[str, Path],
+        sheet_name: Optional[str] = None,
+        header_row: int = 0,
+        max_rows: Optional[int] = None,
+        chunk_size: int = READ_CHUNK_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        """
+        按块读取Excel文件，内存占用与文件行数无关
+        
+        Args:
+            file_path: 文件路径
+            sheet_name: 工作表名称
+            header_row: 标题行索引
+            max_rows: 最大读取行数
+            chunk_size: 每块行数
+            
+        Returns:
+            Iterator[DataFrame]: 数据块（已删除全空行）
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise BusinessException(f"读取Excel文件失败: 文件不存在: {file_path}")
+        
+        try:
+            for chunk in iter_table_chunks(
+                file_path,
+                chunk_size=chunk_size,
+                sheet_name=sheet_name,
+                header_row=header_row,
+                max_rows=max_rows
+            ):
+                chunk.columns = chunk.columns.astype(str)
+                yield chunk
+        except Exception as e:
+            logger.error(f"读取Excel文件失败: {e}")
+            raise BusinessException(f"读取Excel文件失败: {str(e)}")
+    
     def write_excel(
         self, 
         data: Union[pd.DataFrame, List[Dict[str, Any]]], 
@@ -413,6 +446,59 @@ class FileService:
             logger.error(f"生成导出文件失败: {e}")
             raise BusinessException(f"生成导出文件失败: {str(e)}")
     
+    def write_export_stream(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        filename: str,
+        file_format: str = "xlsx",
+        sheet_name: str = "Sheet1",
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        流式生成导出文件
+        
+        逐行写出（CSV/NDJSON 分块写入，XLSX 使用只写模式），不在内存中保留全部数据
+        
+        Args:
+            rows: 行数据迭代器
+            filename: 文件名
+            file_format: 文件格式（csv/ndjson/xlsx）
+            sheet_name: 工作表名称（XLSX）
+            on_progress: 进度回调，参数为已写出行数
+            
+        Returns:
+            Dict: 文件信息（含记录数）
+        """
+        try:
+            file_format = str(getattr(file_format, "value", file_format)).lower()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_id = str(uuid.uuid4())[:8]
+            
+            if not filename.endswith(f'.{file_format}'):
+                filename = f"{filename}_{timestamp}_{file_id}.{file_format}"
+            
+            file_path = self.export_dir / filename
+            record_count = write_export(rows, file_path, file_format, sheet_name, on_progress=on_progress)
+            
+            file_info = {
+                "file_id": file_id,
+                "filename": filename,
+                "file_path": str(file_path),
+                "file_url": f"/api/files/exports/{filename}",
+                "file_size": file_path.stat().st_size,
+                "file_format": file_format,
+                "record_count": record_count,
+                "created_time": datetime.now(),
+                "status": "ready"
+            }
+            
+            logger.info(f"成功生成导出文件: {filename}, 记录数: {record_count}")
+            return file_info
+            
+        except Exception as e:
+            logger.error(f"生成导出文件失败: {e}")
+            raise BusinessException(f"生成导出文件失败: {str(e)}")
+    
     def delete_file(self, file_path: Union[str, Path]) -> bool:
         """
         删除文件
@@ -0,0 +1,193 @@
+"""通知批量发送调度
+
+按渠道累积批量项，满足任一条件即取出一批发送：
+- 批量队列达到批量大小（size）
+- 最早一项已等待超过最长等待时间（interval，秒）
+批量发送在固定大小的线程池中执行。线程池占满时暂停取数（背压），批量项留在队列后端中，
+批量队列超过上限后新通知改走单条发送（见 NotificationQueueService._should_batch）。
+每个渠道记录批次数、批量大小、等待时间（最早一项入队到开始发送）和发送耗时。
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import BoundedSemaphore, Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from .notification_queue_backends import QueueItem
+
+# 没有待发送的批次时的检查间隔（秒），其他进程加入的批量项最迟在该间隔后被发现
+BATCH_CHECK_INTERVAL = 1.0
+
+
+@dataclass
+class BatchMetrics:
+    """单个渠道的批量发送指标"""
+    batches: int = 0
+    items: int = 0
+    max_size: int = 0
+    failed_batches: int = 0
+    flush_reasons: Dict[str, int] = field(default_factory=lambda: {"size": 0, "latency": 0})
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    backpressure_count: int = 0
+
+    def record(self, size: int, reason: str, wait: float, duration: float, success: bool):
+        self.batches += 1
+        self.items += size
+        self.max_size = max(self.max_size, size)
+        self.flush_reasons[reason] += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+        if not success:
+            self.failed_batches += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        batches = self.batches or 1
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_size": round(self.items / batches, 2),
+            "max_size": self.max_size,
+            "failed_batches": self.failed_batches,
+            "flush_reasons": dict(self.flush_reasons),
+            "avg_wait_seconds": round(self.total_wait / batches, 3),
+            "max_wait_seconds": round(self.max_wait, 3),
+            "avg_duration_seconds": round(self.total_duration / batches, 3),
+            "max_duration_seconds": round(self.max_duration, 3),
+            "backpressure_count": self.backpressure_count
+        }
+
+
+class NotificationBatcher:
+    """按大小或最长等待时间取出批次，在有界线程池中发送"""
+
+    def __init__(
+        self,
+        backend: Any,
+        configs: Dict[str, Dict[str, float]],
+        flush: Callable[[str, List[QueueItem]], bool],
+        workers: int = 4,
+        check_interval: float = BATCH_CHECK_INTERVAL,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        self.backend = backend
+        self.configs = configs
+        self.flush = flush
+        self.workers = workers
+        self.check_interval = check_interval
+        self._clock = clock
+
+        self._slots = BoundedSemaphore(workers)
+        self._wakeup = Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[Thread] = None
+        self._running = False
+        self._active = 0
+        self._metrics = {channel: BatchMetrics() for channel in configs}
+        self._metrics_lock = Lock()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="notify-batch")
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info(f"Batch processor started with {self.workers} workers")
+
+    def stop(self, timeout: float = 5):
+        """停止调度并等待已提交的批次发送完成"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        logger.info("Batch processor stopped")
+
+    def notify(self, channel: str):
+        """加入批量项后调用：达到批量大小，或队列中的第一项开始计算等待时间时唤醒调度线程"""
+        config = self.configs.get(channel)
+        if config is None:
+            return
+        size = self.backend.batch_size(channel)
+        if size == 1 or size >= config["size"]:
+            self._wakeup.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """各渠道的批量发送指标及线程池占用"""
+        with self._metrics_lock:
+            return {
+                "workers": self.workers,
+                "active": self._active,
+                "channels": {channel: metrics.to_dict() for channel, metrics in self._metrics.items()}
+            }
+
+    def _run(self):
+        while self._running:
+            # 先清除唤醒标志再检查，检查期间的唤醒不会丢失
+            self._wakeup.clear()
+            try:
+                wait = self._flush_due()
+            except Exception as e:
+                logger.error(f"Batch processor error: {e}")
+                wait = self.check_interval
+            self._wakeup.wait(wait)
+
+    def _flush_due(self) -> float:
+        """取出所有满足条件的批次，返回距下一个批次到期的秒数"""
+        self.backend.recover_batches()
+        next_check = self.check_interval
+        for channel, config in self.configs.items():
+            while True:
+                size = self.backend.batch_size(channel)
+                if size == 0:
+                    break
+                oldest = self.backend.oldest_batch_time(channel)
+                waited = (self._clock() - oldest).total_seconds() if oldest else 0.0
+                if size >= config["size"]:
+                    reason = "size"
+                elif waited >= config["interval"]:
+                    reason = "latency"
+                else:
+                    next_check = min(next_check, config["interval"] - waited)
+                    break
+
+                if not self._slots.acquire(blocking=False):
+                    # 线程池已满：暂停取数，有批次发送完成时再检查
+                    with self._metrics_lock:
+                        self._metrics[channel].backpressure_count += 1
+                    return self.check_interval
+
+                items = self.backend.pop_batch(channel, int(config["size"]))
+                if not items:
+                    self._slots.release()
+                    break
+                with self._metrics_lock:
+                    self._active += 1
+                self._executor.submit(self._execute, channel, items, reason, max(waited, 0.0))
+        return max(next_check, 0.01)
+
+    def _execute(self, channel: str, items: List[QueueItem], reason: str, waited: float):
+        started = time.monotonic()
+        success = False
+        try:
+            success = bool(self.flush(channel, items))
+        except Exception as e:
+            # 批量项保持处理中，由后端按可见性超时放回
+            logger.error(f"Batch {channel} flush error: {e}")
+        finally:
+            duration = time.monotonic() - started
+            with self._metrics_lock:
+                self._active -= 1
+                self._metrics[channel].record(len(items), reason, waited, duration, success)
+            self._slots.release()
+            self._wakeup.set()
@@ -13,12 +13,16 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 from loguru import logger
 
 from ..models.notification import Notification, NotificationStatus, NotificationPriority, NotificationChannel
 from ..models.user import User
 from ..database import get_db
+from ..utils.time_buckets import TimeBucket, bucket_series
+
+# 视为发送成功的状态
+SENT_STATUSES = [NotificationStatus.SENT, NotificationStatus.DELIVERED, NotificationStatus.READ]
 
 
 @dataclass
@@ -463,48 +467,23 @@ class NotificationHistoryService:
     
     def _get_daily_stats(self, channel: str, start_date: Optional[datetime],
                         end_date: Optional[datetime]) -> List[Dict[str, Any]]:
-        """获取每日统计"""
+        """获取每日统计（一条按天分组的查询，没有通知的日期补0）"""
         try:
-            query = self.db.query(
-                func.date(Notification.created_at).label('date'),
-                func.count(Notification.id).label('total'),
-                func.sum(
-                    func.case(
-                        [(Notification.status.in_([
-                            NotificationStatus.SENT,
-                            NotificationStatus.DELIVERED,
-                            NotificationStatus.READ
-                        ]), 1)],
-                        else_=0
-                    )
-                ).label('sent'),
-                func.sum(
-                    func.case(
-                        [(Notification.status == NotificationStatus.FAILED, 1)],
-                        else_=0
-                    )
-                ).label('failed')
-            ).filter(Notification.channel == NotificationChannel(channel))
-            
-            if start_date:
-                query = query.filter(Notification.created_at >= start_date)
-            if end_date:
-                query = query.filter(Notification.created_at <= end_date)
-            
-            results = query.group_by(
-                func.date(Notification.created_at)
-            ).order_by(
-                func.date(Notification.created_at)
-            ).all()
+            query = self._channel_query(channel, start_date, end_date)
+            series = bucket_series(
+                query, Notification.created_at, TimeBucket.DAY, start_date, end_date,
+                sent=func.count(case((Notification.status.in_(SENT_STATUSES), 1))),
+                failed=func.count(case((Notification.status == NotificationStatus.FAILED, 1)))
+            )
             
             daily_stats = []
-            for result in results:
+            for point in series:
                 daily_stats.append({
-                    'date': result.date.isoformat(),
-                    'total': result.total,
-                    'sent': result.sent or 0,
-                    'failed': result.failed or 0,
-                    'success_rate': round((result.sent or 0) / result.total * 100, 2) if result.total > 0 else 0
+                    'date': point['bucket'].date().isoformat(),
+                    'total': point['count'],
+                    'sent': point['sent'],
+                    'failed': point['failed'],
+                    'success_rate': round(point['sent'] / point['count'] * 100, 2) if point['count'] > 0 else 0
                 })
             
             return daily_stats
@@ -515,48 +494,32 @@ class NotificationHistoryService:
     
     def _get_hourly_stats(self, channel: str, start_date: Optional[datetime],
                          end_date: Optional[datetime]) -> List[Dict[str, Any]]:
-        """获取每小时统计"""
+        """获取每小时统计（按一天中的小时汇总，0-23时均返回）"""
         try:
             # 只获取最近24小时的数据
             if not start_date:
                 start_date = datetime.now() - timedelta(hours=24)
             
-            query = self.db.query(
-                func.extract('hour', Notification.created_at).label('hour'),
-                func.count(Notification.id).label('total'),
-                func.sum(
-                    func.case(
-                        [(Notification.status.in_([
-                            NotificationStatus.SENT,
-                            NotificationStatus.DELIVERED,
-                            NotificationStatus.READ
-                        ]), 1)],
-                        else_=0
-                    )
-                ).label('sent')
-            ).filter(
-                and_(
-                    Notification.channel == NotificationChannel(channel),
-                    Notification.created_at >= start_date
-                )
+            query = self._channel_query(channel, start_date, end_date)
+            series = bucket_series(
+                query, Notification.created_at, TimeBucket.HOUR,
+                sent=func.count(case((Notification.status.in_(SENT_STATUSES), 1)))
             )
             
-            if end_date:
-                query = query.filter(Notification.created_at <= end_date)
-            
-            results = query.group_by(
-                func.extract('hour', Notification.created_at)
-            ).order_by(
-                func.extract('hour', Notification.created_at)
-            ).all()
+            # 跨天的数据合并到同一小时
+            totals = [0] * 24
+            sent = [0] * 24
+            for point in series:
+                totals[point['bucket'].hour] += point['count']
+                sent[point['bucket'].hour] += point['sent']
             
             hourly_stats = []
-            for result in results:
+            for hour in range(24):
                 hourly_stats.append({
-                    'hour': int(result.hour),
-                    'total': result.total,
-                    'sent': result.sent or 0,
-                    'success_rate': round((result.sent or 0) / result.total * 100, 2) if result.total > 0 else 0
+                    'hour': hour,
+                    'total': totals[hour],
+                    'sent': sent[hour],
+                    'success_rate': round(sent[hour] / totals[hour] * 100, 2) if totals[hour] > 0 else 0
                 })
             
             return hourly_stats
@@ -565,6 +528,16 @@ class NotificationHistoryService:
             logger.error(f"Error getting hourly stats: {e}")
             return []
     
+    def _channel_query(self, channel: str, start_date: Optional[datetime],
+                       end_date: Optional[datetime]):
+        """指定渠道、时间范围内的通知查询"""
+        query = self.db.query(Notification).filter(Notification.channel == NotificationChannel(channel))
+        if start_date:
+            query = query.filter(Notification.created_at >= start_date)
+        if end_date:
+            query = query.filter(Notification.created_at <= end_date)
+        return query
+    
     def _get_user_channel_preferences(self, user_id: int,
                                      start_date: Optional[datetime],
                                      end_date: Optional[datetime]) -> Dict[str, int]:
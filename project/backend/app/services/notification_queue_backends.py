@@ -0,0 +1,590 @@
+"""通知队列存储后端
+
+NotificationQueueService 的队列项存放在后端中，服务本身只负责调度工作线程和发送：
+- MemoryQueueBackend：进程内存（延迟队列 + 字典），单进程使用，重启后丢失
+- RedisStreamQueueBackend：Redis 持久化，多个进程（多个 uvicorn worker）共享同一队列
+
+Redis 后端的数据结构（键前缀默认为 pmc:notify）：
+- {prefix}:items        哈希，队列项 ID -> 队列项 JSON（含状态）
+- {prefix}:delayed      有序集合，"优先级|ID" -> 计划时间；到期后由 Lua 脚本原子地移入就绪流
+- {prefix}:ready:{n}    按优先级划分的流（0-3），消费组 workers；优先读取高优先级的流
+- {prefix}:batch:{ch}   列表，等待批量发送的队列项 ID
+- {prefix}:inflight     有序集合，"渠道|ID" -> 可见性超时时间，记录已取出、尚未完成的批量项
+- {prefix}:completed / {prefix}:failed  有序集合，ID -> 创建时间，用于计数和清理
+
+投递语义为至少一次：流消息在处理完成后才 XACK；处理中的进程退出后，消息空闲超过
+可见性超时即由其他消费者通过 XAUTOCLAIM 接管。批量项同理，超时未完成的重新放回批量列表。
+"""
+
+import json
+import os
+import socket
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from enum import Enum
+from queue import Empty
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from redis import Redis
+from redis.exceptions import ResponseError
+
+from ..utils.delay_queue import DelayQueue
+
+# 优先级排序值（越大越先处理）
+PRIORITY_RANKS = {
+    "low": 0,
+    "normal": 1,
+    "medium": 1,
+    "high": 2,
+    "urgent": 3
+}
+
+_MAX_RANK = max(PRIORITY_RANKS.values())
+
+
+def _priority_rank(priority: Any) -> int:
+    if isinstance(priority, int):
+        return max(0, min(priority, _MAX_RANK))
+    return PRIORITY_RANKS.get(str(getattr(priority, "value", priority)).lower(), PRIORITY_RANKS["normal"])
+
+
+class QueueStatus(Enum):
+    """队列状态"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    RETRYING = "retrying"
+
+
+@dataclass
+class QueueItem:
+    """队列项"""
+    id: str
+    notification_id: int
+    priority: int
+    channel: str
+    recipient: str
+    content: Dict[str, Any]
+    retry_count: int = 0
+    max_retries: int = 3
+    created_at: datetime = None
+    scheduled_at: datetime = None
+    status: QueueStatus = QueueStatus.PENDING
+    error_message: Optional[str] = None
+
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now()
+        if self.scheduled_at is None:
+            self.scheduled_at = datetime.now()
+
+    def __lt__(self, other):
+        # 优先级队列排序：优先级高的先处理，时间早的先处理
+        if self.priority != other.priority:
+            return self.priority > other.priority
+        return self.scheduled_at < other.scheduled_at
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["status"] = self.status.value
+        data["created_at"] = self.created_at.isoformat()
+        data["scheduled_at"] = self.scheduled_at.isoformat()
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+    @classmethod
+    def from_json(cls, raw: Any) -> "QueueItem":
+        data = json.loads(raw)
+        data["status"] = QueueStatus(data["status"])
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["scheduled_at"] = datetime.fromisoformat(data["scheduled_at"])
+        return cls(**data)
+
+
+# 查询队列项状态时返回的状态名
+_ITEM_STATUS_NAMES = {
+    QueueStatus.PROCESSING: "processing",
+    QueueStatus.COMPLETED: "completed",
+    QueueStatus.FAILED: "failed"
+}
+
+
+class MemoryQueueBackend:
+    """进程内存后端"""
+
+    def __init__(self):
+        self.queue = DelayQueue()
+        self.batch_queues: Dict[str, List[QueueItem]] = {}
+        self.processing_items: Dict[str, QueueItem] = {}
+        self.completed_items: Dict[str, QueueItem] = {}
+        self.failed_items: Dict[str, QueueItem] = {}
+        self.lock = Lock()
+
+    def enqueue(self, item: QueueItem):
+        """按计划时间和优先级加入延迟队列"""
+        self.queue.put(item, due=item.scheduled_at, priority=_priority_rank(item.priority))
+
+    def reserve(self, consumer: str, timeout: float) -> Optional[QueueItem]:
+        """取出一个已到期的队列项并标记为处理中，超时返回 None"""
+        try:
+            item = self.queue.get(timeout=timeout)
+        except Empty:
+            return None
+        with self.lock:
+            item.status = QueueStatus.PROCESSING
+            self.processing_items[item.id] = item
+        return item
+
+    def complete(self, item: QueueItem):
+        with self.lock:
+            self.processing_items.pop(item.id, None)
+            item.status = QueueStatus.COMPLETED
+            self.completed_items[item.id] = item
+
+    def retry(self, item: QueueItem):
+        """重新入队（计划时间由调用方设置）"""
+        with self.lock:
+            self.processing_items.pop(item.id, None)
+            item.status = QueueStatus.RETRYING
+        self.enqueue(item)
+
+    def fail(self, item: QueueItem):
+        with self.lock:
+            self.processing_items.pop(item.id, None)
+            item.status = QueueStatus.FAILED
+            self.failed_items[item.id] = item
+
+    def take_failed(self, item_id: str) -> Optional[QueueItem]:
+        """取出一个失败项（用于手动重试）"""
+        with self.lock:
+            return self.failed_items.pop(item_id, None)
+
+    def push_batch(self, channel: str, item: QueueItem):
+        with self.lock:
+            self.batch_queues.setdefault(channel, []).append(item)
+
+    def pop_batch(self, channel: str, size: int) -> List[QueueItem]:
+        """取出最多 size 个批量项并标记为处理中"""
+        with self.lock:
+            items = self.batch_queues.get(channel, [])
+            batch, self.batch_queues[channel] = items[:size], items[size:]
+            for item in batch:
+                item.status = QueueStatus.PROCESSING
+                self.processing_items[item.id] = item
+            return batch
+
+    def batch_size(self, channel: str) -> int:
+        with self.lock:
+            return len(self.batch_queues.get(channel, []))
+
+    def oldest_batch_time(self, channel: str) -> Optional[datetime]:
+        """批量队列中最早一项的创建时间，队列为空时返回 None"""
+        with self.lock:
+            items = self.batch_queues.get(channel)
+            return items[0].created_at if items else None
+
+    def recover_batches(self) -> int:
+        # 进程内存中的批量项随进程退出一起丢失，没有需要放回的项
+        return 0
+
+    def get_item(self, item_id: str) -> Optional[Tuple[str, QueueItem]]:
+        """返回 (状态名, 队列项)，不在处理中、已完成、已失败或批量队列中时返回 None"""
+        with self.lock:
+            if item_id in self.processing_items:
+                return "processing", self.processing_items[item_id]
+            elif item_id in self.completed_items:
+                return "completed", self.completed_items[item_id]
+            elif item_id in self.failed_items:
+                return "failed", self.failed_items[item_id]
+            for items in self.batch_queues.values():
+                for item in items:
+                    if item.id == item_id:
+                        return "pending_batch", item
+            return None
+
+    def stats(self, channels: List[str]) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "queue_size": self.queue.qsize(),
+                "delayed_count": self.queue.delayed_count(),
+                "batch_queues": {
+                    channel: len(self.batch_queues.get(channel, [])) for channel in channels
+                },
+                "processing_count": len(self.processing_items),
+                "completed_count": len(self.completed_items),
+                "failed_count": len(self.failed_items)
+            }
+
+    def cleanup(self, cutoff_time: datetime) -> Tuple[int, int]:
+        """清理创建时间早于 cutoff_time 的已完成、已失败项，返回 (已完成数, 已失败数)"""
+        with self.lock:
+            removed = []
+            for items in (self.completed_items, self.failed_items):
+                expired = [item_id for item_id, item in items.items() if item.created_at < cutoff_time]
+                for item_id in expired:
+                    items.pop(item_id)
+                removed.append(len(expired))
+            return removed[0], removed[1]
+
+    def wake_all(self):
+        self.queue.wake_all()
+
+
+# 到期项移入对应优先级的就绪流
+_PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    local sep = string.find(member, '|', 1, true)
+    local stream = KEYS[2 + tonumber(string.sub(member, 1, sep - 1))]
+    redis.call('XADD', stream, '*', 'id', string.sub(member, sep + 1))
+    redis.call('ZREM', KEYS[1], member)
+end
+return #due
+"""
+
+# 取出一批批量项，同时记录可见性超时
+_POP_BATCH_SCRIPT = """
+local ids = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #ids > 0 then
+    redis.call('LTRIM', KEYS[1], #ids, -1)
+end
+for _, id in ipairs(ids) do
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3] .. '|' .. id)
+end
+return ids
+"""
+
+# 超时未完成的批量项放回各自渠道批量列表的头部（列表键由前缀和渠道拼接），优先发送
+_REQUEUE_BATCH_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, member in ipairs(expired) do
+    local sep = string.find(member, '|', 1, true)
+    redis.call('LPUSH', ARGV[2] .. string.sub(member, 1, sep - 1), string.sub(member, sep + 1))
+    redis.call('ZREM', KEYS[1], member)
+end
+return #expired
+"""
+
+
+class RedisStreamQueueBackend:
+    """Redis 流后端：持久化、至少一次投递、多进程共享"""
+
+    GROUP = "workers"
+
+    def __init__(
+        self,
+        client: Redis,
+        prefix: str = "pmc:notify",
+        visibility_timeout: float = 300,
+        promote_limit: int = 500,
+        poll_interval: float = 0.05
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.promote_limit = promote_limit
+        self.poll_interval = poll_interval
+        self.consumer_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.items_key = f"{prefix}:items"
+        self.delayed_key = f"{prefix}:delayed"
+        self.inflight_key = f"{prefix}:inflight"
+        self.completed_key = f"{prefix}:completed"
+        self.failed_key = f"{prefix}:failed"
+        self.batch_prefix = f"{prefix}:batch:"
+        # 高优先级在前
+        self.streams = [f"{prefix}:ready:{rank}" for rank in range(_MAX_RANK, -1, -1)]
+
+        self._promote = client.register_script(_PROMOTE_SCRIPT)
+        self._pop_batch = client.register_script(_POP_BATCH_SCRIPT)
+        self._requeue_batch = client.register_script(_REQUEUE_BATCH_SCRIPT)
+
+        # 本进程取出、尚未确认的消息：队列项 ID -> (流, 消息 ID)
+        self._deliveries: Dict[str, Tuple[str, str]] = {}
+        # 阻塞读取一次可能从多个流各取到一条，多出的留给同一消费者的下次取数
+        self._buffered: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._lock = Lock()
+        self._next_claim_at = 0.0
+
+        for stream in self.streams:
+            try:
+                client.xgroup_create(stream, self.GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    def _stream_of(self, rank: int) -> str:
+        return self.streams[_MAX_RANK - rank]
+
+    def _save(self, pipe, item: QueueItem):
+        pipe.hset(self.items_key, item.id, item.to_json())
+
+    def _load(self, item_ids: List[str]) -> List[QueueItem]:
+        if not item_ids:
+            return []
+        raws = self.client.hmget(self.items_key, item_ids)
+        return [QueueItem.from_json(raw) for raw in raws if raw is not None]
+
+    def _schedule(self, pipe, item: QueueItem):
+        member = f"{_priority_rank(item.priority)}|{item.id}"
+        pipe.zadd(self.delayed_key, {member: item.scheduled_at.timestamp()})
+
+    def enqueue(self, item: QueueItem):
+        pipe = self.client.pipeline()
+        self._save(pipe, item)
+        self._schedule(pipe, item)
+        pipe.execute()
+
+    def _promote_due(self):
+        keys = [self.delayed_key] + [self._stream_of(rank) for rank in range(_MAX_RANK + 1)]
+        self._promote(keys=keys, args=[time.time(), self.promote_limit])
+
+    def _claim_stale(self, consumer: str) -> Optional[Tuple[str, str, str]]:
+        """接管空闲超过可见性超时的消息（持有它的消费者可能已退出），每秒最多检查一次"""
+        now = time.monotonic()
+        if now < self._next_claim_at:
+            return None
+        self._next_claim_at = now + 1
+        min_idle = int(self.visibility_timeout * 1000)
+        for stream in self.streams:
+            _, messages, _ = self.client.xautoclaim(stream, self.GROUP, consumer, min_idle, "0-0", count=1)
+            for message_id, fields in messages:
+                if fields:
+                    return stream, _text(message_id), _field(fields, "id")
+        return None
+
+    def _read(self, consumer: str, block: Optional[float]) -> List[Tuple[str, str, str]]:
+        if block is None:
+            for stream in self.streams:
+                response = self.client.xreadgroup(self.GROUP, consumer, {stream: ">"}, count=1)
+                deliveries = _parse_messages(response)
+                if deliveries:
+                    return deliveries
+            return []
+        response = self.client.xreadgroup(
+            self.GROUP, consumer, {stream: ">" for stream in self.streams},
+            count=1, block=max(int(block * 1000), 1)
+        )
+        deliveries = _parse_messages(response)
+        deliveries.sort(key=lambda delivery: self.streams.index(delivery[0]))
+        return deliveries
+
+    def _next_due(self) -> Optional[float]:
+        head = self.client.zrange(self.delayed_key, 0, 0, withscores=True)
+        return head[0][1] if head else None
+
+    def reserve(self, consumer: str, timeout: float) -> Optional[QueueItem]:
+        """取出一个已到期的队列项并标记为处理中，超时返回 None"""
+        consumer = f"{self.consumer_id}:{consumer}"
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                buffered = self._buffered.get(consumer)
+                delivery = buffered.pop(0) if buffered else None
+            if delivery is None:
+                self._promote_due()
+                delivery = self._claim_stale(consumer)
+            deliveries = [delivery] if delivery else self._read(consumer, block=None)
+
+            if not deliveries:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = remaining
+                next_due = self._next_due()
+                if next_due is not None:
+                    wait = min(wait, max(next_due - time.time(), 0.001))
+                started = time.monotonic()
+                deliveries = self._read(consumer, block=wait)
+                if not deliveries and time.monotonic() - started < wait:
+                    # 客户端不支持阻塞读取（如 fakeredis）时按短间隔轮询，避免空转
+                    time.sleep(min(wait, self.poll_interval))
+                    continue
+
+            if len(deliveries) > 1:
+                with self._lock:
+                    self._buffered.setdefault(consumer, []).extend(deliveries[1:])
+            if deliveries:
+                item = self._start(*deliveries[0])
+                if item is not None:
+                    return item
+
+    def _start(self, stream: str, message_id: str, item_id: str) -> Optional[QueueItem]:
+        items = self._load([item_id])
+        if not items:
+            # 队列项已被清理，直接确认消息
+            self.client.xack(stream, self.GROUP, message_id)
+            self.client.xdel(stream, message_id)
+            return None
+        item = items[0]
+        item.status = QueueStatus.PROCESSING
+        self.client.hset(self.items_key, item.id, item.to_json())
+        with self._lock:
+            self._deliveries[item.id] = (stream, message_id)
+        return item
+
+    def _finish(self, pipe, item: QueueItem):
+        """确认消息（或移除批量项的可见性记录）"""
+        with self._lock:
+            delivery = self._deliveries.pop(item.id, None)
+        if delivery:
+            stream, message_id = delivery
+            pipe.xack(stream, self.GROUP, message_id)
+            pipe.xdel(stream, message_id)
+        pipe.zrem(self.inflight_key, f"{item.channel}|{item.id}")
+
+    def complete(self, item: QueueItem):
+        item.status = QueueStatus.COMPLETED
+        pipe = self.client.pipeline()
+        self._finish(pipe, item)
+        self._save(pipe, item)
+        pipe.zadd(self.completed_key, {item.id: item.created_at.timestamp()})
+        pipe.execute()
+
+    def retry(self, item: QueueItem):
+        """重新入队（计划时间由调用方设置）"""
+        item.status = QueueStatus.RETRYING
+        pipe = self.client.pipeline()
+        self._finish(pipe, item)
+        self._save(pipe, item)
+        self._schedule(pipe, item)
+        pipe.execute()
+
+    def fail(self, item: QueueItem):
+        item.status = QueueStatus.FAILED
+        pipe = self.client.pipeline()
+        self._finish(pipe, item)
+        self._save(pipe, item)
+        pipe.zadd(self.failed_key, {item.id: item.created_at.timestamp()})
+        pipe.execute()
+
+    def take_failed(self, item_id: str) -> Optional[QueueItem]:
+        """取出一个失败项（用于手动重试）；多个进程同时重试时只有一个能取到"""
+        if not self.client.zrem(self.failed_key, item_id):
+            return None
+        items = self._load([item_id])
+        return items[0] if items else None
+
+    def push_batch(self, channel: str, item: QueueItem):
+        pipe = self.client.pipeline()
+        self._save(pipe, item)
+        pipe.rpush(f"{self.batch_prefix}{channel}", item.id)
+        pipe.execute()
+
+    def pop_batch(self, channel: str, size: int) -> List[QueueItem]:
+        """取出最多 size 个批量项并标记为处理中；超过可见性超时未完成的批量项先放回批量列表"""
+        self.recover_batches()
+        item_ids = self._pop_batch(
+            keys=[f"{self.batch_prefix}{channel}", self.inflight_key],
+            args=[size, time.time() + self.visibility_timeout, channel]
+        )
+        items = self._load([_text(item_id) for item_id in item_ids])
+        if items:
+            pipe = self.client.pipeline()
+            for item in items:
+                item.status = QueueStatus.PROCESSING
+                self._save(pipe, item)
+            pipe.execute()
+        return items
+
+    def batch_size(self, channel: str) -> int:
+        return self.client.llen(f"{self.batch_prefix}{channel}")
+
+    def oldest_batch_time(self, channel: str) -> Optional[datetime]:
+        """批量队列中最早一项的创建时间，队列为空时返回 None"""
+        head = self.client.lindex(f"{self.batch_prefix}{channel}", 0)
+        items = self._load([_text(head)]) if head is not None else []
+        return items[0].created_at if items else None
+
+    def recover_batches(self) -> int:
+        """超过可见性超时仍未完成的批量项（取出它的进程可能已退出）放回批量列表，返回放回的项数"""
+        return self._requeue_batch(keys=[self.inflight_key], args=[time.time(), self.batch_prefix])
+
+    def get_item(self, item_id: str) -> Optional[Tuple[str, QueueItem]]:
+        """返回 (状态名, 队列项)，不在处理中、已完成、已失败或批量队列中时返回 None"""
+        items = self._load([item_id])
+        if not items:
+            return None
+        item = items[0]
+        if item.status in _ITEM_STATUS_NAMES:
+            return _ITEM_STATUS_NAMES[item.status], item
+        if self.client.lpos(f"{self.batch_prefix}{item.channel}", item.id) is not None:
+            return "pending_batch", item
+        return None
+
+    def stats(self, channels: List[str]) -> Dict[str, Any]:
+        pipe = self.client.pipeline()
+        pipe.zcard(self.delayed_key)
+        pipe.zcount(self.delayed_key, f"({time.time()}", "+inf")
+        for stream in self.streams:
+            pipe.xlen(stream)
+            pipe.xpending(stream, self.GROUP)
+        for channel in channels:
+            pipe.llen(f"{self.batch_prefix}{channel}")
+        pipe.zcard(self.inflight_key)
+        pipe.zcard(self.completed_key)
+        pipe.zcard(self.failed_key)
+        results = pipe.execute()
+
+        scheduled, delayed = results[0], results[1]
+        stream_results = results[2:2 + 2 * len(self.streams)]
+        stream_length = sum(stream_results[0::2])
+        pending = sum(summary["pending"] for summary in stream_results[1::2])
+        batch_results = results[2 + 2 * len(self.streams):]
+        return {
+            "queue_size": scheduled + stream_length - pending,
+            "delayed_count": delayed,
+            "batch_queues": dict(zip(channels, batch_results[:len(channels)])),
+            "processing_count": pending + batch_results[len(channels)],
+            "completed_count": batch_results[len(channels) + 1],
+            "failed_count": batch_results[len(channels) + 2]
+        }
+
+    def cleanup(self, cutoff_time: datetime) -> Tuple[int, int]:
+        """清理创建时间早于 cutoff_time 的已完成、已失败项，返回 (已完成数, 已失败数)"""
+        removed = []
+        for key in (self.completed_key, self.failed_key):
+            item_ids = self.client.zrangebyscore(key, "-inf", cutoff_time.timestamp())
+            if item_ids:
+                pipe = self.client.pipeline()
+                pipe.zrem(key, *item_ids)
+                pipe.hdel(self.items_key, *item_ids)
+                pipe.execute()
+            removed.append(len(item_ids))
+        return removed[0], removed[1]
+
+    def wake_all(self):
+        # 工作线程的阻塞读取带超时，到时自行检查停止标志
+        pass
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _field(fields: Dict[Any, Any], name: str) -> str:
+    return _text(fields.get(name.encode(), fields.get(name)))
+
+
+def _parse_messages(response: Any) -> List[Tuple[str, str, str]]:
+    """XREADGROUP 结果转为 [(流, 消息 ID, 队列项 ID)]"""
+    deliveries = []
+    for stream, messages in response or []:
+        for message_id, fields in messages:
+            deliveries.append((_text(stream), _text(message_id), _field(fields, "id")))
+    return deliveries
+
+
+def create_queue_backend(settings: Any):
+    """按配置创建队列后端：NOTIFICATION_QUEUE_BACKEND 为 redis 时使用 Redis 流，否则使用进程内存"""
+    if str(getattr(settings, "NOTIFICATION_QUEUE_BACKEND", "memory")).lower() == "redis":
+        logger.info("Notification queue uses Redis stream backend")
+        return RedisStreamQueueBackend(
+            Redis.from_url(settings.REDIS_URL),
+            prefix=settings.NOTIFICATION_QUEUE_PREFIX,
+            visibility_timeout=settings.NOTIFICATION_QUEUE_VISIBILITY_TIMEOUT
+        )
+    return MemoryQueueBackend()
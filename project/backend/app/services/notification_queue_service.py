@@ -12,56 +12,19 @@ import json
 from typing import List, Dict, Optional, Any, Callable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
-from enum import Enum
-from queue import PriorityQueue
-from threading import Thread, Lock
+from threading import Thread
 from loguru import logger
 import time
 from sqlalchemy.orm import Session
 
+from ..core.config import settings
 from ..models.notification import Notification, NotificationStatus, NotificationPriority
 from ..services.notification_service import NotificationService
 from ..services.wechat_service import WeChatService
 from ..services.sms_service import sms_service
 from ..services.email_service import email_service
-
-
-class QueueStatus(Enum):
-    """队列状态"""
-    PENDING = "pending"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    RETRYING = "retrying"
-
-
-@dataclass
-class QueueItem:
-    """队列项"""
-    id: str
-    notification_id: int
-    priority: int
-    channel: str
-    recipient: str
-    content: Dict[str, Any]
-    retry_count: int = 0
-    max_retries: int = 3
-    created_at: datetime = None
-    scheduled_at: datetime = None
-    status: QueueStatus = QueueStatus.PENDING
-    error_message: Optional[str] = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now()
-        if self.scheduled_at is None:
-            self.scheduled_at = datetime.now()
-    
-    def __lt__(self, other):
-        # 优先级队列排序：优先级高的先处理，时间早的先处理
-        if self.priority != other.priority:
-            return self.priority > other.priority
-        return self.scheduled_at < other.scheduled_at
+from ..services.notification_batcher import NotificationBatcher
+from ..services.notification_queue_backends import QueueItem, QueueStatus, create_queue_backend
 
 
 @dataclass
@@ -80,32 +43,26 @@ class BatchItem:
 class NotificationQueueService:
     """通知队列管理服务"""
     
-    def __init__(self, db_session_factory: Callable[[], Session]):
+    def __init__(self, db_session_factory: Callable[[], Session], backend=None, batch_workers: int = 4):
         self.db_session_factory = db_session_factory
-        self.queue = PriorityQueue()
-        self.batch_queues = {
-            "email": [],
-            "sms": [],
-            "wechat": []
-        }
-        self.processing_items = {}
-        self.completed_items = {}
-        self.failed_items = {}
+        # 队列存储后端：默认按配置创建（进程内存或 Redis 流），工作线程只会取到已到期的项
+        self.backend = backend or create_queue_backend(settings)
         
-        self.lock = Lock()
         self.running = False
         self.worker_threads = []
-        self.batch_thread = None
         
-        # 配置
+        # 配置：达到批量大小或最早一项等待超过 interval 秒即发送
         self.batch_configs = {
-            "email": {"size": 50, "interval": 30},  # 50封邮件，30秒间隔
-            "sms": {"size": 100, "interval": 60},   # 100条短信，60秒间隔
-            "wechat": {"size": 200, "interval": 10} # 200条微信，10秒间隔
+            "email": {"size": 50, "interval": 30},  # 50封邮件，最长等待30秒
+            "sms": {"size": 100, "interval": 60},   # 100条短信，最长等待60秒
+            "wechat": {"size": 200, "interval": 10} # 200条微信，最长等待10秒
         }
         
         self.retry_delays = [60, 300, 900]  # 重试延迟：1分钟、5分钟、15分钟
         
+        # 批量发送调度：在 batch_workers 个线程中发送，线程池占满时暂停取数
+        self.batcher = NotificationBatcher(self.backend, self.batch_configs, self._flush_batch, workers=batch_workers)
+        
     def start(self, worker_count: int = 3):
         """启动队列服务"""
         if self.running:
@@ -119,22 +76,21 @@ class NotificationQueueService:
             worker.start()
             self.worker_threads.append(worker)
         
-        # 启动批量处理线程
-        self.batch_thread = Thread(target=self._batch_processor, daemon=True)
-        self.batch_thread.start()
+        # 启动批量发送调度
+        self.batcher.start()
         
         logger.info(f"Notification queue service started with {worker_count} workers")
     
     def stop(self):
         """停止队列服务"""
         self.running = False
+        self.backend.wake_all()
         
         # 等待工作线程结束
         for worker in self.worker_threads:
             worker.join(timeout=5)
         
-        if self.batch_thread:
-            self.batch_thread.join(timeout=5)
+        self.batcher.stop(timeout=5)
         
         logger.info("Notification queue service stopped")
     
@@ -157,10 +113,10 @@ class NotificationQueueService:
         
         # 判断是否支持批量发送
         if channel in self.batch_configs and self._should_batch(channel):
-            with self.lock:
-                self.batch_queues[channel].append(item)
+            self.backend.push_batch(channel, item)
+            self.batcher.notify(channel)
         else:
-            self.queue.put(item)
+            self._enqueue(item)
         
         logger.debug(f"Added notification {item_id} to queue")
         return item_id
@@ -184,52 +140,34 @@ class NotificationQueueService:
     
     def get_queue_status(self) -> Dict[str, Any]:
         """获取队列状态"""
-        with self.lock:
-            return {
-                "queue_size": self.queue.qsize(),
-                "batch_queues": {
-                    channel: len(items) for channel, items in self.batch_queues.items()
-                },
-                "processing_count": len(self.processing_items),
-                "completed_count": len(self.completed_items),
-                "failed_count": len(self.failed_items),
-                "running": self.running
-            }
+        return {
+            **self.backend.stats(list(self.batch_configs)),
+            "batch_metrics": self.batcher.metrics(),
+            "running": self.running
+        }
     
     def get_item_status(self, item_id: str) -> Optional[Dict[str, Any]]:
         """获取队列项状态"""
-        with self.lock:
-            if item_id in self.processing_items:
-                item = self.processing_items[item_id]
-                return {"status": "processing", "item": asdict(item)}
-            elif item_id in self.completed_items:
-                item = self.completed_items[item_id]
-                return {"status": "completed", "item": asdict(item)}
-            elif item_id in self.failed_items:
-                item = self.failed_items[item_id]
-                return {"status": "failed", "item": asdict(item)}
-            else:
-                # 检查批量队列
-                for channel, items in self.batch_queues.items():
-                    for item in items:
-                        if item.id == item_id:
-                            return {"status": "pending_batch", "item": asdict(item)}
-                return None
+        found = self.backend.get_item(item_id)
+        if found is None:
+            return None
+        status, item = found
+        return {"status": status, "item": asdict(item)}
     
     def retry_failed_item(self, item_id: str) -> bool:
         """重试失败的队列项"""
-        with self.lock:
-            if item_id in self.failed_items:
-                item = self.failed_items.pop(item_id)
-                item.retry_count = 0
-                item.status = QueueStatus.PENDING
-                item.error_message = None
-                item.scheduled_at = datetime.now()
-                
-                self.queue.put(item)
-                logger.info(f"Retrying failed item {item_id}")
-                return True
+        item = self.backend.take_failed(item_id)
+        if item is None:
             return False
+        
+        item.retry_count = 0
+        item.status = QueueStatus.PENDING
+        item.error_message = None
+        item.scheduled_at = datetime.now()
+        
+        self._enqueue(item)
+        logger.info(f"Retrying failed item {item_id}")
+        return True
     
     def _worker(self, worker_name: str):
         """工作线程"""
@@ -237,54 +175,32 @@ class NotificationQueueService:
         
         while self.running:
             try:
-                # 获取队列项（阻塞等待，超时1秒）
-                try:
-                    item = self.queue.get(timeout=1)
-                except:
-                    continue
-                
-                # 检查是否到了执行时间
-                if item.scheduled_at > datetime.now():
-                    # 重新放回队列
-                    self.queue.put(item)
-                    time.sleep(1)
+                # 获取已到期的队列项并标记为处理中（等待到最近的到期时间，超时1秒以便检查停止标志）
+                item = self.backend.reserve(worker_name, timeout=1)
+                if item is None:
                     continue
                 
-                # 标记为处理中
-                with self.lock:
-                    self.processing_items[item.id] = item
-                    item.status = QueueStatus.PROCESSING
-                
                 logger.debug(f"Worker {worker_name} processing item {item.id}")
                 
                 # 处理通知
                 success = self._process_item(item)
                 
-                # 更新状态
-                with self.lock:
-                    self.processing_items.pop(item.id, None)
+                # 更新状态（处理完成后才确认，进程中途退出时由其他进程接管）
+                if success:
+                    self.backend.complete(item)
+                    logger.debug(f"Item {item.id} completed successfully")
+                elif item.retry_count < item.max_retries:
+                    # 重试
+                    item.retry_count += 1
+                    delay = self.retry_delays[min(item.retry_count - 1, len(self.retry_delays) - 1)]
+                    item.scheduled_at = datetime.now() + timedelta(seconds=delay)
                     
-                    if success:
-                        item.status = QueueStatus.COMPLETED
-                        self.completed_items[item.id] = item
-                        logger.debug(f"Item {item.id} completed successfully")
-                    else:
-                        if item.retry_count < item.max_retries:
-                            # 重试
-                            item.retry_count += 1
-                            item.status = QueueStatus.RETRYING
-                            delay = self.retry_delays[min(item.retry_count - 1, len(self.retry_delays) - 1)]
-                            item.scheduled_at = datetime.now() + timedelta(seconds=delay)
-                            
-                            self.queue.put(item)
-                            logger.warning(f"Item {item.id} failed, retrying in {delay} seconds (attempt {item.retry_count})")
-                        else:
-                            # 失败
-                            item.status = QueueStatus.FAILED
-                            self.failed_items[item.id] = item
-                            logger.error(f"Item {item.id} failed permanently after {item.retry_count} retries")
-                
-                self.queue.task_done()
+                    self.backend.retry(item)
+                    logger.warning(f"Item {item.id} failed, retrying in {delay} seconds (attempt {item.retry_count})")
+                else:
+                    # 失败
+                    self.backend.fail(item)
+                    logger.error(f"Item {item.id} failed permanently after {item.retry_count} retries")
                 
             except Exception as e:
                 logger.error(f"Worker {worker_name} error: {e}")
@@ -292,36 +208,14 @@ class NotificationQueueService:
         
         logger.info(f"Worker {worker_name} stopped")
     
-    def _batch_processor(self):
-        """批量处理线程"""
-        logger.info("Batch processor started")
-        
-        while self.running:
-            try:
-                for channel, config in self.batch_configs.items():
-                    with self.lock:
-                        if len(self.batch_queues[channel]) >= config["size"]:
-                            # 取出一批进行处理
-                            batch_items = self.batch_queues[channel][:config["size"]]
-                            self.batch_queues[channel] = self.batch_queues[channel][config["size"]:]
-                            
-                            # 创建批量项
-                            batch = BatchItem(
-                                channel=channel,
-                                items=batch_items,
-                                batch_size=config["size"]
-                            )
-                            
-                            # 异步处理批量发送
-                            Thread(target=self._process_batch, args=(batch,), daemon=True).start()
-                
-                time.sleep(5)  # 每5秒检查一次
-                
-            except Exception as e:
-                logger.error(f"Batch processor error: {e}")
-                time.sleep(5)
-        
-        logger.info("Batch processor stopped")
+    def _flush_batch(self, channel: str, items: List[QueueItem]) -> bool:
+        """批量发送调度的发送回调"""
+        batch = BatchItem(
+            channel=channel,
+            items=items,
+            batch_size=self.batch_configs[channel]["size"]
+        )
+        return self._process_batch(batch)
     
     def _process_item(self, item: QueueItem) -> bool:
         """处理单个队列项"""
@@ -347,7 +241,7 @@ class NotificationQueueService:
             if 'db' in locals():
                 db.close()
     
-    def _process_batch(self, batch: BatchItem):
+    def _process_batch(self, batch: BatchItem) -> bool:
         """处理批量发送"""
         try:
             logger.info(f"Processing batch of {len(batch.items)} {batch.channel} notifications")
@@ -360,28 +254,24 @@ class NotificationQueueService:
                 self._send_batch_wechat(batch.items)
             
             # 更新状态
-            with self.lock:
-                for item in batch.items:
-                    item.status = QueueStatus.COMPLETED
-                    self.completed_items[item.id] = item
+            for item in batch.items:
+                self.backend.complete(item)
             
             logger.info(f"Batch processing completed for {batch.channel}")
+            return True
             
         except Exception as e:
             logger.error(f"Batch processing error: {e}")
             
             # 将失败的项重新加入队列
-            with self.lock:
-                for item in batch.items:
-                    if item.retry_count < item.max_retries:
-                        item.retry_count += 1
-                        item.status = QueueStatus.RETRYING
-                        item.error_message = str(e)
-                        self.queue.put(item)
-                    else:
-                        item.status = QueueStatus.FAILED
-                        item.error_message = str(e)
-                        self.failed_items[item.id] = item
+            for item in batch.items:
+                item.error_message = str(e)
+                if item.retry_count < item.max_retries:
+                    item.retry_count += 1
+                    self.backend.retry(item)
+                else:
+                    self.backend.fail(item)
+            return False
     
     def _send_email(self, item: QueueItem) -> bool:
         """发送邮件"""
@@ -505,38 +395,26 @@ class NotificationQueueService:
             logger.error(f"Batch WeChat sending failed: {e}")
             raise
     
+    def _enqueue(self, item: QueueItem):
+        """按计划时间和优先级加入队列"""
+        self.backend.enqueue(item)
+    
     def _should_batch(self, channel: str) -> bool:
         """判断是否应该批量发送"""
         if channel not in self.batch_configs:
             return False
         
         # 检查队列中的数量
-        with self.lock:
-            queue_size = len(self.batch_queues[channel])
-            return queue_size < self.batch_configs[channel]["size"] * 2  # 不超过2倍批量大小
+        queue_size = self.backend.batch_size(channel)
+        return queue_size < self.batch_configs[channel]["size"] * 2  # 不超过2倍批量大小
     
     def cleanup_old_items(self, days: int = 7):
         """清理旧的队列项"""
         cutoff_time = datetime.now() - timedelta(days=days)
         
-        with self.lock:
-            # 清理已完成的项
-            completed_to_remove = [
-                item_id for item_id, item in self.completed_items.items()
-                if item.created_at < cutoff_time
-            ]
-            for item_id in completed_to_remove:
-                self.completed_items.pop(item_id)
-            
-            # 清理失败的项
-            failed_to_remove = [
-                item_id for item_id, item in self.failed_items.items()
-                if item.created_at < cutoff_time
-            ]
-            for item_id in failed_to_remove:
-                self.failed_items.pop(item_id)
+        completed_count, failed_count = self.backend.cleanup(cutoff_time)
         
-        logger.info(f"Cleaned up {len(completed_to_remove)} completed and {len(failed_to_remove)} failed items")
+        logger.info(f"Cleaned up {completed_count} completed and {failed_count} failed items")
 
 
 # 全局队列服务实例
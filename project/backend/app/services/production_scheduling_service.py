@@ -6,13 +6,23 @@ from app.models.production_plan import ProductionPlan, ProductionStage, PlanStat
 from app.models.order import Order
 from app.models.equipment import Equipment
 from app.models.material import Material
+from app.utils.resource_timeline import ResourceTimeline, sweep_overlaps
+from app.utils.schedule_optimizer import OptimizerJob, ScheduleOptimizer
 from decimal import Decimal
 import logging
+import time
 from dataclasses import dataclass
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# 参与资源冲突检查的计划状态
+CONFLICT_STATUSES = [PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS]
+
+# 优先级顺序与拖期权重
+PRIORITY_ORDER = {PlanPriority.URGENT: 0, PlanPriority.HIGH: 1, PlanPriority.MEDIUM: 2, PlanPriority.LOW: 3}
+PRIORITY_WEIGHTS = {PlanPriority.URGENT: 4, PlanPriority.HIGH: 3, PlanPriority.MEDIUM: 2, PlanPriority.LOW: 1}
+
 class SchedulingStrategy(Enum):
     """排程策略"""
     EARLIEST_DUE_DATE = "earliest_due_date"  # 最早交期优先
@@ -20,6 +30,7 @@ class SchedulingStrategy(Enum):
     CRITICAL_RATIO = "critical_ratio"  # 紧急比率
     PRIORITY_FIRST = "priority_first"  # 优先级优先
     BALANCED = "balanced"  # 平衡策略
+    OPTIMIZED = "optimized"  # 约束优化（产能、依赖、交期）
 
 class ResourceType(Enum):
     """资源类型"""
@@ -51,16 +62,32 @@ class SchedulingResult:
 class ProductionSchedulingService:
     """生产计划排程服务"""
     
-    def __init__(self, db: Session):
+    # 排程结果写回时每批提交的计划数
+    DEFAULT_SAVE_CHUNK_SIZE = 500
+    # 优化策略局部搜索的时间预算（秒）
+    DEFAULT_OPTIMIZER_TIME_BUDGET = 2.0
+    
+    def __init__(
+        self,
+        db: Session,
+        save_chunk_size: int = DEFAULT_SAVE_CHUNK_SIZE,
+        optimizer_time_budget: float = DEFAULT_OPTIMIZER_TIME_BUDGET
+    ):
         self.db = db
         self.default_strategy = SchedulingStrategy.BALANCED
+        self.save_chunk_size = save_chunk_size
+        self.optimizer_time_budget = optimizer_time_budget
+        self.last_save_stats: Dict = {}
+        self.last_optimization_stats: Dict = {}
+        self.last_reschedule_scope: Dict = {}
         
     def auto_schedule_plans(
         self,
         plan_ids: Optional[List[int]] = None,
         strategy: SchedulingStrategy = None,
         start_date: Optional[datetime] = None,
-        constraints: Optional[List[SchedulingConstraint]] = None
+        constraints: Optional[List[SchedulingConstraint]] = None,
+        save_chunk_size: Optional[int] = None
     ) -> List[SchedulingResult]:
         """自动排程生产计划
         
@@ -69,6 +96,7 @@ class ProductionSchedulingService:
             strategy: 排程策略
             start_date: 排程开始时间
             constraints: 资源约束
+            save_chunk_size: 写回时每批提交的计划数，为空则使用服务默认值
             
         Returns:
             排程结果列表
@@ -87,25 +115,33 @@ class ProductionSchedulingService:
             if constraints is None:
                 constraints = self._get_default_constraints()
             
-            # 根据策略排序计划
-            sorted_plans = self._sort_plans_by_strategy(plans, strategy)
+            # 一次性加载资源占用时间线，排程过程中随计划落位同步更新
+            timeline = self._build_resource_timeline()
             
-            # 执行排程
-            results = []
-            current_time = start_date
-            
-            for plan in sorted_plans:
-                result = self._schedule_single_plan(
-                    plan, current_time, constraints
-                )
-                results.append(result)
+            if strategy == SchedulingStrategy.OPTIMIZED:
+                # 约束优化排程
+                results = self._optimize_plans(plans, start_date, constraints, timeline)
+            else:
+                # 根据策略排序计划
+                sorted_plans = self._sort_plans_by_strategy(plans, strategy)
                 
-                # 更新当前时间为下一个可用时间
-                if result.scheduled_end_date:
-                    current_time = max(current_time, result.scheduled_end_date)
+                # 执行排程
+                results = []
+                current_time = start_date
+                
+                for plan in sorted_plans:
+                    result = self._schedule_single_plan(
+                        plan, current_time, constraints, timeline
+                    )
+                    results.append(result)
+                    self._place_on_timeline(timeline, plan, result)
+                    
+                    # 更新当前时间为下一个可用时间
+                    if result.scheduled_end_date:
+                        current_time = max(current_time, result.scheduled_end_date)
             
             # 保存排程结果
-            self._save_scheduling_results(results)
+            self._save_scheduling_results(results, chunk_size=save_chunk_size)
             
             logger.info(f"完成 {len(results)} 个计划的自动排程")
             return results
@@ -175,7 +211,9 @@ class ProductionSchedulingService:
         plan_id: int,
         new_priority: Optional[PlanPriority] = None,
         new_due_date: Optional[date] = None,
-        strategy: Optional[SchedulingStrategy] = None
+        strategy: Optional[SchedulingStrategy] = None,
+        incremental: bool = True,
+        start_date: Optional[datetime] = None
     ) -> SchedulingResult:
         """重新排程计划
         
@@ -184,6 +222,9 @@ class ProductionSchedulingService:
             new_priority: 新优先级
             new_due_date: 新交期
             strategy: 排程策略
+            incremental: 增量模式，同时重排受影响的计划（同资源且与本计划原时间段或新时间段重叠、
+                或依赖本计划），其余计划保持不变；为 False 时只重排本计划
+            start_date: 排程开始时间
             
         Returns:
             排程结果
@@ -196,22 +237,43 @@ class ProductionSchedulingService:
             if not plan:
                 raise ValueError(f"计划 {plan_id} 不存在")
             
+            strategy = strategy or self.default_strategy
+            start_date = start_date or datetime.now()
+            old_start, old_end = _as_date(plan.planned_start_date), _as_date(plan.planned_end_date)
+            
             # 更新计划信息
             if new_priority:
                 plan.priority = new_priority
             if new_due_date:
                 plan.planned_end_date = new_due_date
             
+            # 先写入变更，避免提交时覆盖批量写回的排程结果
+            self.db.flush()
+            
+            plan_ids = [plan_id]
+            if incremental:
+                # 受影响的时间窗为计划的原时间段和排程器将为其分配的新时间段
+                new_span = self._preview_plan_span(plan, strategy, start_date)
+                windows = [(old_start, old_end), new_span]
+                plan_ids += [p.id for p in self._find_affected_plans(plan, windows)]
+            
             # 重新排程
             results = self.auto_schedule_plans(
-                plan_ids=[plan_id],
-                strategy=strategy or self.default_strategy
+                plan_ids=plan_ids,
+                strategy=strategy,
+                start_date=start_date
             )
+            self.last_reschedule_scope = {
+                "plan_id": plan_id,
+                "incremental": incremental,
+                "rescheduled_plan_ids": [result.plan_id for result in results]
+            }
             
-            if results:
+            result = next((r for r in results if r.plan_id == plan_id), None)
+            if result:
                 self.db.commit()
-                logger.info(f"完成计划 {plan_id} 的重新排程")
-                return results[0]
+                logger.info(f"完成计划 {plan_id} 的重新排程，共重排 {len(results)} 个计划")
+                return result
             else:
                 raise ValueError("重新排程失败")
                 
@@ -220,6 +282,64 @@ class ProductionSchedulingService:
             self.db.rollback()
             raise
     
+    def _preview_plan_span(
+        self,
+        plan: ProductionPlan,
+        strategy: SchedulingStrategy,
+        start_date: datetime
+    ) -> Tuple[date, date]:
+        """按当前资源占用试排单个计划（不保存），返回排程器为其分配的起止日期"""
+        timeline = self._build_resource_timeline()
+        constraints = self._get_default_constraints()
+        if strategy == SchedulingStrategy.OPTIMIZED:
+            result = self._optimize_plans([plan], start_date, constraints, timeline)[0]
+        else:
+            result = self._schedule_single_plan(plan, start_date, constraints, timeline)
+        return _as_date(result.scheduled_start_date), _as_date(result.scheduled_end_date)
+    
+    def _find_affected_plans(
+        self,
+        plan: ProductionPlan,
+        windows: List[Tuple[date, date]]
+    ) -> List[ProductionPlan]:
+        """查找受计划变更影响、需要一并重排的计划
+        
+        包括：与该计划共用车间和生产线且与任一时间窗 [start, end] 重叠的待排程计划，
+        以及按依赖规则（同一客户、优先级不高于本计划）排在本计划之后的待排程计划。
+        进行中、已完成等状态的计划不会被移动。
+        """
+        schedulable = [PlanStatus.DRAFT, PlanStatus.CONFIRMED]
+        
+        affected = self.db.query(ProductionPlan).filter(
+            ProductionPlan.id != plan.id,
+            ProductionPlan.status.in_(schedulable),
+            ProductionPlan.workshop == plan.workshop,
+            ProductionPlan.production_line == plan.production_line,
+            or_(*[
+                and_(
+                    ProductionPlan.planned_start_date <= window_end,
+                    ProductionPlan.planned_end_date >= window_start
+                )
+                for window_start, window_end in windows
+            ])
+        ).all()
+        
+        if plan.order_id and plan.order is not None:
+            rank = (PRIORITY_ORDER.get(plan.priority, 4), plan.id)
+            related_plans = self.db.query(ProductionPlan).join(Order).filter(
+                Order.customer_name == plan.order.customer_name,
+                ProductionPlan.id != plan.id,
+                ProductionPlan.status.in_(schedulable)
+            ).all()
+            affected += [
+                p for p in related_plans
+                if (PRIORITY_ORDER.get(p.priority, 4), p.id) > rank
+            ]
+        
+        unique = {p.id: p for p in affected}
+        logger.info(f"计划 {plan.id} 变更影响 {len(unique)} 个计划")
+        return list(unique.values())
+    
     def get_gantt_chart_data(
         self,
         start_date: Optional[date] = None,
@@ -312,13 +432,15 @@ class ProductionSchedulingService:
     def analyze_scheduling_conflicts(
         self,
         start_date: Optional[date] = None,
-        end_date: Optional[date] = None
+        end_date: Optional[date] = None,
+        line_capacity: int = 1
     ) -> Dict:
         """分析排程冲突
         
         Args:
             start_date: 分析开始日期
             end_date: 分析结束日期
+            line_capacity: 每条生产线可同时执行的计划数
             
         Returns:
             冲突分析结果
@@ -349,39 +471,66 @@ class ProductionSchedulingService:
                 }
             }
             
-            # 检查资源冲突
+            # 按资源分组
             resource_usage = {}
             for plan in plans:
+                if plan.planned_start_date is None or plan.planned_end_date is None:
+                    continue
                 key = f"{plan.workshop}_{plan.production_line}"
                 if key not in resource_usage:
                     resource_usage[key] = []
                 resource_usage[key].append(plan)
             
-            # 分析每个资源的使用情况
+            # 扫描线分析每个资源的使用情况：重叠计划对、重叠时间窗、峰值并发
             for resource_key, resource_plans in resource_usage.items():
-                if len(resource_plans) > 1:
-                    # 检查时间重叠
-                    for i, plan1 in enumerate(resource_plans):
-                        for plan2 in resource_plans[i+1:]:
-                            if self._check_time_overlap(plan1, plan2):
-                                conflict = {
-                                    "type": "resource_conflict",
-                                    "resource": resource_key,
-                                    "plan1": {
-                                        "id": plan1.id,
-                                        "name": plan1.plan_name,
-                                        "start": plan1.planned_start_date.isoformat(),
-                                        "end": plan1.planned_end_date.isoformat()
-                                    },
-                                    "plan2": {
-                                        "id": plan2.id,
-                                        "name": plan2.plan_name,
-                                        "start": plan2.planned_start_date.isoformat(),
-                                        "end": plan2.planned_end_date.isoformat()
-                                    },
-                                    "severity": "high" if plan1.priority == PlanPriority.HIGH or plan2.priority == PlanPriority.HIGH else "medium"
-                                }
-                                conflicts["resource_conflicts"].append(conflict)
+                plan_map = {plan.id: plan for plan in resource_plans}
+                report = sweep_overlaps([
+                    (plan.id, _as_date(plan.planned_start_date), _as_date(plan.planned_end_date))
+                    for plan in resource_plans
+                ])
+                
+                for plan1_id, plan2_id in report.pairs:
+                    plan1, plan2 = plan_map[plan1_id], plan_map[plan2_id]
+                    conflict = {
+                        "type": "resource_conflict",
+                        "resource": resource_key,
+                        "plan1": {
+                            "id": plan1.id,
+                            "name": plan1.plan_name,
+                            "start": plan1.planned_start_date.isoformat(),
+                            "end": plan1.planned_end_date.isoformat()
+                        },
+                        "plan2": {
+                            "id": plan2.id,
+                            "name": plan2.plan_name,
+                            "start": plan2.planned_start_date.isoformat(),
+                            "end": plan2.planned_end_date.isoformat()
+                        },
+                        "severity": "high" if plan1.priority == PlanPriority.HIGH or plan2.priority == PlanPriority.HIGH else "medium"
+                    }
+                    conflicts["resource_conflicts"].append(conflict)
+                
+                for window in report.windows:
+                    conflicts["time_conflicts"].append({
+                        "type": "time_conflict",
+                        "resource": resource_key,
+                        "start": window.start.isoformat(),
+                        "end": window.end.isoformat(),
+                        "max_concurrency": window.max_concurrency,
+                        "plan_ids": window.keys
+                    })
+                
+                if report.peak_concurrency > line_capacity:
+                    conflicts["capacity_overloads"].append({
+                        "type": "capacity_overload",
+                        "resource": resource_key,
+                        "capacity": line_capacity,
+                        "peak_concurrency": report.peak_concurrency,
+                        "peak_start": report.peak_start.isoformat(),
+                        "peak_end": report.peak_end.isoformat(),
+                        "plan_ids": report.peak_keys,
+                        "severity": "high" if report.peak_concurrency > line_capacity * 2 else "medium"
+                    })
             
             # 统计冲突信息
             conflicts["summary"]["total_conflicts"] = len(conflicts["resource_conflicts"])
@@ -441,11 +590,154 @@ class ProductionSchedulingService:
                 (p.planned_end_date - p.planned_start_date).days
             ))
     
+    def _optimize_plans(
+        self,
+        plans: List[ProductionPlan],
+        start_date: datetime,
+        constraints: List[SchedulingConstraint],
+        timeline: ResourceTimeline
+    ) -> List[SchedulingResult]:
+        """约束优化排程
+        
+        以天为单位建模：每个计划占用所在生产线 (工期 + 1) 天（计划结束日当天仍占用产线，
+        与按日期的冲突判断一致），最早开始于计划开始日期，交期为计划结束日期。
+        时间线中不参与本次排程的已确认、进行中计划预先占住所在生产线，优化结果避开这些时段。
+        """
+        origin = start_date.date()
+        dependencies = self._get_plan_dependencies(plans)
+        
+        # 本次排程的计划整体移动，只有其他占用资源的计划保留在时间线中
+        for plan in plans:
+            timeline.remove(plan.id)
+        reserved = self._reserved_line_days(timeline, origin)
+        
+        jobs = []
+        durations = {}
+        for plan in plans:
+            plan_start, plan_end = _as_date(plan.planned_start_date), _as_date(plan.planned_end_date)
+            durations[plan.id] = max(0, (plan_end - plan_start).days)
+            jobs.append(OptimizerJob(
+                key=plan.id,
+                resource=(plan.workshop or "默认车间", plan.production_line or "默认生产线"),
+                duration=durations[plan.id] + 1,
+                release=max(0, (plan_start - origin).days),
+                due=(plan_end - origin).days + 1,
+                weight=PRIORITY_WEIGHTS.get(plan.priority, 1),
+                predecessors=dependencies.get(plan.id, [])
+            ))
+        
+        optimizer = ScheduleOptimizer(
+            capacities=self._get_line_capacities(constraints),
+            time_budget=self.optimizer_time_budget
+        )
+        solution = optimizer.solve(jobs, reserved)
+        self.last_optimization_stats = {
+            "plans": len(jobs),
+            "makespan_days": solution.makespan,
+            "total_tardiness_days": solution.total_tardiness,
+            "weighted_tardiness": solution.weighted_tardiness,
+            "tardy_plans": solution.tardy_jobs,
+            "initial_rule": solution.initial_rule,
+            "initial_weighted_tardiness": solution.initial_weighted_tardiness,
+            "iterations": solution.iterations,
+            "improvements": solution.improvements,
+            "runtime_seconds": round(solution.runtime, 4)
+        }
+        logger.info(f"优化排程完成: {self.last_optimization_stats}")
+        
+        results = []
+        for plan in sorted(plans, key=lambda p: (solution.starts[p.id], p.id)):
+            start_time = max(
+                start_date,
+                datetime.combine(origin + timedelta(days=solution.starts[plan.id]), datetime.min.time())
+            )
+            estimated_duration = timedelta(days=durations[plan.id])
+            end_time = start_time + estimated_duration
+            assigned_resources = {
+                "workshop": plan.workshop or "默认车间",
+                "production_line": plan.production_line or "默认生产线",
+                "responsible_person": plan.responsible_person or "待分配"
+            }
+            conflicts = self._check_resource_conflicts(
+                start_time, end_time, assigned_resources,
+                exclude_plan_id=plan.id, timeline=timeline
+            )
+            results.append(SchedulingResult(
+                plan_id=plan.id,
+                scheduled_start_date=start_time,
+                scheduled_end_date=end_time,
+                assigned_resources=assigned_resources,
+                estimated_duration=estimated_duration,
+                conflicts=conflicts,
+                feasibility_score=self._calculate_feasibility_score(
+                    plan, start_time, end_time, conflicts
+                )
+            ))
+        
+        plan_map = {plan.id: plan for plan in plans}
+        for result in results:
+            self._place_on_timeline(timeline, plan_map[result.plan_id], result)
+        
+        return results
+    
+    def _reserved_line_days(
+        self,
+        timeline: ResourceTimeline,
+        origin: date
+    ) -> Dict[Tuple[str, str], List[Tuple[int, int]]]:
+        """时间线中的占用转换为各生产线上相对 origin 的已占用天 [start, end)（结束日当天仍占用）"""
+        reserved: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for _, (workshop, production_line), start, end in timeline.items():
+            last = (end - origin).days + 1
+            if last <= 0:
+                continue
+            line = (workshop or "默认车间", production_line or "默认生产线")
+            reserved.setdefault(line, []).append((max(0, (start - origin).days), last))
+        return reserved
+    
+    def _get_plan_dependencies(self, plans: List[ProductionPlan]) -> Dict[int, List[int]]:
+        """获取计划间的依赖关系
+        
+        与 utils/scheduler.py 的规则一致：同一客户的计划中，优先级更高（同级时ID更小）的计划先行。
+        同一客户的计划按此顺序串成链，依赖的传递闭包与两两依赖相同，但边数为线性。
+        """
+        order_ids = {plan.order_id for plan in plans if plan.order_id}
+        if not order_ids:
+            return {}
+        
+        customers = dict(self.db.query(Order.id, Order.customer_name).filter(
+            Order.id.in_(order_ids)
+        ).all())
+        
+        groups: Dict[str, List[ProductionPlan]] = {}
+        for plan in plans:
+            customer = customers.get(plan.order_id)
+            if customer:
+                groups.setdefault(customer, []).append(plan)
+        
+        dependencies = {}
+        for group in groups.values():
+            group.sort(key=lambda p: (PRIORITY_ORDER.get(p.priority, 4), p.id))
+            for previous, plan in zip(group, group[1:]):
+                dependencies[plan.id] = [previous.id]
+        return dependencies
+    
+    def _get_line_capacities(self, constraints: List[SchedulingConstraint]) -> Dict[Tuple[str, str], int]:
+        """从生产线约束中读取产能（resource_id 格式为 "车间_生产线"）"""
+        capacities = {}
+        for constraint in constraints or []:
+            if constraint.resource_type != ResourceType.PRODUCTION_LINE:
+                continue
+            workshop, _, production_line = constraint.resource_id.partition("_")
+            capacities[(workshop, production_line)] = max(1, int(constraint.capacity))
+        return capacities
+    
     def _schedule_single_plan(
         self,
         plan: ProductionPlan,
         current_time: datetime,
-        constraints: List[SchedulingConstraint]
+        constraints: List[SchedulingConstraint],
+        timeline: Optional[ResourceTimeline] = None
     ) -> SchedulingResult:
         """排程单个计划"""
         try:
@@ -465,7 +757,8 @@ class ProductionSchedulingService:
             
             # 检查冲突
             conflicts = self._check_resource_conflicts(
-                start_time, end_time, assigned_resources, exclude_plan_id=plan.id
+                start_time, end_time, assigned_resources,
+                exclude_plan_id=plan.id, timeline=timeline
             )
             
             # 计算可行性评分
@@ -500,16 +793,32 @@ class ProductionSchedulingService:
         start_time: datetime,
         end_time: datetime,
         resources: Dict[str, str],
-        exclude_plan_id: Optional[int] = None
+        exclude_plan_id: Optional[int] = None,
+        timeline: Optional[ResourceTimeline] = None
     ) -> List[str]:
-        """检查资源冲突"""
+        """检查资源冲突
+        
+        提供 timeline 时在内存索引中查找，否则直接查询数据库
+        """
         conflicts = []
         
         try:
+            if timeline is not None:
+                overlaps = timeline.find_overlaps(
+                    resources.get("workshop"),
+                    resources.get("production_line"),
+                    start_time.date(),
+                    end_time.date(),
+                    exclude_key=exclude_plan_id
+                )
+                for plan_id, _, _, plan_number in sorted(overlaps, key=lambda item: item[0]):
+                    conflicts.append(f"与计划 {plan_number} 存在资源冲突")
+                return conflicts
+            
             # 查询同时间段使用相同资源的计划
             query = self.db.query(ProductionPlan).filter(
                 and_(
-                    ProductionPlan.status.in_([PlanStatus.CONFIRMED, PlanStatus.IN_PROGRESS]),
+                    ProductionPlan.status.in_(CONFLICT_STATUSES),
                     or_(
                         and_(
                             ProductionPlan.planned_start_date <= start_time.date(),
@@ -543,6 +852,52 @@ class ProductionSchedulingService:
         
         return conflicts
     
+    def _build_resource_timeline(self) -> ResourceTimeline:
+        """加载占用资源的计划，构建 (车间, 生产线) 时间线索引"""
+        timeline = ResourceTimeline()
+        rows = self.db.query(
+            ProductionPlan.id,
+            ProductionPlan.plan_number,
+            ProductionPlan.workshop,
+            ProductionPlan.production_line,
+            ProductionPlan.planned_start_date,
+            ProductionPlan.planned_end_date
+        ).filter(
+            ProductionPlan.status.in_(CONFLICT_STATUSES)
+        ).all()
+        
+        for plan_id, plan_number, workshop, production_line, plan_start, plan_end in rows:
+            if plan_start is None or plan_end is None:
+                continue
+            start, end = _as_date(plan_start), _as_date(plan_end)
+            if end < start:
+                continue
+            timeline.place(plan_id, workshop, production_line, start, end, plan_number)
+        
+        logger.debug(f"资源时间线加载完成，共 {len(timeline)} 个占用")
+        return timeline
+    
+    def _place_on_timeline(
+        self,
+        timeline: ResourceTimeline,
+        plan: ProductionPlan,
+        result: SchedulingResult
+    ):
+        """按保存后的状态更新计划在时间线中的占用"""
+        will_confirm = not result.conflicts and result.feasibility_score > 0.8
+        if not result.assigned_resources or not (will_confirm or plan.status in CONFLICT_STATUSES):
+            timeline.remove(plan.id)
+            return
+        
+        timeline.place(
+            plan.id,
+            result.assigned_resources.get("workshop"),
+            result.assigned_resources.get("production_line"),
+            result.scheduled_start_date.date(),
+            result.scheduled_end_date.date(),
+            plan.plan_number
+        )
+    
     def _calculate_feasibility_score(
         self,
         plan: ProductionPlan,
@@ -569,38 +924,84 @@ class ProductionSchedulingService:
         
         return max(0.0, min(1.0, score))
     
-    def _save_scheduling_results(self, results: List[SchedulingResult]):
-        """保存排程结果"""
+    def _save_scheduling_results(
+        self,
+        results: List[SchedulingResult],
+        chunk_size: Optional[int] = None
+    ) -> Dict:
+        """保存排程结果
+        
+        按批次写回：每批用一次 IN 查询确认计划存在，再通过 bulk_update_mappings
+        批量更新并提交，避免逐条查询和逐个修改ORM对象。
+        
+        Args:
+            results: 排程结果列表
+            chunk_size: 每批提交的计划数，为空则使用服务默认值
+            
+        Returns:
+            写回统计（写入行数、批次数、耗时、每秒写入行数），同时记录在 last_save_stats
+        """
+        chunk_size = max(1, chunk_size or self.save_chunk_size)
+        rows_written = 0
+        chunks = 0
+        started = time.perf_counter()
+        
         try:
-            for result in results:
-                plan = self.db.query(ProductionPlan).filter(
-                    ProductionPlan.id == result.plan_id
-                ).first()
+            for offset in range(0, len(results), chunk_size):
+                chunk = results[offset:offset + chunk_size]
+                existing_ids = {
+                    plan_id for (plan_id,) in self.db.query(ProductionPlan.id).filter(
+                        ProductionPlan.id.in_([result.plan_id for result in chunk])
+                    ).all()
+                }
                 
-                if plan:
+                now = datetime.now()
+                mappings = []
+                for result in chunk:
+                    if result.plan_id not in existing_ids:
+                        continue
+                    
                     # 更新计划的排程信息
-                    plan.planned_start_date = result.scheduled_start_date.date()
-                    plan.planned_end_date = result.scheduled_end_date.date()
+                    mapping = {
+                        "id": result.plan_id,
+                        "planned_start_date": result.scheduled_start_date.date(),
+                        "planned_end_date": result.scheduled_end_date.date(),
+                        "updated_at": now
+                    }
                     
                     # 更新资源分配
-                    if "workshop" in result.assigned_resources:
-                        plan.workshop = result.assigned_resources["workshop"]
-                    if "production_line" in result.assigned_resources:
-                        plan.production_line = result.assigned_resources["production_line"]
-                    if "responsible_person" in result.assigned_resources:
-                        plan.responsible_person = result.assigned_resources["responsible_person"]
+                    for field in ("workshop", "production_line", "responsible_person"):
+                        if field in result.assigned_resources:
+                            mapping[field] = result.assigned_resources[field]
                     
                     # 如果没有冲突且可行性评分高，则确认计划
                     if not result.conflicts and result.feasibility_score > 0.8:
-                        plan.status = PlanStatus.CONFIRMED
+                        mapping["status"] = PlanStatus.CONFIRMED
                     
-                    plan.updated_at = datetime.now()
+                    mappings.append(mapping)
+                
+                if mappings:
+                    self.db.bulk_update_mappings(ProductionPlan, mappings)
+                self.db.commit()
+                rows_written += len(mappings)
+                chunks += 1
             
-            self.db.commit()
-            logger.info(f"保存 {len(results)} 个排程结果")
+            elapsed = time.perf_counter() - started
+            self.last_save_stats = {
+                "rows_written": rows_written,
+                "chunks": chunks,
+                "chunk_size": chunk_size,
+                "elapsed_seconds": round(elapsed, 4),
+                "rows_per_second": round(rows_written / elapsed, 2) if elapsed > 0 else 0.0
+            }
+            logger.info(
+                f"保存 {rows_written} 个排程结果，共 {chunks} 批，"
+                f"{self.last_save_stats['rows_per_second']} 行/秒"
+            )
+            return self.last_save_stats
             
         except Exception as e:
-            logger.error(f"保存排程结果失败: {str(e)}")
+            logger.error(f"保存排程结果失败（已提交 {rows_written} 行）: {str(e)}")
             self.db.rollback()
             raise
     
@@ -611,6 +1012,10 @@ class ProductionSchedulingService:
             plan2.planned_end_date < plan1.planned_start_date
         )
 
+def _as_date(value) -> date:
+    """将 datetime 统一为 date，便于与按日期的冲突判断保持一致"""
+    return value.date() if isinstance(value, datetime) else value
+
 # 创建全局服务实例
 production_scheduling_service = None
 
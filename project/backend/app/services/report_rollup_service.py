@@ -0,0 +1,386 @@
+"""报表日汇总服务
+
+维护 models/report_rollup.py 中按天预聚合的报表指标，并为报表接口读取：
+- refresh_rollup: 增量刷新。只重算水位线（减去重叠窗口）之后新增或修改过的明细行所在的日期，
+  以及明细行删除、改期时登记的原日期；每个日期先删后插，整体在一个事务内完成。
+  没有刷新状态时全量重建
+- read_rollup: 按天读取 [start, end] 的汇总行。上次刷新当天之前的日期读汇总表，
+  其余日期（包括今天与未来计划）直接对明细表分组聚合，两部分合并后结构相同
+- sum_rows / group_rows / rollup_series: 在内存中把日汇总行组合成报表指标与趋势序列
+- 明细行被删除或日期被修改时，before_flush 事件把原日期登记到 report_rollup_dirty_dates，
+  由下次刷新重算
+
+汇总粒度为 天 × 维度（车间、产品、状态等），维度列以空字符串代替 NULL。
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from sqlalchemy import and_, event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.equipment import MaintenanceRecord
+from app.models.production_plan import ProductionPlan
+from app.models.quality import QualityCheck
+from app.models.report_rollup import (
+    MaintenanceDailyRollup,
+    ProductionDailyRollup,
+    QualityDailyRollup,
+    ReportRollupDirtyDate,
+    ReportRollupState,
+)
+from app.services.stats_service import Measure, count_of, sum_of
+from app.utils.time_buckets import TimeBucket, as_datetime, bucket_range, date_bucket, floor_bucket
+
+logger = logging.getLogger(__name__)
+
+# 重叠窗口：覆盖刷新开始时尚未提交、时间戳早于水位线的写入
+ROLLUP_OVERLAP = timedelta(minutes=5)
+
+# 单条重算语句覆盖的日期数
+_DATES_PER_BATCH = 100
+
+# 表名 -> 汇总定义，用于登记待重算日期
+_SOURCE_ROLLUPS: Dict[str, List["RollupSpec"]] = {}
+
+RollupKey = Tuple[Any, ...]
+
+
+@dataclass
+class RollupSpec:
+    """一张日汇总表的定义
+
+    date_column 与 dimensions 为明细表的属性名，measures 在使用时才构建，
+    汇总表中对应列与维度、聚合量同名，行数记在 count_column。
+    """
+    name: str
+    model: Any
+    source: Any
+    date_column: str
+    dimensions: Dict[str, str]
+    measures: Callable[[], List[Measure]] = field(default=lambda: [])
+    count_column: str = "row_count"
+
+    def __post_init__(self):
+        _SOURCE_ROLLUPS.setdefault(self.source.__tablename__, []).append(self)
+
+    @property
+    def measure_names(self) -> List[str]:
+        return [self.count_column, *[measure.name for measure in self.measures()]]
+
+    def source_date(self):
+        return getattr(self.source, self.date_column)
+
+    def aggregate_statement(self, *criteria: Any):
+        """明细表按 天 × 维度 分组聚合"""
+        day = date_bucket(self.source_date(), TimeBucket.DAY)
+        dimensions = [getattr(self.source, column) for column in self.dimensions.values()]
+        return select(
+            day.label("stat_date"),
+            *[column.label(name) for name, column in zip(self.dimensions, dimensions)],
+            func.count().label(self.count_column),
+            *[measure.expression() for measure in self.measures()]
+        ).where(*criteria).group_by(day, *dimensions)
+
+    def date_criteria(self, dates: Sequence[date]) -> Any:
+        """明细日期落在给定日期中的任意一天"""
+        column = self.source_date()
+        return or_(*[
+            and_(column >= day, column < day + timedelta(days=1))
+            for day in (as_datetime(value) for value in dates)
+        ])
+
+
+def _dimension_value(value: Any) -> str:
+    """维度值统一为字符串（枚举取其值），NULL 记为空字符串"""
+    if isinstance(value, Enum):
+        value = value.value
+    return "" if value is None else str(value)
+
+
+def _number(value: Any) -> Union[int, float]:
+    if value is None:
+        return 0
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _merge_rows(spec: RollupSpec, rows: Iterable[Any]) -> Dict[RollupKey, Dict[str, Any]]:
+    """分组结果转为 {(日期, 维度...): 汇总行}
+
+    NULL 与空字符串、枚举与其值在汇总表中是同一维度值，落到同一键时累加。
+    """
+    merged: Dict[RollupKey, Dict[str, Any]] = {}
+    for row in rows:
+        values = row._asdict()
+        stat_date = as_datetime(values.pop("stat_date"))
+        if stat_date is None:
+            continue
+        dimensions = {name: _dimension_value(values.pop(name)) for name in spec.dimensions}
+        key = (stat_date.date(), *dimensions.values())
+        target = merged.get(key)
+        if target is None:
+            merged[key] = {"stat_date": stat_date.date(), **dimensions,
+                           **{name: _number(value) for name, value in values.items()}}
+        else:
+            for name, value in values.items():
+                target[name] += _number(value)
+    return merged
+
+
+def _database_now(db: Session) -> datetime:
+    """数据库时钟（明细表的 created_at/updated_at 由数据库生成）"""
+    return as_datetime(db.execute(select(func.now())).scalar())
+
+
+def _changed_dates(db: Session, spec: RollupSpec, since: datetime) -> Set[date]:
+    day = date_bucket(spec.source_date(), TimeBucket.DAY)
+    changed = db.execute(select(day).where(or_(
+        spec.source.updated_at >= since,
+        spec.source.created_at >= since
+    )).distinct()).scalars()
+    return {as_datetime(value).date() for value in changed if value is not None}
+
+
+def _rebuild_dates(db: Session, spec: RollupSpec, dates: Optional[Sequence[date]]) -> None:
+    """删除并重新插入给定日期（为空表示全部）的汇总行"""
+    batches = [None] if dates is None else [
+        dates[i:i + _DATES_PER_BATCH] for i in range(0, len(dates), _DATES_PER_BATCH)
+    ]
+    for batch in batches:
+        delete_query = db.query(spec.model)
+        criteria = []
+        if batch is not None:
+            delete_query = delete_query.filter(spec.model.stat_date.in_(batch))
+            criteria.append(spec.date_criteria(batch))
+        delete_query.delete(synchronize_session=False)
+
+        merged = _merge_rows(spec, db.execute(spec.aggregate_statement(*criteria)).all())
+        if merged:
+            db.bulk_insert_mappings(spec.model, list(merged.values()))
+
+
+def refresh_rollup(db: Session, spec: RollupSpec, full: bool = False) -> int:
+    """增量刷新一张汇总表
+
+    Args:
+        db: 数据库会话
+        spec: 汇总定义
+        full: 是否全量重建
+
+    Returns:
+        int: 重算的日期数（全量重建时为汇总后的日期数）
+    """
+    try:
+        started_at = _database_now(db)
+        state = db.get(ReportRollupState, spec.name)
+        dirty = db.query(ReportRollupDirtyDate.id, ReportRollupDirtyDate.stat_date).filter(
+            ReportRollupDirtyDate.rollup == spec.name
+        ).all()
+
+        if full or state is None or state.watermark is None:
+            _rebuild_dates(db, spec, None)
+            processed = db.query(func.count(func.distinct(spec.model.stat_date))).scalar() or 0
+        else:
+            dates = _changed_dates(db, spec, state.watermark - ROLLUP_OVERLAP)
+            dates.update(stat_date for _, stat_date in dirty)
+            _rebuild_dates(db, spec, sorted(dates))
+            processed = len(dates)
+
+        if dirty:
+            db.query(ReportRollupDirtyDate).filter(
+                ReportRollupDirtyDate.id.in_([dirty_id for dirty_id, _ in dirty])
+            ).delete(synchronize_session=False)
+
+        if state is None:
+            state = ReportRollupState(name=spec.name)
+            db.add(state)
+        state.watermark = started_at
+        state.refreshed_at = _database_now(db)
+        state.rows_processed = processed
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"刷新报表汇总 {spec.name}: {processed} 天")
+    return processed
+
+
+def refresh_all(db: Session, full: bool = False) -> Dict[str, Any]:
+    """刷新全部汇总表，各表独立提交，单表失败不影响其他表"""
+    results: Dict[str, Any] = {}
+    for spec in ROLLUPS:
+        try:
+            results[spec.name] = refresh_rollup(db, spec, full=full)
+        except Exception as e:
+            logger.error(f"刷新报表汇总 {spec.name} 失败: {e}")
+            results[spec.name] = f"error: {e}"
+    return results
+
+
+def covered_until(db: Session, spec: RollupSpec) -> Optional[date]:
+    """汇总表已覆盖的日期上界（不含）：上次刷新当天之前的日期"""
+    state = db.get(ReportRollupState, spec.name)
+    if state is None or state.watermark is None:
+        return None
+    return state.watermark.date()
+
+
+def read_rollup(
+    db: Session,
+    spec: RollupSpec,
+    start: date,
+    end: date,
+    where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    source_criteria: Sequence[Any] = ()
+) -> List[Dict[str, Any]]:
+    """读取 [start, end] 各天的汇总行
+
+    Args:
+        db: 数据库会话
+        spec: 汇总定义
+        start: 开始日期
+        end: 结束日期（含当天）
+        where: 维度筛选，作用于每一行 {"stat_date", 维度..., 聚合量...}
+        source_criteria: 汇总粒度之外的明细筛选条件；给出时整个区间都从明细表聚合
+
+    Returns:
+        List[Dict[str, Any]]: 汇总行，维度值为字符串
+    """
+    start, end = as_datetime(start).date(), as_datetime(end).date()
+    boundary = covered_until(db, spec) if not source_criteria else None
+    rows: List[Dict[str, Any]] = []
+
+    if boundary is not None and boundary > start:
+        covered_end = min(end, boundary - timedelta(days=1))
+        for rollup in db.query(spec.model).filter(
+            spec.model.stat_date >= start, spec.model.stat_date <= covered_end
+        ):
+            rows.append({
+                "stat_date": rollup.stat_date,
+                **{name: getattr(rollup, name) for name in spec.dimensions},
+                **{name: _number(getattr(rollup, name)) for name in spec.measure_names},
+            })
+        start = boundary
+
+    if start <= end:
+        column = spec.source_date()
+        statement = spec.aggregate_statement(
+            column >= as_datetime(start),
+            column < as_datetime(end + timedelta(days=1)),
+            *source_criteria
+        )
+        rows.extend(_merge_rows(spec, db.execute(statement).all()).values())
+
+    if where is not None:
+        rows = [row for row in rows if where(row)]
+    return rows
+
+
+def sum_rows(rows: Iterable[Dict[str, Any]], name: str, **dimensions: Any) -> Union[int, float]:
+    """汇总行中满足维度取值的某个聚合量合计，如 sum_rows(rows, "plan_count", status="completed")"""
+    wanted = {key: _dimension_value(value) for key, value in dimensions.items()}
+    return sum(
+        row[name] for row in rows
+        if all(row[key] == value for key, value in wanted.items())
+    )
+
+
+def group_rows(rows: Iterable[Dict[str, Any]], dimension: str) -> Dict[str, List[Dict[str, Any]]]:
+    """汇总行按某个维度分组"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(row[dimension], []).append(row)
+    return groups
+
+
+def rollup_series(
+    rows: Iterable[Dict[str, Any]],
+    start: date,
+    end: date,
+    bucket: Union[TimeBucket, str],
+    *names: str
+) -> List[Dict[str, Any]]:
+    """日汇总行合并为 [start, end] 按时间段粒度的稠密序列 {"bucket": 时间段起点, 聚合量...}"""
+    series = {key: dict.fromkeys(names, 0) for key in bucket_range(start, end, bucket)}
+    for row in rows:
+        point = series.get(floor_bucket(row["stat_date"], bucket))
+        if point is not None:
+            for name in names:
+                point[name] += row[name]
+    return [{"bucket": key, **values} for key, values in series.items()]
+
+
+def _attribute_date(instance: Any, spec: RollupSpec, history_side: str) -> Optional[date]:
+    value = getattr(inspect(instance).attrs[spec.date_column].history, history_side)
+    value = value[0] if value else None
+    return as_datetime(value).date() if value is not None else None
+
+
+@event.listens_for(Session, "before_flush")
+def _record_dirty_dates(session, flush_context, instances):
+    """明细行删除或改期时登记原日期，新日期由 updated_at 水位线覆盖"""
+    pending: Set[Tuple[str, date]] = set()
+    for instance in list(session.deleted) + list(session.dirty):
+        for spec in _SOURCE_ROLLUPS.get(getattr(instance, "__tablename__", None), ()):
+            try:
+                if instance in session.deleted:
+                    old = _attribute_date(instance, spec, "deleted") or _attribute_date(instance, spec, "unchanged")
+                else:
+                    old = _attribute_date(instance, spec, "deleted")
+            except Exception as e:
+                # 明细模型与汇总定义不一致时不影响业务写入，由全量重建兜底
+                logger.debug(f"登记汇总重算日期失败 {spec.name}: {e}")
+                continue
+            if old is not None:
+                pending.add((spec.name, old))
+
+    for rollup, stat_date in pending:
+        session.add(ReportRollupDirtyDate(rollup=rollup, stat_date=stat_date))
+
+
+def _production_measures() -> List[Measure]:
+    return [
+        sum_of("quantity", ProductionPlan.quantity),
+        sum_of("progress_sum", ProductionPlan.progress),
+        count_of("progress_count", ProductionPlan.progress),
+    ]
+
+
+def _quality_measures() -> List[Measure]:
+    return [
+        sum_of("check_quantity", QualityCheck.check_quantity),
+        sum_of("pass_quantity", QualityCheck.pass_quantity),
+    ]
+
+
+def _maintenance_measures() -> List[Measure]:
+    return [
+        sum_of("cost_sum", MaintenanceRecord.total_cost),
+        count_of("cost_count", MaintenanceRecord.total_cost),
+    ]
+
+
+PRODUCTION_ROLLUP = RollupSpec(
+    "production_daily", ProductionDailyRollup, ProductionPlan, "plan_start_date",
+    {"workshop": "workshop", "product_name": "product_name", "status": "status"},
+    measures=_production_measures, count_column="plan_count"
+)
+QUALITY_ROLLUP = RollupSpec(
+    "quality_daily", QualityDailyRollup, QualityCheck, "check_date",
+    {"product_name": "product_name", "result": "result"},
+    measures=_quality_measures, count_column="check_count"
+)
+MAINTENANCE_ROLLUP = RollupSpec(
+    "maintenance_daily", MaintenanceDailyRollup, MaintenanceRecord, "planned_start_time",
+    {"maintenance_type": "maintenance_type"},
+    measures=_maintenance_measures, count_column="record_count"
+)
+
+ROLLUPS = [PRODUCTION_ROLLUP, QUALITY_ROLLUP, MAINTENANCE_ROLLUP]
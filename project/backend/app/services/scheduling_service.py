@@ -7,10 +7,12 @@
 - 设备负荷均衡
 """
 
+from bisect import bisect_left
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
+import numpy as np
 import pandas as pd
 from loguru import logger
 
@@ -46,6 +48,7 @@ class ProductionOrder:
     scheduled_start: Optional[datetime] = None
     scheduled_end: Optional[datetime] = None
     assigned_equipment: Optional[str] = None
+    equipment_type: Optional[str] = None  # 所需设备类型，为空则不限
 
 
 @dataclass
@@ -57,6 +60,7 @@ class Equipment:
     available_hours_per_day: float
     maintenance_schedule: List[Tuple[datetime, datetime]]
     current_load: float = 0.0
+    equipment_type: Optional[str] = None
 
 
 @dataclass
@@ -70,6 +74,25 @@ class Material:
     supplier: str
 
 
+class MaintenanceWindows:
+    """单台设备按开始时间排序的维护窗口，附带结束时间前缀最大值，O(log n) 判断时段是否与维护重叠"""
+    
+    def __init__(self, windows: List[Tuple[datetime, datetime]]):
+        ordered = sorted(windows)
+        self.starts = [start for start, _ in ordered]
+        self.max_ends = []
+        max_end = None
+        for _, end in ordered:
+            max_end = end if max_end is None or end > max_end else max_end
+            self.max_ends.append(max_end)
+    
+    def overlaps(self, start_time: datetime, end_time: datetime) -> bool:
+        """[start_time, end_time) 是否与任一维护窗口重叠"""
+        # 开始时间早于 end_time 的窗口中，只要最晚结束时间晚于 start_time 即重叠
+        index = bisect_left(self.starts, end_time)
+        return index > 0 and self.max_ends[index - 1] > start_time
+
+
 class SchedulingService:
     """自动排产服务"""
     
@@ -78,28 +101,51 @@ class SchedulingService:
         self.equipment: List[Equipment] = []
         self.materials: List[Material] = []
         self.schedule_results: List[Dict] = []
+        # 索引：按编码查找物料/设备/订单，设备按类型分组，维护窗口按设备排序
+        self._orders_by_id: Dict[str, ProductionOrder] = {}
+        self._materials_by_code: Dict[str, Material] = {}
+        self._equipment_by_id: Dict[str, Equipment] = {}
+        self._equipment_by_type: Dict[Optional[str], List[Equipment]] = {}
+        self._maintenance: Dict[str, MaintenanceWindows] = {}
         
     def add_order(self, order: ProductionOrder) -> None:
         """添加生产订单"""
         self.orders.append(order)
+        self._orders_by_id[order.order_id] = order
         logger.info(f"添加生产订单: {order.order_id}, 产品: {order.product_code}, 数量: {order.quantity}")
     
     def add_equipment(self, equipment: Equipment) -> None:
         """添加设备信息"""
         self.equipment.append(equipment)
+        self._equipment_by_id[equipment.equipment_id] = equipment
+        self._equipment_by_type.setdefault(equipment.equipment_type, []).append(equipment)
+        self._maintenance[equipment.equipment_id] = MaintenanceWindows(equipment.maintenance_schedule)
         logger.info(f"添加设备: {equipment.equipment_id}, 名称: {equipment.name}")
     
     def add_material(self, material: Material) -> None:
         """添加物料信息"""
         self.materials.append(material)
+        self._materials_by_code[material.material_code] = material
         logger.info(f"添加物料: {material.material_code}, 库存: {material.current_stock}")
     
+    def get_order(self, order_id: str) -> Optional[ProductionOrder]:
+        """按订单ID查找订单"""
+        return self._orders_by_id.get(order_id)
+    
+    def get_equipment(self, equipment_id: str) -> Optional[Equipment]:
+        """按设备ID查找设备"""
+        return self._equipment_by_id.get(equipment_id)
+    
+    def get_material(self, material_code: str) -> Optional[Material]:
+        """按物料编码查找物料"""
+        return self._materials_by_code.get(material_code)
+    
     def check_material_availability(self, order: ProductionOrder) -> Tuple[bool, List[str]]:
         """检查物料可用性"""
         missing_materials = []
         
         for material_code, required_qty in order.material_requirements.items():
-            material = next((m for m in self.materials if m.material_code == material_code), None)
+            material = self._materials_by_code.get(material_code)
             if not material:
                 missing_materials.append(f"{material_code}: 物料不存在")
                 continue
@@ -111,24 +157,81 @@ class SchedulingService:
         is_available = len(missing_materials) == 0
         return is_available, missing_materials
     
+    def precheck_material_feasibility(self, orders: List[ProductionOrder]) -> Tuple[Set[str], Set[str]]:
+        """向量化物料预检：一次性按当前库存检查全部待排产订单
+        
+        排产过程中库存只减不增，因此：
+        - 按当前库存已不足（或物料不存在）的订单在贪心排产中一定失败
+        - 其余订单的总需求若不超过某物料库存，则该物料不会成为任何订单的瓶颈；
+          只使用这类物料的订单在排产时无需再逐项检查库存
+        
+        Returns:
+            (必然物料不足的订单ID集合, 物料必然充足的订单ID集合)
+        """
+        order_indexes, material_indexes, quantities = [], [], []
+        material_positions = {code: i for i, code in enumerate(self._materials_by_code)}
+        for order_index, order in enumerate(orders):
+            for material_code, required_qty in order.material_requirements.items():
+                order_indexes.append(order_index)
+                material_indexes.append(material_positions.get(material_code, -1))
+                quantities.append(required_qty)
+        
+        if not order_indexes:
+            return set(), {order.order_id for order in orders}
+        
+        # 库存与需求量按浮点比较，小数数量不会被截断
+        stock = np.fromiter(
+            (m.current_stock for m in self._materials_by_code.values()),
+            dtype=np.float64, count=len(self._materials_by_code)
+        )
+        order_indexes = np.asarray(order_indexes, dtype=np.int64)
+        material_indexes = np.asarray(material_indexes, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        
+        # 单个订单对照当前库存
+        known = material_indexes >= 0
+        available = np.zeros(len(quantities), dtype=np.float64)
+        available[known] = stock[material_indexes[known]]
+        short = ~known | (available < quantities)
+        infeasible = np.zeros(len(orders), dtype=bool)
+        infeasible[order_indexes[short]] = True
+        
+        # 可行订单的物料总需求对照库存，找出存在争用的物料
+        candidate_rows = ~infeasible[order_indexes]
+        demand = np.bincount(
+            material_indexes[candidate_rows], weights=quantities[candidate_rows], minlength=len(stock)
+        )
+        contended = demand > stock
+        contended_rows = np.zeros(len(quantities), dtype=bool)
+        contended_rows[candidate_rows] = contended[material_indexes[candidate_rows]]
+        touches_contended = np.zeros(len(orders), dtype=bool)
+        touches_contended[order_indexes[contended_rows]] = True
+        
+        guaranteed = ~infeasible & ~touches_contended
+        return (
+            {orders[i].order_id for i in np.flatnonzero(infeasible)},
+            {orders[i].order_id for i in np.flatnonzero(guaranteed)}
+        )
+    
     def find_available_equipment(self, order: ProductionOrder, start_time: datetime) -> Optional[Equipment]:
         """查找可用设备"""
         end_time = start_time + timedelta(hours=order.estimated_hours)
+        candidates = (
+            self._equipment_by_type.get(order.equipment_type, [])
+            if order.equipment_type else self.equipment
+        )
         
-        for equipment in self.equipment:
-            # 检查设备是否在维护期间
-            in_maintenance = any(
-                start_time < maint_end and end_time > maint_start
-                for maint_start, maint_end in equipment.maintenance_schedule
-            )
+        for equipment in candidates:
+            # 检查设备负荷
+            daily_hours = equipment.available_hours_per_day
+            if equipment.current_load + order.estimated_hours > daily_hours:
+                continue
             
-            if in_maintenance:
+            # 检查设备是否在维护期间
+            if self._maintenance[equipment.equipment_id].overlaps(start_time, end_time):
                 continue
                 
-            # 检查设备负荷
-            daily_hours = equipment.available_hours_per_day
-            if equipment.current_load + order.estimated_hours <= daily_hours:
-                return equipment
+            return equipment
         
         return None
     
@@ -172,9 +275,16 @@ class SchedulingService:
         failed_orders = []
         current_time = start_date
         
+        # 向量化物料预检，物料必然充足的订单在循环中跳过逐项库存检查
+        infeasible_orders, guaranteed_orders = self.precheck_material_feasibility(sorted_orders)
+        logger.info(f"物料预检: {len(infeasible_orders)} 个订单物料不足，{len(guaranteed_orders)} 个订单物料充足")
+        
         for order in sorted_orders:
             # 检查物料可用性
-            material_available, missing_materials = self.check_material_availability(order)
+            if order.order_id in guaranteed_orders:
+                material_available, missing_materials = True, []
+            else:
+                material_available, missing_materials = self.check_material_availability(order)
             if not material_available:
                 failed_orders.append({
                     'order': order,
@@ -202,8 +312,7 @@ class SchedulingService:
             
             # 扣减物料库存
             for material_code, required_qty in order.material_requirements.items():
-                material = next(m for m in self.materials if m.material_code == material_code)
-                material.current_stock -= required_qty
+                self._materials_by_code[material_code].current_stock -= required_qty
             
             scheduled_orders.append(order)
             current_time = order.scheduled_end
@@ -254,7 +363,7 @@ class SchedulingService:
     
     def reschedule_order(self, order_id: str, new_priority: Priority = None, new_due_date: datetime = None) -> bool:
         """重新排产指定订单"""
-        order = next((o for o in self.orders if o.order_id == order_id), None)
+        order = self._orders_by_id.get(order_id)
         if not order:
             logger.error(f"订单 {order_id} 不存在")
             return False
@@ -269,13 +378,12 @@ class SchedulingService:
         if order.status == OrderStatus.SCHEDULED:
             # 释放设备资源
             if order.assigned_equipment:
-                equipment = next(e for e in self.equipment if e.equipment_id == order.assigned_equipment)
+                equipment = self._equipment_by_id[order.assigned_equipment]
                 equipment.current_load -= order.estimated_hours
             
             # 恢复物料库存
             for material_code, required_qty in order.material_requirements.items():
-                material = next(m for m in self.materials if m.material_code == material_code)
-                material.current_stock += required_qty
+                self._materials_by_code[material_code].current_stock += required_qty
         
         order.status = OrderStatus.PENDING
         order.scheduled_start = None
@@ -0,0 +1,211 @@
+"""关键词搜索索引
+
+列表接口的 keyword 筛选原本是多列 LIKE '%关键词%'，无法使用普通索引，只能全表扫描。
+这里为参与搜索的列建立子串索引，先用索引取出候选行，再用原 LIKE 条件精确判断，
+结果与原来完全一致：
+- SQLite: FTS5 trigram 外部内容表（需 SQLite 3.34+），由触发器在增删改时同步；关键词不少于3个字符时使用
+- PostgreSQL: 每列一个 pg_trgm GIN 索引，LIKE/ILIKE 直接走索引
+- MySQL: ngram 全文索引，MATCH ... AGAINST 短语匹配预筛选
+- 其他数据库或索引未就绪时退化为原 LIKE 条件
+
+索引在应用启动时由 init_search_indexes 幂等创建（SQLite 新建时一次性回填已有数据）。
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, List, Sequence, Set
+
+from sqlalchemy import Boolean, String, bindparam, or_
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.material import BOM, Material
+from app.models.order import Order
+
+logger = logging.getLogger(__name__)
+
+# 已在当前数据库上就绪的索引名
+_ready_indexes: Set[str] = set()
+
+# SQLite trigram 分词的最短可索引长度，MySQL ngram_token_size 默认值
+_SQLITE_MIN_LENGTH = 3
+_MYSQL_MIN_LENGTH = 2
+
+
+@dataclass
+class SearchIndex:
+    """一张表上参与关键词搜索的列
+
+    model 可以是 ORM 模型或 Table；columns 为参与搜索的列名，ignore_case 时使用 ILIKE。
+    """
+    name: str
+    model: Any
+    columns: Sequence[str]
+    ignore_case: bool = False
+
+    @property
+    def table(self):
+        return getattr(self.model, "__table__", self.model)
+
+    @property
+    def ready(self) -> bool:
+        return self.name in _ready_indexes
+
+    def _column(self, name: str):
+        if hasattr(self.model, "__table__"):
+            return getattr(self.model, name)
+        return self.table.c[name]
+
+    def like(self, keyword: str):
+        """原有的多列 LIKE 条件"""
+        columns = [self._column(name) for name in self.columns]
+        if self.ignore_case:
+            pattern = f"%{keyword}%"
+            return or_(*[column.ilike(pattern) for column in columns])
+        return or_(*[column.contains(keyword) for column in columns])
+
+    def filter(self, keyword: str) -> "KeywordMatch":
+        """关键词筛选条件，编译时按数据库选择索引"""
+        return KeywordMatch(self, keyword)
+
+    def ensure(self, connection: Connection) -> bool:
+        """在当前数据库上创建索引（幂等），返回是否就绪"""
+        missing = [column for column in self.columns if column not in self.table.c]
+        if missing:
+            logger.warning(f"搜索索引 {self.name} 未创建，{self.table.name} 缺少列: {', '.join(missing)}")
+            _ready_indexes.discard(self.name)
+            return False
+
+        creators = {
+            "sqlite": self._ensure_sqlite,
+            "postgresql": self._ensure_postgresql,
+            "mysql": self._ensure_mysql,
+        }
+        creator = creators.get(connection.dialect.name)
+        if creator is None:
+            return False
+        try:
+            creator(connection)
+        except Exception as e:
+            logger.warning(f"创建搜索索引 {self.name} 失败，关键词搜索退化为 LIKE 扫描: {e}")
+            _ready_indexes.discard(self.name)
+            return False
+        _ready_indexes.add(self.name)
+        return True
+
+    def _quoted(self, connection: Connection) -> List[str]:
+        quote = connection.dialect.identifier_preparer.quote
+        return [quote(column) for column in self.columns]
+
+    def _ensure_sqlite(self, connection: Connection) -> None:
+        table = self.table.name
+        columns = ", ".join(self._quoted(connection))
+        new_values = ", ".join(f"new.{column}" for column in self._quoted(connection))
+        old_values = ", ".join(f"old.{column}" for column in self._quoted(connection))
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.name,)
+        ).first()
+        if not exists:
+            connection.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {self.name} USING fts5("
+                f"{columns}, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+
+        # 外部内容表由触发器同步：删除与更新需提供旧值
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        if not exists:
+            connection.exec_driver_sql(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')")
+
+    def _ensure_postgresql(self, connection: Connection) -> None:
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        table = self.table.name
+        for column, quoted in zip(self.columns, self._quoted(connection)):
+            connection.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({quoted} gin_trgm_ops)"
+            )
+
+    def _ensure_mysql(self, connection: Connection) -> None:
+        table = self.table.name
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+            (table, self.name)
+        ).first()
+        if not exists:
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table} ADD FULLTEXT INDEX {self.name} ({', '.join(self._quoted(connection))}) "
+                f"WITH PARSER ngram"
+            )
+
+
+class KeywordMatch(ColumnElement):
+    """关键词匹配条件：索引预筛选 + 原 LIKE 条件"""
+    type = Boolean()
+    _is_implicitly_boolean = True  # 本身即为条件表达式，不在 WHERE 中再包一层 "= 1"
+    inherit_cache = False  # 是否使用索引取决于关键词长度与索引状态，不参与语句缓存
+
+    def __init__(self, index: SearchIndex, keyword: str):
+        self.index = index
+        self.keyword = keyword
+
+
+@compiles(KeywordMatch)
+def _compile_like(element, compiler, **kw):
+    # PostgreSQL 的 trigram GIN 索引直接支持 LIKE/ILIKE；其他数据库全表扫描
+    return compiler.process(element.index.like(element.keyword), **kw)
+
+
+@compiles(KeywordMatch, "sqlite")
+def _compile_sqlite(element, compiler, **kw):
+    index, keyword = element.index, element.keyword
+    like = compiler.process(element.index.like(keyword), **kw)
+    if not index.ready or len(keyword) < _SQLITE_MIN_LENGTH:
+        return like
+    phrase = compiler.process(bindparam(None, '"' + keyword.replace('"', '""') + '"', type_=String()), **kw)
+    row_id = compiler.process(index.table.c.id, **kw)
+    return f"({row_id} IN (SELECT rowid FROM {index.name} WHERE {index.name} MATCH {phrase}) AND ({like}))"
+
+
+@compiles(KeywordMatch, "mysql")
+def _compile_mysql(element, compiler, **kw):
+    index, keyword = element.index, element.keyword
+    like = compiler.process(element.index.like(keyword), **kw)
+    phrase_text = keyword.replace('"', " ").strip()
+    if not index.ready or len(phrase_text) < _MYSQL_MIN_LENGTH:
+        return like
+    columns = ", ".join(compiler.process(index.table.c[column], **kw) for column in index.columns)
+    phrase = compiler.process(bindparam(None, f'"{phrase_text}"', type_=String()), **kw)
+    return f"(MATCH ({columns}) AGAINST ({phrase} IN BOOLEAN MODE) AND ({like}))"
+
+
+MATERIAL_SEARCH = SearchIndex(
+    "materials_search", Material, ["material_code", "material_name", "specification", "primary_supplier"]
+)
+ORDER_SEARCH = SearchIndex("orders_search", Order, ["order_no", "customer_name", "product_name", "product_model"])
+BOM_SEARCH = SearchIndex("bom_search", BOM, ["bom_code", "product_name"], ignore_case=True)
+
+SEARCH_INDEXES = [MATERIAL_SEARCH, ORDER_SEARCH, BOM_SEARCH]
+
+
+def ensure_search_indexes(connection: Connection) -> List[str]:
+    """创建全部搜索索引，返回就绪的索引名"""
+    return [index.name for index in SEARCH_INDEXES if index.ensure(connection)]
+
+
+def init_search_indexes(engine: Engine) -> List[str]:
+    """应用启动时在同步引擎上创建全部搜索索引（须在建表之后调用），返回就绪的索引名"""
+    with engine.begin() as connection:
+        return ensure_search_indexes(connection)
@@ -0,0 +1,171 @@
+"""SMTP连接池
+
+复用已登录的SMTP连接发送邮件，避免每封邮件都重新建立连接、TLS握手和登录：
+- 发送在连接池自己的线程池中执行，不阻塞事件循环；线程数即最大并发连接数
+- 空闲连接后进先出复用，空闲超过 idle_timeout 或已发送 max_messages 封后关闭重建
+- 复用的连接已被服务器断开时，重新建立连接再发送一次
+连接与线程绑定而不是与事件循环绑定，队列服务每次新建事件循环发送时也能复用。
+"""
+
+import asyncio
+import smtplib
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+# 这些错误只影响当前邮件，连接仍可继续使用
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+@dataclass
+class _Connection:
+    server: smtplib.SMTP
+    sent: int = 0
+    released_at: float = field(default_factory=time.monotonic)
+
+
+class SMTPConnectionPool:
+    """SMTP连接池"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        use_ssl: bool = False,
+        size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 60,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._idle: List[_Connection] = []
+        self._lock = Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"connections_opened": 0, "messages_sent": 0, "reconnects": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="smtp")
+            return self._executor
+
+    def _open(self) -> _Connection:
+        if self.use_ssl:
+            context = ssl.create_default_context()
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=context)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                context = ssl.create_default_context()
+                server.starttls(context=context)
+        try:
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        return _Connection(server)
+
+    @staticmethod
+    def _close(connection: _Connection):
+        try:
+            connection.server.quit()
+        except Exception:
+            connection.server.close()
+
+    def _acquire(self) -> Optional[_Connection]:
+        """取出一个可复用的空闲连接，没有时返回 None"""
+        expired = []
+        connection = None
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.released_at > self.idle_timeout:
+                    expired.append(candidate)
+                else:
+                    connection = candidate
+                    break
+        for candidate in expired:
+            self._close(candidate)
+        return connection
+
+    def _release(self, connection: _Connection):
+        if connection.sent >= self.max_messages:
+            self._close(connection)
+            return
+        connection.released_at = time.monotonic()
+        with self._lock:
+            self._idle.append(connection)
+
+    def send_blocking(self, from_addr: str, recipients: List[str], message: str) -> Dict[str, Any]:
+        """在当前线程中发送，返回被拒绝的收件人（同 smtplib.SMTP.sendmail）"""
+        connection = self._acquire()
+        reused = connection is not None
+        if connection is None:
+            connection = self._open()
+        try:
+            try:
+                refused = connection.server.sendmail(from_addr, recipients, message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                if not reused:
+                    raise
+                # 服务器已关闭空闲连接，重新连接后再发送一次
+                connection.server.close()
+                with self._lock:
+                    self._stats["reconnects"] += 1
+                connection = self._open()
+                refused = connection.server.sendmail(from_addr, recipients, message)
+        except _MESSAGE_ERRORS:
+            connection.sent += 1
+            self._release(connection)
+            raise
+        except Exception:
+            connection.server.close()
+            raise
+        connection.sent += 1
+        with self._lock:
+            self._stats["messages_sent"] += 1
+        self._release(connection)
+        return refused
+
+    async def send(self, from_addr: str, recipients: List[str], message: str) -> Dict[str, Any]:
+        """在连接池线程中发送，最多 size 封同时发送"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.send_blocking, from_addr, recipients, message)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "idle_connections": len(self._idle)}
+
+    def close(self):
+        """关闭线程池和所有空闲连接"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+        logger.info("SMTP connection pool closed")
@@ -0,0 +1,370 @@
+"""统计聚合服务
+
+为 /reports/dashboard 与各模块 /stats/overview 接口提供单次扫描的分组统计：
+- 每张表只执行一条按状态（或结果）分组的查询，本月新增、逾期、紧急等计数以条件聚合
+  COUNT(CASE WHEN ... THEN 1 END) / SUM(CASE WHEN ... THEN x END) 在同一次扫描中得出，
+  接口再在内存中按状态组合出各项指标
+- 聚合结果按表短时缓存（STATS_CACHE_TTL），并登记 "{实体}:*" 标签；
+  业务表的写入提交后由 ORM 事件自动失效对应标签
+- 同时支持同步 Session 与 AsyncSession
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from sqlalchemy import and_, case, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.models.equipment import Equipment, MaintenanceRecord, MaintenanceStatus
+from app.models.material import Material, MaterialCategory
+from app.models.order import Order, OrderPriority
+from app.models.production_plan import ProductionPlan
+from app.models.progress import ProgressRecord, QualityRecord
+from app.models.quality import QualityCheck
+
+logger = logging.getLogger(__name__)
+
+# 表名 -> 缓存标签实体名，用于写入提交后的自动失效
+_TABLE_ENTITIES: Dict[str, str] = {}
+
+# Session.info 中记录本事务写入过的实体
+_CHANGED_ENTITIES_KEY = "pmc_stats_changed_entities"
+
+
+@dataclass
+class Measure:
+    """条件聚合量
+
+    kind 为 "count" 时统计满足条件（且 value 非空）的行数，为 "distinct" 时统计满足条件的 value 的不同取值数，
+    为 "sum" 时对满足条件的 value 求和。
+    """
+    name: str
+    kind: str = "count"
+    value: Any = None
+    condition: Any = None
+
+    def expression(self):
+        """构建聚合表达式"""
+        if self.condition is not None:
+            target = case((self.condition, 1 if self.value is None else self.value))
+        else:
+            target = self.value
+        if self.kind == "sum":
+            return func.sum(target).label(self.name)
+        if self.kind == "distinct":
+            return func.count(target.distinct()).label(self.name)
+        return (func.count(target) if target is not None else func.count()).label(self.name)
+
+
+def count_if(name: str, condition: Any) -> Measure:
+    """满足条件的行数"""
+    return Measure(name, "count", condition=condition)
+
+
+def count_of(name: str, value: Any, condition: Any = None) -> Measure:
+    """值非空（且满足条件）的行数，用作平均值的分母"""
+    return Measure(name, "count", value=value, condition=condition)
+
+
+def count_distinct(name: str, value: Any, condition: Any = None) -> Measure:
+    """满足条件的行中 value 的不同取值数"""
+    return Measure(name, "distinct", value=value, condition=condition)
+
+
+def sum_of(name: str, value: Any, condition: Any = None) -> Measure:
+    """满足条件的行的合计"""
+    return Measure(name, "sum", value=value, condition=condition)
+
+
+@dataclass
+class StatsTable:
+    """单表分组统计定义
+
+    measures 在每次查询时按当前时间构建，以便"本月""今天"等条件随时间推移。
+    """
+    name: str
+    entity: str
+    model: Any
+    group_by: str = "status"
+    measures: Callable[[datetime], List[Measure]] = field(default=lambda now: [])
+
+    def __post_init__(self):
+        _TABLE_ENTITIES[self.model.__tablename__] = self.entity
+
+    @property
+    def cache_key(self) -> str:
+        return cache_manager.key_builder.build("stats", self.name)
+
+    @property
+    def tags(self) -> List[str]:
+        return [f"{self.entity}:*"]
+
+    def statement(self, now: datetime):
+        """一条 GROUP BY 查询得到各分组的行数及全部条件聚合量"""
+        column = getattr(self.model, self.group_by)
+        return select(
+            column.label("group_key"),
+            func.count().label("count"),
+            *[measure.expression() for measure in self.measures(now)]
+        ).group_by(column)
+
+
+def _group_key(value: Any) -> str:
+    """分组值统一为字符串（枚举取其值），便于JSON缓存"""
+    if isinstance(value, Enum):
+        value = value.value
+    return "" if value is None else str(value)
+
+
+def _number(value: Any) -> Union[int, float]:
+    if value is None:
+        return 0
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class StatsBreakdown:
+    """分组聚合结果：{分组值: {聚合量: 值}}，其中 "count" 为该组行数"""
+
+    def __init__(self, groups: Dict[str, Dict[str, Union[int, float]]]):
+        self.groups = groups
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any]) -> "StatsBreakdown":
+        groups = {}
+        for row in rows:
+            values = row._asdict()
+            key = _group_key(values.pop("group_key"))
+            groups[key] = {name: _number(value) for name, value in values.items()}
+        return cls(groups)
+
+    def _select(self, statuses: tuple, exclude: Iterable[Any]) -> Iterator[Dict[str, Union[int, float]]]:
+        wanted = {_group_key(status) for status in statuses} if statuses else None
+        excluded = {_group_key(status) for status in exclude}
+        for key, values in self.groups.items():
+            if (wanted is None or key in wanted) and key not in excluded:
+                yield values
+
+    def value(self, name: str, *statuses: Any, exclude: Iterable[Any] = ()) -> Union[int, float]:
+        """指定分组（默认全部）上某个聚合量的合计"""
+        return sum(values.get(name, 0) for values in self._select(statuses, exclude))
+
+    def count(self, *statuses: Any, exclude: Iterable[Any] = ()) -> int:
+        """指定分组（默认全部）的行数"""
+        return int(self.value("count", *statuses, exclude=exclude))
+
+    def average(self, sum_name: str, count_name: str, *statuses: Any, exclude: Iterable[Any] = ()) -> float:
+        """由合计与计数求平均值"""
+        count = self.value(count_name, *statuses, exclude=exclude)
+        return float(self.value(sum_name, *statuses, exclude=exclude)) / count if count else 0.0
+
+
+async def _fetch_rows(db: Union[Session, AsyncSession], statement) -> List[Any]:
+    if isinstance(db, AsyncSession):
+        return (await db.execute(statement)).all()
+    return db.execute(statement).all()
+
+
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_pending_invalidations: Set[asyncio.Task] = set()
+
+
+async def get_breakdown(db: Union[Session, AsyncSession], table: StatsTable) -> StatsBreakdown:
+    """获取单表的分组统计
+
+    结果短时缓存并在表写入后失效；并发未命中只查询一次。工厂函数使用的是当前请求的会话，
+    因此不启用过期旧值的后台刷新。
+    """
+    global _event_loop
+    _event_loop = asyncio.get_running_loop()
+
+    async def load():
+        rows = await _fetch_rows(db, table.statement(datetime.now()))
+        return StatsBreakdown.from_rows(rows).groups
+
+    groups = await cache_manager.get_or_set(
+        table.cache_key, load, ttl=settings.STATS_CACHE_TTL, tags=table.tags
+    )
+    return StatsBreakdown(groups)
+
+
+async def _invalidate_entities(entities: Set[str]) -> None:
+    try:
+        await cache_manager.invalidate_tags(*[f"{entity}:*" for entity in sorted(entities)])
+    except Exception as e:
+        logger.warning(f"失效统计缓存失败 {sorted(entities)}: {e}")
+
+
+def invalidate_entities_later(entities: Set[str]) -> None:
+    """从同步上下文（ORM 事件回调）安排统计缓存失效
+
+    在事件循环线程中直接创建任务；在线程池中提交时（如 run_in_threadpool 执行的排程）
+    交给主事件循环执行。没有事件循环的进程（如 Celery worker）依赖短TTL过期。
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None:
+        task = loop.create_task(_invalidate_entities(entities))
+        _pending_invalidations.add(task)
+        task.add_done_callback(_pending_invalidations.discard)
+    elif _event_loop is not None and _event_loop.is_running():
+        asyncio.run_coroutine_threadsafe(_invalidate_entities(entities), _event_loop)
+
+
+def _changed_entities(session: Session) -> Set[str]:
+    return session.info.setdefault(_CHANGED_ENTITIES_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_entities(session, flush_context):
+    """记录本次刷新写入的实体"""
+    changed = _changed_entities(session)
+    for instance in chain(session.new, session.dirty, session.deleted):
+        entity = _TABLE_ENTITIES.get(getattr(instance, "__tablename__", None))
+        if entity is not None:
+            changed.add(entity)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_entities(orm_execute_state):
+    """记录 ORM 批量 INSERT/UPDATE/DELETE 涉及的实体"""
+    if orm_execute_state.is_select:
+        return
+    for mapper in orm_execute_state.all_mappers:
+        entity = _TABLE_ENTITIES.get(getattr(mapper.class_, "__tablename__", None))
+        if entity is not None:
+            _changed_entities(orm_execute_state.session).add(entity)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_entities(session):
+    """事务提交后失效写入过的实体的统计缓存"""
+    changed = session.info.pop(_CHANGED_ENTITIES_KEY, None)
+    if changed:
+        invalidate_entities_later(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_entities(session):
+    session.info.pop(_CHANGED_ENTITIES_KEY, None)
+
+
+def _day_start(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_start(now: datetime) -> datetime:
+    return _day_start(now).replace(day=1)
+
+
+def _order_measures(now: datetime) -> List[Measure]:
+    month_start = _month_start(now)
+    return [
+        count_if("urgent", Order.priority == OrderPriority.URGENT),
+        count_if("monthly_new", Order.created_at >= month_start),
+        count_if("monthly_updated", Order.updated_at >= month_start),
+        count_if("overdue", Order.delivery_date < _day_start(now)),
+        sum_of("amount", Order.total_amount),
+        sum_of("monthly_amount", Order.total_amount, Order.created_at >= month_start),
+    ]
+
+
+def _material_measures(now: datetime) -> List[Measure]:
+    return [
+        count_if("raw_material", Material.category == MaterialCategory.RAW_MATERIAL),
+        count_if("semi_finished", Material.category == MaterialCategory.SEMI_FINISHED),
+        count_if("finished_product", Material.category == MaterialCategory.FINISHED_PRODUCT),
+        count_if("consumable", Material.category == MaterialCategory.CONSUMABLE),
+        count_if("tool", Material.category == MaterialCategory.TOOL),
+        count_if("inactive", Material.is_active.is_(False)),
+        count_if("low_stock", Material.current_stock <= Material.safety_stock),
+        count_if("out_of_stock", Material.current_stock <= 0),
+        count_if("overstock", Material.current_stock >= Material.max_stock),
+        sum_of("stock_value", Material.current_stock * Material.unit_price),
+        count_if("monthly_new", Material.created_at >= _month_start(now)),
+    ]
+
+
+def _production_plan_measures(now: datetime) -> List[Measure]:
+    month_start = _month_start(now)
+    return [
+        count_if("monthly_new", ProductionPlan.created_at >= month_start),
+        count_if("monthly_updated", ProductionPlan.updated_at >= month_start),
+        count_if("overdue", ProductionPlan.plan_end_date < _day_start(now)),
+        sum_of("progress_sum", ProductionPlan.progress),
+        count_of("progress_count", ProductionPlan.progress),
+    ]
+
+
+def _equipment_measures(now: datetime) -> List[Measure]:
+    today = _day_start(now)
+    return [
+        count_if("warranty_expiring", and_(
+            Equipment.warranty_expiry < today + timedelta(days=31),
+            Equipment.warranty_expiry >= today
+        )),
+        sum_of("value", Equipment.purchase_cost),
+        count_if("monthly_new", Equipment.created_at >= _month_start(now)),
+    ]
+
+
+def _maintenance_measures(now: datetime) -> List[Measure]:
+    this_month = MaintenanceRecord.planned_start_time >= _month_start(now)
+    return [
+        # 设备表不记录下次维护日期，以7天内（含已过期）计划开始、尚未执行的维护单所属设备作为待维护设备
+        count_distinct("due_equipment", MaintenanceRecord.equipment_id, and_(
+            MaintenanceRecord.status.in_([MaintenanceStatus.PLANNED, MaintenanceStatus.POSTPONED]),
+            MaintenanceRecord.planned_start_time < _day_start(now) + timedelta(days=8)
+        )),
+        count_if("monthly", this_month),
+        sum_of("monthly_cost", MaintenanceRecord.total_cost, this_month),
+    ]
+
+
+def _quality_check_measures(now: datetime) -> List[Measure]:
+    this_month = QualityCheck.created_at >= _month_start(now)
+    return [
+        sum_of("check_quantity", QualityCheck.check_quantity),
+        sum_of("pass_quantity", QualityCheck.pass_quantity),
+        count_if("monthly", this_month),
+        sum_of("monthly_check_quantity", QualityCheck.check_quantity, this_month),
+        sum_of("monthly_pass_quantity", QualityCheck.pass_quantity, this_month),
+    ]
+
+
+def _progress_measures(now: datetime) -> List[Measure]:
+    month_start = _month_start(now)
+    return [
+        count_if("overdue", ProgressRecord.plan_end_date < _day_start(now)),
+        sum_of("progress_sum", ProgressRecord.progress),
+        count_of("progress_count", ProgressRecord.progress),
+        count_if("monthly_new", ProgressRecord.created_at >= month_start),
+        count_if("monthly_updated", ProgressRecord.updated_at >= month_start),
+    ]
+
+
+ORDER_STATS = StatsTable("order", "order", Order, measures=_order_measures)
+MATERIAL_STATS = StatsTable("material", "material", Material, measures=_material_measures)
+PRODUCTION_PLAN_STATS = StatsTable(
+    "production_plan", "production_plan", ProductionPlan, measures=_production_plan_measures
+)
+EQUIPMENT_STATS = StatsTable("equipment", "equipment", Equipment, measures=_equipment_measures)
+MAINTENANCE_STATS = StatsTable("maintenance_record", "equipment", MaintenanceRecord, measures=_maintenance_measures)
+QUALITY_CHECK_STATS = StatsTable(
+    "quality_check", "quality", QualityCheck, group_by="result", measures=_quality_check_measures
+)
+PROGRESS_STATS = StatsTable("progress_record", "progress", ProgressRecord, measures=_progress_measures)
+PROGRESS_QUALITY_STATS = StatsTable("progress_quality_record", "progress", QualityRecord, group_by="check_result")
@@ -8,7 +8,6 @@
 - 会话管理
 """
 
-import requests
 import json
 import hashlib
 import secrets
@@ -21,6 +20,8 @@ import asyncio
 import jwt
 from urllib.parse import urlencode, quote
 
+from .wechat_client import get_wechat_client
+
 
 class UserRole(Enum):
     """用户角色"""
@@ -118,8 +119,8 @@ class WeChatAuthService:
         self.app_secret = app_secret or secrets.token_urlsafe(32)
         self.redirect_uri = redirect_uri or "http://localhost:8000/auth/callback"
         
-        self.access_token = None
-        self.token_expires_at = None
+        # 企业微信接口客户端（连接复用、重试，令牌与同一应用的其他服务共用）
+        self.client = get_wechat_client(corp_id, corp_secret)
         
         # 存储
         self.users: Dict[str, UserInfo] = {}
@@ -201,34 +202,8 @@ class WeChatAuthService:
         logger.info(f"初始化了 {len(default_users)} 个默认用户")
     
     async def get_access_token(self) -> str:
-        """获取访问令牌"""
-        if (self.access_token and 
-            self.token_expires_at and 
-            datetime.now() < self.token_expires_at):
-            return self.access_token
-        
-        url = f"https://qyapi.weixin.qq.com/cgi-bin/gettoken"
-        params = {
-            "corpid": self.corp_id,
-            "corpsecret": self.corp_secret
-        }
-        
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if data.get("errcode") == 0:
-                self.access_token = data["access_token"]
-                self.token_expires_at = datetime.now() + timedelta(seconds=data["expires_in"] - 600)
-                logger.info("微信访问令牌获取成功")
-                return self.access_token
-            else:
-                logger.error(f"获取微信访问令牌失败: {data}")
-                raise Exception(f"获取访问令牌失败: {data.get('errmsg')}")
-                
-        except Exception as e:
-            logger.error(f"获取微信访问令牌异常: {e}")
-            raise
+        """获取访问令牌（同一应用的服务共用令牌缓存，过期时只刷新一次）"""
+        return await self.client.get_access_token()
     
     def generate_auth_url(self, state: str = None) -> str:
         """生成授权URL"""
@@ -289,18 +264,8 @@ class WeChatAuthService:
     async def _get_user_info_by_code(self, code: str) -> Optional[UserInfo]:
         """通过授权码获取用户信息"""
         try:
-            # 1. 获取access_token
-            access_token = await self.get_access_token()
-            
-            # 2. 通过code获取用户ID
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/user/getuserinfo"
-            params = {
-                "access_token": access_token,
-                "code": code
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            # 1. 通过code获取用户ID（客户端自动附带access_token）
+            data = await self.client.get("/user/getuserinfo", params={"code": code})
             
             if data.get("errcode") != 0:
                 logger.error(f"获取用户ID失败: {data}")
@@ -311,7 +276,7 @@ class WeChatAuthService:
                 logger.error("未获取到用户ID")
                 return None
             
-            # 3. 获取用户详细信息
+            # 2. 获取用户详细信息
             user_detail = await self._get_user_detail(user_id)
             return user_detail
             
@@ -322,15 +287,7 @@ class WeChatAuthService:
     async def _get_user_detail(self, user_id: str) -> Optional[UserInfo]:
         """获取用户详细信息"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/user/get"
-            params = {
-                "access_token": access_token,
-                "userid": user_id
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            data = await self.client.get("/user/get", params={"userid": user_id})
             
             if data.get("errcode") != 0:
                 logger.error(f"获取用户详细信息失败: {data}")
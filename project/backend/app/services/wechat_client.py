@@ -0,0 +1,232 @@
+"""企业微信 API 客户端
+
+消息、群组、认证等企业微信服务共用的异步 HTTP 层：
+- 同一应用（corp_id + corp_secret）共用一个客户端，连接保持复用，访问令牌只缓存一份
+- 统一超时；网络错误、429/5xx 和企业微信“系统繁忙”（errcode -1）按指数退避加随机抖动重试。
+  POST 只在请求未发出（连接失败）、限流或系统繁忙时重试，避免重复发送消息
+- 令牌单飞刷新：并发请求同时发现令牌过期时只请求一次 gettoken；
+  接口返回令牌失效（40014、42001）时刷新令牌后重发一次
+连接与令牌锁绑定在模块共用的后台事件循环线程上，而不是调用方的事件循环，
+队列服务、催办调度器每次新建事件循环发送时也能复用连接。
+"""
+
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+from loguru import logger
+
+WECHAT_API_BASE = "https://qyapi.weixin.qq.com/cgi-bin"
+
+# 令牌失效（无效、过期）的错误码
+TOKEN_INVALID_ERRCODES = {40014, 42001}
+# 系统繁忙，可稍后重试
+BUSY_ERRCODE = -1
+# 可重试的 HTTP 状态码；POST 只重试服务端未处理请求的状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+POST_RETRY_STATUS_CODES = {429, 503}
+# 请求尚未发出的错误，POST 也可以安全重试
+_UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+T = TypeVar("T")
+
+# 所有客户端的连接所在的后台事件循环
+_io_loop: Optional[asyncio.AbstractEventLoop] = None
+_io_loop_lock = threading.Lock()
+
+
+def _get_io_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时启动）后台事件循环线程"""
+    global _io_loop
+    with _io_loop_lock:
+        if _io_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="wechat-io", daemon=True).start()
+            _io_loop = loop
+        return _io_loop
+
+
+async def _on_io_loop(coroutine: Awaitable[T]) -> T:
+    """在后台事件循环中执行协程并等待结果，调用方取消时一并取消"""
+    loop = _get_io_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coroutine
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+
+class WeChatAPIError(Exception):
+    """企业微信接口返回错误"""
+
+    def __init__(self, errcode: Any, errmsg: Any):
+        self.errcode = errcode
+        self.errmsg = errmsg
+        super().__init__(f"{errmsg} (errcode={errcode})")
+
+
+class WeChatClient:
+    """企业微信 API 客户端"""
+
+    def __init__(
+        self,
+        corp_id: str,
+        corp_secret: str,
+        base_url: str = WECHAT_API_BASE,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 20,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.corp_id = corp_id
+        self.corp_secret = corp_secret
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.transport = transport
+
+        self.access_token: Optional[str] = None
+        self.token_expires_at: Optional[datetime] = None
+        self.token_refreshes = 0
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        """获取连接（只在后台事件循环中调用）"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=self.limits, transport=self.transport
+            )
+            self._token_lock = asyncio.Lock()
+        return self._client
+
+    def _token_valid(self, stale_token: Optional[str] = None) -> bool:
+        return bool(self.access_token and self.token_expires_at
+                    and datetime.now() < self.token_expires_at
+                    and self.access_token != stale_token)
+
+    async def get_access_token(self, stale_token: Optional[str] = None) -> str:
+        """获取访问令牌
+
+        stale_token 为接口报告失效的令牌，与缓存的令牌相同时强制刷新。
+        """
+        if self._token_valid(stale_token):
+            return self.access_token
+        return await _on_io_loop(self._refresh_token(stale_token))
+
+    async def _refresh_token(self, stale_token: Optional[str]) -> str:
+        self._ensure_client()
+        async with self._token_lock:
+            # 等待期间其他请求可能已刷新令牌
+            if self._token_valid(stale_token):
+                return self.access_token
+            data = await self._send("GET", "/gettoken", params={
+                "corpid": self.corp_id,
+                "corpsecret": self.corp_secret
+            })
+            if data.get("errcode") != 0:
+                logger.error(f"获取微信访问令牌失败: {data}")
+                raise WeChatAPIError(data.get("errcode"), data.get("errmsg"))
+            self.access_token = data["access_token"]
+            # token有效期2小时，提前10分钟刷新
+            self.token_expires_at = datetime.now() + timedelta(seconds=data["expires_in"] - 600)
+            self.token_refreshes += 1
+            logger.info("微信访问令牌获取成功")
+            return self.access_token
+
+    def _retry_reason(self, method: str, response: Optional[httpx.Response],
+                      error: Optional[Exception]) -> Optional[str]:
+        """返回重试原因，不应重试时返回 None"""
+        idempotent = method == "GET"
+        if error is not None:
+            if idempotent or isinstance(error, _UNSENT_ERRORS):
+                return type(error).__name__
+            return None
+        retry_codes = RETRY_STATUS_CODES if idempotent else POST_RETRY_STATUS_CODES
+        if response.status_code in retry_codes:
+            return f"HTTP {response.status_code}"
+        return None
+
+    async def _send(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+        """发送请求并返回响应 JSON，可重试的失败按指数退避加随机抖动重试"""
+        client = self._ensure_client()
+        for attempt in range(self.max_retries + 1):
+            response, error = None, None
+            try:
+                response = await client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                error = e
+            reason = self._retry_reason(method, response, error)
+            if reason is None and error is None:
+                response.raise_for_status()
+                data = response.json()
+                if data.get("errcode") != BUSY_ERRCODE:
+                    return data
+                reason = "系统繁忙"
+            if reason is None or attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+                return response.json()
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            logger.warning(f"企业微信请求 {path} 失败（{reason}），{delay:.2f}s 后第 {attempt + 1} 次重试")
+            await asyncio.sleep(delay)
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """带访问令牌调用接口，返回响应 JSON（errcode 由调用方判断）"""
+        return await _on_io_loop(self._request(method, path, params, json))
+
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]],
+                       json: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        token = await self.get_access_token()
+        data = await self._send(method, path, params={**(params or {}), "access_token": token}, json=json)
+        if data.get("errcode") in TOKEN_INVALID_ERRCODES:
+            logger.warning(f"微信访问令牌已失效（errcode={data.get('errcode')}），刷新后重试")
+            token = await self.get_access_token(stale_token=token)
+            data = await self._send(method, path, params={**(params or {}), "access_token": token}, json=json)
+        return data
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.request("GET", path, params=params)
+
+    async def post(self, path: str, json: Optional[Dict[str, Any]] = None,
+                   params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.request("POST", path, params=params, json=json)
+
+    async def aclose(self):
+        """关闭连接"""
+        await _on_io_loop(self._aclose())
+
+    async def _aclose(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+# 按应用共用的客户端
+_clients: Dict[Tuple[str, str], WeChatClient] = {}
+
+
+def get_wechat_client(corp_id: str, corp_secret: str) -> WeChatClient:
+    """获取应用对应的共用客户端"""
+    key = (corp_id, corp_secret)
+    client = _clients.get(key)
+    if client is None:
+        client = _clients.setdefault(key, WeChatClient(corp_id, corp_secret))
+    return client
+
+
+async def close_wechat_clients():
+    """关闭所有共用客户端（应用关闭时调用）"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -7,15 +7,16 @@
 - 群组信息查询
 """
 
-import requests
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
 from loguru import logger
 import asyncio
 
+from .wechat_client import get_wechat_client
+
 
 class GroupType(Enum):
     """群组类型"""
@@ -73,50 +74,21 @@ class WeChatGroupService:
         self.corp_id = corp_id
         self.corp_secret = corp_secret
         self.agent_id = agent_id
-        self.access_token = None
-        self.token_expires_at = None
+        # 企业微信接口客户端（连接复用、重试，令牌与同一应用的其他服务共用）
+        self.client = get_wechat_client(corp_id, corp_secret)
         self.groups: Dict[str, GroupInfo] = {}
         self.group_members: Dict[str, List[GroupMember]] = {}
         self.group_messages: Dict[str, List[GroupMessage]] = {}
         
     async def get_access_token(self) -> str:
-        """获取访问令牌"""
-        if (self.access_token and 
-            self.token_expires_at and 
-            datetime.now() < self.token_expires_at):
-            return self.access_token
-        
-        url = f"https://qyapi.weixin.qq.com/cgi-bin/gettoken"
-        params = {
-            "corpid": self.corp_id,
-            "corpsecret": self.corp_secret
-        }
-        
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if data.get("errcode") == 0:
-                self.access_token = data["access_token"]
-                self.token_expires_at = datetime.now() + timedelta(seconds=data["expires_in"] - 600)
-                logger.info("微信访问令牌获取成功")
-                return self.access_token
-            else:
-                logger.error(f"获取微信访问令牌失败: {data}")
-                raise Exception(f"获取访问令牌失败: {data.get('errmsg')}")
-                
-        except Exception as e:
-            logger.error(f"获取微信访问令牌异常: {e}")
-            raise
+        """获取访问令牌（同一应用的服务共用令牌缓存，过期时只刷新一次）"""
+        return await self.client.get_access_token()
     
     async def create_group(self, name: str, description: str, 
                           group_type: GroupType, owner_id: str,
                           initial_members: List[str] = None) -> str:
         """创建群组"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/appchat/create?access_token={access_token}"
-            
             # 构建群组数据
             group_data = {
                 "name": name,
@@ -125,8 +97,7 @@ class WeChatGroupService:
                 "chatid": f"{group_type.value}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             }
             
-            response = requests.post(url, json=group_data, timeout=10)
-            result = response.json()
+            result = await self.client.post("/appchat/create", json=group_data)
             
             if result.get("errcode") == 0:
                 group_id = result["chatid"]
@@ -174,9 +145,6 @@ class WeChatGroupService:
     async def add_members(self, group_id: str, user_ids: List[str]) -> bool:
         """添加群组成员"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/appchat/update?access_token={access_token}"
-            
             # 获取当前成员列表
             current_members = [m.user_id for m in self.group_members.get(group_id, [])]
             new_members = list(set(current_members + user_ids))
@@ -186,8 +154,7 @@ class WeChatGroupService:
                 "add_user_list": user_ids
             }
             
-            response = requests.post(url, json=data, timeout=10)
-            result = response.json()
+            result = await self.client.post("/appchat/update", json=data)
             
             if result.get("errcode") == 0:
                 # 更新本地成员列表
@@ -220,16 +187,12 @@ class WeChatGroupService:
     async def remove_members(self, group_id: str, user_ids: List[str]) -> bool:
         """移除群组成员"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/appchat/update?access_token={access_token}"
-            
             data = {
                 "chatid": group_id,
                 "del_user_list": user_ids
             }
             
-            response = requests.post(url, json=data, timeout=10)
-            result = response.json()
+            result = await self.client.post("/appchat/update", json=data)
             
             if result.get("errcode") == 0:
                 # 更新本地成员列表
@@ -258,9 +221,6 @@ class WeChatGroupService:
                                 message_type: str = "text") -> bool:
         """发送群组消息"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/appchat/send?access_token={access_token}"
-            
             data = {
                 "chatid": group_id,
                 "msgtype": message_type,
@@ -269,8 +229,7 @@ class WeChatGroupService:
                 }
             }
             
-            response = requests.post(url, json=data, timeout=10)
-            result = response.json()
+            result = await self.client.post("/appchat/send", json=data)
             
             if result.get("errcode") == 0:
                 # 记录消息
@@ -300,11 +259,7 @@ class WeChatGroupService:
     async def get_group_info(self, group_id: str) -> Optional[GroupInfo]:
         """获取群组信息"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/appchat/get?access_token={access_token}&chatid={group_id}"
-            
-            response = requests.get(url, timeout=10)
-            result = response.json()
+            result = await self.client.get("/appchat/get", params={"chatid": group_id})
             
             if result.get("errcode") == 0:
                 chat_info = result["chat_info"]
@@ -337,15 +292,11 @@ class WeChatGroupService:
                                description: str = None) -> bool:
         """更新群组信息"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/appchat/update?access_token={access_token}"
-            
             data = {"chatid": group_id}
             if name:
                 data["name"] = name
             
-            response = requests.post(url, json=data, timeout=10)
-            result = response.json()
+            result = await self.client.post("/appchat/update", json=data)
             
             if result.get("errcode") == 0:
                 # 更新本地信息
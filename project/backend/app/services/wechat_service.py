@@ -7,9 +7,8 @@
 - 日报周报推送
 """
 
-import requests
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
@@ -17,6 +16,8 @@ from loguru import logger
 import asyncio
 from jinja2 import Template
 
+from .wechat_client import get_wechat_client
+
 
 class MessageType(Enum):
     """消息类型枚举"""
@@ -81,6 +82,8 @@ class WeChatService:
     
     def __init__(self, config: WeChatConfig):
         self.config = config
+        # 企业微信接口客户端（连接复用、重试，令牌与同一应用的其他服务共用）
+        self.client = get_wechat_client(config.corp_id, config.corp_secret)
         self.notification_rules: List[NotificationRule] = []
         self.message_queue: List[Message] = []
         self.sent_messages: List[Message] = []
@@ -144,44 +147,12 @@ class WeChatService:
         logger.info(f"初始化了 {len(default_rules)} 个默认通知规则")
     
     async def get_access_token(self) -> str:
-        """获取访问令牌"""
-        # 检查token是否有效
-        if (self.config.access_token and 
-            self.config.token_expires_at and 
-            datetime.now() < self.config.token_expires_at):
-            return self.config.access_token
-        
-        # 获取新token
-        url = f"https://qyapi.weixin.qq.com/cgi-bin/gettoken"
-        params = {
-            "corpid": self.config.corp_id,
-            "corpsecret": self.config.corp_secret
-        }
-        
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if data.get("errcode") == 0:
-                self.config.access_token = data["access_token"]
-                # token有效期2小时，提前10分钟刷新
-                self.config.token_expires_at = datetime.now() + timedelta(seconds=data["expires_in"] - 600)
-                logger.info("微信访问令牌获取成功")
-                return self.config.access_token
-            else:
-                logger.error(f"获取微信访问令牌失败: {data}")
-                raise Exception(f"获取访问令牌失败: {data.get('errmsg')}")
-                
-        except Exception as e:
-            logger.error(f"获取微信访问令牌异常: {e}")
-            raise
+        """获取访问令牌（同一应用的服务共用令牌缓存，过期时只刷新一次）"""
+        return await self.client.get_access_token()
     
     async def send_text_message(self, recipients: List[str], content: str, safe: int = 0) -> bool:
         """发送文本消息"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token={access_token}"
-            
             # 构建消息体
             data = {
                 "touser": "|".join(recipients) if recipients != ["@all"] else "@all",
@@ -193,8 +164,7 @@ class WeChatService:
                 "safe": safe
             }
             
-            response = requests.post(url, json=data, timeout=10)
-            result = response.json()
+            result = await self.client.post("/message/send", json=data)
             
             if result.get("errcode") == 0:
                 logger.info(f"微信消息发送成功: {recipients}")
@@ -210,9 +180,6 @@ class WeChatService:
     async def send_markdown_message(self, recipients: List[str], content: str) -> bool:
         """发送Markdown消息"""
         try:
-            access_token = await self.get_access_token()
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token={access_token}"
-            
             data = {
                 "touser": "|".join(recipients) if recipients != ["@all"] else "@all",
                 "msgtype": "markdown",
@@ -222,8 +189,7 @@ class WeChatService:
                 }
             }
             
-            response = requests.post(url, json=data, timeout=10)
-            result = response.json()
+            result = await self.client.post("/message/send", json=data)
             
             if result.get("errcode") == 0:
                 logger.info(f"微信Markdown消息发送成功: {recipients}")
@@ -7,7 +7,8 @@
 """
 
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+import pandas as pd
 from sqlalchemy.orm import Session
 from loguru import logger
 
@@ -22,27 +23,52 @@ from ..models.progress import ProgressRecord
 from ..models.quality import QualityRecord
 from ..core.celery_app import celery_app
 from ..core.exceptions import ValidationException, BusinessException
+from ..services.batch_import import BatchImporter, ImportResult, ImportSpec
+from ..utils.stream_export import EXPORT_BATCH_SIZE
 
 
 @celery_app.task(bind=True, name="process_import_data")
-def process_import_data_task(self, data_type: str, data: List[Dict[str, Any]], user_id: int):
+def process_import_data_task(
+    self,
+    data_type: str,
+    data: Optional[List[Dict[str, Any]]] = None,
+    user_id: Optional[int] = None,
+    file_path: Optional[str] = None,
+    read_options: Optional[Dict[str, Any]] = None,
+    total_rows: Optional[int] = None
+):
     """
     处理导入数据的后台任务
     
     Args:
         self: Celery任务实例
         data_type: 数据类型
-        data: 导入数据
+        data: 导入数据（与 file_path 二选一）
         user_id: 用户ID
+        file_path: 导入文件路径，按块流式读取，内存占用与文件行数无关
+        read_options: 读取选项（sheet_name、header_row、max_rows、field_mapping、filters）
+        total_rows: 文件数据行数，用于计算进度
     """
     db = SessionLocal()
     try:
         logger.info(f"开始处理导入任务: {self.request.id}, 数据类型: {data_type}")
         
-        total_count = len(data)
-        success_count = 0
-        error_count = 0
-        errors = []
+        spec = IMPORT_SPECS.get(data_type)
+        if spec is None:
+            raise ValidationException(f"不支持的数据类型: {data_type}")
+        
+        if file_path is not None:
+            options = dict(read_options or {})
+            field_mapping = options.pop('field_mapping', None)
+            filters = options.pop('filters', None)
+            source = (
+                prepare_import_chunk(chunk, data_type, field_mapping, filters)
+                for chunk in FileService().iter_excel_chunks(file_path, **options)
+            )
+            total_count = total_rows
+        else:
+            source = data
+            total_count = len(data)
         
         # 更新任务状态为处理中
         self.update_state(
@@ -58,64 +84,34 @@ def process_import_data_task(self, data_type: str, data: List[Dict[str, Any]], u
             }
         )
         
-        for i, item in enumerate(data):
-            try:
-                # 根据数据类型处理数据
-                if data_type == "progress":
-                    _process_progress_data(item, db)
-                elif data_type == "equipment":
-                    _process_equipment_data(item, db)
-                elif data_type == "material":
-                    _process_material_data(item, db)
-                elif data_type == "production_plan":
-                    _process_production_plan_data(item, db)
-                elif data_type == "order":
-                    _process_order_data(item, db)
-                elif data_type == "user":
-                    _process_user_data(item, db)
-                elif data_type == "quality":
-                    _process_quality_data(item, db)
-                elif data_type == "notification":
-                    _process_notification_data(item, db)
-                else:
-                    raise ValidationException(f"不支持的数据类型: {data_type}")
-                
-                success_count += 1
-                
-                # 更新进度
-                progress = int((i + 1) / total_count * 100)
-                self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'progress': progress,
-                        'message': f'已处理 {i + 1}/{total_count} 条数据',
-                        'result': {
-                            'total_count': total_count,
-                            'success_count': success_count,
-                            'error_count': error_count
-                        }
+        def report_progress(current: ImportResult, total: Optional[int]):
+            # 按时间节流，避免每行写一次结果后端
+            total = total or total_count
+            self.update_state(
+                state='PROGRESS',
+                meta={
+                    'progress': int(current.total_count / total * 100) if total else 0,
+                    'message': f'已处理 {current.total_count}/{total} 条数据',
+                    'result': {
+                        'total_count': total,
+                        'success_count': current.success_count,
+                        'error_count': current.error_count
                     }
-                )
-                
-            except Exception as e:
-                error_count += 1
-                error_msg = f"第{i+1}行数据处理失败: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
+                }
+            )
         
-        # 提交数据库事务
-        db.commit()
+        # 按块校验、查重并批量写入，每块提交一次
+        importer = BatchImporter(db, spec, on_progress=report_progress)
+        import_result = importer.run(source)
+        for error_msg in import_result.errors[:10]:
+            logger.error(error_msg)
         
-        result = {
-            'total_count': total_count,
-            'success_count': success_count,
-            'error_count': error_count,
-            'errors': errors[:10]  # 只返回前10个错误
-        }
+        result = import_result.to_dict()
         
         logger.info(
             f"导入任务完成: {self.request.id}, "
-            f"成功: {success_count}, 失败: {error_count}"
+            f"成功: {import_result.success_count}, 失败: {import_result.error_count}, "
+            f"跳过: {import_result.skipped_count}"
         )
         
         return result
@@ -155,52 +151,29 @@ def process_export_data_task(self, data_type: str, request: Dict[str, Any], user
             }
         )
         
-        # 查询数据
-        data = []
-        if data_type == "progress":
-            data = _query_progress_data(request, db)
-        elif data_type == "equipment":
-            data = _query_equipment_data(request, db)
-        elif data_type == "material":
-            data = _query_material_data(request, db)
-        elif data_type == "production_plan":
-            data = _query_production_plan_data(request, db)
-        elif data_type == "order":
-            data = _query_order_data(request, db)
-        elif data_type == "user":
-            data = _query_user_data(request, db)
-        elif data_type == "quality":
-            data = _query_quality_data(request, db)
-        elif data_type == "notification":
-            data = _query_notification_data(request, db)
-        else:
-            raise ValidationException(f"不支持的数据类型: {data_type}")
+        # 查询数据（按批从数据库游标读取，边读边写，不一次性加载全部记录）
+        rows = query_export_rows(data_type, request, db)
         
-        # 更新进度
-        self.update_state(
-            state='PROGRESS',
-            meta={
-                'progress': 50,
-                'message': f'查询到{len(data)}条数据，开始生成文件',
-                'result': None
-            }
-        )
+        def report_progress(written: int):
+            self.update_state(
+                state='PROGRESS',
+                meta={
+                    'progress': 50,
+                    'message': f'已写出{written}条数据',
+                    'result': None
+                }
+            )
         
         # 生成导出文件
         filename = f"{data_type}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         file_format = request.get('format', 'xlsx')
         
-        file_info = file_service.generate_export_file(
-            data=data,
+        file_info = file_service.write_export_stream(
+            rows=rows,
             filename=filename,
             file_format=file_format,
-            style_config={
-                'header_style': {
-                    'font': {'bold': True, 'color': 'FFFFFF'},
-                    'fill': {'start_color': '4472C4', 'end_color': '4472C4', 'fill_type': 'solid'},
-                    'alignment': {'horizontal': 'center', 'vertical': 'center'}
-                }
-            }
+            sheet_name=data_type,
+            on_progress=report_progress
         )
         
         result = {
@@ -208,12 +181,12 @@ def process_export_data_task(self, data_type: str, request: Dict[str, Any], user
             'filename': file_info['filename'],
             'file_path': file_info['file_path'],
             'file_size': file_info['file_size'],
-            'record_count': len(data)
+            'record_count': file_info['record_count']
         }
         
         logger.info(
             f"导出任务完成: {self.request.id}, "
-            f"文件: {file_info['filename']}, 记录数: {len(data)}"
+            f"文件: {file_info['filename']}, 记录数: {file_info['record_count']}"
         )
         
         return result
@@ -225,118 +198,205 @@ def process_export_data_task(self, data_type: str, request: Dict[str, Any], user
         db.close()
 
 
-# 数据处理函数
-def _process_progress_data(item: Dict[str, Any], db: Session):
-    """处理进度数据"""
-    progress = ProgressRecord(
-        project_name=item.get('项目名称'),
-        task_name=item.get('任务名称'),
-        progress=float(item.get('进度(%)', 0)),
-        start_date=datetime.strptime(item.get('开始时间'), '%Y-%m-%d') if item.get('开始时间') else None,
-        end_date=datetime.strptime(item.get('结束时间'), '%Y-%m-%d') if item.get('结束时间') else None,
-        responsible_person=item.get('负责人'),
-        status=item.get('状态', '进行中'),
-        remarks=item.get('备注')
-    )
-    db.add(progress)
-
-
-def _process_equipment_data(item: Dict[str, Any], db: Session):
-    """处理设备数据"""
-    equipment = Equipment(
-        name=item.get('设备名称'),
-        equipment_code=item.get('设备编号'),
-        equipment_type=item.get('设备类型'),
-        status=item.get('状态', '正常'),
-        capacity=float(item.get('产能', 0)),
-        location=item.get('位置'),
-        responsible_person=item.get('负责人'),
-        remarks=item.get('备注')
-    )
-    db.add(equipment)
-
-
-def _process_material_data(item: Dict[str, Any], db: Session):
-    """处理物料数据"""
-    material = Material(
-        material_name=item.get('物料名称'),
-        material_code=item.get('物料编号'),
-        material_type=item.get('物料类型'),
-        unit=item.get('单位'),
-        current_stock=float(item.get('库存数量', 0)),
-        min_stock_level=float(item.get('安全库存', 0)),
-        max_stock_level=float(item.get('最大库存', 0)),
-        unit_price=float(item.get('单价', 0)),
-        supplier=item.get('供应商'),
-        remarks=item.get('备注')
-    )
-    db.add(material)
-
-
-def _process_production_plan_data(item: Dict[str, Any], db: Session):
-    """处理生产计划数据"""
-    plan = ProductionPlan(
-        plan_name=item.get('计划名称'),
-        product_name=item.get('产品名称'),
-        planned_quantity=int(item.get('计划数量', 0)),
-        start_date=datetime.strptime(item.get('开始时间'), '%Y-%m-%d') if item.get('开始时间') else None,
-        end_date=datetime.strptime(item.get('结束时间'), '%Y-%m-%d') if item.get('结束时间') else None,
-        priority=item.get('优先级', '中'),
-        status=item.get('状态', '计划中'),
-        remarks=item.get('备注')
-    )
-    db.add(plan)
-
-
-def _process_order_data(item: Dict[str, Any], db: Session):
-    """处理订单数据"""
-    order = Order(
-        order_number=item.get('订单编号'),
-        customer_name=item.get('客户名称'),
-        product_name=item.get('产品名称'),
-        quantity=int(item.get('订单数量', 0)),
-        delivery_date=datetime.strptime(item.get('交期'), '%Y-%m-%d') if item.get('交期') else None,
-        status=item.get('状态', '待生产'),
-        remarks=item.get('备注')
-    )
-    db.add(order)
-
-
-def _process_user_data(item: Dict[str, Any], db: Session):
-    """处理用户数据"""
-    user = User(
-        username=item.get('用户名'),
-        full_name=item.get('姓名'),
-        email=item.get('邮箱'),
-        phone=item.get('电话'),
-        department=item.get('部门'),
-        role=item.get('角色', 'user'),
-        is_active=item.get('状态') == '激活'
-    )
-    db.add(user)
-
-
-def _process_quality_data(item: Dict[str, Any], db: Session):
-    """处理质量数据"""
-    quality = QualityRecord(
-        product_name=item.get('产品名称'),
-        batch_number=item.get('批次号'),
-        inspection_date=datetime.strptime(item.get('检验日期'), '%Y-%m-%d') if item.get('检验日期') else None,
-        inspector=item.get('检验员'),
-        result=item.get('检验结果', '合格'),
-        remarks=item.get('备注')
-    )
-    db.add(quality)
+def prepare_import_chunk(
+    df: pd.DataFrame,
+    data_type: str,
+    field_mapping: Optional[Dict[str, str]] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """
+    对一块导入数据应用字段映射、过滤条件并清理
+    
+    Args:
+        df: 数据块
+        data_type: 数据类型
+        field_mapping: 字段映射
+        filters: 过滤条件
+        
+    Returns:
+        DataFrame: 清理后的数据块
+    """
+    # 应用字段映射
+    if field_mapping:
+        df = df.rename(columns=field_mapping)
+    
+    # 应用过滤条件
+    if filters:
+        for field, value in filters.items():
+            if field in df.columns:
+                df = df[df[field] == value]
+    
+    # 数据验证和清理
+    return _clean_import_data(df, data_type)
 
 
-def _process_notification_data(item: Dict[str, Any], db: Session):
-    """处理通知数据"""
-    # 这里可以根据实际需求实现通知数据处理
-    pass
+def _clean_import_data(df: pd.DataFrame, data_type: str) -> pd.DataFrame:
+    """
+    清理导入数据
+    
+    Args:
+        df: 数据框
+        data_type: 数据类型
+        
+    Returns:
+        DataFrame: 清理后的数据
+    """
+    try:
+        # 删除空行
+        df = df.dropna(how='all')
+        
+        # 根据数据类型进行特定清理
+        if data_type == "progress":
+            # 进度数据清理
+            required_columns = ['project_name', 'task_name', 'progress']
+            for col in required_columns:
+                if col not in df.columns:
+                    raise ValidationException(f"缺少必需列: {col}")
+            
+            # 进度值验证
+            if 'progress' in df.columns:
+                df['progress'] = pd.to_numeric(df['progress'], errors='coerce')
+                df = df[df['progress'].between(0, 100)]
+        
+        elif data_type == "equipment":
+            # 设备数据清理
+            required_columns = ['equipment_name', 'equipment_type']
+            for col in required_columns:
+                if col not in df.columns:
+                    raise ValidationException(f"缺少必需列: {col}")
+        
+        elif data_type == "material":
+            # 物料数据清理
+            required_columns = ['material_name', 'material_code']
+            for col in required_columns:
+                if col not in df.columns:
+                    raise ValidationException(f"缺少必需列: {col}")
+        
+        # 通用数据清理
+        # 去除前后空格
+        for col in df.select_dtypes(include=['object']).columns:
+            df[col] = df[col].astype(str).str.strip()
+        
+        # 替换空字符串为None
+        df = df.replace('', None)
+        
+        return df
+        
+    except Exception as e:
+        logger.error(f"数据清理失败: {e}")
+        raise BusinessException(f"数据清理失败: {str(e)}")
+
+
+def _user_is_active(frame: pd.DataFrame) -> pd.Series:
+    """用户状态列为“激活”时启用"""
+    if '状态' not in frame.columns:
+        return pd.Series(False, index=frame.index)
+    return frame['状态'] == '激活'
+
+
+# 数据类型 -> 批量导入规则（表头 -> 模型字段）
+IMPORT_SPECS = {
+    # 进度与通知数据的导入暂未实现，只计数
+    "progress": ImportSpec(ProgressRecord),
+    "equipment": ImportSpec(
+        Equipment,
+        columns={
+            '设备名称': 'name',
+            '设备编号': 'equipment_code',
+            '设备类型': 'equipment_type',
+            '状态': 'status',
+            '产能': 'capacity',
+            '位置': 'location',
+            '负责人': 'responsible_person',
+            '备注': 'remarks'
+        },
+        defaults={'status': '正常', 'capacity': 0},
+        floats=['capacity'],
+        unique='equipment_code'
+    ),
+    "material": ImportSpec(
+        Material,
+        columns={
+            '物料名称': 'material_name',
+            '物料编号': 'material_code',
+            '物料类型': 'material_type',
+            '单位': 'unit',
+            '库存数量': 'current_stock',
+            '安全库存': 'min_stock_level',
+            '最大库存': 'max_stock_level',
+            '单价': 'unit_price',
+            '供应商': 'supplier',
+            '备注': 'remarks'
+        },
+        defaults={'current_stock': 0, 'min_stock_level': 0, 'max_stock_level': 0, 'unit_price': 0},
+        floats=['current_stock', 'min_stock_level', 'max_stock_level', 'unit_price'],
+        unique='material_code'
+    ),
+    "production_plan": ImportSpec(
+        ProductionPlan,
+        columns={
+            '计划名称': 'plan_name',
+            '产品名称': 'product_name',
+            '计划数量': 'planned_quantity',
+            '开始时间': 'start_date',
+            '结束时间': 'end_date',
+            '优先级': 'priority',
+            '状态': 'status',
+            '备注': 'remarks'
+        },
+        defaults={'planned_quantity': 0, 'priority': '中', 'status': '计划中'},
+        integers=['planned_quantity'],
+        dates=['start_date', 'end_date']
+    ),
+    "order": ImportSpec(
+        Order,
+        columns={
+            '订单编号': 'order_number',
+            '客户名称': 'customer_name',
+            '产品名称': 'product_name',
+            '订单数量': 'quantity',
+            '交期': 'delivery_date',
+            '状态': 'status',
+            '备注': 'remarks'
+        },
+        defaults={'quantity': 0, 'status': '待生产'},
+        integers=['quantity'],
+        dates=['delivery_date'],
+        unique='order_number'
+    ),
+    "user": ImportSpec(
+        User,
+        columns={
+            '用户名': 'username',
+            '姓名': 'full_name',
+            '邮箱': 'email',
+            '电话': 'phone',
+            '部门': 'department',
+            '角色': 'role'
+        },
+        defaults={'role': 'user'},
+        derived={'is_active': _user_is_active},
+        unique='username'
+    ),
+    "quality": ImportSpec(
+        QualityRecord,
+        columns={
+            '产品名称': 'product_name',
+            '批次号': 'batch_number',
+            '检验日期': 'inspection_date',
+            '检验员': 'inspector',
+            '检验结果': 'result',
+            '备注': 'remarks'
+        },
+        defaults={'result': '合格'},
+        dates=['inspection_date']
+    ),
+    "notification": ImportSpec(None),
+}
 
 
 # 数据查询函数
-def _query_progress_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_progress_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询进度数据"""
     query = db.query(ProgressRecord)
     
@@ -349,8 +409,7 @@ def _query_progress_data(request: Dict[str, Any], db: Session) -> List[Dict[str,
         end_date = datetime.strptime(request['end_date'], '%Y-%m-%d')
         query = query.filter(ProgressRecord.end_date <= end_date)
     
-    records = query.all()
-    return [
+    return (
         {
             '项目名称': record.project_name,
             '任务名称': record.task_name,
@@ -361,11 +420,11 @@ def _query_progress_data(request: Dict[str, Any], db: Session) -> List[Dict[str,
             '状态': record.status,
             '备注': record.remarks or ''
         }
-        for record in records
-    ]
+        for record in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
 
-def _query_equipment_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_equipment_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询设备数据"""
     query = db.query(Equipment)
     
@@ -375,8 +434,7 @@ def _query_equipment_data(request: Dict[str, Any], db: Session) -> List[Dict[str
     if request.get('status'):
         query = query.filter(Equipment.status == request['status'])
     
-    records = query.all()
-    return [
+    return (
         {
             '设备名称': record.name,
             '设备编号': record.equipment_code,
@@ -387,19 +445,18 @@ def _query_equipment_data(request: Dict[str, Any], db: Session) -> List[Dict[str
             '负责人': record.responsible_person,
             '备注': record.remarks or ''
         }
-        for record in records
-    ]
+        for record in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
 
-def _query_material_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_material_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询物料数据"""
     query = db.query(Material)
     
     if request.get('material_type'):
         query = query.filter(Material.material_type == request['material_type'])
     
-    records = query.all()
-    return [
+    return (
         {
             '物料名称': record.material_name,
             '物料编号': record.material_code,
@@ -412,19 +469,18 @@ def _query_material_data(request: Dict[str, Any], db: Session) -> List[Dict[str,
             '供应商': record.supplier,
             '备注': record.remarks or ''
         }
-        for record in records
-    ]
+        for record in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
 
-def _query_production_plan_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_production_plan_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询生产计划数据"""
     query = db.query(ProductionPlan)
     
     if request.get('status'):
         query = query.filter(ProductionPlan.status == request['status'])
     
-    records = query.all()
-    return [
+    return (
         {
             '计划名称': record.plan_name,
             '产品名称': record.product_name,
@@ -435,19 +491,18 @@ def _query_production_plan_data(request: Dict[str, Any], db: Session) -> List[Di
             '状态': record.status,
             '备注': record.remarks or ''
         }
-        for record in records
-    ]
+        for record in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
 
-def _query_order_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_order_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询订单数据"""
     query = db.query(Order)
     
     if request.get('status'):
         query = query.filter(Order.status == request['status'])
     
-    records = query.all()
-    return [
+    return (
         {
             '订单编号': record.order_number,
             '客户名称': record.customer_name,
@@ -457,11 +512,11 @@ def _query_order_data(request: Dict[str, Any], db: Session) -> List[Dict[str, An
             '状态': record.status,
             '备注': record.remarks or ''
         }
-        for record in records
-    ]
+        for record in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
 
-def _query_user_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_user_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询用户数据"""
     query = db.query(User)
     
@@ -471,8 +526,7 @@ def _query_user_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any
     if request.get('role'):
         query = query.filter(User.role == request['role'])
     
-    records = query.all()
-    return [
+    return (
         {
             '用户名': record.username,
             '姓名': record.full_name,
@@ -482,19 +536,18 @@ def _query_user_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any
             '角色': record.role,
             '状态': '激活' if record.is_active else '禁用'
         }
-        for record in records
-    ]
+        for record in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
 
-def _query_quality_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_quality_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询质量数据"""
     query = db.query(QualityRecord)
     
     if request.get('result'):
         query = query.filter(QualityRecord.result == request['result'])
     
-    records = query.all()
-    return [
+    return (
         {
             '产品名称': record.product_name,
             '批次号': record.batch_number,
@@ -503,11 +556,32 @@ def _query_quality_data(request: Dict[str, Any], db: Session) -> List[Dict[str,
             '检验结果': record.result,
             '备注': record.remarks or ''
         }
-        for record in records
-    ]
+        for record in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
 
-def _query_notification_data(request: Dict[str, Any], db: Session) -> List[Dict[str, Any]]:
+def _query_notification_data(request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
     """查询通知数据"""
     # 这里可以根据实际需求实现通知数据查询
-    return []
\ No newline at end of file
+    return iter(())
+
+
+# 数据类型 -> 查询函数
+EXPORT_QUERIES = {
+    "progress": _query_progress_data,
+    "equipment": _query_equipment_data,
+    "material": _query_material_data,
+    "production_plan": _query_production_plan_data,
+    "order": _query_order_data,
+    "user": _query_user_data,
+    "quality": _query_quality_data,
+    "notification": _query_notification_data,
+}
+
+
+def query_export_rows(data_type: str, request: Dict[str, Any], db: Session) -> Iterator[Dict[str, Any]]:
+    """按数据类型逐行生成导出数据（需在会话关闭前消费完）"""
+    query_func = EXPORT_QUERIES.get(data_type)
+    if query_func is None:
+        raise ValidationException(f"不支持的数据类型: {data_type}")
+    return query_func(request, db)
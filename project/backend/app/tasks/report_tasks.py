@@ -0,0 +1,31 @@
+"""报表定时任务
+
+- 增量刷新报表日汇总表（生产、质量、设备维护）
+"""
+
+from loguru import logger
+
+from ..db.database import SessionLocal
+from ..services.report_rollup_service import refresh_all
+from ..core.celery_app import celery_app
+
+
+@celery_app.task(name="refresh_report_rollups")
+def refresh_report_rollups_task(full: bool = False):
+    """增量刷新报表日汇总的定时任务
+
+    只重算上次刷新以来有明细变化的日期；full 为 True 时全量重建。
+    汇总表与报表接口使用同一数据库，因此使用 db.database 的会话。
+    """
+    db = SessionLocal()
+    try:
+        results = refresh_all(db, full=full)
+
+        logger.info(f"报表日汇总刷新完成: {results}")
+        return {"results": results, "status": "success"}
+
+    except Exception as e:
+        logger.error(f"刷新报表日汇总任务失败: {str(e)}")
+        return {"error": str(e), "status": "failed"}
+    finally:
+        db.close()
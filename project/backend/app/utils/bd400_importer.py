@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Callable, Iterable, Optional
 import pandas as pd
 from datetime import datetime, date
 from decimal import Decimal
@@ -6,6 +6,8 @@ import re
 from sqlalchemy.orm import Session
 from ..models.order import Order, OrderStatus, OrderPriority
 from ..schemas.order import OrderCreate
+from ..services.batch_import import IMPORT_CHUNK_SIZE, existing_values, insert_records, iter_chunks, to_records
+from .stream_reader import iter_table_chunks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -55,40 +57,55 @@ class BD400OrderImporter:
         self.errors = []
         self.warnings = []
         
-    def import_from_excel(self, file_content: bytes) -> Dict[str, Any]:
-        """从Excel文件导入BD400订单数据"""
+    def import_from_excel(self, file_content: bytes, filename: Optional[str] = None) -> Dict[str, Any]:
+        """从Excel文件导入BD400订单数据（按块流式读取，也支持CSV）"""
+        return self._import_chunks(
+            lambda: iter_table_chunks(file_content, chunk_size=IMPORT_CHUNK_SIZE, filename=filename)
+        )
+    
+    def import_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """导入已读取的BD400订单数据（表头为中文字段名）"""
+        return self._import_chunks(lambda: iter_chunks(df) if not df.empty else iter([df]))
+    
+    def _import_chunks(self, read_chunks: Callable[[], Iterable[pd.DataFrame]]) -> Dict[str, Any]:
+        """先逐块读取校验全部数据，全部通过后再逐块读取导入；read_chunks 每次调用返回新的块迭代器"""
         try:
-            # 读取Excel文件
-            df = pd.read_excel(file_content, sheet_name=0)
-            
-            # 数据预处理
-            df = self._preprocess_dataframe(df)
-            
             # 验证数据格式
-            validation_result = self._validate_dataframe(df)
-            if not validation_result['valid']:
+            errors = []
+            for position, chunk in enumerate(read_chunks()):
+                validation_result = self._validate_dataframe(
+                    self._preprocess_dataframe(chunk), check_fields=position == 0
+                )
+                errors.extend(validation_result['errors'])
+            if errors:
                 return {
                     'success': False,
                     'message': '数据验证失败',
-                    'errors': validation_result['errors'],
+                    'errors': errors,
                     'imported_count': 0
                 }
             
-            # 导入数据
+            # 按块导入：每块一次查重查询、一次批量写入
             imported_count = 0
             skipped_count = 0
-            
-            for index, row in df.iterrows():
-                try:
-                    result = self._import_single_order(row, index + 2)  # +2因为Excel行号从1开始，且有表头
-                    if result['success']:
-                        imported_count += 1
-                    else:
-                        skipped_count += 1
-                        
-                except Exception as e:
-                    self.errors.append(f"第{index + 2}行: 导入失败 - {str(e)}")
-                    skipped_count += 1
+            seen = set()
+            
+            for chunk in read_chunks():
+                chunk = self._preprocess_dataframe(chunk)
+                order_numbers = chunk['order_number']
+                
+                # 已存在的订单号，以及文件内重复出现的订单号（保留第一行）
+                existing = existing_values(self.db, Order.order_no, order_numbers.tolist()) | seen
+                duplicated = order_numbers.isin(existing) | order_numbers.duplicated()
+                for index, order_number in order_numbers[duplicated].items():
+                    # +2因为Excel行号从1开始，且有表头
+                    self.warnings.append(f"第{index + 2}行: 订单号 {order_number} 已存在，跳过")
+                seen.update(order_numbers[~duplicated])
+                
+                records = self._build_records(chunk[~duplicated])
+                insert_records(self.db, Order, records)
+                imported_count += len(records)
+                skipped_count += int(duplicated.sum())
             
             # 提交事务
             if imported_count > 0:
@@ -134,146 +151,91 @@ class BD400OrderImporter:
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
         
-        # 处理字符串格式
+        # 处理字符串格式（空值保持为空）
         string_columns = ['order_number', 'customer_name', 'product_name']
         for col in string_columns:
             if col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str).str.strip())
         
         return df
     
-    def _validate_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """验证数据格式"""
+    def _validate_dataframe(self, df: pd.DataFrame, check_fields: bool = True) -> Dict[str, Any]:
+        """验证数据格式（check_fields 为 False 时不重复报告缺少的字段）"""
         errors = []
         
         # 检查必要字段
         required_fields = ['order_number', 'customer_name', 'product_name', 'quantity', 'delivery_date']
         missing_fields = [field for field in required_fields if field not in df.columns]
         
-        if missing_fields:
+        if missing_fields and check_fields:
             errors.append(f"缺少必要字段: {', '.join(missing_fields)}")
         
-        # 检查数据完整性
-        for index, row in df.iterrows():
-            row_num = index + 2
-            
-            # 检查订单号
-            if pd.isna(row.get('order_number')) or str(row.get('order_number')).strip() == '':
-                errors.append(f"第{row_num}行: 订单号不能为空")
-            
-            # 检查客户名称
-            if pd.isna(row.get('customer_name')) or str(row.get('customer_name')).strip() == '':
-                errors.append(f"第{row_num}行: 客户名称不能为空")
-            
-            # 检查产品名称
-            if pd.isna(row.get('product_name')) or str(row.get('product_name')).strip() == '':
-                errors.append(f"第{row_num}行: 产品名称不能为空")
-            
-            # 检查数量
-            if pd.isna(row.get('quantity')) or row.get('quantity') <= 0:
-                errors.append(f"第{row_num}行: 数量必须大于0")
-            
-            # 检查交货日期
-            if pd.isna(row.get('delivery_date')):
-                errors.append(f"第{row_num}行: 交货日期不能为空")
+        # 检查数据完整性（按列判断，再按行号汇总错误）
+        row_errors = []
+        checks = [
+            (self._blank(df, 'order_number'), "订单号不能为空"),
+            (self._blank(df, 'customer_name'), "客户名称不能为空"),
+            (self._blank(df, 'product_name'), "产品名称不能为空"),
+            (~(self._column(df, 'quantity') > 0), "数量必须大于0"),
+            (self._column(df, 'delivery_date').isna(), "交货日期不能为空"),
+        ]
+        for order, (mask, message) in enumerate(checks):
+            row_errors.extend((index + 2, order, message) for index in df.index[mask])
+        row_errors.sort()
+        errors.extend(f"第{row_num}行: {message}" for row_num, _, message in row_errors)
         
         return {
             'valid': len(errors) == 0,
             'errors': errors
         }
     
-    def _import_single_order(self, row: pd.Series, row_num: int) -> Dict[str, Any]:
-        """导入单个订单"""
-        try:
-            # 检查订单是否已存在
-            order_number = str(row.get('order_number')).strip()
-            existing_order = self.db.query(Order).filter(
-                Order.order_no == order_number
-            ).first()
-            
-            if existing_order:
-                self.warnings.append(f"第{row_num}行: 订单号 {order_number} 已存在，跳过")
-                return {'success': False, 'reason': 'duplicate'}
-            
-            # 构建订单数据
-            order_data = self._build_order_data(row)
-            
-            # 创建订单
-            order = Order(**order_data)
-            self.db.add(order)
-            
-            return {'success': True}
-            
-        except Exception as e:
-            self.errors.append(f"第{row_num}行: {str(e)}")
-            return {'success': False, 'reason': str(e)}
+    @staticmethod
+    def _column(df: pd.DataFrame, column: str) -> pd.Series:
+        """取列，缺少时为全空列"""
+        if column in df.columns:
+            return df[column]
+        return pd.Series(None, index=df.index, dtype=object)
+    
+    def _blank(self, df: pd.DataFrame, column: str) -> pd.Series:
+        """空值或空字符串"""
+        values = self._column(df, column)
+        return values.isna() | (values.astype(str).str.strip() == '')
     
-    def _build_order_data(self, row: pd.Series) -> Dict[str, Any]:
-        """构建订单数据"""
-        data = {
-            'order_no': str(row.get('order_number', '')).strip(),
-            'customer_name': str(row.get('customer_name', '')).strip(),
-            'product_name': str(row.get('product_name', '')).strip(),
-            'quantity': int(row.get('quantity', 0)),
-            'unit': str(row.get('unit', '件')).strip(),
-            'order_date': self._parse_date(row.get('order_date'), datetime.now().date()),
-            'delivery_date': self._parse_date(row.get('delivery_date')),
+    def _text(self, df: pd.DataFrame, column: str) -> pd.Series:
+        """去除首尾空白的文本列，空字符串视为空"""
+        values = self._column(df, column)
+        values = values.where(values.isna(), values.astype(str).str.strip())
+        return values.where(values.notna() & (values != ''), None)
+    
+    def _build_records(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """按列构建一块订单的写入数据"""
+        if df.empty:
+            return []
+        now = datetime.now()
+        today = pd.Timestamp(now.date())
+        priority = self._column(df, 'priority').astype(str).str.strip().map(self.PRIORITY_MAPPING)
+        
+        data = pd.DataFrame({
+            'order_no': self._text(df, 'order_number'),
+            'customer_name': self._text(df, 'customer_name'),
+            'product_name': self._text(df, 'product_name'),
+            'quantity': self._column(df, 'quantity').astype(int),
+            'unit': self._text(df, 'unit').fillna('件'),
+            'order_date': pd.to_datetime(self._column(df, 'order_date')).dt.normalize().fillna(today),
+            'delivery_date': pd.to_datetime(self._column(df, 'delivery_date')).dt.normalize(),
             'status': OrderStatus.PENDING,
-            'priority': self._parse_priority(row.get('priority')),
-            'created_at': datetime.now(),
-            'updated_at': datetime.now()
-        }
+            'priority': priority.where(priority.notna(), OrderPriority.MEDIUM),
+            'created_at': now,
+            'updated_at': now
+        }, index=df.index)
         
         # 可选字段
-        optional_fields = {
-            'product_model': 'product_model',
-            'contact_person': 'contact_person',
-            'contact_phone': 'contact_phone', 
-            'contact_email': 'contact_email',
-            'delivery_address': 'delivery_address',
-            'technical_requirements': 'technical_requirements',
-            'quality_standards': 'quality_standards',
-            'remark': 'remark'
-        }
-        
-        for field, column in optional_fields.items():
-            value = row.get(column)
-            if pd.notna(value) and str(value).strip():
-                data[field] = str(value).strip()
+        for column in ['product_model', 'contact_person', 'contact_phone', 'contact_email',
+                       'delivery_address', 'technical_requirements', 'quality_standards', 'remark']:
+            data[column] = self._text(df, column)
         
         # 数值字段
-        if pd.notna(row.get('unit_price')):
-            data['unit_price'] = float(row.get('unit_price'))
-        
-        if pd.notna(row.get('total_amount')):
-            data['total_amount'] = float(row.get('total_amount'))
-        
-        return data
-    
-    def _parse_date(self, date_value, default=None) -> date:
-        """解析日期"""
-        if pd.isna(date_value):
-            if default is not None:
-                return default
-            raise ValueError("日期不能为空")
-        
-        if isinstance(date_value, pd.Timestamp):
-            return date_value.date()
-        elif isinstance(date_value, datetime):
-            return date_value.date()
-        elif isinstance(date_value, date):
-            return date_value
-        else:
-            # 尝试解析字符串日期
-            try:
-                return pd.to_datetime(str(date_value)).date()
-            except:
-                raise ValueError(f"无效的日期格式: {date_value}")
-    
-    def _parse_priority(self, priority_value) -> OrderPriority:
-        """解析优先级"""
-        if pd.isna(priority_value):
-            return OrderPriority.MEDIUM
+        for column in ['unit_price', 'total_amount']:
+            data[column] = pd.to_numeric(self._column(df, column), errors='coerce')
         
-        priority_str = str(priority_value).strip()
-        return self.PRIORITY_MAPPING.get(priority_str, OrderPriority.MEDIUM)
\ No newline at end of file
+        return to_records(data)
@@ -0,0 +1,77 @@
+"""延迟队列
+
+线程安全的定时队列，消费者只会取到已到期的项：
+- 未到期的项放在按到期时间排序的最小堆中
+- 取数时把已到期的项移入就绪堆，就绪堆按 (优先级, 到期时间, 加入顺序) 排序，优先级高的先出
+- 没有就绪项时在条件变量上等待，直到最近的到期时间或有新项加入，不轮询、不把未到期的项反复放回
+"""
+
+import heapq
+import itertools
+import time
+from datetime import datetime
+from queue import Empty
+from threading import Condition
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class DelayQueue:
+    """按到期时间出队的优先级队列"""
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.now):
+        self._clock = clock
+        self._delayed: List[Tuple[datetime, int, int, Any]] = []
+        self._ready: List[Tuple[int, datetime, int, Any]] = []
+        self._sequence = itertools.count()
+        self._condition = Condition()
+
+    def put(self, item: Any, due: Optional[datetime] = None, priority: int = 0) -> None:
+        """加入队列；due 为到期时间（默认立即到期），priority 越大越先处理"""
+        due = due or self._clock()
+        with self._condition:
+            heapq.heappush(self._delayed, (due, -priority, next(self._sequence), item))
+            # 新项可能比等待中的最近到期时间更早，唤醒一个消费者重新计算等待时间
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """取出一个已到期的项，最多等待 timeout 秒，超时抛出 queue.Empty"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = self._clock()
+                self._promote(now)
+                if self._ready:
+                    item = heapq.heappop(self._ready)[-1]
+                    if self._ready:
+                        self._condition.notify()
+                    return item
+
+                wait = None
+                if self._delayed:
+                    wait = max((self._delayed[0][0] - now).total_seconds(), 0)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Empty
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+    def _promote(self, now: datetime) -> None:
+        while self._delayed and self._delayed[0][0] <= now:
+            due, priority, sequence, item = heapq.heappop(self._delayed)
+            heapq.heappush(self._ready, (priority, due, sequence, item))
+
+    def qsize(self) -> int:
+        with self._condition:
+            return len(self._delayed) + len(self._ready)
+
+    def delayed_count(self) -> int:
+        """尚未到期的项数"""
+        with self._condition:
+            self._promote(self._clock())
+            return len(self._delayed)
+
+    def wake_all(self) -> None:
+        """唤醒所有等待的消费者（停止服务时使用）"""
+        with self._condition:
+            self._condition.notify_all()
@@ -1,5 +1,5 @@
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from io import BytesIO
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
@@ -7,6 +7,8 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 from datetime import datetime
 import logging
 
+from .stream_reader import READ_CHUNK_SIZE, iter_table_chunks, read_table
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,31 +21,41 @@ class ExcelHandler:
         self.workbook = None
         self.worksheet = None
     
-    def read_excel(self, file_content: bytes, sheet_name: Optional[str] = None) -> pd.DataFrame:
+    def read_excel(self, file_content: bytes, sheet_name: Optional[str] = None,
+                   filename: Optional[str] = None) -> pd.DataFrame:
         """
-        读取Excel文件
+        读取Excel文件（也支持CSV）
         
         Args:
             file_content: Excel文件内容
             sheet_name: 工作表名称，如果为None则读取第一个工作表
+            filename: 文件名，用于识别文件类型；为None时按文件头识别
         
         Returns:
-            DataFrame: 读取的数据
+            DataFrame: 读取的数据（列名已去除首尾空格）
         """
         try:
-            if sheet_name:
-                df = pd.read_excel(BytesIO(file_content), sheet_name=sheet_name)
-            else:
-                df = pd.read_excel(BytesIO(file_content))
-            
-            # 清理列名（去除空格和特殊字符）
-            df.columns = df.columns.str.strip()
-            
-            return df
+            return read_table(file_content, sheet_name=sheet_name, filename=filename)
         except Exception as e:
             logger.error(f"读取Excel文件失败: {e}")
             raise
     
+    def iter_excel(self, file_content: bytes, sheet_name: Optional[str] = None,
+                   chunk_size: int = READ_CHUNK_SIZE, filename: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        按块读取Excel文件（也支持CSV），用于大文件导入
+        
+        Args:
+            file_content: Excel文件内容
+            sheet_name: 工作表名称，如果为None则读取第一个工作表
+            chunk_size: 每块行数
+            filename: 文件名，用于识别文件类型；为None时按文件头识别
+        
+        Returns:
+            Iterator[DataFrame]: 数据块
+        """
+        return iter_table_chunks(file_content, chunk_size=chunk_size, sheet_name=sheet_name, filename=filename)
+    
     def create_excel(self, data: List[Dict[str, Any]], sheet_name: str = "Sheet1") -> BytesIO:
         """
         创建Excel文件
@@ -0,0 +1,94 @@
+"""列表接口的快速响应路径
+
+常规路径为每行构造一个 Pydantic 详情模型，FastAPI 再按 response_model 校验一遍并编码为 JSON，
+页面较大时 CPU 主要耗在模型构造上。快速路径只查询响应需要的列（元组行），按字段名投影为字典，
+由 orjson 直接编码为字节，跳过模型构造与二次校验。
+
+通过查询参数 fast=true 或 Accept: application/vnd.pmc.fast+json 启用，响应结构与常规路径一致
+（code/message/data/page_info/timestamp），字段值按数据库返回的原始类型编码：
+Decimal 为字符串，日期时间为 ISO 格式，枚举为其值。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.common import PageInfo, QueryParams
+
+FAST_JSON_MEDIA_TYPE = "application/vnd.pmc.fast+json"
+
+
+def _default(value: Any) -> Any:
+    """orjson 不直接支持的类型"""
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class FastJSONResponse(Response):
+    """orjson 编码的 JSON 响应"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def wants_fast_response(request: Request, params: QueryParams) -> bool:
+    """请求是否选择快速响应路径"""
+    return params.fast or FAST_JSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+@dataclass
+class Projection:
+    """列表响应的列投影
+
+    fields 为响应字段名，默认同时也是模型的属性名（查询时按需解析，不在导入时检查）；
+    columns 为响应字段名与模型属性名不同时的映射；computed 为由已投影字段计算的派生字段。
+    """
+    model: Any
+    fields: Sequence[str]
+    computed: Dict[str, Callable[[Dict[str, Any]], Any]] = field(default_factory=dict)
+    columns: Dict[str, str] = field(default_factory=dict)
+
+    def select(self, statement: Any, *extra_fields: Optional[str]) -> Any:
+        """把 select(模型) 改为只查询投影列，保留原有条件
+
+        extra_fields 为分页需要但不在响应中的列（如游标分页的排序字段），追加在末尾，不进入响应。
+        """
+        names = list(self.fields) + [name for name in extra_fields if name and name not in self.fields]
+        return statement.with_only_columns(*[
+            getattr(self.model, self.columns.get(name, name)).label(name) for name in names
+        ])
+
+    async def fetch(self, db: AsyncSession, statement: Any, *extra_fields: Optional[str]) -> List[Any]:
+        """执行投影查询，返回元组行"""
+        return (await db.execute(self.select(statement, *extra_fields))).all()
+
+    def rows(self, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """元组行转为响应字典"""
+        fields = self.fields
+        computed = list(self.computed.items())
+        items = []
+        for row in rows:
+            item = dict(zip(fields, row))
+            for name, compute in computed:
+                item[name] = compute(item)
+            items.append(item)
+        return items
+
+
+def paged_response(message: str, items: List[Dict[str, Any]], page_info: PageInfo) -> FastJSONResponse:
+    """与 PagedResponseModel 结构一致的快速分页响应"""
+    return FastJSONResponse({
+        "code": 200,
+        "message": message,
+        "data": items,
+        "page_info": page_info.model_dump(),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
@@ -0,0 +1,192 @@
+"""列表分页
+
+列表接口支持两种分页方式：
+- 页码分页（page/page_size）：OFFSET/LIMIT，翻页越深扫描越多
+- 游标分页（cursor）：按 (排序字段, id) 做键集分页，下一页从上一页最后一行之后开始取，
+  配合 (排序字段, id) 上的索引，任意深度的翻页代价与首页相同。游标为不透明的URL安全字符串，
+  传空字符串获取首页，之后传上一页返回的 next_cursor
+
+总记录数按筛选条件短时缓存（PAGINATION_COUNT_CACHE_TTL），登记 "{实体}:*" 标签，
+实体表写入提交后随统计缓存一起失效；游标分页时可通过 with_total=false 省去计数。
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, List, Optional, Tuple, Union
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ColumnProperty, Query, Session
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.schemas.common import PageInfo, QueryParams
+
+
+class CursorError(ValueError):
+    """游标无效或与当前排序条件不一致"""
+
+
+def _encode_value(value: Any) -> Any:
+    """排序值转为可JSON序列化的 [类型, 值]"""
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        return ["enum", value.name]
+    if isinstance(value, datetime):
+        return ["datetime", value.isoformat()]
+    if isinstance(value, date):
+        return ["date", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["decimal", str(value)]
+    return ["value", value]
+
+
+def _decode_value(encoded: Any, column: Any) -> Any:
+    if encoded is None:
+        return None
+    kind, value = encoded
+    if kind == "enum":
+        enum_class = getattr(column.type, "enum_class", None)
+        return enum_class[value] if enum_class is not None else value
+    if kind == "datetime":
+        return datetime.fromisoformat(value)
+    if kind == "date":
+        return date.fromisoformat(value)
+    if kind == "decimal":
+        return Decimal(value)
+    return value
+
+
+@dataclass
+class KeysetPagination:
+    """按 (排序字段, id) 的键集分页
+
+    sort_field 为空或不是模型的列时按 id 排序（自增主键即创建顺序）。
+    可为空的排序列把 NULL 排在最后，此时排序键多一个 "列 IS NULL"。
+    """
+    model: Any
+    sort_field: Optional[str] = None
+    sort_order: Optional[str] = "desc"
+    page_size: int = 10
+
+    def __post_init__(self):
+        attribute = getattr(self.model, self.sort_field, None) if self.sort_field else None
+        prop = getattr(attribute, "property", None)
+        if not isinstance(prop, ColumnProperty) or self.sort_field == "id":
+            attribute = None
+            self.sort_field = None
+        self.column = attribute
+        self.id_column = self.model.id
+        self.descending = self.sort_order != "asc"
+        self.nullable = attribute is not None and bool(prop.columns[0].nullable)
+
+    def _after(self, column: Any, value: Any) -> Any:
+        return column < value if self.descending else column > value
+
+    def ordering(self) -> List[Any]:
+        direction = (lambda column: column.desc()) if self.descending else (lambda column: column.asc())
+        if self.column is None:
+            return [direction(self.id_column)]
+        nulls_last = [self.column.is_(None)] if self.nullable else []
+        return [*nulls_last, direction(self.column), direction(self.id_column)]
+
+    def encode(self, row: Any) -> str:
+        payload = {
+            "f": self.sort_field or "id",
+            "o": "desc" if self.descending else "asc",
+            "id": row.id,
+        }
+        if self.column is not None:
+            payload["v"] = _encode_value(getattr(row, self.sort_field))
+        raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str) -> Tuple[Any, Any]:
+        """解析游标，返回 (排序值, id)"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            value = _decode_value(payload.get("v"), self.column) if self.column is not None else None
+            last_id = payload["id"]
+        except Exception:
+            raise CursorError("分页游标无效")
+        if payload.get("f") != (self.sort_field or "id") or payload.get("o") != ("desc" if self.descending else "asc"):
+            raise CursorError("分页游标与当前排序条件不一致，请从首页重新查询")
+        return value, last_id
+
+    def criteria(self, cursor: str) -> Any:
+        """位于游标所指行之后的条件"""
+        value, last_id = self.decode(cursor)
+        after_id = self._after(self.id_column, last_id)
+        if self.column is None:
+            return after_id
+        if value is None:
+            return and_(self.column.is_(None), after_id)
+        after = or_(self._after(self.column, value), and_(self.column == value, after_id))
+        return or_(after, self.column.is_(None)) if self.nullable else after
+
+    def apply(self, query: Any, cursor: Optional[str]) -> Any:
+        """为查询（Query 或 select）加上游标条件、排序，并多取一行用于判断是否还有下一页"""
+        if cursor:
+            query = query.where(self.criteria(cursor))
+        return query.order_by(None).order_by(*self.ordering()).limit(self.page_size + 1)
+
+    def page(self, rows: List[Any]) -> Tuple[List[Any], Optional[str]]:
+        """截取本页数据并生成下一页游标（没有下一页时为 None）"""
+        items = list(rows[:self.page_size])
+        next_cursor = self.encode(items[-1]) if len(rows) > self.page_size and items else None
+        return items, next_cursor
+
+
+async def count_total(db: Union[Session, AsyncSession], query: Any, entity: Optional[str] = None) -> int:
+    """统计查询的总记录数
+
+    给出实体名时按 SQL 与参数缓存，登记 "{实体}:*" 标签，实体表写入提交后失效。
+    """
+    statement = query.statement if isinstance(query, Query) else query
+    statement = select(func.count()).select_from(statement.order_by(None).subquery())
+
+    async def load():
+        if isinstance(db, AsyncSession):
+            return await db.scalar(statement) or 0
+        return db.execute(statement).scalar() or 0
+
+    if entity is None:
+        return await load()
+
+    compiled = statement.compile()
+    params = sorted(compiled.params.items(), key=lambda item: item[0])
+    digest = hashlib.md5(f"{compiled}|{params!r}".encode("utf-8")).hexdigest()
+    return await cache_manager.get_or_set(
+        cache_manager.key_builder.build("count", entity, digest), load,
+        ttl=settings.PAGINATION_COUNT_CACHE_TTL, tags=[f"{entity}:*"]
+    )
+
+
+def build_page_info(params: QueryParams, total: Optional[int], next_cursor: Optional[str] = None) -> PageInfo:
+    """分页信息；游标分页时 has_next 由是否有下一页游标决定，未统计时 total 为空"""
+    total_pages = (total + params.page_size - 1) // params.page_size if total is not None else None
+    if params.cursor is not None:
+        return PageInfo(
+            page=params.page,
+            page_size=params.page_size,
+            total=total,
+            total_pages=total_pages,
+            has_next=next_cursor is not None,
+            has_prev=bool(params.cursor),
+            next_cursor=next_cursor
+        )
+    return PageInfo(
+        page=params.page,
+        page_size=params.page_size,
+        total=total,
+        total_pages=total_pages,
+        has_next=params.page < total_pages,
+        has_prev=params.page > 1
+    )
@@ -0,0 +1,379 @@
+"""资源时间线索引
+
+为排程服务提供内存中的资源占用索引：
+- IntervalTree: 以开始时间为键、子树最大结束时间为附加信息的区间树（Treap实现），
+  支持 O(log n) 插入/删除与 O(log n + k) 的重叠查询
+- ResourceTimeline: 按 (车间, 生产线) 分组的区间树集合，用于一次加载、多次查询的冲突检测
+- sweep_overlaps: 排序扫描线，一次遍历得到重叠对、重叠时间窗与峰值并发，O(n log n + k)
+- BusyIntervals: 单个资源上互不重叠的占用区间，按开始时间有序维护，二分查找空闲时段
+"""
+
+import random
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+class _Node:
+    """区间树节点"""
+
+    __slots__ = ("start", "end", "seq", "key", "payload", "priority", "max_end", "left", "right")
+
+    def __init__(self, start: Any, end: Any, seq: int, key: Hashable, payload: Any, priority: float):
+        self.start = start
+        self.end = end
+        self.seq = seq
+        self.key = key
+        self.payload = payload
+        self.priority = priority
+        self.max_end = end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+    def update(self) -> None:
+        """根据子节点重新计算子树最大结束时间"""
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+class IntervalTree:
+    """区间树
+
+    区间均按闭区间 [start, end] 处理，start/end 只需可比较（date、datetime、数字均可）。
+    每个区间由唯一的 key 标识，同一 key 再次插入会替换原区间。
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._root: Optional[_Node] = None
+        self._index: Dict[Hashable, Tuple[Any, int]] = {}
+        self._seq = count()
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def insert(self, key: Hashable, start: Any, end: Any, payload: Any = None) -> None:
+        """插入区间
+
+        Args:
+            key: 区间标识（如计划ID）
+            start: 开始时间
+            end: 结束时间
+            payload: 附加数据，查询时原样返回
+        """
+        if end < start:
+            raise ValueError("区间结束时间不能早于开始时间")
+        if key in self._index:
+            self.remove(key)
+        seq = next(self._seq)
+        node = _Node(start, end, seq, key, payload, self._random.random())
+        self._root = self._insert(self._root, node)
+        self._index[key] = (start, seq)
+
+    def remove(self, key: Hashable) -> bool:
+        """删除区间，返回是否存在该区间"""
+        position = self._index.pop(key, None)
+        if position is None:
+            return False
+        self._root = self._remove(self._root, position)
+        return True
+
+    def overlap(self, start: Any, end: Any) -> List[Tuple[Hashable, Any, Any, Any]]:
+        """查询与 [start, end] 重叠的全部区间
+
+        Returns:
+            (key, start, end, payload) 列表，按区间开始时间排序
+        """
+        found = []
+        stack = []
+        node = self._root
+        # 中序遍历，利用 max_end 剪掉不可能重叠的左子树，利用开始时间剪掉右子树
+        while stack or node is not None:
+            while node is not None and node.max_end >= start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start > end:
+                break
+            if node.end >= start:
+                found.append((node.key, node.start, node.end, node.payload))
+            node = node.right
+        return found
+
+    def items(self) -> Iterable[Tuple[Hashable, Any, Any, Any]]:
+        """按开始时间顺序遍历全部区间"""
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key, node.start, node.end, node.payload
+            node = node.right
+
+    def _insert(self, root: Optional[_Node], node: _Node) -> _Node:
+        if root is None:
+            return node
+        if (node.start, node.seq) < (root.start, root.seq):
+            root.left = self._insert(root.left, node)
+            if root.left.priority > root.priority:
+                root = self._rotate_right(root)
+        else:
+            root.right = self._insert(root.right, node)
+            if root.right.priority > root.priority:
+                root = self._rotate_left(root)
+        root.update()
+        return root
+
+    def _remove(self, root: Optional[_Node], position: Tuple[Any, int]) -> Optional[_Node]:
+        if root is None:
+            return None
+        current = (root.start, root.seq)
+        if position < current:
+            root.left = self._remove(root.left, position)
+        elif position > current:
+            root.right = self._remove(root.right, position)
+        else:
+            if root.left is None:
+                return root.right
+            if root.right is None:
+                return root.left
+            if root.left.priority > root.right.priority:
+                root = self._rotate_right(root)
+                root.right = self._remove(root.right, position)
+            else:
+                root = self._rotate_left(root)
+                root.left = self._remove(root.left, position)
+        root.update()
+        return root
+
+    @staticmethod
+    def _rotate_right(node: _Node) -> _Node:
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    @staticmethod
+    def _rotate_left(node: _Node) -> _Node:
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        node.update()
+        pivot.update()
+        return pivot
+
+
+class ResourceTimeline:
+    """按 (车间, 生产线) 分组的资源占用时间线"""
+
+    def __init__(self):
+        self._trees: Dict[Tuple[Optional[str], Optional[str]], IntervalTree] = {}
+        self._resource_of: Dict[Hashable, Tuple[Optional[str], Optional[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._resource_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._resource_of
+
+    def place(
+        self,
+        key: Hashable,
+        workshop: Optional[str],
+        production_line: Optional[str],
+        start: Any,
+        end: Any,
+        payload: Any = None
+    ) -> None:
+        """登记（或移动）一个资源占用"""
+        self.remove(key)
+        resource = (workshop, production_line)
+        tree = self._trees.get(resource)
+        if tree is None:
+            tree = self._trees[resource] = IntervalTree()
+        tree.insert(key, start, end, payload)
+        self._resource_of[key] = resource
+
+    def remove(self, key: Hashable) -> bool:
+        """移除一个资源占用"""
+        resource = self._resource_of.pop(key, None)
+        if resource is None:
+            return False
+        return self._trees[resource].remove(key)
+
+    def items(self) -> Iterable[Tuple[Hashable, Tuple[Optional[str], Optional[str]], Any, Any]]:
+        """遍历全部占用 (key, (车间, 生产线), start, end)"""
+        for resource, tree in self._trees.items():
+            for key, start, end, _ in tree.items():
+                yield key, resource, start, end
+
+    def find_overlaps(
+        self,
+        workshop: Optional[str],
+        production_line: Optional[str],
+        start: Any,
+        end: Any,
+        exclude_key: Optional[Hashable] = None
+    ) -> List[Tuple[Hashable, Any, Any, Any]]:
+        """查询指定资源上与 [start, end] 重叠的占用"""
+        tree = self._trees.get((workshop, production_line))
+        if tree is None:
+            return []
+        return [item for item in tree.overlap(start, end) if item[0] != exclude_key]
+
+
+class BusyIntervals:
+    """单个资源的占用区间集合
+
+    区间按左闭右开 [start, end) 处理且互不重叠。首尾相接的区间合并为连续占用块，
+    块的开始与结束时间分别保存在有序列表中；查找空闲时段时先二分定位，
+    再只检查其后容纳不下所需时长的少量空隙。
+    """
+
+    def __init__(self):
+        self._starts: List[Any] = []
+        self._ends: List[Any] = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        """已登记的占用数（合并前）"""
+        return self._count
+
+    def __iter__(self):
+        """按时间顺序遍历连续占用块"""
+        return iter(zip(self._starts, self._ends))
+
+    def copy(self) -> "BusyIntervals":
+        duplicate = BusyIntervals()
+        duplicate._starts = list(self._starts)
+        duplicate._ends = list(self._ends)
+        duplicate._count = self._count
+        return duplicate
+
+    def find_slot(self, earliest_start: Any, duration: Any) -> Any:
+        """查找不早于 earliest_start、可容纳 duration 的最早开始时间"""
+        starts, ends = self._starts, self._ends
+        candidate = earliest_start
+        index = bisect_right(starts, candidate) - 1
+        if index >= 0 and ends[index] > candidate:
+            candidate = ends[index]
+        index += 1
+        while index < len(starts) and starts[index] < candidate + duration:
+            candidate = ends[index]
+            index += 1
+        return candidate
+
+    def add(self, start: Any, end: Any) -> None:
+        """登记占用区间（调用方保证不与已有区间重叠）"""
+        starts, ends = self._starts, self._ends
+        self._count += 1
+        index = bisect_right(starts, start)
+        merge_previous = index > 0 and ends[index - 1] >= start
+        merge_next = index < len(starts) and starts[index] <= end
+
+        if merge_previous and merge_next:
+            ends[index - 1] = max(ends[index], end)
+            del starts[index]
+            del ends[index]
+        elif merge_previous:
+            ends[index - 1] = max(ends[index - 1], end)
+        elif merge_next:
+            starts[index] = start
+        else:
+            starts.insert(index, start)
+            ends.insert(index, end)
+
+    @property
+    def last_end(self) -> Any:
+        """最后一个占用的结束时间"""
+        return self._ends[-1] if self._ends else None
+
+
+@dataclass
+class OverlapWindow:
+    """资源上并发数不少于2的连续时间窗"""
+    start: Any
+    end: Any
+    max_concurrency: int
+    keys: List[Hashable]
+
+
+@dataclass
+class SweepReport:
+    """单个资源的扫描线分析结果"""
+    pairs: List[Tuple[Hashable, Hashable]] = field(default_factory=list)
+    windows: List[OverlapWindow] = field(default_factory=list)
+    peak_concurrency: int = 0
+    peak_start: Any = None
+    peak_end: Any = None
+    peak_keys: List[Hashable] = field(default_factory=list)
+
+
+def sweep_overlaps(intervals: Sequence[Tuple[Hashable, Any, Any]]) -> SweepReport:
+    """扫描线分析同一资源上的区间重叠
+
+    区间按闭区间 [start, end] 处理：首尾相接（一个的结束等于另一个的开始）也视为重叠。
+
+    Args:
+        intervals: (key, start, end) 列表
+
+    Returns:
+        SweepReport: 重叠对（按开始时间顺序，先开始者在前）、重叠时间窗及峰值并发
+    """
+    report = SweepReport()
+    # 同一时刻先处理开始事件再处理结束事件，保证闭区间语义
+    events = []
+    for order, (key, start, end) in enumerate(intervals):
+        if end < start:
+            continue
+        events.append((start, 0, order, key))
+        events.append((end, 1, order, key))
+    events.sort(key=lambda event: (event[0], event[1], event[2]))
+
+    active: Dict[int, Hashable] = {}
+    window: Optional[OverlapWindow] = None
+
+    for position, kind, order, key in events:
+        if kind == 0:
+            for other in active.values():
+                report.pairs.append((other, key))
+            active[order] = key
+            concurrency = len(active)
+
+            if concurrency >= 2:
+                if window is None:
+                    window = OverlapWindow(position, position, concurrency, list(active.values()))
+                else:
+                    window.keys.append(key)
+                    window.max_concurrency = max(window.max_concurrency, concurrency)
+
+            if concurrency > report.peak_concurrency:
+                report.peak_concurrency = concurrency
+                report.peak_start = position
+                report.peak_end = None
+                report.peak_keys = list(active.values())
+        else:
+            # 峰值区间在峰值状态下的第一个结束事件处闭合
+            if report.peak_end is None and len(active) == report.peak_concurrency:
+                report.peak_end = position
+            del active[order]
+            if window is not None and len(active) < 2:
+                window.end = position
+                report.windows.append(window)
+                window = None
+
+    return report
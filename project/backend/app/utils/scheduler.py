@@ -6,6 +6,7 @@ import heapq
 from sqlalchemy.orm import Session
 from app.models.production_plan import ProductionPlan, ProductionStage, PlanStatus, PlanPriority
 from app.models.order import Order
+from app.utils.resource_timeline import BusyIntervals
 import logging
 
 logger = logging.getLogger(__name__)
@@ -244,7 +245,8 @@ class ProductionScheduler:
     def _assign_resources(self, sorted_tasks: List[ScheduleTask], resources: Dict[str, ResourceConstraint], start_date: Optional[datetime]) -> List[ScheduleResult]:
         """分配资源并生成排程结果"""
         results = []
-        resource_schedule = {name: [] for name in resources.keys()}  # 记录每个资源的占用情况
+        results_by_plan: Dict[int, ScheduleResult] = {}  # 计划ID -> 排程结果，用于查找依赖完成时间
+        resource_schedule = {name: BusyIntervals() for name in resources.keys()}  # 记录每个资源的占用情况
         current_date = start_date or datetime.now()
         
         for task in sorted_tasks:
@@ -256,20 +258,21 @@ class ProductionScheduler:
                 earliest_start = max(task.earliest_start, current_date)
                 if task.dependencies:
                     # 找到依赖任务的最晚完成时间
-                    dep_finish_times = []
-                    for dep_id in task.dependencies:
-                        for result in results:
-                            if result.plan_id == dep_id:
-                                dep_finish_times.append(result.scheduled_end)
+                    dep_finish_times = [
+                        results_by_plan[dep_id].scheduled_end
+                        for dep_id in task.dependencies
+                        if dep_id in results_by_plan
+                    ]
                     if dep_finish_times:
                         earliest_start = max(earliest_start, max(dep_finish_times))
                 
                 # 找到资源的下一个可用时间
-                available_start = self._find_next_available_time(best_resource, resource_schedule, earliest_start)
-                scheduled_end = available_start + timedelta(days=task.estimated_duration)
+                duration = timedelta(days=task.estimated_duration)
+                available_start = self._find_next_available_time(best_resource, resource_schedule, earliest_start, duration)
+                scheduled_end = available_start + duration
                 
                 # 记录资源占用
-                resource_schedule[best_resource].append((available_start, scheduled_end))
+                resource_schedule[best_resource].add(available_start, scheduled_end)
                 
                 # 计算资源利用率
                 resource_constraint = resources[best_resource]
@@ -284,10 +287,11 @@ class ProductionScheduler:
                     resource_utilization=utilization
                 )
                 results.append(result)
+                results_by_plan[task.plan_id] = result
         
         return results
     
-    def _find_best_resource(self, task: ScheduleTask, resources: Dict[str, ResourceConstraint], resource_schedule: Dict[str, List[Tuple[datetime, datetime]]]) -> Optional[str]:
+    def _find_best_resource(self, task: ScheduleTask, resources: Dict[str, ResourceConstraint], resource_schedule: Dict[str, BusyIntervals]) -> Optional[str]:
         """为任务找到最佳资源"""
         best_resource = None
         best_score = -1
@@ -306,7 +310,7 @@ class ProductionScheduler:
         
         return best_resource
     
-    def _calculate_resource_score(self, task: ScheduleTask, constraint: ResourceConstraint, schedule: List[Tuple[datetime, datetime]]) -> float:
+    def _calculate_resource_score(self, task: ScheduleTask, constraint: ResourceConstraint, schedule: BusyIntervals) -> float:
         """计算资源评分"""
         # 基础评分：产能匹配度
         capacity_score = min(1.0, constraint.capacity / max(1, task.quantity)) * 0.4
@@ -320,33 +324,16 @@ class ProductionScheduler:
         
         return capacity_score + idle_score + skill_score
     
-    def _find_next_available_time(self, resource: str, resource_schedule: Dict[str, List[Tuple[datetime, datetime]]], earliest_start: datetime) -> datetime:
-        """找到资源的下一个可用时间"""
-        schedule = resource_schedule[resource]
-        
-        if not schedule:
-            return earliest_start
-        
-        # 按时间排序
-        sorted_schedule = sorted(schedule, key=lambda x: x[0])
-        
-        # 检查是否可以在现有任务之间插入
-        for i, (start, end) in enumerate(sorted_schedule):
-            if earliest_start < start:
-                return earliest_start
-            if i < len(sorted_schedule) - 1:
-                next_start = sorted_schedule[i + 1][0]
-                if end <= earliest_start < next_start:
-                    return earliest_start
-        
-        # 在最后一个任务之后安排
-        last_end = sorted_schedule[-1][1]
-        return max(earliest_start, last_end)
+    def _find_next_available_time(self, resource: str, resource_schedule: Dict[str, BusyIntervals], earliest_start: datetime, duration: timedelta = timedelta()) -> datetime:
+        """找到资源上不早于 earliest_start、能容纳 duration 的最早可用时间"""
+        return resource_schedule[resource].find_slot(earliest_start, duration)
     
     def _optimize_schedule(self, results: List[ScheduleResult], tasks: List[ScheduleTask], resources: Dict[str, ResourceConstraint]) -> List[ScheduleResult]:
         """优化排程结果"""
         # 简单的优化：检查是否有任务可以提前
         optimized_results = results.copy()
+        tasks_by_plan = {t.plan_id: t for t in tasks}
+        results_by_plan = {r.plan_id: r for r in optimized_results}
         
         # 按开始时间排序
         optimized_results.sort(key=lambda r: r.scheduled_start)
@@ -361,11 +348,11 @@ class ProductionScheduler:
                 current.scheduled_start > previous.scheduled_end):
                 
                 # 检查是否有依赖关系阻止提前
-                task = next(t for t in tasks if t.plan_id == current.plan_id)
+                task = tasks_by_plan[current.plan_id]
                 can_advance = True
                 
                 for dep_id in task.dependencies:
-                    dep_result = next((r for r in optimized_results if r.plan_id == dep_id), None)
+                    dep_result = results_by_plan.get(dep_id)
                     if dep_result and dep_result.scheduled_end > previous.scheduled_end:
                         can_advance = False
                         break
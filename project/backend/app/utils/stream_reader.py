@@ -0,0 +1,198 @@
+"""流式读取
+
+上传的表格文件按块读取，内存占用与文件行数无关：
+- XLSX：openpyxl 只读模式逐行解析工作表，每 chunk_size 行组装一个 DataFrame
+- CSV：pandas C 引擎按块读取（chunksize）
+- XLS（旧格式）：openpyxl 不支持，整表读取后再切块
+文件类型按文件名后缀判断，没有文件名时按文件头识别。
+各块的索引为数据行序号（从 0 开始，跳过的空行也计数），与 pd.read_excel 读取整表时一致。
+"""
+
+import io
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+import openpyxl
+import pandas as pd
+
+READ_CHUNK_SIZE = 5000
+
+_XLSX_MAGIC = b"PK\x03\x04"
+_XLS_MAGIC = b"\xd0\xcf\x11\xe0"
+
+Source = Union[str, Path, bytes, BinaryIO]
+
+
+def _peek(source: Source, size: int) -> bytes:
+    if isinstance(source, bytes):
+        return source[:size]
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file:
+            return file.read(size)
+    position = source.tell()
+    head = source.read(size)
+    source.seek(position)
+    return head
+
+
+def _open(source: Source) -> Union[str, Path, BinaryIO]:
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if not isinstance(source, (str, Path)):
+        source.seek(0)
+    return source
+
+
+def detect_format(source: Source, filename: Optional[str] = None) -> str:
+    """识别文件类型：xlsx、xls 或 csv"""
+    name = filename
+    if name is None:
+        name = str(source) if isinstance(source, (str, Path)) else getattr(source, "name", None)
+    if name:
+        suffix = Path(str(name)).suffix.lower()
+        if suffix in (".csv", ".txt"):
+            return "csv"
+        if suffix == ".xls":
+            return "xls"
+        if suffix in (".xlsx", ".xlsm"):
+            return "xlsx"
+    head = _peek(source, 4)
+    if head.startswith(_XLSX_MAGIC):
+        return "xlsx"
+    if head.startswith(_XLS_MAGIC):
+        return "xls"
+    return "csv"
+
+
+def _headers(values: Sequence[Any]) -> List[str]:
+    """表头：去除首尾空白，空表头记为 Unnamed: n，重名的加 .n 后缀（与 pandas 一致）"""
+    values = list(values)
+    while values and values[-1] is None:
+        values.pop()
+    headers = []
+    seen: Dict[str, int] = {}
+    for position, value in enumerate(values):
+        header = str(value).strip() if value is not None else ""
+        header = header or f"Unnamed: {position}"
+        if header in seen:
+            seen[header] += 1
+            header = f"{header}.{seen[header]}"
+        else:
+            seen[header] = 0
+        headers.append(header)
+    return headers
+
+
+def _iter_xlsx(source: Source, chunk_size: int, sheet_name: Optional[str], header_row: int,
+               max_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+    workbook = openpyxl.load_workbook(_open(source), read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        for _ in range(header_row):
+            next(rows, None)
+        headers = _headers(next(rows, ()))
+        width = len(headers)
+
+        batch, index = [], []
+        yielded = False
+        for position, values in enumerate(rows):
+            if max_rows is not None and position >= max_rows:
+                break
+            values = tuple(values[:width])
+            if all(value is None for value in values):
+                continue
+            batch.append(values + (None,) * (width - len(values)))
+            index.append(position)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=headers, index=index)
+                yielded = True
+                batch, index = [], []
+        if batch or not yielded:
+            yield pd.DataFrame(batch, columns=headers, index=index)
+    finally:
+        # 只读模式会保持文件句柄，需显式关闭
+        workbook.close()
+
+
+def _iter_csv(source: Source, chunk_size: int, header_row: int, max_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+    options = dict(header=header_row, nrows=max_rows, encoding="utf-8-sig", engine="c")
+    yielded = False
+    with pd.read_csv(_open(source), chunksize=chunk_size, **options) as reader:
+        for chunk in reader:
+            chunk.columns = [str(column).strip() for column in chunk.columns]
+            yield chunk
+            yielded = True
+    if not yielded:
+        frame = pd.read_csv(_open(source), **{**options, "nrows": 0})
+        frame.columns = [str(column).strip() for column in frame.columns]
+        yield frame
+
+
+def _iter_xls(source: Source, chunk_size: int, sheet_name: Optional[str], header_row: int,
+              max_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+    frame = pd.read_excel(_open(source), sheet_name=sheet_name or 0, header=header_row, nrows=max_rows)
+    frame.columns = [str(column).strip() for column in frame.columns]
+    frame = frame.dropna(how="all")
+    if frame.empty:
+        yield frame
+    for start in range(0, len(frame), chunk_size):
+        yield frame.iloc[start:start + chunk_size]
+
+
+def iter_table_chunks(
+    source: Source,
+    chunk_size: int = READ_CHUNK_SIZE,
+    sheet_name: Optional[str] = None,
+    header_row: int = 0,
+    max_rows: Optional[int] = None,
+    filename: Optional[str] = None
+) -> Iterator[pd.DataFrame]:
+    """按块读取表格文件（XLSX、XLS、CSV），每块最多 chunk_size 行，跳过全空行
+
+    source 可以是文件路径、文件内容或文件对象；没有数据行时产出一个只有表头的空块。
+    """
+    file_format = detect_format(source, filename)
+    if file_format == "csv":
+        return _iter_csv(source, chunk_size, header_row, max_rows)
+    if file_format == "xls":
+        return _iter_xls(source, chunk_size, sheet_name, header_row, max_rows)
+    return _iter_xlsx(source, chunk_size, sheet_name, header_row, max_rows)
+
+
+def iter_table_rows(source: Source, **options: Any) -> Iterator[Dict[str, Any]]:
+    """逐行读取表格文件，每行为 表头 -> 值 的字典，空单元格为 None"""
+    for chunk in iter_table_chunks(source, **options):
+        yield from chunk.astype(object).where(chunk.notna(), None).to_dict("records")
+
+
+def read_table(source: Source, **options: Any) -> pd.DataFrame:
+    """读取整个表格为 DataFrame（按块解析后合并，不保留解析过程中的中间结构）"""
+    chunks = list(iter_table_chunks(source, **options))
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks)
+
+
+def count_rows(
+    source: Source,
+    sheet_name: Optional[str] = None,
+    header_row: int = 0,
+    max_rows: Optional[int] = None,
+    filename: Optional[str] = None
+) -> int:
+    """数据行数
+
+    XLSX 取工作表记录的范围（不读取单元格，可能包含空行）；其他格式按块读取计数。
+    """
+    if detect_format(source, filename) == "xlsx":
+        workbook = openpyxl.load_workbook(_open(source), read_only=True)
+        try:
+            worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+            total = worksheet.max_row
+        finally:
+            workbook.close()
+        if total is not None:
+            total = max(total - header_row - 1, 0)
+            return total if max_rows is None else min(total, max_rows)
+    chunks = iter_table_chunks(source, sheet_name=sheet_name, header_row=header_row, max_rows=max_rows,
+                               filename=filename)
+    return sum(len(chunk) for chunk in chunks)
@@ -0,0 +1,212 @@
+"""时间分桶聚合
+
+为报表趋势与通知统计提供按时间段（小时/天/周/月）分组的稠密序列：
+- date_bucket: 把时间列截断到所在时间段起点的SQL表达式，按数据库方言编译
+  （SQLite、PostgreSQL、MySQL、SQL Server），周以周一为起点
+- bucket_series: 在给定查询上执行一条 GROUP BY 时间段 的聚合查询，再在内存中补齐没有数据的时间段，
+  查询次数与时间跨度无关
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class TimeBucket(str, Enum):
+    """时间段粒度"""
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class _DateBucket(FunctionElement):
+    """时间列所在时间段的起点（各粒度一个子类，保证语句缓存键区分粒度）"""
+    bucket: TimeBucket
+    inherit_cache = True
+
+
+class _HourBucket(_DateBucket):
+    bucket = TimeBucket.HOUR
+    inherit_cache = True
+
+
+class _DayBucket(_DateBucket):
+    bucket = TimeBucket.DAY
+    inherit_cache = True
+
+
+class _WeekBucket(_DateBucket):
+    bucket = TimeBucket.WEEK
+    inherit_cache = True
+
+
+class _MonthBucket(_DateBucket):
+    bucket = TimeBucket.MONTH
+    inherit_cache = True
+
+
+_BUCKET_FUNCTIONS = {
+    TimeBucket.HOUR: _HourBucket,
+    TimeBucket.DAY: _DayBucket,
+    TimeBucket.WEEK: _WeekBucket,
+    TimeBucket.MONTH: _MonthBucket,
+}
+
+
+def date_bucket(column: Any, bucket: Union[TimeBucket, str]) -> _DateBucket:
+    """构建时间段起点表达式"""
+    return _BUCKET_FUNCTIONS[TimeBucket(bucket)](column)
+
+
+@compiles(_DateBucket)
+def _compile_date_trunc(element, compiler, **kw):
+    # PostgreSQL：date_trunc 的周同样以周一为起点
+    return f"date_trunc('{element.bucket.value}', {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(_DateBucket, "sqlite")
+def _compile_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    expressions = {
+        TimeBucket.HOUR: f"strftime('%Y-%m-%d %H:00:00', {column})",
+        TimeBucket.DAY: f"strftime('%Y-%m-%d 00:00:00', {column})",
+        # 先移到本周日（周日不动），再回退6天得到周一
+        TimeBucket.WEEK: f"strftime('%Y-%m-%d 00:00:00', {column}, 'weekday 0', '-6 days')",
+        TimeBucket.MONTH: f"strftime('%Y-%m-01 00:00:00', {column})",
+    }
+    return expressions[element.bucket]
+
+
+@compiles(_DateBucket, "mysql")
+def _compile_mysql(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    expressions = {
+        TimeBucket.HOUR: f"DATE_ADD(DATE({column}), INTERVAL HOUR({column}) HOUR)",
+        TimeBucket.DAY: f"DATE({column})",
+        TimeBucket.WEEK: f"DATE_SUB(DATE({column}), INTERVAL WEEKDAY({column}) DAY)",
+        TimeBucket.MONTH: f"DATE_SUB(DATE({column}), INTERVAL DAYOFMONTH({column}) - 1 DAY)",
+    }
+    return expressions[element.bucket]
+
+
+@compiles(_DateBucket, "mssql")
+def _compile_mssql(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    if element.bucket == TimeBucket.WEEK:
+        # 日期0（1900-01-01）是周一
+        return f"DATEADD(week, DATEDIFF(day, 0, {column}) / 7, 0)"
+    return f"DATEADD({element.bucket.value}, DATEDIFF({element.bucket.value}, 0, {column}), 0)"
+
+
+def as_datetime(value: Any) -> Optional[datetime]:
+    """数据库返回的时间段起点统一为 datetime（SQLite 返回字符串，部分方言返回 date）"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(str(value))
+
+
+def floor_bucket(moment: Union[date, datetime], bucket: Union[TimeBucket, str]) -> datetime:
+    """时间所在时间段的起点"""
+    bucket = TimeBucket(bucket)
+    moment = as_datetime(moment)
+    if bucket == TimeBucket.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == TimeBucket.WEEK:
+        return moment - timedelta(days=moment.weekday())
+    if bucket == TimeBucket.MONTH:
+        return moment.replace(day=1)
+    return moment
+
+
+def next_bucket(start: datetime, bucket: Union[TimeBucket, str]) -> datetime:
+    """下一个时间段的起点"""
+    bucket = TimeBucket(bucket)
+    if bucket == TimeBucket.HOUR:
+        return start + timedelta(hours=1)
+    if bucket == TimeBucket.DAY:
+        return start + timedelta(days=1)
+    if bucket == TimeBucket.WEEK:
+        return start + timedelta(weeks=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def bucket_range(
+    start: Union[date, datetime],
+    end: Union[date, datetime],
+    bucket: Union[TimeBucket, str]
+) -> List[datetime]:
+    """覆盖 [start, end] 的全部时间段起点"""
+    current = floor_bucket(start, bucket)
+    last = floor_bucket(end, bucket)
+    buckets = []
+    while current <= last:
+        buckets.append(current)
+        current = next_bucket(current, bucket)
+    return buckets
+
+
+def _number(value: Any) -> Union[int, float]:
+    if value is None:
+        return 0
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def bucket_series(
+    query: Query,
+    column: Any,
+    bucket: Union[TimeBucket, str] = TimeBucket.DAY,
+    start: Optional[Union[date, datetime]] = None,
+    end: Optional[Union[date, datetime]] = None,
+    **measures: Any
+) -> List[Dict[str, Any]]:
+    """按时间段聚合并返回稠密序列
+
+    Args:
+        query: 已带筛选条件的查询（如报表的 base_query）
+        column: 分桶的时间列
+        bucket: 时间段粒度
+        start: 序列起点，为空时取有数据的最早时间段
+        end: 序列终点，为空时取有数据的最晚时间段
+        **measures: 附加聚合表达式，如 passed=func.count(case((cond, 1)))
+
+    Returns:
+        List[Dict[str, Any]]: 按时间顺序的 {"bucket": 时间段起点, "count": 行数, **measures}，
+        没有数据的时间段各项为0
+    """
+    bucket = TimeBucket(bucket)
+    expression = date_bucket(column, bucket)
+    rows = query.order_by(None).with_entities(
+        expression.label("bucket"),
+        func.count().label("count"),
+        *[aggregate.label(name) for name, aggregate in measures.items()]
+    ).group_by(expression).all()
+
+    filled: Dict[datetime, Dict[str, Any]] = {}
+    for row in rows:
+        values = row._asdict()
+        key = as_datetime(values.pop("bucket"))
+        if key is not None:
+            filled[key] = {name: _number(value) for name, value in values.items()}
+
+    if start is None or end is None:
+        if not filled:
+            return []
+        start = start if start is not None else min(filled)
+        end = end if end is not None else max(filled)
+
+    empty = dict.fromkeys(["count", *measures], 0)
+    return [{"bucket": key, **filled.get(key, empty)} for key in bucket_range(start, end, bucket)]
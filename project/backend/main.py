@@ -10,10 +10,12 @@ from app.core.logging import setup_logging, get_logger
 from app.core.middleware import setup_middleware
 from app.core.exceptions import setup_exception_handlers
 from app.core.database import init_database, close_database
-from app.db.database import engine, Base
+from app.db.database import engine, Base, dispose_async_engine
 from app.api.api import api_router
 from app.services.reminder_scheduler import ReminderScheduler
 from app.services.task_service import task_service
+from app.services.search_index import init_search_indexes
+from app.services.wechat_client import close_wechat_clients
 
 # 设置日志
 setup_logging(log_level=settings.LOG_LEVEL, debug=settings.DEBUG)
@@ -33,10 +35,14 @@ async def lifespan(app: FastAPI):
         await init_database()
         logger.info("数据库连接初始化完成")
         
-        # 创建数据库表
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        # 创建数据库表（engine 为同步引擎）
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
         logger.info("数据库表创建完成")
+        
+        # 创建关键词搜索索引（幂等）
+        search_indexes = init_search_indexes(engine)
+        logger.info(f"关键词搜索索引就绪: {search_indexes}")
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
         raise
@@ -95,6 +101,20 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"数据库关闭失败: {e}")
     
+    try:
+        # 关闭异步数据库连接池（请求中按需创建的引擎，未经 init_database 时也需要关闭）
+        await dispose_async_engine()
+        logger.info("异步数据库连接池已关闭")
+    except Exception as e:
+        logger.error(f"异步数据库连接池关闭失败: {e}")
+    
+    try:
+        # 关闭企业微信接口连接
+        await close_wechat_clients()
+        logger.info("企业微信接口连接已关闭")
+    except Exception as e:
+        logger.error(f"企业微信接口连接关闭失败: {e}")
+    
     logger.info("PMC系统已关闭")
 
 # 创建FastAPI应用
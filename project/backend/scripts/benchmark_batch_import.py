@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量导入对比脚本
+
+在合成的BD400订单表上，对比两种导入方式的耗时：
+- 逐行导入：iterrows 逐行查重、构造 Order 对象并 add，最后提交（原 BD400OrderImporter 的做法）
+- 批量导入：BD400OrderImporter.import_dataframe，按列校验、每块一次 IN 查重、一次 executemany 写入
+
+数据库中预先存在一部分订单号，用于覆盖查重跳过的分支；两种方式导入后的订单数应一致。
+默认使用临时 SQLite 文件。
+
+用法:
+    python scripts/benchmark_batch_import.py
+    python scripts/benchmark_batch_import.py --rows 20000 --existing 2000
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderPriority, OrderStatus
+from app.utils.bd400_importer import BD400OrderImporter
+
+
+def build_frame(rows: int, seed: int) -> pd.DataFrame:
+    """与BD400订单表表头一致的合成数据"""
+    rng = random.Random(seed)
+    start = datetime(2025, 6, 1)
+    return pd.DataFrame({
+        '订单号': [f"BD{i:07d}" for i in range(rows)],
+        '客户名称': [f"客户{rng.randrange(300)}" for _ in range(rows)],
+        '产品名称': [f"产品{rng.randrange(1000)}" for _ in range(rows)],
+        '产品型号': [f"M-{rng.randrange(100)}" if rng.random() < 0.5 else None for _ in range(rows)],
+        '数量': [rng.randrange(1, 5000) for _ in range(rows)],
+        '单位': [rng.choice(['件', '套', '箱']) for _ in range(rows)],
+        '单价': [rng.randrange(100, 100000) / 100 for _ in range(rows)],
+        '下单日期': [start - timedelta(days=rng.randrange(30)) for _ in range(rows)],
+        '交货日期': [start + timedelta(days=rng.randrange(90)) for _ in range(rows)],
+        '优先级': [rng.choice(['低', '中', '高', '紧急', None]) for _ in range(rows)],
+        '联系人': [f"联系人{rng.randrange(500)}" for _ in range(rows)],
+        '备注': [None if rng.random() < 0.7 else "加急" for _ in range(rows)],
+    })
+
+
+def prepare_database(path: str, existing: int, seed: int):
+    """新建订单表，并写入 existing 个随机的已存在订单号"""
+    engine = create_engine(f"sqlite:///{path}")
+    Order.__table__.create(engine)
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 1)
+    with engine.begin() as conn:
+        numbers = rng.sample(range(existing * 10), existing)
+        if numbers:
+            conn.execute(insert(Order), [{
+                "order_no": f"BD{i:07d}", "customer_name": "已有客户", "product_name": "已有产品", "quantity": 1,
+                "unit": "件", "order_date": now, "delivery_date": now, "status": OrderStatus.PENDING,
+                "priority": OrderPriority.MEDIUM, "created_at": now, "updated_at": now
+            } for i in numbers])
+    return engine
+
+
+def row_by_row_import(db: Session, frame: pd.DataFrame) -> int:
+    """逐行导入（原实现）"""
+    importer = BD400OrderImporter(db)
+    df = importer._preprocess_dataframe(frame)
+    imported = 0
+    for _, row in df.iterrows():
+        order_number = str(row.get('order_number')).strip()
+        if db.query(Order).filter(Order.order_no == order_number).first():
+            continue
+        data = {
+            'order_no': order_number,
+            'customer_name': str(row.get('customer_name', '')).strip(),
+            'product_name': str(row.get('product_name', '')).strip(),
+            'quantity': int(row.get('quantity', 0)),
+            'unit': str(row.get('unit', '件')).strip(),
+            'order_date': row['order_date'].date() if pd.notna(row.get('order_date')) else datetime.now().date(),
+            'delivery_date': row['delivery_date'].date(),
+            'status': OrderStatus.PENDING,
+            'priority': importer.PRIORITY_MAPPING.get(str(row.get('priority')).strip(), OrderPriority.MEDIUM),
+            'created_at': datetime.now(),
+            'updated_at': datetime.now()
+        }
+        for field in ['product_model', 'contact_person', 'remark']:
+            value = row.get(field)
+            if pd.notna(value) and str(value).strip():
+                data[field] = str(value).strip()
+        if pd.notna(row.get('unit_price')):
+            data['unit_price'] = float(row.get('unit_price'))
+        db.add(Order(**data))
+        imported += 1
+    db.commit()
+    return imported
+
+
+def batch_import(db: Session, frame: pd.DataFrame) -> int:
+    """批量导入"""
+    result = BD400OrderImporter(db).import_dataframe(frame)
+    assert result['success'], result
+    return result['imported_count']
+
+
+def measure(import_func, frame: pd.DataFrame, existing: int, seed: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = prepare_database(os.path.join(temp_dir, "benchmark.db"), existing, seed)
+        with Session(engine) as db:
+            started = time.perf_counter()
+            imported = import_func(db, frame.copy())
+            elapsed = time.perf_counter() - started
+            total = db.scalar(select(func.count(Order.id)))
+        engine.dispose()
+    return elapsed, imported, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导入对比")
+    parser.add_argument("--rows", type=int, default=100000, help="导入行数")
+    parser.add_argument("--existing", type=int, default=5000, help="数据库中已存在的订单数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    frame = build_frame(args.rows, args.seed)
+    print(f"导入行数: {args.rows}, 已存在订单: {args.existing}")
+
+    batch_time, batch_imported, batch_total = measure(batch_import, frame, args.existing, args.seed)
+    print(f"批量导入: {batch_time:.2f}s, 导入 {batch_imported} 条, {args.rows / batch_time:,.0f} 行/秒")
+
+    row_time, row_imported, row_total = measure(row_by_row_import, frame, args.existing, args.seed)
+    print(f"逐行导入: {row_time:.2f}s, 导入 {row_imported} 条, {args.rows / row_time:,.0f} 行/秒")
+
+    assert batch_imported == row_imported and batch_total == row_total, "两种方式导入的订单数不一致"
+    print(f"加速比: {row_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表接口快速响应路径对比脚本
+
+在合成物料表上，以与物料列表接口相同的两种方式生成一页响应，经 FastAPI 完整处理后取回响应体：
+- 常规路径：查询 ORM 对象，逐行构造 MaterialDetail，FastAPI 按 response_model 校验并编码
+- 快速路径：app.utils.fast_response 的列投影查询元组行，转为字典后由 orjson 直接编码
+
+输出不同页大小下两种方式的中位耗时、响应体大小，并校验两种响应的数据内容一致。
+默认使用临时 SQLite 文件。
+
+用法:
+    python scripts/benchmark_fast_response.py
+    python scripts/benchmark_fast_response.py --page-sizes 100 1000 5000 --repeat 20
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Date, DateTime, Enum, Integer, Numeric, String, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+
+from app.models.material import MaterialCategory, MaterialStatus
+from app.schemas.common import PageInfo, PagedResponseModel
+from app.schemas.material import MaterialDetail
+from app.utils.fast_response import Projection, paged_response
+
+Base = declarative_base()
+
+
+class BenchmarkMaterial(Base):
+    """与 MaterialDetail 字段一致的物料表"""
+    __tablename__ = "benchmark_materials"
+    id = Column(Integer, primary_key=True)
+    material_code = Column(String(50))
+    material_name = Column(String(100))
+    category = Column(Enum(MaterialCategory))
+    specification = Column(String(200))
+    unit = Column(String(20))
+    unit_price = Column(Numeric(10, 2))
+    current_stock = Column(Numeric(12, 2))
+    min_stock = Column(Numeric(12, 2))
+    max_stock = Column(Numeric(12, 2))
+    safety_stock = Column(Numeric(12, 2))
+    supplier = Column(String(100))
+    supplier_contact = Column(String(50))
+    lead_time = Column(Integer)
+    warehouse = Column(String(50))
+    location = Column(String(50))
+    status = Column(Enum(MaterialStatus))
+    last_purchase_date = Column(Date)
+    last_purchase_price = Column(Numeric(10, 2))
+    last_usage_date = Column(Date)
+    remark = Column(String(200))
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    created_by = Column(String(50))
+    updated_by = Column(String(50))
+
+
+def stock_status(current_stock, min_stock, max_stock) -> str:
+    if current_stock <= 0:
+        return "缺货"
+    if current_stock <= min_stock:
+        return "库存不足"
+    if max_stock is not None and current_stock >= max_stock:
+        return "库存过多"
+    return "正常"
+
+
+PROJECTION = Projection(
+    BenchmarkMaterial,
+    [name for name in MaterialDetail.model_fields if name != "stock_status"],
+    computed={"stock_status": lambda item: stock_status(item["current_stock"], item["min_stock"], item["max_stock"])}
+)
+
+
+def prepare_data(engine, rows: int, seed: int) -> None:
+    rng = random.Random(seed)
+    categories, statuses = list(MaterialCategory), list(MaterialStatus)
+    now = datetime(2025, 6, 1, 8, 0)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(1, rows + 1):
+            session.add(BenchmarkMaterial(
+                id=i,
+                material_code=f"M{i:08d}",
+                material_name=f"物料{i % 500}",
+                category=rng.choice(categories),
+                specification=f"{rng.randrange(10, 500)}x{rng.randrange(10, 500)}mm",
+                unit="个",
+                unit_price=Decimal(rng.randrange(100, 100000)) / 100,
+                current_stock=Decimal(rng.randrange(0, 5000)),
+                min_stock=Decimal(100),
+                max_stock=Decimal(4000),
+                safety_stock=Decimal(200),
+                supplier=f"供应商{rng.randrange(200):03d}",
+                supplier_contact="13800000000",
+                lead_time=rng.randrange(1, 30),
+                warehouse=f"仓库{rng.randrange(5)}",
+                location=f"A-{rng.randrange(100):02d}",
+                status=rng.choice(statuses),
+                last_purchase_date=date(2025, 5, 1) + timedelta(days=i % 30),
+                last_purchase_price=Decimal(rng.randrange(100, 100000)) / 100,
+                remark=None,
+                created_at=now - timedelta(minutes=i),
+                updated_at=now,
+                created_by="admin"
+            ))
+        session.commit()
+
+
+def build_app(engine) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/materials", response_model=PagedResponseModel[MaterialDetail])
+    def regular(page_size: int):
+        with Session(engine) as session:
+            statement = select(BenchmarkMaterial).order_by(BenchmarkMaterial.id.desc()).limit(page_size)
+            details = []
+            for material in session.scalars(statement):
+                details.append(MaterialDetail(
+                    id=material.id,
+                    material_code=material.material_code,
+                    material_name=material.material_name,
+                    category=material.category,
+                    specification=material.specification,
+                    unit=material.unit,
+                    unit_price=material.unit_price,
+                    current_stock=material.current_stock,
+                    min_stock=material.min_stock,
+                    max_stock=material.max_stock,
+                    safety_stock=material.safety_stock,
+                    stock_status=stock_status(material.current_stock, material.min_stock, material.max_stock),
+                    supplier=material.supplier,
+                    supplier_contact=material.supplier_contact,
+                    lead_time=material.lead_time,
+                    warehouse=material.warehouse,
+                    location=material.location,
+                    status=material.status,
+                    last_purchase_date=material.last_purchase_date,
+                    last_purchase_price=material.last_purchase_price,
+                    last_usage_date=material.last_usage_date,
+                    remark=material.remark,
+                    created_at=material.created_at,
+                    updated_at=material.updated_at,
+                    created_by=material.created_by,
+                    updated_by=material.updated_by
+                ))
+        return PagedResponseModel(data=details, page_info=PageInfo(page_size=page_size))
+
+    @app.get("/materials/fast", response_model=PagedResponseModel[MaterialDetail])
+    def fast(page_size: int):
+        with Session(engine) as session:
+            statement = select(BenchmarkMaterial).order_by(BenchmarkMaterial.id.desc()).limit(page_size)
+            rows = session.execute(PROJECTION.select(statement)).all()
+        return paged_response("操作成功", PROJECTION.rows(rows), PageInfo(page_size=page_size))
+
+    return app
+
+
+def measure(client: TestClient, url: str, repeat: int):
+    timings = []
+    response = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+    return statistics.median(timings), response.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表接口快速响应路径对比")
+    parser.add_argument("--rows", type=int, default=10000, help="合成物料数量")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 100, 1000, 5000], help="页大小")
+    parser.add_argument("--repeat", type=int, default=10, help="每种页大小的重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(temp_dir.name, 'benchmark.db')}")
+    prepare_data(engine, args.rows, args.seed)
+    client = TestClient(build_app(engine))
+
+    header = f"{'页大小':>8} {'常规(ms)':>10} {'快速(ms)':>10} {'加速比':>8} {'常规(KB)':>10} {'快速(KB)':>10}"
+    print(f"物料数: {args.rows}")
+    print(header)
+    print("-" * len(header))
+    for page_size in args.page_sizes:
+        regular_time, regular_body = measure(client, f"/materials?page_size={page_size}", args.repeat)
+        fast_time, fast_body = measure(client, f"/materials/fast?page_size={page_size}", args.repeat)
+        assert json.loads(regular_body)["data"] == json.loads(fast_body)["data"], "快速路径的数据与常规路径不一致"
+        print(f"{page_size:>8} {regular_time * 1000:>10.1f} {fast_time * 1000:>10.1f} "
+              f"{regular_time / fast_time:>7.1f}x {len(regular_body) / 1024:>10.1f} {len(fast_body) / 1024:>10.1f}")
+
+    engine.dispose()
+    temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
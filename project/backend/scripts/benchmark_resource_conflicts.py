@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源冲突检查性能对比脚本
+
+在合成的生产计划数据上对比两种冲突检查方式：
+- 旧方式：每个计划发起一次三段式 OR 日期查询（与 _check_resource_conflicts 的 SQL 条件一致）
+- 新方式：一次加载 ResourceTimeline 区间索引，之后在内存中查询
+
+用法:
+    python scripts/benchmark_resource_conflicts.py --plans 5000
+"""
+
+import sys
+import os
+import time
+import random
+import sqlite3
+import argparse
+from datetime import date, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.resource_timeline import ResourceTimeline
+
+OCCUPYING_STATUSES = ("已确认", "进行中")
+
+CONFLICT_SQL = """
+    SELECT id, plan_number, workshop, production_line FROM production_plans
+    WHERE status IN (?, ?)
+      AND ((planned_start_date <= ? AND planned_end_date >= ?)
+        OR (planned_start_date <= ? AND planned_end_date >= ?)
+        OR (planned_start_date >= ? AND planned_end_date <= ?))
+      AND id != ?
+"""
+
+
+def generate_plans(count: int, seed: int = 42):
+    """生成合成计划数据"""
+    rng = random.Random(seed)
+    base = date(2025, 1, 1)
+    workshops = [f"车间{chr(65 + i)}" for i in range(5)]
+    lines = [f"生产线{i}" for i in range(1, 5)]
+    statuses = ["草稿", "已确认", "已确认", "进行中"]
+    plans = []
+    for plan_id in range(1, count + 1):
+        start = base + timedelta(days=rng.randrange(365))
+        end = start + timedelta(days=rng.randrange(1, 15))
+        plans.append({
+            "id": plan_id,
+            "plan_number": f"PP{plan_id:06d}",
+            "workshop": rng.choice(workshops),
+            "production_line": rng.choice(lines),
+            "status": rng.choice(statuses),
+            "planned_start_date": start,
+            "planned_end_date": end,
+        })
+    return plans
+
+
+def run_query_path(plans):
+    """旧方式：逐个计划查询数据库"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE production_plans (id INTEGER PRIMARY KEY, plan_number TEXT, workshop TEXT, "
+        "production_line TEXT, status TEXT, planned_start_date TEXT, planned_end_date TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO production_plans VALUES (:id, :plan_number, :workshop, :production_line, "
+        ":status, :planned_start_date, :planned_end_date)",
+        [dict(p, planned_start_date=p["planned_start_date"].isoformat(),
+              planned_end_date=p["planned_end_date"].isoformat()) for p in plans]
+    )
+    conn.commit()
+
+    started = time.perf_counter()
+    results = {}
+    for plan in plans:
+        s = plan["planned_start_date"].isoformat()
+        e = plan["planned_end_date"].isoformat()
+        rows = conn.execute(CONFLICT_SQL, (*OCCUPYING_STATUSES, s, s, e, e, s, e, plan["id"])).fetchall()
+        results[plan["id"]] = [
+            f"与计划 {number} 存在资源冲突"
+            for row_id, number, workshop, line in sorted(rows)
+            if workshop == plan["workshop"] and line == plan["production_line"]
+        ]
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return results, elapsed
+
+
+def run_timeline_path(plans):
+    """新方式：一次加载区间索引，内存查询"""
+    started = time.perf_counter()
+    timeline = ResourceTimeline()
+    for plan in plans:
+        if plan["status"] in OCCUPYING_STATUSES:
+            timeline.place(plan["id"], plan["workshop"], plan["production_line"],
+                           plan["planned_start_date"], plan["planned_end_date"], plan["plan_number"])
+
+    results = {}
+    for plan in plans:
+        overlaps = timeline.find_overlaps(plan["workshop"], plan["production_line"],
+                                          plan["planned_start_date"], plan["planned_end_date"],
+                                          exclude_key=plan["id"])
+        results[plan["id"]] = [
+            f"与计划 {number} 存在资源冲突"
+            for _, _, _, number in sorted(overlaps, key=lambda item: item[0])
+        ]
+    elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源冲突检查性能对比")
+    parser.add_argument("--plans", type=int, default=5000, help="合成计划数量")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    plans = generate_plans(args.plans, args.seed)
+    print(f"合成计划数量: {len(plans)}")
+
+    query_results, query_elapsed = run_query_path(plans)
+    print(f"逐个查询: {query_elapsed:.3f}s")
+
+    timeline_results, timeline_elapsed = run_timeline_path(plans)
+    print(f"区间索引: {timeline_elapsed:.3f}s")
+
+    if query_results != timeline_results:
+        print("❌ 两种方式的冲突结果不一致")
+        sys.exit(1)
+
+    print("✅ 冲突结果一致")
+    print(f"加速比: {query_elapsed / max(timeline_elapsed, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词搜索索引性能对比脚本
+
+在合成物料表上对比列表接口的关键词筛选：
+- LIKE 扫描：四列 LIKE '%关键词%'（改造前的方式）
+- 搜索索引：app.services.search_index 的 SQLite FTS5 trigram 预筛选 + 原 LIKE 精确判断
+
+每个关键词执行一次分页列表请求（总数 + 第一页），输出两种方式的中位耗时与结果数，并校验结果一致；
+最后验证增删改后索引由触发器同步。默认使用临时 SQLite 文件。
+
+用法:
+    python scripts/benchmark_search_index.py --rows 1000000
+    python scripts/benchmark_search_index.py --rows 200000 --repeat 3
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, delete, func, insert, select, update
+
+from app.services.search_index import SearchIndex
+
+PAGE_SIZE = 20
+BATCH_SIZE = 50000
+
+MATERIALS = ["不锈钢板", "铝合金型材", "紫铜管", "镀锌钢管", "尼龙齿轮", "深沟球轴承", "六角螺栓", "平垫圈",
+             "硅胶密封圈", "PP塑料粒子", "ABS外壳", "电源线", "控制板", "步进电机", "包装纸箱", "防锈油"]
+UNITS = ["mm", "cm", "kg", "g", "m"]
+
+metadata = MetaData()
+materials = Table(
+    "benchmark_materials", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("material_code", String(50), index=True),
+    Column("material_name", String(100)),
+    Column("specification", String(200)),
+    Column("primary_supplier", String(100)),
+)
+search_index = SearchIndex("benchmark_materials_search", materials,
+                           ["material_code", "material_name", "specification", "primary_supplier"])
+
+
+def generate_rows(rows: int, seed: int):
+    """按批生成合成物料"""
+    rng = random.Random(seed)
+    batch = []
+    for i in range(1, rows + 1):
+        batch.append({
+            "id": i,
+            "material_code": f"M{i:08d}",
+            "material_name": f"{rng.choice(MATERIALS)}{rng.choice('ABCDEFGH')}{rng.randrange(100)}型",
+            "specification": f"{rng.randrange(10, 500)}x{rng.randrange(10, 500)}{rng.choice(UNITS)}",
+            "primary_supplier": f"供应商{rng.randrange(2000):04d}",
+        })
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prepare_data(engine, rows: int, seed: int) -> float:
+    """建表、写入合成物料并创建搜索索引，返回建索引耗时（秒）"""
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        for batch in generate_rows(rows, seed):
+            conn.execute(insert(materials), batch)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if not search_index.ensure(conn):
+            raise RuntimeError("当前 SQLite 不支持 FTS5 trigram 分词（需要 3.34+）")
+    return time.perf_counter() - started
+
+
+def list_request(conn, condition):
+    """一次列表请求：总数 + 第一页"""
+    base = select(materials).where(condition)
+    total = conn.execute(select(func.count()).select_from(base.subquery())).scalar()
+    page = conn.execute(base.order_by(materials.c.id.desc()).limit(PAGE_SIZE)).all()
+    return total, [row.id for row in page]
+
+
+def measure(conn, condition, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = list_request(conn, condition)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def check_sync(engine) -> None:
+    """增删改后索引与表保持一致"""
+    with engine.begin() as conn:
+        new_id = conn.execute(select(func.max(materials.c.id))).scalar() + 1
+        conn.execute(insert(materials), [{
+            "id": new_id, "material_code": "SYNC0001", "material_name": "同步校验物料",
+            "specification": "1x1mm", "primary_supplier": "校验供应商"
+        }])
+        assert list_request(conn, search_index.filter("同步校验物料"))[0] == 1, "新增后应可搜索"
+
+        conn.execute(update(materials).where(materials.c.id == new_id).values(material_name="改名校验物料"))
+        assert list_request(conn, search_index.filter("同步校验物料"))[0] == 0, "更新后旧名称不应命中"
+        assert list_request(conn, search_index.filter("改名校验物料"))[0] == 1, "更新后新名称应命中"
+
+        conn.execute(delete(materials).where(materials.c.id == new_id))
+        assert list_request(conn, search_index.filter("改名校验物料"))[0] == 0, "删除后不应命中"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词搜索索引性能对比")
+    parser.add_argument("--rows", type=int, default=1000000, help="合成物料数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个关键词的重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(temp_dir.name, 'benchmark.db')}")
+
+    started = time.perf_counter()
+    build_seconds = prepare_data(engine, args.rows, args.seed)
+    print(f"物料数: {args.rows}，写入数据 {time.perf_counter() - started - build_seconds:.1f}s，"
+          f"建立搜索索引 {build_seconds:.1f}s")
+
+    keywords = [
+        f"M{args.rows // 2:08d}",   # 精确编码
+        "供应商0421",                # 供应商
+        "深沟球轴承",                # 常见名称
+        "123x45",                   # 规格片段
+        "不存在的物料",              # 无结果
+        "铜",                       # 短关键词（不足3个字符，退化为 LIKE）
+    ]
+
+    header = f"{'关键词':<14} {'结果数':>8} {'LIKE(ms)':>10} {'索引(ms)':>10} {'加速比':>8}"
+    print(header)
+    print("-" * len(header))
+    with engine.connect() as conn:
+        for keyword in keywords:
+            like_time, like_result = measure(conn, search_index.like(keyword), args.repeat)
+            index_time, index_result = measure(conn, search_index.filter(keyword), args.repeat)
+            assert like_result == index_result, f"{keyword}: 索引结果与 LIKE 不一致"
+            print(f"{keyword:<14} {like_result[0]:>8} {like_time * 1000:>10.1f} {index_time * 1000:>10.1f} "
+                  f"{like_time / index_time:>7.1f}x")
+
+    check_sync(engine)
+    print("增删改同步校验通过")
+
+    engine.dispose()
+    temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
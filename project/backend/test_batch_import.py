@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量导入测试
+
+验证 app.services.batch_import 与 BD400 订单导入：
+1. 按列转换数值、日期与默认值，错误行记录行号后跳过；已存在与文件内重复的唯一键跳过；跨块提交
+2. 写入失败回滚的块中的唯一键不计为已导入，后续块中的同一键仍可导入
+3. BD400 订单导入（已读取的表格）按列校验并批量写入，字段取值与逐行导入一致
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from sqlalchemy import Column, DateTime, Float, Integer, String, create_engine, event
+from sqlalchemy.orm import Session, declarative_base
+
+from app.models.order import Order, OrderPriority, OrderStatus
+from app.services.batch_import import BatchImporter, ImportSpec
+from app.utils.bd400_importer import BD400OrderImporter
+
+Base = declarative_base()
+
+
+class Part(Base):
+    """测试用的物料表"""
+    __tablename__ = "test_parts"
+    id = Column(Integer, primary_key=True)
+    code = Column(String(20), unique=True)
+    name = Column(String(50))
+    price = Column(Float)
+    stock = Column(Integer)
+    arrived_at = Column(DateTime)
+    unit = Column(String(10))
+
+
+class StrictPart(Base):
+    """名称必填的测试物料表，用于构造写入失败的块"""
+    __tablename__ = "test_strict_parts"
+    id = Column(Integer, primary_key=True)
+    code = Column(String(20), unique=True)
+    name = Column(String(50), nullable=False)
+
+
+PART_SPEC = ImportSpec(
+    model=Part,
+    columns={'编码': 'code', '名称': 'name', '单价': 'price', '库存': 'stock', '到货日期': 'arrived_at', '单位': 'unit'},
+    defaults={'stock': 0, 'unit': '个'},
+    floats=['price'],
+    integers=['stock'],
+    dates=['arrived_at'],
+    unique='code'
+)
+
+
+def test_batch_importer():
+    """测试通用批量导入"""
+    print("\n=== 测试批量导入引擎 ===")
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    inserts = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statement.startswith("INSERT") and inserts.append(statement))
+    session = Session(engine)
+    session.add(Part(code="P0000", name="已有"))
+    session.commit()
+    inserts.clear()
+
+    rows = [{'编码': f"P{i:04d}", '名称': f"物料{i}", '单价': i / 2, '库存': i, '到货日期': '2025-06-01', '单位': '箱'}
+            for i in range(1, 101)]
+    rows[9].update({'单价': 'abc'})
+    rows[19].update({'到货日期': '2025/13/45'})
+    rows[29].update({'库存': None, '单位': None})
+    rows.append({'编码': "P0000", '名称': "重复"})
+    rows.append({'编码': "P0050", '名称': "文件内重复"})
+
+    progress = []
+    result = BatchImporter(session, PART_SPEC, chunk_size=40, first_row=2,
+                           on_progress=lambda result, total: progress.append((result.total_count, total))).run(rows)
+    assert (result.total_count, result.success_count, result.error_count, result.skipped_count) == (102, 98, 2, 2), \
+        result.to_dict()
+    assert result.errors == ["第11行数据处理失败: 单价不是有效的数字: abc",
+                             "第21行数据处理失败: 到货日期不是有效的日期: 2025/13/45"]
+    assert result.warnings == ["第102行: P0000 已存在，跳过", "第103行: P0050 已存在，跳过"]
+    # 缺失值不同的行会分成不同的 executemany，但不应逐行写入
+    assert len(inserts) < 10 and progress[-1] == (102, 102), "应按块批量写入"
+
+    part = session.query(Part).filter(Part.code == "P0030").one()
+    assert (part.stock, part.unit) == (0, '个'), "缺失值应使用默认值"
+    part = session.query(Part).filter(Part.code == "P0007").one()
+    assert (part.price, part.stock, part.arrived_at) == (3.5, 7, datetime(2025, 6, 1))
+    assert session.query(Part).count() == 99
+    print(f"✅ 102行: 成功{result.success_count}, 错误{result.error_count}, 跳过{result.skipped_count}, "
+          f"{len(inserts)} 次批量写入")
+    session.close()
+
+
+def test_rolled_back_chunk():
+    """测试回滚块中的唯一键可在后续块中导入"""
+    print("\n=== 测试写入失败的块 ===")
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    spec = ImportSpec(model=StrictPart, columns={'编码': 'code', '名称': 'name'}, unique='code')
+
+    rows = [
+        {'编码': "S0001", '名称': "物料1"}, {'编码': "S0002", '名称': None},  # 第一块违反非空约束整体回滚
+        {'编码': "S0001", '名称': "物料1"}, {'编码': "S0003", '名称': "物料3"},
+        {'编码': "S0003", '名称': "重复"},
+    ]
+    result = BatchImporter(session, spec, chunk_size=2, first_row=2).run(rows)
+    assert (result.success_count, result.error_count, result.skipped_count) == (2, 2, 1), result.to_dict()
+    assert result.errors[0].startswith("第2-3行写入失败"), result.errors
+    assert result.warnings == ["第6行: S0003 已存在，跳过"], result.warnings
+    assert sorted(code for code, in session.query(StrictPart.code)) == ["S0001", "S0003"]
+    print("✅ 回滚块中的 S0001 在后续块中导入成功，已提交的 S0003 重复时跳过")
+    session.close()
+
+
+def test_bd400_import():
+    """测试BD400订单导入"""
+    print("\n=== 测试BD400订单导入 ===")
+    engine = create_engine("sqlite://")
+    Order.__table__.create(engine)
+    session = Session(engine)
+    session.add(Order(order_no="BD0001", customer_name="旧客户", product_name="旧产品", quantity=1, unit="件",
+                      order_date=datetime(2025, 1, 1), delivery_date=datetime(2025, 2, 1)))
+    session.commit()
+
+    invalid = pd.DataFrame([
+        {'订单号': 'BD1000', '客户名称': '客户A', '产品名称': '产品', '数量': 0, '交货日期': '2025-07-01'},
+        {'订单号': None, '客户名称': None, '产品名称': '产品', '数量': 5, '交货日期': None},
+    ])
+    result = BD400OrderImporter(session).import_dataframe(invalid)
+    assert not result['success'] and result['errors'] == [
+        "第2行: 数量必须大于0", "第3行: 订单号不能为空", "第3行: 客户名称不能为空", "第3行: 交货日期不能为空"
+    ], result['errors']
+    print("✅ 校验错误按行号汇总")
+
+    rows = [{'订单号': f" BD{i:04d} ", '客户名称': f"客户{i % 7}", '产品名称': '产品X', '数量': i,
+             '单位': None if i % 2 else '套', '单价': 2.5, '下单日期': None if i % 3 else '2025-05-01',
+             '交货日期': '2025-07-01 15:30', '优先级': ['高', 'URGENT', None, '未知'][i % 4],
+             '备注': None if i % 5 else f"备注{i}"} for i in range(1, 301)]
+    rows.append(dict(rows[10]))
+    result = BD400OrderImporter(session).import_dataframe(pd.DataFrame(rows))
+    assert result['success'] and (result['imported_count'], result['skipped_count']) == (299, 2), result
+    assert result['warnings'] == ["第2行: 订单号 BD0001 已存在，跳过", "第302行: 订单号 BD0011 已存在，跳过"]
+
+    order = session.query(Order).filter(Order.order_no == "BD0006").one()
+    assert (order.customer_name, order.quantity, order.unit, order.unit_price) == ("客户6", 6, "套", 2.5)
+    assert order.order_date == datetime(2025, 5, 1) and order.delivery_date == datetime(2025, 7, 1)
+    assert (order.status, order.priority, order.remark) == (OrderStatus.PENDING, OrderPriority.MEDIUM, None)
+    order = session.query(Order).filter(Order.order_no == "BD0005").one()
+    assert (order.unit, order.priority, order.remark) == ("件", OrderPriority.URGENT, "备注5")
+    assert order.order_date == datetime.combine(datetime.now().date(), datetime.min.time())
+    priorities = [session.query(Order).filter(Order.order_no == f"BD{i:04d}").one().priority for i in (4, 7)]
+    assert priorities == [OrderPriority.HIGH, OrderPriority.MEDIUM], "未知优先级应为中"
+    print(f"✅ 导入{result['imported_count']}条, 跳过{result['skipped_count']}条, 字段取值正确")
+    session.close()
+
+
+def main():
+    """主测试函数"""
+    print("开始批量导入测试...")
+    tests = [test_batch_importer, test_rolled_back_chunk, test_bd400_import]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
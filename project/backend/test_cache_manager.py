@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存管理器测试
+
+验证两级缓存的进程内部分：
+1. LocalCache 按字节预算淘汰，优先清理过期条目
+2. Redis 不可用时 CacheManager 退化为仅 L1，读写与计数照常工作
+3. get_stats 按键前缀统计命中/未命中
+4. get_or_set 合并并发未命中，过期后在旧值窗口内返回旧值并只触发一次后台刷新
+5. 按标签失效只删除登记在标签下的键
+6. L1 命中与 L2 命中（其他进程）取到的值一致，非 JSON 原生类型同样经过序列化，写入后修改原对象不影响缓存
+"""
+
+import sys
+import os
+import time
+import asyncio
+from datetime import datetime
+
+import fakeredis
+import fakeredis.aioredis
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core import cache as cache_module
+from app.core.cache import CacheManager, LocalCache, entity_tags
+
+
+def test_local_cache_eviction():
+    """测试字节预算与TTL感知的LRU淘汰"""
+    print("\n=== 测试一级缓存淘汰 ===")
+    local = LocalCache(max_bytes=100, max_ttl=60)
+    for i in range(10):
+        local.set(f"k{i}", i, size=10)
+    local.get("k0")  # k0 变为最近使用
+    local.set("k10", 10, size=10)
+
+    assert local.size_bytes == 100
+    assert local.get("k0") == (True, 0), "最近使用的条目不应被淘汰"
+    assert local.get("k1") == (False, None), "最久未使用的条目应被淘汰"
+
+    local.set("short", "v", size=10, ttl=0.01)
+    time.sleep(0.02)
+    local.set("k11", 11, size=10)
+    assert local.expirations >= 1, "容量不足时应先清理过期条目"
+    assert local.get("k3") == (True, 3), "清理过期条目后不应再淘汰有效条目"
+    assert not local.set("huge", "v", size=1000), "超过容量的条目不应写入"
+    print("✅ 一级缓存淘汰正确")
+
+
+def test_l1_only_fallback():
+    """测试Redis不可用时仅使用一级缓存"""
+    print("\n=== 测试Redis不可用时的降级 ===")
+
+    async def unavailable_redis():
+        raise ConnectionError("redis unavailable")
+
+    original_get_redis = cache_module.get_redis
+    cache_module.get_redis = unavailable_redis
+    try:
+        async def run():
+            manager = CacheManager(l1_max_bytes=1024, l1_ttl=60)
+            assert await manager.set("pmc:order:1", {"status": "已确认"}, ttl=30)
+            assert await manager.get("pmc:order:1") == {"status": "已确认"}
+            assert await manager.get("pmc:order:2") is None
+            assert await manager.increment("pmc:counter:orders") == 1
+            assert await manager.increment("pmc:counter:orders", 2) == 3
+            assert await manager.delete("pmc:order:1") == 1
+            assert await manager.get("pmc:order:1", default="missing") == "missing"
+
+            stats = await manager.get_stats()
+            assert stats["redis_available"] is False
+            order_stats = stats["prefixes"]["pmc:order"]
+            assert order_stats["l1_hits"] == 1 and order_stats["misses"] == 2
+            return stats
+
+        stats = asyncio.run(run())
+    finally:
+        cache_module.get_redis = original_get_redis
+    print(f"✅ 降级为一级缓存: {stats['prefixes']}")
+
+
+def test_get_or_set_single_flight():
+    """测试并发未命中合并与过期旧值的后台刷新"""
+    print("\n=== 测试并发合并与后台刷新 ===")
+
+    async def unavailable_redis():
+        raise ConnectionError("redis unavailable")
+
+    original_get_redis = cache_module.get_redis
+    cache_module.get_redis = unavailable_redis
+    try:
+        async def run():
+            manager = CacheManager(l1_max_bytes=1024, l1_ttl=60)
+            calls = 0
+
+            async def expensive_query():
+                nonlocal calls
+                calls += 1
+                await asyncio.sleep(0.05)
+                return {"version": calls}
+
+            results = await asyncio.gather(*(
+                manager.get_or_set("pmc:api:dashboard", expensive_query, ttl=1, stale_ttl=10)
+                for _ in range(50)
+            ))
+            assert calls == 1, f"并发未命中应只计算一次，实际 {calls} 次"
+            assert all(result == {"version": 1} for result in results)
+
+            await asyncio.sleep(1.05)
+            started = time.perf_counter()
+            stale_results = await asyncio.gather(*(
+                manager.get_or_set("pmc:api:dashboard", expensive_query, ttl=1, stale_ttl=10)
+                for _ in range(20)
+            ))
+            assert time.perf_counter() - started < 0.05, "旧值窗口内不应等待重新计算"
+            assert all(result == {"version": 1} for result in stale_results)
+
+            await asyncio.sleep(0.1)
+            assert calls == 2, f"过期后应只有一个后台刷新，实际计算 {calls} 次"
+            assert await manager.get_or_set("pmc:api:dashboard", expensive_query, ttl=1) == {"version": 2}
+
+        asyncio.run(run())
+    finally:
+        cache_module.get_redis = original_get_redis
+    print("✅ 并发合并与后台刷新正确")
+
+
+def test_tag_invalidation():
+    """测试按标签精确失效"""
+    print("\n=== 测试按标签失效 ===")
+
+    async def unavailable_redis():
+        raise ConnectionError("redis unavailable")
+
+    original_get_redis = cache_module.get_redis
+    cache_module.get_redis = unavailable_redis
+    try:
+        async def run():
+            manager = CacheManager(l1_max_bytes=4096, l1_ttl=60)
+            # 单项缓存只登记 order:{id}，列表/统计缓存登记 order:*
+            await manager.set("pmc:order:1", {"id": 1}, tags=["order:1"])
+            await manager.set("pmc:order:2", {"id": 2}, tags=["order:2"])
+            await manager.set("pmc:api:order_stats", {"total": 2}, tags=["order:*"])
+            await manager.set("pmc:material:1", {"id": 1}, tags=["material:1"])
+
+            invalidated = await manager.invalidate_tags(*entity_tags("order", 1))
+            assert invalidated == 2, f"应失效订单1及订单统计缓存，实际 {invalidated} 个"
+            assert await manager.get("pmc:order:1") is None
+            assert await manager.get("pmc:api:order_stats") is None
+            assert await manager.get("pmc:order:2") == {"id": 2}, "其他订单的缓存不应失效"
+            assert await manager.get("pmc:material:1") == {"id": 1}, "其他实体的缓存不应失效"
+            assert await manager.invalidate_tags("order:3") == 0
+
+        asyncio.run(run())
+    finally:
+        cache_module.get_redis = original_get_redis
+    print("✅ 按标签失效正确")
+
+
+def test_l1_matches_l2():
+    """测试一级缓存与Redis命中的值一致"""
+    print("\n=== 测试L1与L2命中一致 ===")
+
+    async def run():
+        server = fakeredis.FakeServer()
+        writer = CacheManager(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), 4096, 60)
+        reader = CacheManager(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), 4096, 60)
+        try:
+            value = {"t": datetime(2025, 6, 1, 8, 30), "items": [1]}
+            assert await writer.set("pmc:order:1", value, ttl=30)
+            value["items"].append(2)
+
+            l1_hit = await writer.get("pmc:order:1")
+            l2_hit = await reader.get("pmc:order:1")
+            assert l1_hit is not value, "L1 不应保存调用方的原对象"
+            assert l1_hit == l2_hit == {"t": "2025-06-01 08:30:00", "items": [1]}, (l1_hit, l2_hit)
+
+            assert await writer.mset({"pmc:order:2": {"t": datetime(2025, 6, 2)}}, ttl=30)
+            assert await writer.get("pmc:order:2") == await reader.get("pmc:order:2") == {"t": "2025-06-02 00:00:00"}
+
+            async def factory():
+                return {"t": datetime(2025, 6, 3)}
+
+            computed = await writer.get_or_set("pmc:api:report", factory, ttl=30)
+            assert computed == await writer.get_or_set("pmc:api:report", factory, ttl=30) \
+                == await reader.get_or_set("pmc:api:report", factory, ttl=30) == {"t": "2025-06-03 00:00:00"}, \
+                "首次计算、L1 命中、L2 命中应返回相同的值"
+            assert (await writer.get_stats())["prefixes"]["pmc:order"]["l1_hits"] == 2
+            assert (await reader.get_stats())["prefixes"]["pmc:order"]["l2_hits"] == 2
+        finally:
+            await writer.close()
+            await reader.close()
+
+    asyncio.run(run())
+    print("✅ L1 与 L2 命中的值一致（datetime 均为字符串），写入后修改原对象不影响缓存")
+
+
+def main():
+    """主测试函数"""
+    print("开始缓存管理器测试...")
+    tests = [
+        test_local_cache_eviction,
+        test_l1_only_fallback,
+        test_get_or_set_single_flight,
+        test_tag_invalidation,
+        test_l1_matches_l2
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟队列测试
+
+验证 app.utils.delay_queue.DelayQueue：
+1. 只返回已到期的项，已到期的项按优先级出队；等待中的消费者在最近到期时间或有更早的项加入时被唤醒
+2. 大量远期重试项不会挡住就绪项，多个工作线程不空转
+"""
+
+import sys
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from queue import Empty
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.delay_queue import DelayQueue
+
+
+def test_due_order():
+    """测试到期与优先级顺序"""
+    print("\n=== 测试出队顺序 ===")
+    queue = DelayQueue()
+    now = datetime.now()
+    queue.put("later", due=now + timedelta(seconds=0.3), priority=3)
+    queue.put("low", due=now - timedelta(seconds=2), priority=0)
+    queue.put("urgent", due=now - timedelta(seconds=1), priority=3)
+    queue.put("normal-1", priority=1)
+    queue.put("normal-2", priority=1)
+
+    taken = [queue.get(timeout=0.1) for _ in range(4)]
+    assert taken == ["urgent", "normal-1", "normal-2", "low"], taken
+    assert queue.qsize() == 1 and queue.delayed_count() == 1
+    try:
+        queue.get(timeout=0.05)
+    except Empty:
+        print("✅ 未到期的项不会被取出")
+    else:
+        raise AssertionError("未到期的项不应被取出")
+
+    started = time.monotonic()
+    assert queue.get(timeout=2) == "later"
+    elapsed = time.monotonic() - started
+    assert 0.1 < elapsed < 0.5, f"应在到期时被唤醒，实际等待 {elapsed:.2f}s"
+    print(f"✅ 已到期的项按优先级出队，等待 {elapsed:.2f}s 后取到到期项")
+
+    # 消费者在等待远期项时，加入更早到期的项应立即重新计算等待时间
+    queue.put("far", due=datetime.now() + timedelta(minutes=15))
+    result = {}
+
+    def consume():
+        started = time.monotonic()
+        result["item"] = queue.get(timeout=5)
+        result["elapsed"] = time.monotonic() - started
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    time.sleep(0.1)
+    queue.put("soon", due=datetime.now() + timedelta(seconds=0.2))
+    consumer.join()
+    assert result["item"] == "soon" and result["elapsed"] < 0.6, result
+    print(f"✅ 加入更早到期的项后唤醒等待的消费者（{result['elapsed']:.2f}s）")
+
+
+def test_retries_do_not_block():
+    """测试远期重试项不挡住就绪项"""
+    print("\n=== 测试远期重试项 ===")
+    queue = DelayQueue()
+    retry_at = datetime.now() + timedelta(minutes=15)
+    for i in range(1000):
+        queue.put(f"retry-{i}", due=retry_at, priority=3)
+
+    processed = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            try:
+                item = queue.get(timeout=0.2)
+            except Empty:
+                continue
+            with lock:
+                processed.append(item)
+
+    workers = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in workers:
+        thread.start()
+
+    cpu_started = time.process_time()
+    started = time.monotonic()
+    for i in range(100):
+        queue.put(f"ready-{i}", priority=1)
+    while len(processed) < 100 and time.monotonic() - started < 2:
+        time.sleep(0.01)
+    elapsed = time.monotonic() - started
+    time.sleep(0.5)
+    cpu = time.process_time() - cpu_started
+    stop.set()
+    queue.wake_all()
+    for thread in workers:
+        thread.join()
+
+    assert sorted(processed) == sorted(f"ready-{i}" for i in range(100)), "工作线程只应取到就绪项"
+    assert queue.delayed_count() == 1000
+    assert cpu < 0.3, f"工作线程空转，CPU {cpu:.2f}s"
+    print(f"✅ 1000 个15分钟后重试的项不影响 100 个就绪项（{elapsed * 1000:.0f}ms 处理完，CPU {cpu:.2f}s）")
+
+
+def main():
+    """主测试函数"""
+    print("开始延迟队列测试...")
+    tests = [test_due_order, test_retries_do_not_block]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
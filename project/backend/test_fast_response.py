@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表快速响应路径测试
+
+验证 app.utils.fast_response：
+1. 投影查询只选择响应列，编码结果与 Pydantic 模型的 JSON 序列化一致（Decimal、日期时间、枚举、NULL）
+2. 游标分页的排序字段不在响应列中时追加查询但不进入响应；请求标志识别查询参数与 Accept 头
+3. 订单、物料接口的投影只引用真实列，字段名与详情模型一致，可在数据库上执行
+"""
+
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pydantic import BaseModel
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from app.api.endpoints.materials import MATERIAL_PROJECTION
+from app.api.endpoints.orders import ORDER_PROJECTION
+from app.models.material import Material, MaterialCategory
+from app.models.order import Order, OrderPriority, OrderStatus
+from app.schemas.common import PageInfo, PagedResponseModel, QueryParams
+from app.schemas.material import MaterialDetail
+from app.schemas.order import OrderDetail
+from app.utils.fast_response import FAST_JSON_MEDIA_TYPE, Projection, paged_response, wants_fast_response
+from app.utils.pagination import KeysetPagination
+
+
+class OrderRow(BaseModel):
+    """测试用的订单响应模型"""
+    id: int
+    order_no: str
+    customer_name: str
+    quantity: int
+    total_amount: Optional[float]
+    delivery_date: datetime
+    status: OrderStatus
+    priority: OrderPriority
+    is_urgent: bool
+    deposit: Optional[Decimal]
+
+
+PROJECTION = Projection(
+    Order,
+    ["id", "order_no", "customer_name", "quantity", "total_amount", "delivery_date", "status", "priority"],
+    computed={
+        "is_urgent": lambda item: item["priority"] == OrderPriority.URGENT,
+        "deposit": lambda item: None if item["total_amount"] is None else Decimal(str(item["total_amount"])) * Decimal("0.3")
+    }
+)
+
+
+def build_session():
+    """内存SQLite中的合成订单，返回会话及执行过的SQL列表"""
+    engine = create_engine("sqlite://")
+    Order.__table__.create(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    session = Session(engine)
+    now = datetime(2025, 6, 1, 8, 0, 0, 123000)
+    for i in range(30):
+        session.add(Order(
+            order_no=f"SO{i:05d}", customer_name=f"客户{i % 3}", product_name="测试产品",
+            quantity=10 + i, unit="个",
+            total_amount=None if i % 4 == 0 else i / 4,
+            order_date=now, delivery_date=now + timedelta(days=i % 5),
+            status=list(OrderStatus)[i % len(OrderStatus)],
+            priority=OrderPriority.URGENT if i % 3 == 0 else OrderPriority.MEDIUM
+        ))
+    session.commit()
+    return session, statements
+
+
+def test_same_json_as_model():
+    """测试快速路径编码与模型序列化一致"""
+    print("\n=== 测试编码一致性 ===")
+    session, statements = build_session()
+    statement = select(Order).where(Order.customer_name != "客户2").order_by(Order.id.desc()).limit(10)
+
+    statements.clear()
+    items = PROJECTION.rows(session.execute(PROJECTION.select(statement)).all())
+    assert "product_name" not in statements[0] and "WHERE" in statements[0], "应只查询投影列并保留条件"
+
+    page_info = PageInfo(page=1, page_size=10, total=20, total_pages=2, has_next=True)
+    fast = json.loads(paged_response("获取订单列表成功", items, page_info).body)
+    expected = json.loads(PagedResponseModel[OrderRow](
+        message="获取订单列表成功", data=[OrderRow(**item) for item in items], page_info=page_info
+    ).model_dump_json())
+    assert fast["data"] == expected["data"], "数据编码应与模型一致"
+    assert fast["page_info"] == expected["page_info"]
+    assert len(fast["timestamp"]) == len("2025-06-01 08:00:00")
+    print(f"✅ {len(items)} 行编码与模型序列化一致")
+
+
+def test_keyset_and_flag():
+    """测试游标分页附加列与请求标志"""
+    print("\n=== 测试游标分页与请求标志 ===")
+    session, _ = build_session()
+    keyset = KeysetPagination(Order, "order_date", "desc", page_size=7)
+    cursor, seen = "", []
+    while cursor is not None:
+        statement = keyset.apply(select(Order), cursor)
+        rows = session.execute(PROJECTION.select(statement, keyset.sort_field)).all()
+        page, cursor = keyset.page(rows)
+        items = PROJECTION.rows(page)
+        assert all("order_date" not in item for item in items), "附加的排序列不应进入响应"
+        seen.extend(item["id"] for item in items)
+    assert sorted(seen) == list(range(1, 31)) and len(seen) == 30
+    print("✅ 游标分页遍历不重不漏")
+
+    def request(accept):
+        return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+    assert wants_fast_response(request(FAST_JSON_MEDIA_TYPE), QueryParams())
+    assert wants_fast_response(request("application/json"), QueryParams(fast=True))
+    assert not wants_fast_response(request("application/json"), QueryParams())
+    print("✅ 查询参数与 Accept 头均可启用快速路径")
+
+
+def test_endpoint_projections():
+    """测试订单、物料接口的投影查询"""
+    print("\n=== 测试接口投影 ===")
+    session, _ = build_session()
+    Material.__table__.create(session.get_bind())
+    session.add(Material(
+        material_code="M001", material_name="钢板", unit="张", category=MaterialCategory.RAW_MATERIAL,
+        current_stock=5, safety_stock=10, primary_supplier="华东钢材"
+    ))
+    session.commit()
+
+    orders = ORDER_PROJECTION.rows(session.execute(ORDER_PROJECTION.select(select(Order).order_by(Order.id))).all())
+    assert len(orders) == 30 and orders[0]["order_number"] == "SO00000", orders[0]
+    assert set(ORDER_PROJECTION.fields) <= set(OrderDetail.model_fields), "投影字段应为 OrderDetail 字段"
+
+    materials = MATERIAL_PROJECTION.rows(session.execute(MATERIAL_PROJECTION.select(select(Material))).all())
+    assert materials[0]["supplier"] == "华东钢材" and materials[0]["stock_status"] == "库存不足", materials[0]
+    assert set(MATERIAL_PROJECTION.fields) | set(MATERIAL_PROJECTION.computed) <= set(MaterialDetail.model_fields), \
+        "投影字段应为 MaterialDetail 字段"
+    print(f"✅ 订单投影 {len(ORDER_PROJECTION.fields)} 列、物料投影 {len(MATERIAL_PROJECTION.fields)} 列均可执行")
+
+
+def main():
+    """主测试函数"""
+    print("开始列表快速响应路径测试...")
+    tests = [test_same_json_as_model, test_keyset_and_flag, test_endpoint_projections]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
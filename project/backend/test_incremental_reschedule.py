@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量重排测试
+
+验证 ProductionSchedulingService.reschedule_plan 的增量模式：
+1. 受影响的时间窗为计划原时间段和排程器分配的新时间段，与新时间段重叠的计划一并重排，两段之间的计划不受影响
+2. 优化策略下计划被已占用的生产线推后时，按推后后的时间段查找受影响的计划
+"""
+
+import sys
+import os
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.production_plan import PlanPriority, PlanStatus
+from app.services.production_scheduling_service import (
+    CONFLICT_STATUSES, ProductionSchedulingService, SchedulingResult, SchedulingStrategy
+)
+from app.utils.resource_timeline import ResourceTimeline
+
+ORIGIN = date(2025, 3, 1)
+
+
+def day(offset):
+    return ORIGIN + timedelta(days=offset)
+
+
+def make_plan(plan_id, start, end, status=PlanStatus.DRAFT):
+    return SimpleNamespace(
+        id=plan_id, plan_number=f"PP{plan_id:04d}", workshop="一车间", production_line="1号线",
+        responsible_person="张三", priority=PlanPriority.MEDIUM, order_id=None, order=None, status=status,
+        planned_start_date=start, planned_end_date=end
+    )
+
+
+class StubQuery:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.plan
+
+
+class StubDB:
+    """只支持按ID查询被重排计划，flush/commit/rollback 为空操作"""
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def query(self, *entities):
+        return StubQuery(self.plan)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class RecordingService(ProductionSchedulingService):
+    """以内存中的计划列表代替数据库查询，记录查找受影响计划时使用的时间窗"""
+
+    def __init__(self, plan, others):
+        super().__init__(db=StubDB(plan), optimizer_time_budget=0.1)
+        self.plans = [plan] + others
+        self.windows = []
+
+    def _build_resource_timeline(self):
+        timeline = ResourceTimeline()
+        for plan in self.plans:
+            if plan.status in CONFLICT_STATUSES:
+                timeline.place(plan.id, plan.workshop, plan.production_line,
+                               plan.planned_start_date, plan.planned_end_date, plan.plan_number)
+        return timeline
+
+    def _find_affected_plans(self, plan, windows):
+        self.windows.append(windows)
+        return [
+            other for other in self.plans
+            if other.id != plan.id and other.status in (PlanStatus.DRAFT, PlanStatus.CONFIRMED)
+            and any(other.planned_start_date <= end and other.planned_end_date >= start for start, end in windows)
+        ]
+
+    def auto_schedule_plans(self, plan_ids=None, strategy=None, start_date=None, **kwargs):
+        self.rescheduled = plan_ids
+        return [
+            SchedulingResult(plan_id, start_date, start_date, {}, timedelta(), [], 1.0)
+            for plan_id in plan_ids
+        ]
+
+
+def test_window_covers_new_slot():
+    """测试时间窗覆盖排程器分配的新时间段"""
+    print("\n=== 测试新时间段内的受影响计划 ===")
+    plan = make_plan(1, day(0), day(2))
+    others = [
+        make_plan(2, day(10), day(12)),  # 与新时间段重叠
+        make_plan(3, day(1), day(2)),    # 与原时间段重叠
+        make_plan(4, day(5), day(6)),    # 两者之间，不受影响
+        make_plan(5, day(13), day(13)),  # 新交期延长工期后与新时间段重叠
+    ]
+    service = RecordingService(plan, others)
+    start_date = datetime.combine(day(10), datetime.min.time())
+
+    service.reschedule_plan(1, start_date=start_date)
+    assert service.windows[-1] == [(day(0), day(2)), (day(10), day(12))], service.windows
+    assert sorted(service.rescheduled) == [1, 2, 3], service.rescheduled
+    print("✅ 计划从 3月1日 顺延到 3月11日后，与新时间段重叠的计划一并重排")
+
+    plan.planned_start_date, plan.planned_end_date = day(0), day(2)
+    service.reschedule_plan(1, new_due_date=day(3), start_date=start_date)
+    assert service.windows[-1] == [(day(0), day(2)), (day(10), day(13))], service.windows
+    assert sorted(service.rescheduled) == [1, 2, 3, 5], service.rescheduled
+    print("✅ 交期延后时按新工期计算新时间段")
+
+    service.reschedule_plan(1, incremental=False, start_date=start_date)
+    assert service.rescheduled == [1]
+
+
+def test_window_follows_optimizer():
+    """测试优化策略下按推后后的时间段查找受影响计划"""
+    print("\n=== 测试优化策略下的受影响计划 ===")
+    plan = make_plan(1, day(0), day(2))
+    others = [
+        # 生产线被进行中的计划占用到 3月6日，优化排程将计划推后到 3月7日
+        make_plan(900, day(0), day(5), PlanStatus.IN_PROGRESS),
+        make_plan(2, day(7), day(8)),
+        make_plan(3, day(12), day(14)),
+    ]
+    service = RecordingService(plan, others)
+    start_date = datetime.combine(day(0), datetime.min.time())
+
+    service.reschedule_plan(1, strategy=SchedulingStrategy.OPTIMIZED, start_date=start_date)
+    assert service.windows[-1] == [(day(0), day(2)), (day(6), day(8))], service.windows
+    assert sorted(service.rescheduled) == [1, 2], service.rescheduled
+    print("✅ 计划避开已占用时段后，按 3月7日-3月9日 的新时间段查找受影响计划")
+
+
+def main():
+    """主测试函数"""
+    print("开始增量重排测试...")
+    tests = [test_window_covers_new_slot, test_window_follows_optimizer]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游标分页测试
+
+验证 app.utils.pagination：
+1. 逐页跟随游标遍历，结果与按 (排序字段, id) 的完整排序一致，不重不漏（含重复值、NULL、枚举列），
+   且每页查询都不跳过行（OFFSET 为0）
+2. 无效游标、与排序条件不一致的游标被拒绝
+3. 总记录数按条件缓存，订单写入提交后失效
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from app.core import cache as cache_module
+from app.models.order import Order, OrderStatus, OrderPriority
+from app.services import stats_service  # noqa: F401  注册订单表的缓存失效事件
+from app.utils.pagination import CursorError, KeysetPagination, count_total
+
+
+def build_session():
+    """内存SQLite中的合成订单，返回会话及执行过的SQL列表"""
+    engine = create_engine("sqlite://")
+    Order.__table__.create(engine)
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    )
+
+    session = Session(engine)
+    statuses = list(OrderStatus)
+    now = datetime(2025, 6, 1, 8, 0)
+    for i in range(257):
+        session.add(Order(
+            order_no=f"SO{i:05d}",
+            customer_name=f"客户{i % 7}",
+            product_name="测试产品",
+            quantity=10,
+            unit="个",
+            total_amount=None if i % 9 == 0 else float(i % 13),
+            order_date=now,
+            delivery_date=now + timedelta(days=i % 11),
+            status=statuses[i % len(statuses)],
+            priority=OrderPriority.URGENT if i % 4 == 0 else OrderPriority.MEDIUM,
+            created_at=now
+        ))
+    session.commit()
+    return session, statements
+
+
+def expected_ids(session, sort_field, descending):
+    """Python 端按 (排序值, id) 排序，NULL 排在最后"""
+    orders = session.query(Order).all()
+    if sort_field is None:
+        return sorted((order.id for order in orders), reverse=descending)
+
+    def key(order):
+        value = getattr(order, sort_field)
+        return (value.name if hasattr(value, "name") else value, order.id)
+
+    present = sorted((order for order in orders if getattr(order, sort_field) is not None), key=key, reverse=descending)
+    missing = sorted((order for order in orders if getattr(order, sort_field) is None),
+                     key=lambda order: order.id, reverse=descending)
+    return [order.id for order in present + missing]
+
+
+def test_walk_all_pages():
+    """测试跟随游标遍历全部数据"""
+    print("\n=== 测试游标遍历 ===")
+    session, statements = build_session()
+    cases = [(None, "desc"), ("delivery_date", "desc"), ("delivery_date", "asc"),
+             ("total_amount", "desc"), ("total_amount", "asc"), ("status", "asc"), ("unknown", "desc")]
+    for sort_field, sort_order in cases:
+        keyset = KeysetPagination(Order, sort_field, sort_order, page_size=20)
+        cursor, seen, pages = "", [], 0
+        statements.clear()
+        while cursor is not None:
+            rows = keyset.apply(session.query(Order), cursor).all()
+            items, cursor = keyset.page(rows)
+            seen.extend(item.id for item in items)
+            pages += 1
+        # SQLite 的 LIMIT 总是带 OFFSET 参数，游标分页时其值应为0
+        assert all(parameters[-1] == 0 for statement, parameters in statements if "OFFSET" in statement), \
+            "游标分页不应跳过行"
+        field = sort_field if sort_field != "unknown" else None
+        assert seen == expected_ids(session, field, sort_order == "desc"), f"{sort_field} {sort_order} 顺序不一致"
+        assert len(set(seen)) == 257
+        print(f"✅ {sort_field or 'id'} {sort_order}: {pages} 页，不重不漏")
+
+    # 异步会话使用 select()
+    keyset = KeysetPagination(Order, "delivery_date", "desc", page_size=50)
+    first, cursor = keyset.page(session.scalars(keyset.apply(select(Order), "")).all())
+    second, _ = keyset.page(session.scalars(keyset.apply(select(Order), cursor)).all())
+    assert [o.id for o in first + second] == expected_ids(session, "delivery_date", True)[:100]
+
+
+def test_invalid_cursor():
+    """测试无效游标"""
+    print("\n=== 测试无效游标 ===")
+    session, _ = build_session()
+    keyset = KeysetPagination(Order, "delivery_date", "desc", page_size=10)
+    _, cursor = keyset.page(keyset.apply(session.query(Order), "").all())
+    for bad_cursor, other in [("not-a-cursor", keyset),
+                              (cursor, KeysetPagination(Order, "delivery_date", "asc")),
+                              (cursor, KeysetPagination(Order, "total_amount", "desc"))]:
+        try:
+            other.apply(session.query(Order), bad_cursor)
+        except CursorError:
+            continue
+        raise AssertionError(f"游标应被拒绝: {bad_cursor}")
+    print("✅ 无效或不一致的游标被拒绝")
+
+
+def test_cached_count():
+    """测试总记录数缓存与失效"""
+    print("\n=== 测试总数缓存 ===")
+    session, statements = build_session()
+
+    async def unavailable_redis():
+        raise ConnectionError("redis unavailable")
+
+    async def run():
+        await cache_module.cache_manager.invalidate_tags("order:*")
+        query = session.query(Order).filter(Order.priority == OrderPriority.URGENT)
+        assert await count_total(session, query, "order") == 65
+        statements.clear()
+        assert await count_total(session, query, "order") == 65
+        assert not statements, "缓存有效期内不应再统计"
+        assert await count_total(session, session.query(Order), "order") == 257, "不同条件应分别缓存"
+
+        order = session.query(Order).filter(Order.priority == OrderPriority.MEDIUM).first()
+        order.priority = OrderPriority.URGENT
+        session.commit()
+        await asyncio.sleep(0.01)  # 等待提交事件安排的失效任务
+        assert await count_total(session, query, "order") == 66
+
+    original_get_redis = cache_module.get_redis
+    cache_module.get_redis = unavailable_redis
+    try:
+        asyncio.run(run())
+    finally:
+        cache_module.get_redis = original_get_redis
+    print("✅ 总数缓存命中并在提交后失效")
+
+
+def main():
+    """主测试函数"""
+    print("开始游标分页测试...")
+    tests = [test_walk_all_pages, test_invalid_cursor, test_cached_count]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通知批量发送调度测试
+
+验证 app.services.notification_batcher.NotificationBatcher：
+1. 达到批量大小立即发送；不足一批时在最长等待时间后发送
+2. 发送线程池有界，占满时暂停取数，各渠道记录批量大小、等待时间和背压次数
+"""
+
+import sys
+import os
+import time
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.notification_batcher import NotificationBatcher
+from app.services.notification_queue_backends import MemoryQueueBackend, QueueItem
+
+CONFIGS = {
+    "email": {"size": 50, "interval": 0.3},
+    "sms": {"size": 10, "interval": 60}
+}
+
+
+def push(backend, batcher, channel, start, count):
+    for i in range(start, start + count):
+        backend.push_batch(channel, QueueItem(
+            id=f"{i}_{channel}", notification_id=i, priority="normal", channel=channel,
+            recipient=f"user{i}", content={}
+        ))
+        batcher.notify(channel)
+
+
+class Recorder:
+    """记录发送的批次，可模拟发送耗时"""
+
+    def __init__(self, backend, delay=0.0):
+        self.backend = backend
+        self.delay = delay
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, channel, items):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.batches.append((channel, len(items), time.monotonic()))
+        time.sleep(self.delay)
+        for item in items:
+            self.backend.complete(item)
+        with self.lock:
+            self.active -= 1
+        return True
+
+
+def wait_for(condition, timeout=3):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_size_or_latency():
+    """测试按大小或最长等待时间发送"""
+    print("\n=== 测试发送时机 ===")
+    backend = MemoryQueueBackend()
+    recorder = Recorder(backend)
+    batcher = NotificationBatcher(backend, CONFIGS, recorder, workers=2, check_interval=5)
+    batcher.start()
+    try:
+        started = time.monotonic()
+        push(backend, batcher, "sms", 0, 10)
+        assert wait_for(lambda: len(recorder.batches) == 1, timeout=1)
+        elapsed = recorder.batches[0][2] - started
+        assert recorder.batches[0][:2] == ("sms", 10) and elapsed < 0.2, (recorder.batches, elapsed)
+        print(f"✅ 达到批量大小 {elapsed * 1000:.0f}ms 内发送")
+
+        started = time.monotonic()
+        push(backend, batcher, "email", 0, 10)
+        assert wait_for(lambda: len(recorder.batches) == 2, timeout=2), "不足一批的邮件应在最长等待时间后发送"
+        elapsed = recorder.batches[1][2] - started
+        assert recorder.batches[1][:2] == ("email", 10) and 0.25 < elapsed < 0.6, (recorder.batches, elapsed)
+        assert backend.batch_size("email") == 0 and len(backend.completed_items) == 20
+        print(f"✅ 10 封邮件在 {elapsed:.2f}s 后发送（最长等待 0.3s）")
+
+        metrics = batcher.metrics()["channels"]
+        assert metrics["sms"]["flush_reasons"] == {"size": 1, "latency": 0}
+        assert metrics["email"]["flush_reasons"] == {"size": 0, "latency": 1}
+        assert 0.25 < metrics["email"]["max_wait_seconds"] < 0.6, metrics["email"]
+    finally:
+        batcher.stop()
+
+
+def test_bounded_pool():
+    """测试有界线程池与背压"""
+    print("\n=== 测试线程池背压 ===")
+    backend = MemoryQueueBackend()
+    recorder = Recorder(backend, delay=0.2)
+    batcher = NotificationBatcher(backend, CONFIGS, recorder, workers=2, check_interval=0.05)
+    batcher.start()
+    try:
+        push(backend, batcher, "sms", 0, 60)
+        assert wait_for(lambda: len(backend.completed_items) == 60, timeout=3)
+        time.sleep(0.05)
+        metrics = batcher.metrics()
+        sms = metrics["channels"]["sms"]
+        assert recorder.peak == 2, f"同时发送的批次数应不超过线程池大小，实际 {recorder.peak}"
+        assert (sms["batches"], sms["items"], sms["max_size"], sms["avg_size"]) == (6, 60, 10, 10.0), sms
+        assert sms["backpressure_count"] > 0 and metrics["active"] == 0
+        assert 0.15 < sms["avg_duration_seconds"] < 0.4, sms
+        print(f"✅ 6 批短信由 2 个线程发送，背压 {sms['backpressure_count']} 次，"
+              f"平均等待 {sms['avg_wait_seconds']:.2f}s")
+    finally:
+        batcher.stop()
+
+
+def main():
+    """主测试函数"""
+    print("开始通知批量发送调度测试...")
+    tests = [test_size_or_latency, test_bounded_pool]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
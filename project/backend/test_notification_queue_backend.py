@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通知队列后端测试
+
+验证 app.services.notification_queue_backends.RedisStreamQueueBackend（fakeredis，多个客户端共享同一服务端模拟多进程）：
+1. 多个消费者取到的项互不重复，高优先级先出，未到期的项不提前投递
+2. 取出后未确认的项在可见性超时后由其他消费者接管；后端重建后队列项仍在
+3. 失败项手动重试、批量项取出与超时放回、状态查询与清理
+"""
+
+import sys
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakeredis
+
+from app.services.notification_queue_backends import (
+    MemoryQueueBackend, QueueItem, QueueStatus, RedisStreamQueueBackend
+)
+
+
+def make_item(i, priority="normal", channel="sms", scheduled_at=None):
+    return QueueItem(
+        id=f"{i}_{channel}", notification_id=i, priority=priority, channel=channel,
+        recipient=f"1380000{i:04d}", content={"template_id": "order_reminder", "params": {"n": i}},
+        scheduled_at=scheduled_at
+    )
+
+
+def make_backend(server, **options):
+    """每个后端使用独立的客户端连接，相当于一个独立进程"""
+    return RedisStreamQueueBackend(fakeredis.FakeRedis(server=server), **options)
+
+
+def test_consumers():
+    """测试多消费者、优先级与延迟投递"""
+    print("\n=== 测试多消费者 ===")
+    server = fakeredis.FakeServer()
+    producer = make_backend(server)
+    for i in range(60):
+        producer.enqueue(make_item(i))
+
+    taken = {}
+    lock = threading.Lock()
+
+    def consume(name):
+        backend = make_backend(server)
+        while True:
+            item = backend.reserve(name, timeout=0.2)
+            if item is None:
+                return
+            assert item.status == QueueStatus.PROCESSING
+            backend.complete(item)
+            with lock:
+                taken.setdefault(item.id, []).append(name)
+
+    workers = [threading.Thread(target=consume, args=(f"worker-{i}",)) for i in range(3)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert len(taken) == 60 and all(len(names) == 1 for names in taken.values()), "每项只应被一个消费者取到"
+    stats = producer.stats(["sms"])
+    assert (stats["queue_size"], stats["processing_count"], stats["completed_count"]) == (0, 0, 60), stats
+    print(f"✅ 3 个消费者取到 60 项，无重复（{len(set(n for names in taken.values() for n in names))} 个消费者参与）")
+
+    backend = make_backend(server)
+    now = datetime.now()
+    backend.enqueue(make_item(100, "low", scheduled_at=now - timedelta(seconds=5)))
+    backend.enqueue(make_item(101, "urgent"))
+    backend.enqueue(make_item(102, "high", scheduled_at=now + timedelta(seconds=0.4)))
+    backend.enqueue(make_item(103, "normal"))
+    order = [backend.reserve("w", timeout=0.1).id for _ in range(3)]
+    assert order == ["101_sms", "103_sms", "100_sms"], order
+    assert backend.reserve("w", timeout=0.1) is None, "未到期的项不应提前投递"
+    assert backend.stats(["sms"])["delayed_count"] == 1
+    started = time.monotonic()
+    item = backend.reserve("w", timeout=2)
+    elapsed = time.monotonic() - started
+    assert item.id == "102_sms" and elapsed < 0.6, (item, elapsed)
+    print(f"✅ 按优先级出队，延迟项到期后 {elapsed:.2f}s 内取到")
+
+
+def test_visibility_timeout():
+    """测试可见性超时接管与重启"""
+    print("\n=== 测试可见性超时 ===")
+    server = fakeredis.FakeServer()
+    crashed = make_backend(server, visibility_timeout=0.3)
+    crashed.enqueue(make_item(1))
+    crashed.enqueue(make_item(2, scheduled_at=datetime.now() + timedelta(minutes=5)))
+    item = crashed.reserve("worker-0", timeout=0.1)
+    assert item.id == "1_sms"
+    # 持有该项的进程退出，没有确认
+
+    survivor = make_backend(server, visibility_timeout=0.3)
+    assert survivor.reserve("worker-0", timeout=0.1) is None, "可见性超时前不应被接管"
+    assert survivor.get_item("1_sms")[0] == "processing"
+    time.sleep(0.35)
+    item = survivor.reserve("worker-0", timeout=1)
+    assert item is not None and item.id == "1_sms", item
+    survivor.complete(item)
+    assert survivor.get_item("1_sms")[0] == "completed"
+    assert survivor.reserve("worker-1", timeout=1.2) is None, "已确认的项不应再次投递"
+    print("✅ 未确认的项在可见性超时后由其他进程接管，确认后不再投递")
+
+    restarted = make_backend(server)
+    stats = restarted.stats(["sms"])
+    assert (stats["delayed_count"], stats["completed_count"]) == (1, 1), stats
+    assert restarted.get_item("2_sms") is None and restarted.get_item("1_sms")[1].recipient == "13800000001"
+    print("✅ 重建后端后队列项仍在")
+
+
+def test_failed_and_batches():
+    """测试失败重试、批量项与清理"""
+    print("\n=== 测试失败项与批量项 ===")
+    server = fakeredis.FakeServer()
+    backends = [make_backend(server, visibility_timeout=0.2), MemoryQueueBackend()]
+    for backend in backends:
+        backend.enqueue(make_item(1))
+        item = backend.reserve("w", timeout=0.1)
+        item.error_message = "发送失败"
+        backend.fail(item)
+        status, failed = backend.get_item("1_sms")
+        assert status == "failed" and failed.error_message == "发送失败"
+        assert backend.take_failed("1_sms").id == "1_sms" and backend.take_failed("1_sms") is None
+
+        for i in range(10, 15):
+            backend.push_batch("email", make_item(i, channel="email"))
+        assert backend.batch_size("email") == 5 and backend.get_item("12_email")[0] == "pending_batch"
+        batch = backend.pop_batch("email", 3)
+        assert [item.id for item in batch] == ["10_email", "11_email", "12_email"]
+        assert backend.get_item("12_email")[0] == "processing" and backend.batch_size("email") == 2
+        backend.complete(batch[0])
+        backend.fail(batch[1])
+        assert backend.cleanup(datetime.now() + timedelta(seconds=1)) == (1, 1)
+        assert backend.get_item("10_email") is None
+    print("✅ 失败项只能被取出重试一次，批量项取出后标记为处理中")
+
+    backend = backends[0]
+    time.sleep(0.25)
+    # 未完成的批量项（12_email）超时后放回批量列表
+    again = backend.pop_batch("email", 10)
+    assert sorted(item.id for item in again) == ["12_email", "13_email", "14_email"], [item.id for item in again]
+    print("✅ 超时未完成的批量项重新放回批量列表")
+
+
+def main():
+    """主测试函数"""
+    print("开始通知队列后端测试...")
+    tests = [test_consumers, test_visibility_timeout, test_failed_and_batches]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报表日汇总测试
+
+以 app.models 中的明细模型与 report_rollup_service 中的汇总定义验证：
+1. 质量检查全量刷新后，读取结果与直接对明细表聚合一致，已刷新的日期读汇总表
+2. 生产计划增量刷新只重算有变化的日期（含删除、改期的原日期），结果与全量重建一致
+3. refresh_all 对生产计划、质量检查、设备维护三张汇总表都能刷新并读取
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+import app.models  # noqa: F401  注册全部模型
+from app.models.equipment import MaintenanceRecord, MaintenanceType
+from app.models.production_plan import PlanStatus, ProductionPlan
+from app.models.quality import QualityCheck, QualityCheckType, QualityResult
+from app.models.report_rollup import ReportRollupDirtyDate
+from app.services.report_rollup_service import (
+    MAINTENANCE_ROLLUP, PRODUCTION_ROLLUP, QUALITY_ROLLUP, read_rollup, refresh_all, refresh_rollup, sum_rows
+)
+
+PRODUCTS = ["产品A", "产品B", "产品C"]
+RESULTS = [QualityResult.PASS, QualityResult.PASS, QualityResult.FAIL, QualityResult.REWORK]
+WORKSHOPS = ["一车间", "二车间", None]
+
+
+def build_session():
+    """内存SQLite中30天的质量检查、10天的生产计划和设备维护记录（明细创建于两天前）
+
+    Returns:
+        会话、执行过的SQL列表、今天的日期
+    """
+    engine = create_engine("sqlite://")
+    ProductionPlan.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in (QualityCheck.__table__, MaintenanceRecord.__table__):
+            # 质量、设备模型与生产计划分属两个 Base，外键引用的表不在同一 metadata 中，建表时不带外键约束
+            conn.execute(CreateTable(table, include_foreign_key_constraints=[]))
+            for index in table.indexes:
+                index.create(conn)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    session = Session(engine)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    created = datetime.utcnow() - timedelta(days=2)
+    session.execute(insert(QualityCheck.__table__), [
+        {
+            "check_number": f"QC{i:05d}",
+            "check_type": QualityCheckType.FINAL,
+            "product_name": PRODUCTS[i % len(PRODUCTS)],
+            "check_quantity": 10 + i % 5,
+            "pass_quantity": 8 + i % 3,
+            "result": RESULTS[i % len(RESULTS)],
+            "inspector_id": 1,
+            "check_date": today - timedelta(days=i % 30, hours=-(i % 20)),
+            "created_at": created,
+            "updated_at": created
+        }
+        for i in range(300)
+    ])
+    session.execute(insert(MaintenanceRecord.__table__), [
+        {
+            "maintenance_number": f"MR{i:05d}",
+            "equipment_id": 1 + i % 4,
+            "maintenance_type": [MaintenanceType.PREVENTIVE, MaintenanceType.CORRECTIVE][i % 2],
+            "planned_start_time": today - timedelta(days=i % 10, hours=-8),
+            "total_cost": None if i % 5 == 0 else 100.0 + i,
+            "created_at": created,
+            "updated_at": created
+        }
+        for i in range(40)
+    ])
+    for i in range(40):
+        start = today - timedelta(days=i % 10, hours=-8)
+        session.add(ProductionPlan(
+            plan_no=f"PP{i:05d}", plan_name=f"计划{i}", product_name=PRODUCTS[i % len(PRODUCTS)],
+            quantity=100 + i, unit="件", plan_start_date=start, plan_end_date=start + timedelta(days=5),
+            status=[PlanStatus.CONFIRMED, PlanStatus.COMPLETED][i % 2], progress=i % 100,
+            workshop=WORKSHOPS[i % len(WORKSHOPS)], created_at=created, updated_at=created
+        ))
+    session.commit()
+    return session, statements, today.date()
+
+
+def raw_quality_totals(session, start, end):
+    """直接从明细表按 (日期, 产品, 结果) 统计检查次数与数量"""
+    totals = {}
+    for check in session.query(QualityCheck):
+        day = check.check_date.date()
+        if start <= day <= end:
+            key = (day, check.product_name, check.result.value)
+            count, quantity = totals.get(key, (0, 0))
+            totals[key] = (count + 1, quantity + check.check_quantity)
+    return totals
+
+
+def quality_totals(rows):
+    return {
+        (row["stat_date"], row["product_name"], row["result"]): (row["check_count"], row["check_quantity"])
+        for row in rows
+    }
+
+
+def raw_production_totals(session, start, end):
+    """直接从明细表按 (日期, 车间, 产品, 状态) 统计计划数与计划数量"""
+    totals = {}
+    for plan in session.query(ProductionPlan):
+        day = plan.plan_start_date.date()
+        if start <= day <= end:
+            key = (day, plan.workshop or "", plan.product_name, plan.status.value)
+            count, quantity = totals.get(key, (0, 0))
+            totals[key] = (count + 1, quantity + plan.quantity)
+    return totals
+
+
+def production_totals(rows):
+    return {
+        (row["stat_date"], row["workshop"], row["product_name"], row["status"]): (row["plan_count"], row["quantity"])
+        for row in rows
+    }
+
+
+def test_full_refresh_matches_source():
+    """测试全量刷新后读取结果与明细聚合一致"""
+    print("\n=== 测试全量刷新 ===")
+    session, statements, today = build_session()
+    start, end = today - timedelta(days=40), today + timedelta(days=1)
+
+    before = quality_totals(read_rollup(session, QUALITY_ROLLUP, start, end))
+    assert before == raw_quality_totals(session, start, end), "未刷新时应直接聚合明细"
+
+    processed = refresh_rollup(session, QUALITY_ROLLUP)
+    assert processed == 30, f"应汇总30天，实际 {processed}"
+
+    statements.clear()
+    rows = read_rollup(session, QUALITY_ROLLUP, start, end)
+    assert quality_totals(rows) == raw_quality_totals(session, start, end)
+    assert any("quality_daily_rollups" in statement for statement in statements), "已刷新的日期应读汇总表"
+
+    passed = sum_rows(rows, "check_count", result=QualityResult.PASS)
+    assert passed == session.query(QualityCheck).filter(QualityCheck.result == QualityResult.PASS).count()
+    filtered = read_rollup(session, QUALITY_ROLLUP, start, end, where=lambda row: row["product_name"] == "产品B")
+    assert sum_rows(filtered, "check_count") == 100
+    print(f"✅ 全量刷新 {processed} 天，读取结果与明细一致")
+
+
+def test_incremental_refresh():
+    """测试增量刷新只重算变化的日期"""
+    print("\n=== 测试增量刷新 ===")
+    session, statements, today = build_session()
+    refresh_rollup(session, PRODUCTION_ROLLUP)
+    start, end = today - timedelta(days=40), today
+
+    # 修改状态、改期、删除、新增，共涉及有限的几天
+    changed = session.query(ProductionPlan).filter(ProductionPlan.plan_no == "PP00010").one()
+    changed.status = PlanStatus.CANCELLED
+    moved = session.query(ProductionPlan).filter(ProductionPlan.plan_no == "PP00011").one()
+    moved_from = moved.plan_start_date.date()
+    moved.plan_start_date = datetime.combine(today - timedelta(days=25), datetime.min.time())
+    deleted = session.query(ProductionPlan).filter(ProductionPlan.plan_no == "PP00012").one()
+    deleted_on = deleted.plan_start_date.date()
+    session.delete(deleted)
+    added_on = datetime.combine(today - timedelta(days=3), datetime.min.time())
+    session.add(ProductionPlan(
+        plan_no="PP99999", plan_name="新增计划", product_name="产品D", quantity=3, unit="件",
+        plan_start_date=added_on, plan_end_date=added_on + timedelta(days=1), status=PlanStatus.DRAFT
+    ))
+    session.commit()
+
+    expected_dates = {
+        changed.plan_start_date.date(), moved_from, moved.plan_start_date.date(), deleted_on, added_on.date()
+    }
+    processed = refresh_rollup(session, PRODUCTION_ROLLUP)
+    assert processed == len(expected_dates), f"应只重算 {len(expected_dates)} 天，实际 {processed}"
+    assert session.query(ReportRollupDirtyDate).count() == 0, "待重算日期应在刷新后清除"
+
+    incremental = production_totals(read_rollup(session, PRODUCTION_ROLLUP, start, end))
+    assert incremental == raw_production_totals(session, start, end)
+    refresh_rollup(session, PRODUCTION_ROLLUP, full=True)
+    assert production_totals(read_rollup(session, PRODUCTION_ROLLUP, start, end)) == incremental, \
+        "增量结果应与全量重建一致"
+    print(f"✅ 增量刷新重算 {processed} 天，结果与全量重建一致")
+
+
+def test_refresh_all():
+    """测试三张汇总表按真实明细模型刷新"""
+    print("\n=== 测试刷新全部汇总表 ===")
+    session, _, today = build_session()
+
+    results = refresh_all(session)
+    assert results == {"production_daily": 10, "quality_daily": 30, "maintenance_daily": 10}, results
+
+    start, end = today - timedelta(days=40), today
+    plans = read_rollup(session, PRODUCTION_ROLLUP, start, end)
+    assert sum_rows(plans, "plan_count") == 40
+    assert sum_rows(plans, "plan_count", status=PlanStatus.COMPLETED) == 20
+    assert sum_rows(plans, "quantity") == sum(100 + i for i in range(40))
+    assert sum_rows(plans, "plan_count", workshop="") == 13, "车间为空的计划应记在空字符串维度下"
+
+    records = read_rollup(session, MAINTENANCE_ROLLUP, start, end)
+    costs = [100.0 + i for i in range(40) if i % 5]
+    assert sum_rows(records, "record_count") == 40
+    assert sum_rows(records, "cost_count") == len(costs) and sum_rows(records, "cost_sum") == sum(costs)
+    assert sum_rows(records, "record_count", maintenance_type=MaintenanceType.CORRECTIVE) == 20
+
+    checks = read_rollup(session, QUALITY_ROLLUP, start, end)
+    assert sum_rows(checks, "check_count", result=QualityResult.FAIL) == 75
+    print(f"✅ 三张汇总表刷新完成: {results}")
+
+
+def main():
+    """主测试函数"""
+    print("开始报表日汇总测试...")
+    tests = [test_full_refresh_matches_source, test_incremental_refresh, test_refresh_all]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
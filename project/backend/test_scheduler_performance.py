@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+排程器性能回归测试
+
+验证 ProductionScheduler 的资源分配在大规模任务下保持近似 O(n log n)：
+1. 10000 个任务的资源分配与排程优化需在阈值时间内完成
+2. 同一资源上的排程互不重叠
+3. 依赖任务在前置任务完成后才开始
+
+阈值可通过环境变量 SCHEDULER_PERF_THRESHOLD（秒）调整。
+"""
+
+import sys
+import os
+import time
+import random
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.production_plan import PlanPriority
+from app.utils.scheduler import ProductionScheduler, ScheduleTask
+
+TASK_COUNT = 10000
+THRESHOLD_SECONDS = float(os.environ.get("SCHEDULER_PERF_THRESHOLD", "10"))
+
+
+def build_tasks(count: int, seed: int = 7):
+    """生成合成排程任务"""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    workshops = ["车间A", "车间B", "车间C"]
+    priorities = list(PlanPriority)
+    tasks = []
+    for plan_id in range(1, count + 1):
+        earliest_start = base + timedelta(days=rng.randrange(30))
+        duration = rng.randint(1, 5)
+        dependencies = [rng.randrange(1, plan_id)] if plan_id > 1 and rng.random() < 0.2 else []
+        tasks.append(ScheduleTask(
+            plan_id=plan_id,
+            plan_no=f"PP{plan_id:06d}",
+            product_name="测试产品",
+            quantity=rng.randint(50, 500),
+            priority=rng.choice(priorities),
+            deadline=earliest_start + timedelta(days=duration * 2),
+            estimated_duration=duration,
+            workshop=rng.choice(workshops),
+            production_line="",
+            dependencies=dependencies,
+            earliest_start=earliest_start,
+            latest_finish=earliest_start + timedelta(days=duration * 2)
+        ))
+    return tasks
+
+
+def test_assign_resources_performance():
+    """测试10000个任务的排程耗时"""
+    print(f"\n=== 测试 {TASK_COUNT} 个任务的排程性能 ===")
+    scheduler = ProductionScheduler(db=None)
+    tasks = build_tasks(TASK_COUNT)
+    resources = scheduler._get_resource_constraints()
+
+    started = time.perf_counter()
+    results = scheduler._schedule_by_deadline(tasks, resources, datetime(2025, 1, 1, 8, 0, 0))
+    results = scheduler._optimize_schedule(results, tasks, resources)
+    elapsed = time.perf_counter() - started
+
+    print(f"排程 {len(results)} 个任务耗时 {elapsed:.3f}s（阈值 {THRESHOLD_SECONDS}s）")
+    assert len(results) == TASK_COUNT
+    assert elapsed < THRESHOLD_SECONDS, f"排程耗时 {elapsed:.3f}s 超过阈值 {THRESHOLD_SECONDS}s"
+
+
+def test_schedule_is_consistent():
+    """测试资源不重叠且依赖满足"""
+    print("\n=== 测试排程结果一致性 ===")
+    scheduler = ProductionScheduler(db=None)
+    tasks = build_tasks(2000, seed=11)
+    resources = scheduler._get_resource_constraints()
+    results = scheduler._schedule_by_deadline(tasks, resources, datetime(2025, 1, 1, 8, 0, 0))
+
+    by_resource = {}
+    for result in results:
+        by_resource.setdefault(result.assigned_workshop, []).append(
+            (result.scheduled_start, result.scheduled_end)
+        )
+    for intervals in by_resource.values():
+        intervals.sort()
+        for (_, previous_end), (next_start, _) in zip(intervals, intervals[1:]):
+            assert previous_end <= next_start, "同一资源上的排程存在重叠"
+
+    results_by_plan = {r.plan_id: r for r in results}
+    position = {r.plan_id: i for i, r in enumerate(results)}
+    for task in tasks:
+        for dep_id in task.dependencies:
+            # 只有先于当前任务排程的依赖才参与约束
+            if position[dep_id] < position[task.plan_id]:
+                assert results_by_plan[task.plan_id].scheduled_start >= results_by_plan[dep_id].scheduled_end
+    print("✅ 排程结果一致")
+
+
+def main():
+    """主测试函数"""
+    print("开始排程器性能回归测试...")
+    tests = [test_assign_resources_performance, test_schedule_is_consistent]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
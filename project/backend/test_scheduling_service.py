@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自动排产服务测试
+
+以逐项线性查找的原实现为参照验证 app.services.scheduling_service.SchedulingService：
+1. MaintenanceWindows 的重叠判断与逐个窗口比较一致（含首尾相接、嵌套、零长度窗口）
+2. 随机订单、设备、物料（含小数库存和需求量）下，排产结果与原实现逐单一致
+3. 向量化物料预检不截断小数：总需求略超库存的物料不会被判为充足
+"""
+
+import sys
+import os
+import copy
+import random
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loguru import logger
+
+from app.services.scheduling_service import (
+    Equipment, MaintenanceWindows, Material, Priority, ProductionOrder, SchedulingService
+)
+
+
+def linear_overlaps(windows, start_time, end_time):
+    """原实现：逐个维护窗口比较"""
+    return any(start_time < maint_end and end_time > maint_start for maint_start, maint_end in windows)
+
+
+class LinearSchedulingService(SchedulingService):
+    """原实现：物料与设备逐项线性查找，排产前不做物料预检（设备类型过滤与新实现相同）"""
+
+    def check_material_availability(self, order):
+        missing_materials = []
+        for material_code, required_qty in order.material_requirements.items():
+            material = next((m for m in self.materials if m.material_code == material_code), None)
+            if not material:
+                missing_materials.append(f"{material_code}: 物料不存在")
+                continue
+            if material.current_stock < required_qty:
+                shortage = required_qty - material.current_stock
+                missing_materials.append(f"{material_code}: 缺料{shortage}件")
+        return len(missing_materials) == 0, missing_materials
+
+    def find_available_equipment(self, order, start_time):
+        end_time = start_time + timedelta(hours=order.estimated_hours)
+        for equipment in self.equipment:
+            if order.equipment_type and equipment.equipment_type != order.equipment_type:
+                continue
+            if linear_overlaps(equipment.maintenance_schedule, start_time, end_time):
+                continue
+            if equipment.current_load + order.estimated_hours <= equipment.available_hours_per_day:
+                return equipment
+        return None
+
+    def precheck_material_feasibility(self, orders):
+        return set(), set()
+
+
+def test_maintenance_windows():
+    """测试维护窗口重叠判断"""
+    print("\n=== 测试维护窗口 ===")
+    base = datetime(2025, 1, 1)
+
+    def at(hours):
+        return base + timedelta(hours=hours)
+
+    cases = [
+        # 首尾相接：窗口结束于查询开始、开始于查询结束，都不算重叠
+        ([(at(0), at(4))], at(4), at(6), False),
+        ([(at(6), at(8))], at(4), at(6), False),
+        ([(at(0), at(4)), (at(6), at(8))], at(4), at(6), False),
+        ([(at(0), at(4)), (at(4), at(8))], at(3), at(5), True),
+        # 嵌套：外层窗口覆盖查询，内层窗口早已结束，需依赖结束时间前缀最大值
+        ([(at(0), at(20)), (at(1), at(2))], at(10), at(12), True),
+        ([(at(1), at(2)), (at(0), at(20))], at(10), at(12), True),
+        ([(at(0), at(20)), (at(1), at(2)), (at(3), at(5))], at(20), at(22), False),
+        ([(at(5), at(15)), (at(6), at(7))], at(0), at(30), True),
+        # 零长度窗口与零长度查询
+        ([(at(5), at(5))], at(4), at(6), True),
+        ([(at(5), at(5))], at(5), at(6), False),
+        ([(at(0), at(10))], at(5), at(5), True),
+        ([], at(0), at(1), False),
+    ]
+    for windows, start_time, end_time, expected in cases:
+        assert linear_overlaps(windows, start_time, end_time) == expected
+        assert MaintenanceWindows(windows).overlaps(start_time, end_time) == expected, \
+            f"{windows} 与 [{start_time}, {end_time}) 应为 {expected}"
+    print(f"✅ {len(cases)} 个边界用例（首尾相接、嵌套、零长度）判断正确")
+
+    rng = random.Random(3)
+    checked = 0
+    for _ in range(300):
+        windows = []
+        for _ in range(rng.randint(0, 12)):
+            start = rng.randrange(48)
+            windows.append((at(start), at(start + rng.randint(0, 24))))
+        maintenance = MaintenanceWindows(windows)
+        for _ in range(20):
+            start = rng.randrange(-4, 72)
+            start_time, end_time = at(start), at(start + rng.randint(0, 8))
+            assert maintenance.overlaps(start_time, end_time) == linear_overlaps(windows, start_time, end_time), \
+                f"{windows} 与 [{start_time}, {end_time})"
+            checked += 1
+    print(f"✅ {checked} 次随机查询与逐个窗口比较一致")
+
+
+def build_instance(rng):
+    """随机生成一组订单、设备、物料；需求量与库存取 0.25 的整数倍，浮点运算无舍入误差"""
+    now = datetime.now()
+    equipment_types = ["注塑", "装配", None]
+    materials = [
+        Material(f"M{i:03d}", f"物料{i}", rng.choice([rng.randint(0, 60), rng.randint(0, 240) / 4]), 5, 3, "供应商")
+        for i in range(8)
+    ]
+    equipment = []
+    for i in range(rng.randint(1, 5)):
+        windows = []
+        for _ in range(rng.randint(0, 4)):
+            start = now + timedelta(hours=rng.randint(-12, 72))
+            windows.append((start, start + timedelta(hours=rng.randint(0, 30))))
+        equipment.append(Equipment(
+            f"E{i:02d}", f"设备{i}", 10.0, rng.choice([8.0, 16.0, 24.0]), windows,
+            equipment_type=rng.choice(equipment_types)
+        ))
+    orders = []
+    for i in range(rng.randint(5, 40)):
+        requirements = {}
+        for _ in range(rng.randint(0, 3)):
+            code = f"M{rng.randrange(10):03d}"  # M008、M009 不存在
+            requirements[code] = rng.choice([rng.randint(1, 20), rng.randint(1, 80) / 4])
+        orders.append(ProductionOrder(
+            order_id=f"O{i:03d}", product_code=f"P{i % 4}", quantity=100,
+            # 交期取整天加半天，优先级分数不受两次排产之间时间推移的影响
+            due_date=now + timedelta(days=rng.randint(0, 10), hours=12),
+            priority=rng.choice(list(Priority)), estimated_hours=rng.choice([1.0, 2.0, 4.0, 6.5]),
+            material_requirements=requirements, equipment_type=rng.choice(equipment_types)
+        ))
+    return orders, equipment, materials
+
+
+def run_schedule(service_class, orders, equipment, materials, start_date):
+    service = service_class()
+    for material in copy.deepcopy(materials):
+        service.add_material(material)
+    for item in copy.deepcopy(equipment):
+        service.add_equipment(item)
+    for order in copy.deepcopy(orders):
+        service.add_order(order)
+    result = service.schedule_orders(start_date)
+    scheduled = [
+        (order.order_id, order.scheduled_start, order.scheduled_end, order.assigned_equipment)
+        for order in result['scheduled_orders']
+    ]
+    failed = [(item['order'].order_id, item['reason']) for item in result['failed_orders']]
+    stock = {material.material_code: material.current_stock for material in service.materials}
+    return scheduled, failed, stock, result['equipment_utilization']
+
+
+def test_schedule_matches_linear():
+    """测试排产结果与原实现一致"""
+    print("\n=== 测试排产结果与原实现一致 ===")
+    rng = random.Random(11)
+    start_date = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    scheduled_total = 0
+    for _ in range(200):
+        orders, equipment, materials = build_instance(rng)
+        expected = run_schedule(LinearSchedulingService, orders, equipment, materials, start_date)
+        actual = run_schedule(SchedulingService, orders, equipment, materials, start_date)
+        assert actual[0] == expected[0], "排产成功的订单、时段与设备应一致"
+        assert actual[1] == expected[1], "排产失败的订单及原因应一致"
+        assert actual[2] == expected[2], "排产后的库存应一致"
+        assert actual[3] == expected[3], "设备利用率应一致"
+        assert all(stock >= 0 for stock in actual[2].values()), "库存不应被扣成负数"
+        scheduled_total += len(actual[0])
+    print(f"✅ 200 组随机实例排产结果与原实现一致（共排产 {scheduled_total} 个订单）")
+
+
+def test_fractional_precheck():
+    """测试物料预检不截断小数"""
+    print("\n=== 测试小数物料预检 ===")
+    service = SchedulingService()
+    service.add_material(Material("M001", "物料1", 3, 0, 1, "供应商"))
+    service.add_material(Material("M002", "物料2", 2.5, 0, 1, "供应商"))
+    due = datetime.now() + timedelta(days=5)
+    orders = [
+        # 两单共需 3.2，超过库存 3；截断为整数时会误判为 2 <= 3
+        ProductionOrder("A", "P", 1, due, Priority.NORMAL, 1.0, {"M001": 1.6}),
+        ProductionOrder("B", "P", 1, due, Priority.NORMAL, 1.0, {"M001": 1.6}),
+        # 库存 2.5 截断为 2 时会误判为不足
+        ProductionOrder("C", "P", 1, due, Priority.NORMAL, 1.0, {"M002": 2.5}),
+    ]
+    infeasible, guaranteed = service.precheck_material_feasibility(orders)
+    assert infeasible == set(), infeasible
+    assert guaranteed == {"C"}, f"M001 存在争用，A、B 不应判为物料充足: {guaranteed}"
+
+    service.add_equipment(Equipment("E01", "设备1", 10.0, 24.0, []))
+    for order in orders:
+        service.add_order(order)
+    result = service.schedule_orders()
+    assert [order.order_id for order in result['scheduled_orders']] == ["A", "C"]
+    assert result['failed_orders'][0]['order'].order_id == "B"
+    assert abs(service.get_material("M001").current_stock - 1.4) < 1e-9
+    print("✅ 小数需求量与库存按浮点比较，争用物料仍逐单检查")
+
+
+def main():
+    """主测试函数"""
+    print("开始自动排产服务测试...")
+    logger.remove()  # 排产过程逐单记录日志，测试时关闭
+    tests = [test_maintenance_windows, test_schedule_matches_linear, test_fractional_precheck]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词搜索索引测试
+
+验证 app.services.search_index（SQLite FTS5 trigram）：
+1. 各类关键词（编码、中文、短关键词、含引号与通配符）的结果与原 LIKE 条件完全一致，长关键词走索引
+2. 增删改后索引由触发器同步；模型缺少搜索列时不建索引并退化为 LIKE
+3. 应用启动时（app.main 与 Docker 入口 main 的 lifespan 均调用 init_search_indexes）物料、订单、BOM 三个索引全部建立并就绪
+"""
+
+import sys
+import os
+import ast
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, delete, event, insert, select, update
+
+from app.models import Base
+from app.models.material import BOM, Material, MaterialCategory
+from app.models.order import Order
+from app.services import search_index
+from app.services.search_index import (
+    BOM_SEARCH, MATERIAL_SEARCH, ORDER_SEARCH, SEARCH_INDEXES, SearchIndex, init_search_indexes
+)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+metadata = MetaData()
+items = Table(
+    "search_test_items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("code", String(50)),
+    Column("name", String(100)),
+)
+ITEM_SEARCH = SearchIndex("search_test_items_search", items, ["code", "name"])
+
+NAMES = ["不锈钢板", "铝合金型材", "紫铜管", 'PP"特级"粒子', "100%纯棉", "a_b连接件"]
+
+
+def build_engine():
+    """内存SQLite中的合成物料，返回引擎及执行过的SQL列表"""
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(items), [
+            {"id": i, "code": f"M{i:05d}", "name": f"{NAMES[i % len(NAMES)]}{i % 17}"} for i in range(1, 501)
+        ])
+        assert ITEM_SEARCH.ensure(conn), "当前 SQLite 应支持 FTS5 trigram"
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return engine, statements
+
+
+def search(conn, condition):
+    return conn.execute(select(items.c.id).where(condition).order_by(items.c.id)).scalars().all()
+
+
+def test_same_results_as_like():
+    """测试索引结果与 LIKE 一致"""
+    print("\n=== 测试结果一致性 ===")
+    engine, statements = build_engine()
+    keywords = ["M00123", "M0012", "不锈钢", "铜", "型材1", '"特级"', "100%", "a_b", "0%纯", "不存在"]
+    with engine.connect() as conn:
+        for keyword in keywords:
+            statements.clear()
+            expected = search(conn, ITEM_SEARCH.like(keyword))
+            assert search(conn, ITEM_SEARCH.filter(keyword)) == expected, f"{keyword}: 结果与 LIKE 不一致"
+            used_index = any("MATCH" in statement for statement in statements)
+            assert used_index == (len(keyword) >= 3), f"{keyword}: 不少于3个字符时才走索引"
+            print(f"✅ {keyword}: {len(expected)} 条")
+
+
+def test_index_sync():
+    """测试增删改同步与缺列退化"""
+    print("\n=== 测试索引同步 ===")
+    engine, _ = build_engine()
+    with engine.begin() as conn:
+        conn.execute(insert(items), [{"id": 1000, "code": "NEW01", "name": "新增校验件"}])
+        assert search(conn, ITEM_SEARCH.filter("新增校验")) == [1000]
+        conn.execute(update(items).where(items.c.id == 1000).values(name="改名校验件"))
+        assert search(conn, ITEM_SEARCH.filter("新增校验")) == []
+        assert search(conn, ITEM_SEARCH.filter("改名校验")) == [1000]
+        conn.execute(delete(items).where(items.c.id == 1000))
+        assert search(conn, ITEM_SEARCH.filter("改名校验")) == []
+        print("✅ 增删改后索引同步")
+
+        # 表中缺少搜索列时不建索引，仍按 LIKE 查询
+        broken = SearchIndex("search_test_broken", items, ["code", "supplier"])
+        assert not broken.ensure(conn) and not broken.ready
+        print("✅ 缺少搜索列时不建索引")
+
+
+def lifespan_calls(path):
+    """解析入口文件（导入会加载全部路由），返回 lifespan 中调用的函数名"""
+    with open(os.path.join(BACKEND_DIR, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    lifespan = next(node for node in ast.walk(tree)
+                    if isinstance(node, ast.AsyncFunctionDef) and node.name == "lifespan")
+    return [node.func.id for node in ast.walk(lifespan)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name)]
+
+
+def test_app_startup():
+    """测试应用启动时三个搜索索引全部建立"""
+    print("\n=== 测试应用启动 ===")
+    for path in ("app/main.py", "main.py"):
+        assert "init_search_indexes" in lifespan_calls(path), f"{path}: lifespan 应调用 init_search_indexes"
+
+    # 与 lifespan 相同：先建表，再在同步引擎上建立索引
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    search_index._ready_indexes.clear()
+    expected = {MATERIAL_SEARCH.name, ORDER_SEARCH.name, BOM_SEARCH.name}
+    assert {index.name for index in SEARCH_INDEXES} == expected
+    assert set(init_search_indexes(engine)) == expected
+    assert search_index._ready_indexes == expected, f"就绪索引 {search_index._ready_indexes}，应为 {expected}"
+    assert set(init_search_indexes(engine)) == expected, "重复启动应幂等"
+
+    with engine.begin() as conn:
+        conn.execute(insert(Material.__table__), [{
+            "material_code": "M00001", "material_name": "不锈钢板", "unit": "张",
+            "category": MaterialCategory.RAW_MATERIAL, "primary_supplier": "华东钢材供应商"
+        }])
+        conn.execute(insert(Order.__table__), [{
+            "order_no": "SO20250001", "customer_name": "客户A", "product_name": "控制柜", "quantity": 1,
+            "unit": "台", "order_date": datetime(2025, 6, 1), "delivery_date": datetime(2025, 7, 1)
+        }])
+        conn.execute(insert(BOM.__table__), [{"bom_code": "BOM-001", "product_name": "控制柜", "version": "V1"}])
+
+        for index, model, keyword in [
+            (MATERIAL_SEARCH, Material, "华东钢材"),
+            (ORDER_SEARCH, Order, "SO2025"),
+            (BOM_SEARCH, BOM, "bom-001"),
+        ]:
+            found = conn.execute(select(model.id).where(index.filter(keyword))).scalars().all()
+            assert found == [1], f"{index.name}: {keyword} 应命中"
+            sql = str(select(model.id).where(index.filter(keyword)).compile(engine))
+            assert "MATCH" in sql, f"{index.name}: 关键词搜索应走索引"
+    print(f"✅ 启动后索引就绪: {sorted(expected)}，供应商、订单号、BOM 编码均可走索引搜索")
+
+
+def main():
+    """主测试函数"""
+    print("开始关键词搜索索引测试...")
+    tests = [test_same_results_as_like, test_index_sync, test_app_startup]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SMTP连接池测试
+
+使用本地 aiosmtpd 服务器验证 app.services.smtp_pool.SMTPConnectionPool：
+1. 批量发送复用已登录的连接，连接数不超过连接池大小，与每封邮件新建连接对比吞吐量
+2. 单个连接发送上限后重建；服务器断开空闲连接后自动重连
+"""
+
+import sys
+import os
+import time
+import asyncio
+import logging
+import warnings
+import socket
+import smtplib
+import threading
+from email.mime.text import MIMEText
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from app.services.smtp_pool import SMTPConnectionPool
+
+# 测试服务器不启用TLS，忽略 aiosmtpd 的明文认证告警
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+warnings.filterwarnings("ignore", module="aiosmtpd")
+
+HOST = "127.0.0.1"
+USERNAME = "pmc@example.com"
+PASSWORD = "secret"
+
+
+class Handler:
+    """记录收到的邮件与登录次数"""
+
+    def __init__(self):
+        self.messages = []
+        self.logins = 0
+        self.lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            self.messages.append(envelope)
+        return "250 OK"
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        with self.lock:
+            self.logins += 1
+        return AuthResult(success=auth_data.login.decode() == USERNAME and auth_data.password.decode() == PASSWORD)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port=None):
+    port = port or free_port()
+    handler = Handler()
+    controller = Controller(handler, hostname=HOST, port=port, authenticator=handler.authenticate,
+                            auth_require_tls=False, auth_required=True)
+    controller.start()
+    return controller, handler
+
+
+def make_pool(port, **options):
+    return SMTPConnectionPool(HOST, port, username=USERNAME, password=PASSWORD, use_tls=False, **options)
+
+
+def build_message(i):
+    msg = MIMEText(f"订单提醒 {i}", "plain", "utf-8")
+    msg["Subject"] = f"通知 {i}"
+    return msg.as_string()
+
+
+def send_without_pool(port, recipients, message):
+    """旧实现：每封邮件新建连接、登录、发送后退出"""
+    server = smtplib.SMTP(HOST, port)
+    server.login(USERNAME, PASSWORD)
+    server.sendmail(USERNAME, recipients, message)
+    server.quit()
+
+
+def test_throughput():
+    """测试连接复用与吞吐量"""
+    print("\n=== 测试连接复用 ===")
+    controller, handler = start_server()
+    port = controller.port
+    count = 300
+    try:
+        started = time.perf_counter()
+        for i in range(count):
+            send_without_pool(port, [f"user{i}@example.com"], build_message(i))
+        baseline = count / (time.perf_counter() - started)
+        assert len(handler.messages) == count and handler.logins == count
+
+        handler.messages.clear()
+        handler.logins = 0
+        pool = make_pool(port, size=4)
+
+        async def send_all():
+            return await asyncio.gather(*(
+                pool.send(USERNAME, [f"user{i}@example.com"], build_message(i)) for i in range(count)
+            ))
+
+        started = time.perf_counter()
+        results = asyncio.run(send_all())
+        pooled = count / (time.perf_counter() - started)
+        stats = pool.stats()
+        pool.close()
+
+        assert len(handler.messages) == count and all(result == {} for result in results)
+        assert sorted(envelope.rcpt_tos[0] for envelope in handler.messages) == sorted(
+            f"user{i}@example.com" for i in range(count))
+        assert stats["connections_opened"] <= 4 and handler.logins == stats["connections_opened"], stats
+        assert stats["messages_sent"] == count
+        print(f"✅ {count} 封邮件使用 {stats['connections_opened']} 个连接，登录 {handler.logins} 次")
+        print(f"✅ 吞吐量：每封新建连接 {baseline:.0f} 封/秒，连接池 {pooled:.0f} 封/秒（{pooled / baseline:.1f}x）")
+        assert pooled > baseline, "连接池吞吐量应高于每封新建连接"
+    finally:
+        controller.stop()
+
+
+def test_rotation_and_reconnect():
+    """测试连接重建与断线重连"""
+    print("\n=== 测试连接重建 ===")
+    controller, handler = start_server()
+    port = controller.port
+    pool = make_pool(port, size=1, max_messages=10)
+    try:
+        for i in range(25):
+            pool.send_blocking(USERNAME, ["a@example.com"], build_message(i))
+        stats = pool.stats()
+        assert (stats["connections_opened"], handler.logins) == (3, 3), stats
+        print("✅ 每个连接发送 10 封后重建")
+
+        # 服务器重启，连接池中的空闲连接已失效
+        controller.stop()
+        controller, handler = start_server(port)
+        pool.send_blocking(USERNAME, ["b@example.com"], build_message(99))
+        stats = pool.stats()
+        assert stats["reconnects"] == 1 and len(handler.messages) == 1, stats
+
+        try:
+            pool.send_blocking(USERNAME, [], build_message(100))
+        except smtplib.SMTPException:
+            pass
+        else:
+            raise AssertionError("没有收件人时应抛出异常")
+        pool.send_blocking(USERNAME, ["c@example.com"], build_message(101))
+        assert pool.stats()["connections_opened"] == 4 and len(handler.messages) == 2
+        print("✅ 空闲连接失效后自动重连，单封邮件出错不影响连接复用")
+    finally:
+        pool.close()
+        controller.stop()
+
+
+def main():
+    """主测试函数"""
+    print("开始SMTP连接池测试...")
+    tests = [test_throughput, test_rotation_and_reconnect]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
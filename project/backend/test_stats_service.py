@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统计聚合服务测试
+
+验证 stats_service 的单次扫描统计：
+1. 一条分组查询得到的各项计数与逐项 COUNT 查询一致
+2. 结果缓存期间不再查询数据库，订单写入提交后自动失效
+3. 设备维护统计按真实的维护记录列（计划开始时间、总成本）聚合本月记录及待维护设备
+4. 全部 StatsTable 的分组列与聚合量均引用真实列，统计查询可在数据库上执行
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_, create_engine, event, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from app.core import cache as cache_module
+from app.models.equipment import MaintenanceRecord, MaintenanceStatus, MaintenanceType
+from app.models.order import Order, OrderStatus, OrderPriority
+from app.services import stats_service
+from app.services.stats_service import MAINTENANCE_STATS, ORDER_STATS, StatsBreakdown, StatsTable, get_breakdown
+
+
+def build_session():
+    """内存SQLite中的合成订单，返回会话及执行过的SQL列表"""
+    engine = create_engine("sqlite://")
+    Order.__table__.create(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    session = Session(engine)
+    statuses = list(OrderStatus)
+    now = datetime.now()
+    for i in range(200):
+        session.add(Order(
+            order_no=f"SO{i:05d}",
+            customer_name=f"客户{i % 7}",
+            product_name="测试产品",
+            quantity=10,
+            unit="个",
+            unit_price=1.5,
+            total_amount=15.0 + i,
+            order_date=now,
+            delivery_date=now + timedelta(days=(i % 20) - 10),
+            status=statuses[i % len(statuses)],
+            priority=OrderPriority.URGENT if i % 4 == 0 else OrderPriority.MEDIUM,
+            created_at=now - timedelta(days=i % 60)
+        ))
+    session.commit()
+    return session, statements
+
+
+def with_l1_only(coroutine_factory):
+    """在无Redis环境下（仅一级缓存）运行"""
+    async def unavailable_redis():
+        raise ConnectionError("redis unavailable")
+
+    original_get_redis = cache_module.get_redis
+    cache_module.get_redis = unavailable_redis
+    try:
+        return asyncio.run(coroutine_factory())
+    finally:
+        cache_module.get_redis = original_get_redis
+
+
+def test_single_pass_matches_counts():
+    """测试分组条件聚合与逐项计数一致"""
+    print("\n=== 测试单次扫描统计 ===")
+    session, statements = build_session()
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    open_statuses = [OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.IN_PRODUCTION]
+
+    async def run():
+        await cache_module.cache_manager.invalidate_tags(*ORDER_STATS.tags)
+        statements.clear()
+        return await get_breakdown(session, ORDER_STATS)
+
+    orders = with_l1_only(run)
+    assert len(statements) == 1, f"每张表应只执行一条查询，实际 {len(statements)} 条"
+
+    query = session.query(Order)
+    assert orders.count() == query.count()
+    for order_status in OrderStatus:
+        assert orders.count(order_status) == query.filter(Order.status == order_status).count()
+    assert orders.value("urgent") == query.filter(Order.priority == OrderPriority.URGENT).count()
+    assert orders.value("monthly_new") == query.filter(Order.created_at >= month_start).count()
+    assert orders.value("overdue", *open_statuses) == query.filter(and_(
+        Order.delivery_date < datetime.now().date(), Order.status.in_(open_statuses)
+    )).count()
+    assert abs(orders.value("amount") - sum(order.total_amount for order in query)) < 1e-6
+    print(f"✅ 单次扫描统计一致（{len(orders.groups)} 个状态分组，1 条查询）")
+
+
+def test_cache_invalidated_on_commit():
+    """测试缓存命中与提交后失效"""
+    print("\n=== 测试统计缓存失效 ===")
+    session, statements = build_session()
+
+    async def run():
+        await cache_module.cache_manager.invalidate_tags(*ORDER_STATS.tags)
+        before = await get_breakdown(session, ORDER_STATS)
+        statements.clear()
+        await get_breakdown(session, ORDER_STATS)
+        assert not statements, "缓存有效期内不应再查询数据库"
+
+        order = session.query(Order).filter(Order.status == OrderStatus.PENDING).first()
+        order.status = OrderStatus.CANCELLED
+        session.commit()
+        await asyncio.sleep(0.01)  # 等待提交事件安排的失效任务
+
+        after = await get_breakdown(session, ORDER_STATS)
+        assert after.count(OrderStatus.PENDING) == before.count(OrderStatus.PENDING) - 1
+        assert after.count(OrderStatus.CANCELLED) == before.count(OrderStatus.CANCELLED) + 1
+
+    with_l1_only(run)
+    print("✅ 提交后统计缓存失效")
+
+
+def test_maintenance_stats():
+    """测试设备维护本月统计"""
+    print("\n=== 测试设备维护统计 ===")
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        # 设备模型与其他模型分属两个 Base，建表时不带外键约束
+        conn.execute(CreateTable(MaintenanceRecord.__table__, include_foreign_key_constraints=[]))
+    now = datetime.now()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    records = [
+        {
+            "maintenance_number": f"MR{i:05d}",
+            "equipment_id": i % 4 + 1,
+            "maintenance_type": MaintenanceType.PREVENTIVE,
+            "status": [MaintenanceStatus.PLANNED, MaintenanceStatus.COMPLETED][i % 2],
+            # 每三条中一条在上月，其余在本月
+            "planned_start_time": month_start + timedelta(hours=i) if i % 3 else month_start - timedelta(days=i + 1),
+            "total_cost": None if i % 5 == 0 else 50.0 + i
+        }
+        for i in range(30)
+    ]
+    session = Session(engine)
+    session.execute(insert(MaintenanceRecord.__table__), records)
+    session.commit()
+
+    async def run():
+        await cache_module.cache_manager.invalidate_tags(*MAINTENANCE_STATS.tags)
+        return await get_breakdown(session, MAINTENANCE_STATS)
+
+    breakdown = with_l1_only(run)
+    this_month = [record for record in records if record["planned_start_time"] >= month_start]
+    assert breakdown.count() == len(records)
+    assert breakdown.value("monthly") == len(this_month)
+    expected_cost = sum(record["total_cost"] or 0 for record in this_month)
+    assert abs(breakdown.value("monthly_cost") - expected_cost) < 1e-6
+    due_before = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=8)
+    due_equipment = {
+        record["equipment_id"] for record in records
+        if record["status"] == MaintenanceStatus.PLANNED and record["planned_start_time"] < due_before
+    }
+    assert breakdown.value("due_equipment") == len(due_equipment), breakdown.groups
+    print(f"✅ 本月维护 {len(this_month)} 条，成本合计 {expected_cost:.0f}，待维护设备 {len(due_equipment)} 台")
+
+
+def test_all_tables_execute():
+    """测试全部统计表的查询可执行"""
+    print("\n=== 测试全部统计表 ===")
+    tables = [value for value in vars(stats_service).values() if isinstance(value, StatsTable)]
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(CreateTable(table.model.__table__, include_foreign_key_constraints=[]))
+
+    session = Session(engine)
+    for table in tables:
+        # 构建语句时引用不存在的列会抛出 AttributeError，执行时会抛出 OperationalError
+        rows = session.execute(table.statement(datetime.now())).all()
+        breakdown = StatsBreakdown.from_rows(rows)
+        assert breakdown.count() == 0, f"{table.name}: {breakdown.groups}"
+    print(f"✅ {len(tables)} 张统计表的查询均可执行: {', '.join(table.name for table in tables)}")
+
+
+def main():
+    """主测试函数"""
+    print("开始统计聚合服务测试...")
+    tests = [
+        test_single_pass_matches_counts, test_cache_invalidated_on_commit, test_maintenance_stats,
+        test_all_tables_execute
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导出测试
+
+验证 app.utils.stream_export：
+1. CSV、NDJSON、XLSX 三种格式的内容正确（中文表头、枚举、日期、空值）
+2. 以 yield_per 分批查询数据库，写出大量行时内存峰值与行数无关
+3. 供 StreamingResponse 使用的字节流在返回前执行查询并转换首行，开始传输后的错误记录日志并继续抛出
+"""
+
+import sys
+import os
+import csv
+import io
+import json
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import openpyxl
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderPriority, OrderStatus
+from app.utils.stream_export import iter_export, iter_query, open_export_stream, write_export
+
+NOW = datetime(2025, 6, 1, 8, 0)
+
+
+def build_session(rows: int):
+    """SQLite 文件中的合成订单"""
+    temp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(temp_dir.name, 'export.db')}")
+    Order.__table__.create(engine)
+    statuses = list(OrderStatus)
+    with engine.begin() as conn:
+        for start in range(0, rows, 10000):
+            conn.execute(insert(Order), [{
+                "order_no": f"SO{i:07d}", "customer_name": f"客户{i % 50}", "product_name": "测试产品",
+                "quantity": i % 100 + 1, "unit": "个", "order_date": NOW,
+                "delivery_date": NOW + timedelta(days=i % 30), "status": statuses[i % len(statuses)],
+                "priority": OrderPriority.MEDIUM, "remark": None if i % 2 else f"备注{i}",
+                "created_at": NOW, "updated_at": NOW
+            } for i in range(start, min(start + 10000, rows))])
+    return temp_dir, Session(engine)
+
+
+def order_rows(session):
+    return iter_query(session.query(Order).order_by(Order.id), lambda order: {
+        '订单号': order.order_no,
+        '客户名称': order.customer_name,
+        '数量': order.quantity,
+        '交付日期': order.delivery_date,
+        '状态': order.status,
+        '备注': order.remark,
+    })
+
+
+def test_formats():
+    """测试三种格式的内容"""
+    print("\n=== 测试导出格式 ===")
+    temp_dir, session = build_session(25)
+
+    content = b"".join(iter_export(order_rows(session), "csv")).decode("utf-8-sig")
+    records = list(csv.DictReader(io.StringIO(content)))
+    assert len(records) == 25 and records[0]["订单号"] == "SO0000000"
+    assert records[0]["状态"] == list(OrderStatus)[0].value and records[1]["备注"] == ""
+    print("✅ CSV")
+
+    lines = b"".join(iter_export(order_rows(session), "ndjson")).decode("utf-8").splitlines()
+    first = json.loads(lines[0])
+    assert len(lines) == 25 and first["交付日期"] == NOW.isoformat() and json.loads(lines[1])["备注"] is None
+    print("✅ NDJSON")
+
+    path = os.path.join(temp_dir.name, "orders.xlsx")
+    assert write_export(order_rows(session), path, "xlsx", sheet_name="订单数据") == 25
+    worksheet = openpyxl.load_workbook(path)["订单数据"]
+    values = list(worksheet.values)
+    assert values[0] == ('订单号', '客户名称', '数量', '交付日期', '状态', '备注') and len(values) == 26
+    assert values[1][3] == NOW and values[1][4] == list(OrderStatus)[0].value
+    assert worksheet["A1"].font.bold, "表头应加粗"
+    print("✅ XLSX")
+
+    try:
+        b"".join(iter_export(order_rows(session), "pdf"))
+    except ValueError:
+        print("✅ 不支持的格式被拒绝")
+    else:
+        raise AssertionError("不支持的格式应被拒绝")
+    session.close()
+    temp_dir.cleanup()
+
+
+def test_bounded_memory():
+    """测试大量行写出时的内存峰值"""
+    print("\n=== 测试内存占用 ===")
+    temp_dir, session = build_session(30000)
+    for file_format in ("csv", "ndjson", "xlsx"):
+        path = os.path.join(temp_dir.name, f"orders.{file_format}")
+        progress = []
+        session.expunge_all()
+        tracemalloc.start()
+        written = write_export(order_rows(session), path, file_format, on_progress=progress.append)
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+        assert written == 30000 and progress[-1] == 30000
+        assert peak < 10, f"{file_format} 内存峰值 {peak:.1f}MB 过高"
+        print(f"✅ {file_format}: 3万行，文件 {os.path.getsize(path) / 1024:.0f}KB，内存峰值 {peak:.1f}MB")
+    session.close()
+    temp_dir.cleanup()
+
+
+def test_open_export_stream():
+    """测试响应字节流的预取与中断"""
+    print("\n=== 测试响应字节流 ===")
+    temp_dir, session = build_session(5)
+
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    content = open_export_stream(order_rows(session), "csv")
+    assert len(statements) == 1, "返回字节流之前应已执行查询"
+    assert b"".join(content) == b"".join(iter_export(order_rows(session), "csv"))
+    assert b"".join(open_export_stream([], "csv")) == "\ufeff".encode("utf-8")
+    print("✅ 返回前执行查询，输出与 iter_export 一致")
+
+    # 首行字段映射错误、不支持的格式在返回字节流之前抛出，接口可映射为错误状态码
+    for rows, file_format, error in [
+        (iter_query(session.query(Order), lambda order: {'备注': order.notes}), "csv", AttributeError),
+        (order_rows(session), "pdf", ValueError),
+    ]:
+        try:
+            open_export_stream(rows, file_format)
+        except error:
+            pass
+        else:
+            raise AssertionError(f"{error.__name__} 应在返回字节流之前抛出")
+    print("✅ 首行错误与格式错误在返回前抛出")
+
+    def failing_rows():
+        yield {"订单号": "SO0000000"}
+        raise RuntimeError("连接断开")
+
+    content = open_export_stream(failing_rows(), "ndjson")
+    try:
+        b"".join(content)
+    except RuntimeError:
+        print("✅ 传输中途出错时继续抛出，中断传输")
+    else:
+        raise AssertionError("传输中途的错误不应被吞掉")
+    session.close()
+    temp_dir.cleanup()
+
+
+def main():
+    """主测试函数"""
+    print("开始流式导出测试...")
+    tests = [test_formats, test_bounded_memory, test_open_export_stream]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
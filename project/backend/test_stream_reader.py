@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式读取测试
+
+验证 app.utils.stream_reader 与 BD400 订单导入的流式读取：
+1. XLSX 按块读取的内容、表头、行序号（跳过空行）正确，CSV 按文件头识别；读取大文件时内存峰值与行数无关
+2. BD400 订单导入直接读取 XLSX / CSV 文件内容，校验错误的行号与 Excel 行号一致
+"""
+
+import sys
+import os
+import io
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import openpyxl
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.order import Order
+from app.utils.bd400_importer import BD400OrderImporter
+from app.utils.stream_reader import count_rows, detect_format, iter_table_chunks, iter_table_rows, read_table
+
+HEADERS = ['订单号', ' 客户名称 ', '产品名称', '数量', '交货日期', '备注', '备注']
+
+
+def build_xlsx(rows, path=None):
+    """openpyxl 只写模式生成工作簿，第 3 条数据前插入一个空行"""
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet("订单")
+    worksheet.append(HEADERS)
+    for i, row in enumerate(rows):
+        if i == 2:
+            worksheet.append([None] * len(HEADERS))
+        worksheet.append(row)
+    target = path or io.BytesIO()
+    workbook.save(target)
+    return target if path else target.getvalue()
+
+
+def order_row(i):
+    return [f"BD{i:06d}", f"客户{i % 7}", "产品X", i % 50 + 1, datetime(2025, 7, 1), f"备注{i}", None]
+
+
+def test_read_chunks():
+    """测试按块读取"""
+    print("\n=== 测试按块读取 ===")
+    content = build_xlsx([order_row(i) for i in range(12)])
+    assert detect_format(content) == "xlsx" and detect_format(content, "orders.CSV") == "csv"
+
+    chunks = list(iter_table_chunks(content, chunk_size=5))
+    assert [len(chunk) for chunk in chunks] == [5, 5, 2]
+    assert list(chunks[0].columns) == ['订单号', '客户名称', '产品名称', '数量', '交货日期', '备注', '备注.1']
+    assert list(chunks[0].index) == [0, 1, 3, 4, 5], "跳过空行，行序号与整表读取一致"
+    assert chunks[0].iloc[2]['交货日期'] == datetime(2025, 7, 1) and chunks[0].iloc[2]['数量'] == 3
+
+    rows = list(iter_table_rows(content, max_rows=4))
+    assert len(rows) == 3 and rows[0]['备注.1'] is None and rows[2]['订单号'] == "BD000002"
+    # 工作表没有记录范围时按行计数；有范围时可能包含空行
+    assert len(read_table(content, sheet_name="订单")) == 12 and count_rows(content) in (12, 13)
+    print("✅ XLSX 按块读取")
+
+    csv_content = "\ufeff订单号,数量\nBD1,3\n\nBD2,4\n".encode("utf-8")
+    frame = read_table(csv_content)
+    assert detect_format(csv_content) == "csv" and list(frame.columns) == ['订单号', '数量']
+    assert frame['数量'].tolist() == [3, 4] and count_rows(csv_content) == 2
+    empty = next(iter_table_chunks("订单号,数量\n".encode("utf-8")))
+    assert empty.empty and list(empty.columns) == ['订单号', '数量']
+    print("✅ CSV 按文件头识别")
+
+
+def test_bounded_memory():
+    """测试大文件读取的内存峰值"""
+    print("\n=== 测试内存占用 ===")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "orders.xlsx")
+        build_xlsx((order_row(i) for i in range(30000)), path)
+        tracemalloc.start()
+        total = 0
+        for chunk in iter_table_chunks(path, chunk_size=2000):
+            total += len(chunk)
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+        assert total == 30000
+        assert peak < 20, f"内存峰值 {peak:.1f}MB 过高"
+        print(f"✅ 3万行，文件 {os.path.getsize(path) / 1024:.0f}KB，内存峰值 {peak:.1f}MB")
+
+
+def test_bd400_from_file():
+    """测试BD400订单导入读取文件"""
+    print("\n=== 测试BD400订单导入 ===")
+    engine = create_engine("sqlite://")
+    Order.__table__.create(engine)
+    session = Session(engine)
+
+    rows = [order_row(i) for i in range(20)]
+    rows[5][3] = 0
+    result = BD400OrderImporter(session).import_from_excel(build_xlsx(rows), filename="orders.xlsx")
+    assert not result['success'] and result['errors'] == ["第8行: 数量必须大于0"], result['errors']
+    print("✅ 校验错误行号与 Excel 行号一致")
+
+    rows[5][3] = 6
+    result = BD400OrderImporter(session).import_from_excel(build_xlsx(rows))
+    assert result['success'] and result['imported_count'] == 20, result
+    order = session.query(Order).filter(Order.order_no == "BD000003").one()
+    assert (order.customer_name, order.quantity, order.delivery_date) == ("客户3", 4, datetime(2025, 7, 1))
+    assert order.remark == "备注3"
+
+    csv_content = ("订单号,客户名称,产品名称,数量,交货日期\n"
+                   "BD000003,客户3,产品X,4,2025-07-01\nCSV0001,客户C,产品Y,8,2025-08-01\n").encode("utf-8")
+    result = BD400OrderImporter(session).import_from_excel(csv_content, filename="orders.csv")
+    assert result['success'] and (result['imported_count'], result['skipped_count']) == (1, 1), result
+    assert session.query(Order).filter(Order.order_no == "CSV0001").one().quantity == 8
+    print("✅ XLSX、CSV 文件导入")
+    session.close()
+
+
+def main():
+    """主测试函数"""
+    print("开始流式读取测试...")
+    tests = [test_read_chunks, test_bounded_memory, test_bd400_from_file]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
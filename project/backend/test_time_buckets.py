@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间分桶聚合测试
+
+验证 app.utils.time_buckets：
+1. 数据库端的时间段起点（SQLite）与 Python 端 floor_bucket 一致，周以周一为起点
+2. bucket_series 只执行一条查询，返回覆盖整个区间的稠密序列，附加聚合量与逐段计数一致
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import Column, DateTime, Integer, case, create_engine, event, func, select
+from sqlalchemy.orm import Session, declarative_base
+
+from app.utils.time_buckets import TimeBucket, bucket_series, date_bucket, floor_bucket
+
+Base = declarative_base()
+
+
+class Record(Base):
+    __tablename__ = "bucket_records"
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime)
+    value = Column(Integer)
+
+
+def build_session():
+    """每7小时一条记录，共500条（约5个月）"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    session = Session(engine)
+    start = datetime(2025, 1, 1, 8, 30)
+    session.add_all(Record(created_at=start + timedelta(hours=7 * i), value=i) for i in range(500))
+    session.commit()
+    return session, statements
+
+
+def test_bucket_start_matches_python():
+    """测试SQL与Python的时间段起点一致"""
+    print("\n=== 测试时间段起点 ===")
+    session, _ = build_session()
+    for bucket in TimeBucket:
+        rows = session.execute(select(Record.created_at, date_bucket(Record.created_at, bucket))).all()
+        for created_at, bucket_start in rows:
+            assert floor_bucket(created_at, bucket) == datetime.fromisoformat(bucket_start), \
+                f"{bucket.value}: {created_at} -> {bucket_start}"
+    assert floor_bucket(datetime(2025, 1, 5, 23), TimeBucket.WEEK) == datetime(2024, 12, 30)
+    print("✅ 时间段起点一致")
+
+
+def test_dense_series():
+    """测试稠密序列与附加聚合量"""
+    print("\n=== 测试稠密序列 ===")
+    session, statements = build_session()
+    start, end = datetime(2024, 12, 25), datetime(2025, 6, 30)
+    for bucket in (TimeBucket.DAY, TimeBucket.WEEK, TimeBucket.MONTH):
+        statements.clear()
+        series = bucket_series(
+            session.query(Record), Record.created_at, bucket, start, end,
+            odd=func.count(case((Record.value % 2 == 1, 1)))
+        )
+        assert len(statements) == 1, f"{bucket.value} 应只执行一条查询，实际 {len(statements)} 条"
+        buckets = [point["bucket"] for point in series]
+        assert buckets[0] == floor_bucket(start, bucket) and buckets[-1] == floor_bucket(end, bucket)
+        assert buckets == sorted(set(buckets)), "时间段应连续且不重复"
+        assert sum(point["count"] for point in series) == 500
+        assert sum(point["odd"] for point in series) == 250
+        for point in series[:40]:
+            next_start = point["bucket"] + (timedelta(days=1) if bucket == TimeBucket.DAY else timedelta(weeks=1))
+            if bucket != TimeBucket.MONTH:
+                expected = session.query(Record).filter(
+                    Record.created_at >= point["bucket"], Record.created_at < next_start
+                ).count()
+                assert point["count"] == expected
+        print(f"✅ {bucket.value}: {len(series)} 个时间段，1 条查询")
+
+    assert bucket_series(session.query(Record).filter(Record.value < 0), Record.created_at) == []
+
+
+def main():
+    """主测试函数"""
+    print("开始时间分桶聚合测试...")
+    tests = [test_bucket_start_matches_python, test_dense_series]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+企业微信 API 客户端测试
+
+使用本地模拟的企业微信接口服务验证 app.services.wechat_client.WeChatClient：
+1. 并发请求复用连接，令牌只获取一次；令牌失效时只刷新一次并重发
+2. GET 在 5xx 时重试，POST 只在系统繁忙、限流或连接失败时重试
+3. 每次发送新建事件循环（队列服务、催办调度器的用法）或从多个线程发送时，仍复用同一组连接和令牌
+"""
+
+import sys
+import os
+import json
+import socket
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from app.services.wechat_client import WeChatClient
+
+
+class MockWeChat:
+    """模拟企业微信接口，记录令牌获取次数、连接与各接口调用次数"""
+
+    def __init__(self):
+        self.token_version = 0
+        self.revoked = set()
+        self.calls = Counter()
+        self.ports = set()
+        self.failures = {}  # 路径 -> [(状态码, 响应), ...]，按顺序返回，用完后正常响应
+        self.lock = threading.Lock()
+
+    def handle(self, method, path, query, port):
+        with self.lock:
+            self.calls[path] += 1
+            self.ports.add(port)
+            if self.failures.get(path):
+                return self.failures[path].pop(0)
+            if path == "/cgi-bin/gettoken":
+                self.token_version += 1
+                return 200, {"errcode": 0, "access_token": f"token-{self.token_version}", "expires_in": 7200}
+            token = query.get("access_token", [None])[0]
+            if token in self.revoked or token != f"token-{self.token_version}":
+                return 200, {"errcode": 42001, "errmsg": "access_token expired"}
+            return 200, {"errcode": 0, "errmsg": "ok", "path": path, "method": method}
+
+
+def start_server(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            url = urlparse(self.path)
+            status, body = mock.handle(self.command, url.path, parse_qs(url.query), self.client_address[1])
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = _respond
+        do_POST = _respond
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_client(port, **options):
+    return WeChatClient("corp", "secret", base_url=f"http://127.0.0.1:{port}/cgi-bin",
+                        backoff=0.01, max_connections=5, max_keepalive_connections=5, **options)
+
+
+def test_pooling_and_token():
+    """测试连接复用与令牌单飞刷新"""
+    print("\n=== 测试连接复用与令牌刷新 ===")
+    mock = MockWeChat()
+    server = start_server(mock)
+    client = make_client(server.server_address[1])
+
+    async def scenario():
+        results = await asyncio.gather(*(
+            client.post("/message/send", json={"touser": f"user{i}", "msgtype": "text"}) for i in range(50)
+        ))
+        assert all(result["errcode"] == 0 for result in results)
+        assert mock.calls["/cgi-bin/gettoken"] == 1, "并发请求只应获取一次令牌"
+        assert len(mock.ports) <= 5, f"50 个请求应复用连接，实际使用 {len(mock.ports)} 个连接"
+        print(f"✅ 50 个并发请求使用 {len(mock.ports)} 个连接，获取令牌 1 次")
+
+        for _ in range(20):
+            await client.get("/user/get", params={"userid": "zhangsan"})
+        assert len(mock.ports) <= 5
+
+        # 令牌被服务端提前作废
+        mock.revoked.add(client.access_token)
+        results = await asyncio.gather(*(client.get("/user/get", params={"userid": f"u{i}"}) for i in range(10)))
+        assert all(result["errcode"] == 0 for result in results), results
+        assert mock.calls["/cgi-bin/gettoken"] == 2 and client.access_token == "token-2"
+        print("✅ 令牌失效后 10 个并发请求只刷新一次令牌并重发成功")
+        await client.aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+
+def test_retries():
+    """测试重试策略"""
+    print("\n=== 测试重试 ===")
+    mock = MockWeChat()
+    server = start_server(mock)
+    client = make_client(server.server_address[1], max_retries=3)
+
+    async def scenario():
+        mock.failures["/cgi-bin/user/get"] = [(503, {}), (502, {}), (200, {"errcode": -1, "errmsg": "system busy"})]
+        result = await client.get("/user/get", params={"userid": "zhangsan"})
+        assert result["errcode"] == 0 and mock.calls["/cgi-bin/user/get"] == 4
+        print("✅ GET 在 5xx 和系统繁忙时重试后成功")
+
+        mock.failures["/cgi-bin/message/send"] = [(500, {})]
+        try:
+            await client.post("/message/send", json={"touser": "a"})
+        except httpx.HTTPStatusError:
+            pass
+        else:
+            raise AssertionError("POST 返回 500 时不应重试")
+        assert mock.calls["/cgi-bin/message/send"] == 1
+
+        mock.failures["/cgi-bin/message/send"] = [(429, {}), (200, {"errcode": -1, "errmsg": "system busy"})]
+        result = await client.post("/message/send", json={"touser": "a"})
+        assert result["errcode"] == 0 and mock.calls["/cgi-bin/message/send"] == 4
+        print("✅ POST 只在限流、系统繁忙时重试，500 不重试（避免重复发送）")
+
+        mock.failures["/cgi-bin/user/get"] = [(503, {})] * 10
+        try:
+            await client.get("/user/get", params={"userid": "lisi"})
+        except httpx.HTTPStatusError:
+            pass
+        else:
+            raise AssertionError("重试次数用完后应抛出异常")
+        await client.aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    client = make_client(closed_port, max_retries=2)
+    # 令牌已缓存，直接验证 POST 请求本身的重试
+    client.access_token, client.token_expires_at = "token-1", datetime.now() + timedelta(hours=1)
+
+    async def unreachable():
+        try:
+            await client.post("/message/send", json={"touser": "a"})
+        except httpx.ConnectError:
+            return True
+        return False
+
+    assert asyncio.run(unreachable()), "连接失败重试后应抛出 ConnectError"
+    print("✅ 连接失败时 POST 也会重试，重试用完后抛出异常")
+
+
+def test_reuse_across_event_loops():
+    """测试跨事件循环复用连接"""
+    print("\n=== 测试跨事件循环复用 ===")
+    mock = MockWeChat()
+    server = start_server(mock)
+    client = make_client(server.server_address[1])
+
+    def send_on_new_loop(user):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(client.post("/message/send", json={"touser": user}))
+        finally:
+            loop.close()
+
+    try:
+        results = [send_on_new_loop(f"user{i}") for i in range(10)]
+        assert all(result["errcode"] == 0 for result in results)
+        assert mock.calls["/cgi-bin/gettoken"] == 1, "各事件循环应共用同一个令牌"
+        assert len(mock.ports) == 1, f"依次新建的 10 个事件循环应复用同一连接，实际使用 {len(mock.ports)} 个连接"
+        print("✅ 10 个依次新建的事件循环复用 1 个连接，获取令牌 1 次")
+
+        threads = [threading.Thread(target=send_on_new_loop, args=(f"t{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert mock.calls["/cgi-bin/message/send"] == 18 and mock.calls["/cgi-bin/gettoken"] == 1
+        assert len(mock.ports) <= 5, f"多线程发送应受连接数上限约束，实际使用 {len(mock.ports)} 个连接"
+        print(f"✅ 8 个线程各自的事件循环并发发送，共使用 {len(mock.ports)} 个连接")
+
+        asyncio.run(client.aclose())
+        assert client._client is None, "关闭后不应保留连接"
+        assert send_on_new_loop("after-close")["errcode"] == 0, "关闭后再次发送应重新建立连接"
+        asyncio.run(client.aclose())
+    finally:
+        server.shutdown()
+
+
+def main():
+    """主测试函数"""
+    print("开始企业微信 API 客户端测试...")
+    tests = [test_pooling_and_token, test_retries, test_reuse_across_event_loops]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 失败: {e}")
+    print(f"\n总计: {passed}/{len(tests)} 个测试通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)